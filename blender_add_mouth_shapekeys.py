@@ -7,6 +7,9 @@ WAS DIESES SKRIPT MACHT:
   * mouthOpen: Kiefer öffnet sich (für Sprechen)
   * mouthO: Lippen formen "O" (rund)
   * lipsClosed: Lippen schließen sich
+- Mit FACE_KEY_SET = "full": zusätzlich alle Visemes (viseme_aa, viseme_PP, ...)
+  und Emotions-Keys (mouthSmile_L, browDown_R, ...) aus scripts/face_presets.json,
+  in einem Durchlauf, plus Zuordnungs-JSON für das Frontend neben der GLB
 
 WIE VERWENDEN:
 1. Blender öffnen
@@ -15,35 +18,68 @@ WIE VERWENDEN:
 4. File > Open: Dieses Skript (blender_add_mouth_shapekeys.py) öffnen
 5. "Run Script" klicken
 6. GLB exportieren (File > Export > glTF 2.0) mit "Shape Keys" aktiviert
+   (Der Ordner scripts/ muss neben diesem Skript liegen - dort liegen mouth_shapes.py und mouth_selection.py)
 
 LICHENZ / NUTZUNG:
 Dieses Skript ist Teil des KAYA-Projekts und darf frei verwendet werden.
-Für Anpassungen: Siehe Konfiguration unten.
+Für Anpassungen: Siehe scripts/mouth_shapes.py (Deltas, Region) und Konfiguration unten.
 """
 
+import hashlib
+import os
+import sys
+import time
+
 import bpy
 import bmesh
+import numpy as np
 from mathutils import Vector
 
-# ==================== KONFIGURATION (bei Bedarf anpassen) ====================
-# Öffnungs-Stärke für "mouthOpen" (in Blender-Einheiten)
-OPEN_DELTA_LOCAL = Vector((0.0, -0.02, -0.01))  # Y = nach unten, Z = nach hinten (ggf. anpassen)
-
-# Pucker-Stärke für "mouthO" (0.7 = stark pucker, 0.9 = sanft)
-PUCKER_SCALE = 0.85
+def _scripts_dir():
+    """scripts/ neben diesem Skript finden (auch beim Start aus Blenders Text-Editor)"""
+    bases = [os.path.dirname(os.path.abspath(__file__))]
+    bases += [os.path.dirname(bpy.path.abspath(t.filepath)) for t in bpy.data.texts if t.filepath]
+    for base in bases:
+        path = os.path.join(base, "scripts")
+        if os.path.isdir(path):
+            return path
+    return os.path.join(bases[0], "scripts")
 
-# Schließ-Stärke für "lipsClosed"
-CLOSE_DELTA_LOCAL = Vector((0.0, 0.00, 0.01))  # Z = nach vorne
+# Gemeinsame Helfer (ohne bpy) liegen in scripts/
+sys.path.insert(0, _scripts_dir())
+from mouth_selection import VertexSelector  # noqa: E402
+from asset_cache import AssetCache, SPARSE_SCRIPTS, build_key, hash_file, script_hashes  # noqa: E402
+import mouth_shapes  # noqa: E402
+from mouth_shapes import blender_from_gltf, gltf_from_blender  # noqa: E402
+from glb_sparse_morphs import sparsify_file  # noqa: E402
+from face_shapes import FaceShapeBuilder, load_presets, mapping_path, preset_keys, write_mapping  # noqa: E402
+from enhance_glb import image_content_hash  # noqa: E402
 
-# Mund-Region: Heuristik-Parameter (wenn keine Vertex-Gruppe "Mouth" gefunden wird)
-RADIUS_FACTOR = 0.12      # Mundradius relativ zur Mesh-Diagonale (0.08-0.16)
-DEPTH_OFFSET = 0.05       # Mund-Tiefe von vorderster Kante (0.03-0.08)
-HEIGHT_RATIO = 0.45       # Mund-Höhe relativ zur Kopfhöhe (0.40-0.55)
+# ==================== KONFIGURATION (bei Bedarf anpassen) ====================
+# Deltas, Pucker-Stärke, Region-Heuristik und Falloff stehen in scripts/mouth_shapes.py
+# (gemeinsam mit dem Blender-freien glb_add_mouth_morphs.py). Dort gelten glTF-Achsen
+# (Y = oben); hier in Blender-Achsen (Z = oben) umgerechnet.
+OPEN_DELTA_LOCAL = Vector(blender_from_gltf(mouth_shapes.OPEN_DELTA_LOCAL).tolist())
+CLOSE_DELTA_LOCAL = Vector(blender_from_gltf(mouth_shapes.CLOSE_DELTA_LOCAL).tolist())
+PUCKER_SCALE = mouth_shapes.PUCKER_SCALE
+FALLOFF = mouth_shapes.FALLOFF
 
 # Auto-Export (optional): Wenn leer, musst du manuell exportieren
 # TIPP: Aktiviere Auto-Export für automatischen Export mit Shape Keys!
 AUTO_EXPORT_PATH = r"D:\Landkreis\frontend\public\avatar\Kayanew_mouth.glb"  # Automatischer Export aktiviert
 # AUTO_EXPORT_PATH = ""  # Deaktivieren: Leer lassen und manuell in Blender exportieren
+
+# Build-Cache: unveränderte Szene -> fertige GLB aus dem Cache kopieren statt neu exportieren
+EXPORT_CACHE = True
+FORCE_EXPORT = False  # True = Cache ignorieren und immer exportieren
+
+# Shape-Key-Satz: "mouth" = nur mouthOpen/mouthO/lipsClosed, "full" = alle Keys aus scripts/face_presets.json
+FACE_KEY_SET = "full"
+WRITE_MAPPING = True  # Viseme-/Emotions-Zuordnung als <export>.morphs.json neben die GLB schreiben
+
+# Morph Targets nach dem Export als Sparse-Accessoren speichern (nur bewegte Vertices)
+SPARSE_MORPHS = True
+SPARSE_EPSILON = 1e-6  # Deltas darunter werden verworfen
 # ==============================================================================
 
 def list_scene_info():
@@ -77,28 +113,21 @@ def pick_head_mesh():
     print(f"\n✅ Gewähltes Head-Mesh: '{head.name}' ({len(head.data.vertices)} Vertices)")
     return head
 
-def local_bbox(obj):
-    """Berechnet lokale Bounding Box"""
-    local_corners = [Vector(corner) for corner in obj.bound_box]
-    xs = [c.x for c in local_corners]
-    ys = [c.y for c in local_corners]
-    zs = [c.z for c in local_corners]
-    return (min(xs), max(xs)), (min(ys), max(ys)), (min(zs), max(zs))
-
 def compute_mouth_region(obj):
-    """Schätzt Mund-Region heuristisch aus BBox (wenn keine Vertex-Gruppe vorhanden)"""
-    (xmin, xmax), (ymin, ymax), (zmin, zmax) = local_bbox(obj)
+    """Schätzt Mund-Region heuristisch aus BBox (wenn keine Vertex-Gruppe vorhanden)
+
+    Die Heuristik rechnet in glTF-Achsen wie glb_add_mouth_morphs.py (sonst
+    wäre "oben" Y statt Z und derselbe Avatar bekäme eine andere Region);
+    das Zentrum kommt in Blender-Achsen zurück.
+    """
+    corners = gltf_from_blender([tuple(c) for c in obj.bound_box])
+    (xmin, ymin, zmin), (xmax, ymax, zmax) = corners.min(axis=0), corners.max(axis=0)
     
     # Mund-Mitte: zentral in X, ca. 45% der Höhe von unten, etwas zurückgesetzt von vorderster Kante
-    cx = 0.5 * (xmin + xmax)
-    cy = ymin + HEIGHT_RATIO * (ymax - ymin)
-    cz = zmax - DEPTH_OFFSET * (zmax - zmin)
-    
-    center_local = Vector((cx, cy, cz))
-    diag = Vector((xmax - xmin, ymax - ymin, zmax - zmin)).length
-    radius = max(1e-6, RADIUS_FACTOR * diag)
+    center, radius = mouth_shapes.mouth_region_from_bbox((xmin, ymin, zmin), (xmax, ymax, zmax))
+    center_local = Vector(blender_from_gltf(center).tolist())
     
-    print(f"\n📐 Bounding Box:")
+    print(f"\n📐 Bounding Box (glTF-Achsen, Y = oben):")
     print(f"   X: [{xmin:.3f}, {xmax:.3f}]")
     print(f"   Y: [{ymin:.3f}, {ymax:.3f}]")
     print(f"   Z: [{zmin:.3f}, {zmax:.3f}]")
@@ -146,7 +175,7 @@ def collect_mouth_vertices(obj, center_local, radius):
     return ids
 
 def edit_shape_key(obj, key_name, edit_fn, vertex_mask):
-    """Editiert Shape Key für alle Vertices in mask"""
+    """Editiert Shape Key für alle Vertices in mask (Python-Schleife, Referenz für Benchmark)"""
     # Nur den zu editierenden Key aktivieren
     for kb in obj.data.shape_keys.key_blocks:
         kb.value = 0.0
@@ -165,31 +194,213 @@ def edit_shape_key(obj, key_name, edit_fn, vertex_mask):
     print(f"   ✏️ '{key_name}': {count} Vertices bearbeitet")
     return count
 
-def main():
-    """Hauptfunktion"""
-    # FORCE OUTPUT - Manche Blender-Versionen zeigen Output nur wenn explizit geflusht
-    import sys
-    sys.stdout.flush()
-    
-    print("\n" + "="*60)
-    print("🎭 KAYA Avatar: Shape Keys für Lippenbewegung")
-    print("="*60)
-    sys.stdout.flush()
+# ==================== BULK-PFAD (NumPy, foreach_get/foreach_set) ====================
+# Bei High-Poly-Köpfen (100k+ Vertices) ist jeder Python-Zugriff auf v.co / key.data[i]
+# teuer. Der Bulk-Pfad liest alle Koordinaten einmal als Array, rechnet vektorisiert
+# und schreibt jeden Key mit einem einzigen foreach_set zurück.
+
+def _in_gltf_axes(fn):
+    """Bulk-Funktion aus mouth_shapes.py (glTF-Achsen) für Blender-Koordinaten"""
+    def wrapped(co, center):
+        return blender_from_gltf(fn(gltf_from_blender(co), gltf_from_blender(center)))
+    wrapped.__name__ = fn.__name__
+    wrapped.__doc__ = fn.__doc__
+    return wrapped
+
+open_fn_bulk = _in_gltf_axes(mouth_shapes.open_fn_bulk)
+close_fn_bulk = _in_gltf_axes(mouth_shapes.close_fn_bulk)
+pucker_fn_bulk = _in_gltf_axes(mouth_shapes.pucker_fn_bulk)
+
+def read_coords(collection):
+    """Liest 'co' einer Vertex- oder Shape-Key-Collection als (N, 3) float32-Array"""
+    flat = np.empty(len(collection) * 3, dtype=np.float32)
+    collection.foreach_get("co", flat)
+    return flat.reshape(-1, 3)
+
+def write_coords(collection, coords):
+    """Schreibt (N, 3)-Array mit einem einzigen foreach_set zurück"""
+    collection.foreach_set("co", np.ascontiguousarray(coords, dtype=np.float32).ravel())
+
+def read_group_weights(obj, group_name):
+    """Liest Gewichte einer Vertex-Gruppe als (N,) float32-Array (0.0 = nicht enthalten)
+
+    Vertex-Gruppen haben keine foreach_get-Schnittstelle; wir laufen daher genau
+    einmal über die Vertices und greifen nur auf deren Gruppen-Einträge zu.
+    """
+    vg = obj.vertex_groups.get(group_name)
+    if vg is None:
+        return None
+    gi = vg.index
+    weights = np.zeros(len(obj.data.vertices), dtype=np.float32)
+    for v in obj.data.vertices:
+        for g in v.groups:
+            if g.group == gi:
+                weights[v.index] = g.weight
+                break
+    return weights
+
+def build_selector(obj, coords=None):
+    """Baut den räumlichen Index einmal pro Mesh (für beliebig viele Abfragen)"""
+    if coords is None:
+        coords = read_coords(obj.data.vertices)
+    return VertexSelector(coords)
+
+def collect_mouth_vertices_bulk(obj, center_local, radius, selector=None, falloff=FALLOFF):
+    """Wie collect_mouth_vertices(), liefert aber (Index-Array, Gewichte 0..1)
+
+    Mit Vertex-Gruppe 'Mouth' sind die Gewichte die Gruppen-Gewichte, sonst
+    fällt das Gewicht vom Zentrum zum Rand des Radius nach FALLOFF ab.
+    """
+    weights = read_group_weights(obj, "Mouth")
+    if weights is not None:
+        print("\n✅ Vertex-Gruppe 'Mouth' gefunden - verwende diese!")
+        ids = np.flatnonzero(weights > 0.0)
+        return ids, weights[ids]
     
-    # Scene-Info
-    list_scene_info()
+    print("\n⚠️ Keine Vertex-Gruppe 'Mouth' - verwende heuristische Region")
+    if selector is None:
+        selector = build_selector(obj)
+    sel = selector.radius(np.asarray(center_local, dtype=np.float32), radius, falloff=falloff)
+    return sel.ids, sel.weights
+
+def edit_shape_key_bulk(obj, key_name, edit_fn, vertex_ids, center_local, weights=None):
+    """Editiert Shape Key vektorisiert: ein foreach_get, eine Array-Operation, ein foreach_set
+
+    Gerechnet wird nur auf den Vertices der Region; mit weights wird die
+    Verschiebung pro Vertex skaliert (weicher Übergang zum Rest des Gesichts).
+    """
+    for kb in obj.data.shape_keys.key_blocks:
+        kb.value = 0.0
     
-    # Mesh finden
-    obj = pick_head_mesh()
-    bpy.context.view_layer.objects.active = obj
-    obj.select_set(True)
+    key = obj.data.shape_keys.key_blocks[key_name]
+    key.value = 1.0
     
-    # Prüfe ob Shape Keys bereits existieren
-    existing_keys = {}
-    if obj.data.shape_keys:
-        existing_keys = {kb.name: kb for kb in obj.data.shape_keys.key_blocks}
-        print(f"\n📋 Gefundene Shape Keys im Mesh '{obj.name}': {len(existing_keys)}")
+    coords = read_coords(key.data)
+    ids = np.asarray(vertex_ids, dtype=np.int64)
+    valid = ids < len(coords)
+    ids = ids[valid]
+    co = coords[ids]
+    moved = edit_fn(co, center_local)
+    if weights is not None:
+        w = np.asarray(weights, dtype=np.float32)[valid]
+        moved = co + (moved - co) * w[:, None]
+    coords[ids] = moved
+    write_coords(key.data, coords)
     
+    print(f"   ✏️ '{key_name}': {len(ids)} Vertices bearbeitet (bulk)")
+    return len(ids)
+
+def _socket_value(socket):
+    """default_value eines Node-Sockets als stabiler Text (Zahl, Vektor, Farbe, Text)"""
+    value = getattr(socket, "default_value", None)
+    if value is None:
+        return ""
+    try:
+        return repr(tuple(round(v, 6) for v in value))
+    except TypeError:
+        return repr(round(value, 6) if isinstance(value, float) else value)
+
+def _hash_node_tree(h, tree):
+    """Nodes (Typ, Bild, Eingangswerte) und Verbindungen eines Material-Node-Trees"""
+    for node in sorted(tree.nodes, key=lambda n: n.name):
+        image = getattr(node, "image", None)
+        h.update(f"{node.name}|{node.bl_idname}|{image.name if image else ''}".encode("utf-8"))
+        for attr in ("interpolation", "extension", "projection", "blend_type", "operation", "data_type"):
+            if hasattr(node, attr):
+                h.update(f"{attr}={getattr(node, attr)}".encode("utf-8"))
+        for sock in node.inputs:
+            h.update(f"{sock.identifier}={_socket_value(sock)}".encode("utf-8"))
+        if getattr(node, "node_tree", None):
+            _hash_node_tree(h, node.node_tree)
+    links = sorted(f"{l.from_node.name}.{l.from_socket.identifier}>{l.to_node.name}.{l.to_socket.identifier}"
+                   for l in tree.links)
+    h.update("|".join(links).encode("utf-8"))
+
+def _hash_vertex_weights(h, me):
+    """Vertex-Gruppen-Gewichte (variable Länge pro Vertex - kein foreach_get möglich)"""
+    counts = np.empty(len(me.vertices), dtype=np.int32)
+    rows = []
+    for i, v in enumerate(me.vertices):
+        counts[i] = len(v.groups)
+        rows.extend((g.group, g.weight) for g in v.groups)
+    h.update(counts.tobytes())
+    h.update(np.array(rows, dtype=np.float32).tobytes())
+
+def _hash_armature(h, o):
+    """Ruhe-Matrizen der Bones und aktuelle Pose"""
+    for bone in o.data.bones:
+        h.update(bone.name.encode("utf-8") + np.array(bone.matrix_local, dtype=np.float32).tobytes())
+    if o.pose:
+        for pbone in o.pose.bones:
+            h.update(pbone.name.encode("utf-8") + np.array(pbone.matrix_basis, dtype=np.float32).tobytes())
+
+def scene_fingerprint():
+    """SHA-256 über alles Export-relevante der Szene
+
+    Geometrie, UVs, Shape Keys (inkl. Werte), Vertex-Gruppen-Gewichte,
+    Modifier, Armature-Ruhelage und Pose, Material-Einstellungen und
+    Node-Trees (Eingangswerte, Verbindungen) sowie Bildinhalte. Mesh-Daten
+    werden per foreach_get gelesen; Bilder über gepackte Daten bzw. Datei-Hash,
+    nur generierte Bilder über ihre Pixel.
+    """
+    h = hashlib.sha256()
+    for o in sorted(bpy.data.objects, key=lambda o: o.name):
+        h.update(f"{o.name}|{o.type}|{o.parent.name if o.parent else ''}|{o.parent_bone}".encode("utf-8"))
+        h.update(np.array(o.matrix_world, dtype=np.float32).tobytes())
+        for mod in o.modifiers:
+            target = getattr(mod, "object", None)
+            h.update(f"{mod.name}|{mod.type}|{mod.show_render}|{target.name if target else ''}".encode("utf-8"))
+        if o.type == 'ARMATURE':
+            _hash_armature(h, o)
+        if o.type != 'MESH':
+            continue
+        me = o.data
+        h.update(read_coords(me.vertices).tobytes())
+        loops = np.empty(len(me.loops), dtype=np.int32)
+        me.loops.foreach_get("vertex_index", loops)
+        h.update(loops.tobytes())
+        for uv in me.uv_layers:
+            uvs = np.empty(len(me.loops) * 2, dtype=np.float32)
+            uv.data.foreach_get("uv", uvs)
+            h.update(uv.name.encode("utf-8") + uvs.tobytes())
+        h.update("|".join(vg.name for vg in o.vertex_groups).encode("utf-8"))
+        if o.vertex_groups:
+            _hash_vertex_weights(h, me)
+        h.update("|".join(m.name for m in me.materials if m).encode("utf-8"))
+        if me.shape_keys:
+            for kb in me.shape_keys.key_blocks:
+                h.update(f"{kb.name}|{kb.value:.6f}|{kb.mute}".encode("utf-8") + read_coords(kb.data).tobytes())
+    for mat in sorted(bpy.data.materials, key=lambda m: m.name):
+        h.update(f"{mat.name}|{mat.blend_method}|{mat.use_backface_culling}|{tuple(mat.diffuse_color)}"
+                 f"|{mat.use_nodes}".encode("utf-8"))
+        if mat.use_nodes and mat.node_tree:
+            _hash_node_tree(h, mat.node_tree)
+    for img in sorted(bpy.data.images, key=lambda i: i.name):
+        if img.type in ('RENDER_RESULT', 'COMPOSITING'):
+            continue
+        h.update(f"{img.name}|{tuple(img.size)}".encode("utf-8"))
+        h.update(image_content_hash(img).encode("utf-8"))
+    return h.hexdigest()
+
+def export_cache_key():
+    """Cache-Key für den Auto-Export: Szene, Blender-Version (glTF-Exporter), dieses Skript
+    und - mit SPARSE_MORPHS - der Code der Sparse-Nachbearbeitung"""
+    return build_key({
+        "tool": "mouth_shapekeys_export",
+        "blender": ".".join(str(v) for v in bpy.app.version),
+        "scene": scene_fingerprint(),
+        "script": hash_file(os.path.abspath(__file__)) if os.path.exists(os.path.abspath(__file__)) else None,
+        "sparse_epsilon": SPARSE_EPSILON if SPARSE_MORPHS else None,
+        "sparse_script": script_hashes(SPARSE_SCRIPTS) if SPARSE_MORPHS else None,
+    })
+
+def create_mouth_keys(obj, existing_keys):
+    """Legt fehlende Mund-Keys an und formt sie (Bulk-Pfad)
+
+    Liefert die neu erstellten Key-Namen (leer = alle schon vorhanden) oder
+    None, wenn keine Mund-Vertices gefunden wurden. Wird auch vom
+    Blender-Worker (scripts/blender_worker.py) aufgerufen.
+    """
     # Basis-Key sicherstellen
     ensure_basis(obj)
     
@@ -210,44 +421,105 @@ def main():
         print(f"   → lipsClosed: {'✅' if 'lipsClosed' in existing_keys else '❌'}")
     
     # Mund-Region bestimmen (nur falls Keys erstellt werden mussten)
-    keys_to_create = [key for key in ["mouthOpen", "mouthO", "lipsClosed"] 
-                      if obj.data.shape_keys and key not in obj.data.shape_keys.key_blocks]
-    
     if keys_to_create:
         print("\n🔧 Bearbeite neue Shape Keys...")
         center_local, radius = compute_mouth_region(obj)
-        mouth_ids = collect_mouth_vertices(obj, center_local, radius)
+        selector = build_selector(obj)
+        mouth_ids, mouth_weights = collect_mouth_vertices_bulk(obj, center_local, radius, selector)
         
         if len(mouth_ids) == 0:
             print("\n❌ FEHLER: Keine Mund-Vertices gefunden!")
-            print("   Tipp: Passe HEIGHT_RATIO oder RADIUS_FACTOR in der Konfiguration an")
-            return
-        
-        print(f"\n✅ Mund-Vertices gefunden: {len(mouth_ids)}")
-        
-        # Edit-Funktionen definieren
-        def open_fn(co, vid):
-            """Öffnet Mund: Bewegung nach unten/hinten"""
-            return co + OPEN_DELTA_LOCAL
-        
-        def close_fn(co, vid):
-            """Schließt Lippen: Bewegung nach vorne"""
-            return co + CLOSE_DELTA_LOCAL
+            print("   Tipp: Passe HEIGHT_RATIO oder RADIUS_FACTOR in scripts/mouth_shapes.py an")
+            return None
         
-        def pucker_fn(co, vid):
-            """Puckert Lippen: Bewegung Richtung Center"""
-            direction = center_local - co
-            return co + direction * (1.0 - PUCKER_SCALE)
+        print(f"\n✅ Mund-Vertices gefunden: {len(mouth_ids)} (Falloff: {FALLOFF})")
         
         # Nur neue Keys bearbeiten
         if "mouthOpen" in keys_to_create:
-            edit_shape_key(obj, "mouthOpen", open_fn, mouth_ids)
+            edit_shape_key_bulk(obj, "mouthOpen", open_fn_bulk, mouth_ids, center_local, mouth_weights)
         if "lipsClosed" in keys_to_create:
-            edit_shape_key(obj, "lipsClosed", close_fn, mouth_ids)
+            edit_shape_key_bulk(obj, "lipsClosed", close_fn_bulk, mouth_ids, center_local, mouth_weights)
         if "mouthO" in keys_to_create:
-            edit_shape_key(obj, "mouthO", pucker_fn, mouth_ids)
+            edit_shape_key_bulk(obj, "mouthO", pucker_fn_bulk, mouth_ids, center_local, mouth_weights)
     else:
         print("\n✅ Shape Keys bereits vorhanden - überspringe Bearbeitung")
+    return keys_to_create
+
+def create_face_keys(obj, names=None, overwrite=False):
+    """Legt alle Preset-Keys (face_presets.json) in einem Durchlauf an
+
+    Basis einmal lesen, Regionen einmal auswählen, alle Deltas vorberechnen;
+    die Presets gelten in glTF-Achsen, daher wird die Basis dafür umgerechnet
+    und die Deltas zurück in Blender-Achsen;
+    danach pro Key nur ein foreach_set. Ein Puffer wird wiederverwendet und
+    nach jedem Key nur an den Region-Vertices zurückgesetzt.
+    Liefert die neu erstellten (bzw. mit overwrite neu berechneten) Key-Namen.
+    """
+    presets = load_presets()
+    names = names or preset_keys(presets)
+    ensure_basis(obj)
+    key_blocks = obj.data.shape_keys.key_blocks
+    todo = [n for n in names if overwrite or n not in key_blocks]
+    if not todo:
+        print("\n✅ Alle Preset-Keys bereits vorhanden - überspringe Bearbeitung")
+        return []
+    
+    t0 = time.perf_counter()
+    base = read_coords(key_blocks["Basis"].data)
+    groups = {spec["group"]: read_group_weights(obj, spec["group"])
+              for spec in presets["regions"].values() if spec.get("group")}
+    builder = FaceShapeBuilder(gltf_from_blender(base), presets,
+                               {g: w for g, w in groups.items() if w is not None})
+    deltas = {name: (ids, blender_from_gltf(delta)) for name, (ids, delta) in builder.deltas(todo).items()}
+    t_compute = time.perf_counter() - t0
+    
+    t0 = time.perf_counter()
+    buf = base.copy()
+    for name in todo:
+        key = key_blocks[name] if name in key_blocks else obj.shape_key_add(name=name, from_mix=False)
+        ids, delta = deltas[name]
+        buf[ids] += delta
+        write_coords(key.data, buf)
+        buf[ids] = base[ids]
+        key.value = 0.0
+    t_write = time.perf_counter() - t0
+    
+    regions = ", ".join(f"{n}: {count}" for n, count in builder.region_sizes().items())
+    print(f"\n✏️  {len(todo)} Preset-Keys erstellt (Regionen {regions})")
+    print(f"   Berechnung {t_compute * 1000:.0f} ms, Schreiben {t_write * 1000:.0f} ms "
+          f"({t_write * 1000 / len(todo):.1f} ms/Key)")
+    return todo
+
+def main():
+    """Hauptfunktion"""
+    # FORCE OUTPUT - Manche Blender-Versionen zeigen Output nur wenn explizit geflusht
+    sys.stdout.flush()
+    
+    print("\n" + "="*60)
+    print("🎭 KAYA Avatar: Shape Keys für Lippenbewegung")
+    print("="*60)
+    sys.stdout.flush()
+    
+    # Scene-Info
+    list_scene_info()
+    
+    # Mesh finden
+    obj = pick_head_mesh()
+    bpy.context.view_layer.objects.active = obj
+    obj.select_set(True)
+    
+    # Prüfe ob Shape Keys bereits existieren
+    existing_keys = {}
+    if obj.data.shape_keys:
+        existing_keys = {kb.name: kb for kb in obj.data.shape_keys.key_blocks}
+        print(f"\n📋 Gefundene Shape Keys im Mesh '{obj.name}': {len(existing_keys)}")
+    
+    if FACE_KEY_SET == "full":
+        keys_to_create = create_face_keys(obj)
+    else:
+        keys_to_create = create_mouth_keys(obj, existing_keys)
+    if keys_to_create is None:
+        return
     
     # Alle Keys auf 0 zurücksetzen (außer Basis)
     for kb in obj.data.shape_keys.key_blocks:
@@ -290,7 +562,6 @@ def main():
         print(f"\n🚀 Auto-Export zu: {AUTO_EXPORT_PATH}")
         
         # Prüfe ob Verzeichnis existiert
-        import os
         export_dir = os.path.dirname(AUTO_EXPORT_PATH)
         if not os.path.exists(export_dir):
             print(f"❌ FEHLER: Verzeichnis existiert nicht: {export_dir}")
@@ -300,6 +571,23 @@ def main():
         
         print(f"✅ Verzeichnis existiert: {export_dir}")
         
+        if WRITE_MAPPING and FACE_KEY_SET == "full":
+            # Reihenfolge wie im glTF-Export: alle Keys außer Basis
+            morph_names = [kb.name for kb in obj.data.shape_keys.key_blocks if kb.name != "Basis"]
+            write_mapping(mapping_path(AUTO_EXPORT_PATH), load_presets(), morph_names, obj.name)
+            print(f"🗺️  Viseme-/Emotions-Zuordnung: {mapping_path(AUTO_EXPORT_PATH)}")
+        
+        # Build-Cache: gleiche Szene schon einmal exportiert?
+        cache = AssetCache() if EXPORT_CACHE else None
+        cache_key = export_cache_key() if cache else None
+        if cache and not FORCE_EXPORT and cache.get(cache_key, AUTO_EXPORT_PATH) is not None:
+            file_size = os.path.getsize(AUTO_EXPORT_PATH) / (1024*1024)  # MB
+            print(f"♻️  Szene unverändert - Export aus Cache kopiert ({cache_key[:12]})")
+            print(f"   Datei: {AUTO_EXPORT_PATH}")
+            print(f"   Größe: {file_size:.2f} MB")
+            print(f"   (FORCE_EXPORT = True erzwingt einen neuen Export)")
+            return
+        
         # Prüfe ob Datei bereits existiert
         if os.path.exists(AUTO_EXPORT_PATH):
             file_size = os.path.getsize(AUTO_EXPORT_PATH) / (1024*1024)  # MB
@@ -324,6 +612,13 @@ def main():
                 print(f"✅ Export erfolgreich!")
                 print(f"   Datei: {AUTO_EXPORT_PATH}")
                 print(f"   Größe: {file_size:.2f} MB")
+                if SPARSE_MORPHS:
+                    report = sparsify_file(AUTO_EXPORT_PATH, AUTO_EXPORT_PATH, SPARSE_EPSILON)
+                    saved = (report["before_bytes"] - report["after_bytes"]) / (1024*1024)
+                    print(f"🧮 Sparse Morph Targets: -{saved:.2f} MB -> "
+                          f"{report['file_bytes_after'] / (1024*1024):.2f} MB")
+                if cache:
+                    cache.put(cache_key, AUTO_EXPORT_PATH, {"source": "blender_add_mouth_shapekeys"})
                 
                 # Liste alle Shape Keys in der exportierten Datei (Prüfung)
                 print(f"\n🔍 Exportierte Shape Keys:")
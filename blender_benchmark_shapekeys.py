@@ -0,0 +1,138 @@
+"""
+Blender Benchmark: Shape-Key-Erstellung Python-Schleife vs. NumPy-Bulk-Pfad
+
+WAS DIESES SKRIPT MACHT:
+- Erzeugt ein synthetisches High-Poly-Mesh (UV-Kugel, Standard ca. 130k Vertices)
+- Erstellt mouthOpen / lipsClosed / mouthO einmal mit der alten Schleife
+  (edit_shape_key + collect_mouth_vertices) und einmal mit dem Bulk-Pfad
+  (edit_shape_key_bulk + collect_mouth_vertices_bulk)
+- Vergleicht Laufzeiten und prüft, dass beide Pfade identische Koordinaten liefern
+
+WIE VERWENDEN:
+  blender --background --factory-startup --python blender_benchmark_shapekeys.py -- [--segments 512] [--rings 256]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import blender_add_mouth_shapekeys as msk  # noqa: E402
+
+
+def parse_args():
+    """Parse command line arguments"""
+    argv = sys.argv
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    p = argparse.ArgumentParser(description="Benchmark shape key authoring paths")
+    p.add_argument("--segments", type=int, default=512, help="UV-Kugel Segmente")
+    p.add_argument("--rings", type=int, default=256, help="UV-Kugel Ringe")
+    return p.parse_args(argv)
+
+
+def make_mesh(name, segments, rings):
+    """Erzeugt ein synthetisches High-Poly-Mesh mit Basis-Key"""
+    bpy.ops.mesh.primitive_uv_sphere_add(segments=segments, ring_count=rings, radius=0.12)
+    obj = bpy.context.active_object
+    obj.name = name
+    msk.ensure_basis(obj)
+    for key_name in ("mouthOpen", "lipsClosed", "mouthO"):
+        msk.add_key(obj, key_name)
+    return obj
+
+
+def run_loop(obj):
+    """Alter Pfad: Vertex-Schleife mit mathutils.Vector pro Vertex"""
+    center_local, radius = msk.compute_mouth_region(obj)
+    t0 = time.perf_counter()
+    mouth_ids = msk.collect_mouth_vertices(obj, center_local, radius)
+    t_collect = time.perf_counter() - t0
+
+    def open_fn(co, vid):
+        return co + msk.OPEN_DELTA_LOCAL
+
+    def close_fn(co, vid):
+        return co + msk.CLOSE_DELTA_LOCAL
+
+    def pucker_fn(co, vid):
+        return co + (center_local - co) * (1.0 - msk.PUCKER_SCALE)
+
+    t0 = time.perf_counter()
+    msk.edit_shape_key(obj, "mouthOpen", open_fn, mouth_ids)
+    msk.edit_shape_key(obj, "lipsClosed", close_fn, mouth_ids)
+    msk.edit_shape_key(obj, "mouthO", pucker_fn, mouth_ids)
+    return t_collect, time.perf_counter() - t0, len(mouth_ids)
+
+
+def run_bulk(obj):
+    """Neuer Pfad: foreach_get -> NumPy -> foreach_set"""
+    center_local, radius = msk.compute_mouth_region(obj)
+    t0 = time.perf_counter()
+    selector = msk.build_selector(obj)
+    # Harte Kante, damit das Ergebnis mit der alten Schleife vergleichbar bleibt
+    mouth_ids, _ = msk.collect_mouth_vertices_bulk(obj, center_local, radius, selector, falloff="constant")
+    t_collect = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    msk.edit_shape_key_bulk(obj, "mouthOpen", msk.open_fn_bulk, mouth_ids, center_local)
+    msk.edit_shape_key_bulk(obj, "lipsClosed", msk.close_fn_bulk, mouth_ids, center_local)
+    msk.edit_shape_key_bulk(obj, "mouthO", msk.pucker_fn_bulk, mouth_ids, center_local)
+    return t_collect, time.perf_counter() - t0, len(mouth_ids)
+
+
+def max_key_difference(a, b):
+    """Größte absolute Koordinaten-Abweichung über alle Mund-Keys"""
+    diff = 0.0
+    for key_name in ("mouthOpen", "lipsClosed", "mouthO"):
+        ca = msk.read_coords(a.data.shape_keys.key_blocks[key_name].data)
+        cb = msk.read_coords(b.data.shape_keys.key_blocks[key_name].data)
+        diff = max(diff, float(np.abs(ca - cb).max()))
+    return diff
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+
+    print("\n" + "="*60)
+    print("⏱️  Shape-Key Benchmark: Schleife vs. Bulk")
+    print("="*60)
+
+    loop_obj = make_mesh("Head_loop", args.segments, args.rings)
+    bulk_obj = make_mesh("Head_bulk", args.segments, args.rings)
+    print(f"Vertices: {len(loop_obj.data.vertices)}")
+    sys.stdout.flush()
+
+    loop_collect, loop_edit, loop_count = run_loop(loop_obj)
+    bulk_collect, bulk_edit, bulk_count = run_bulk(bulk_obj)
+
+    if loop_count != bulk_count:
+        print(f"❌ Unterschiedliche Auswahl: Schleife {loop_count}, Bulk {bulk_count}")
+        sys.exit(1)
+
+    diff = max_key_difference(loop_obj, bulk_obj)
+
+    print("\n" + "-"*60)
+    print(f"{'Pfad':<10}{'Auswahl (s)':>14}{'3 Keys (s)':>14}{'Gesamt (s)':>14}")
+    print(f"{'Schleife':<10}{loop_collect:>14.3f}{loop_edit:>14.3f}{loop_collect + loop_edit:>14.3f}")
+    print(f"{'Bulk':<10}{bulk_collect:>14.3f}{bulk_edit:>14.3f}{bulk_collect + bulk_edit:>14.3f}")
+    speedup = (loop_collect + loop_edit) / max(1e-9, bulk_collect + bulk_edit)
+    print("-"*60)
+    print(f"Mund-Vertices: {bulk_count}")
+    print(f"Speedup: {speedup:.1f}x")
+    print(f"Max. Abweichung: {diff:.2e}")
+
+    if diff > 1e-5:
+        print("❌ Bulk-Pfad weicht von der Schleife ab!")
+        sys.exit(1)
+    print("✅ Beide Pfade liefern identische Shape Keys")
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
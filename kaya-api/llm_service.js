@@ -13,7 +13,7 @@ const costTracker = require('./services/cost_tracker');
 class LLMService {
     constructor() {
         this.openaiApiKey = process.env.OPENAI_API_KEY;
-        this.openaiApiUrl = 'https://api.openai.com/v1/chat/completions';
+        this.openaiApiUrl = process.env.OPENAI_API_URL || 'https://api.openai.com/v1/chat/completions';
         this.model = 'gpt-4o-mini'; // Kostenoptimiertes Modell
         this.maxTokens = 70; // Für kurze, menschliche Antworten (30-50 Wörter)
         this.temperature = 0.85; // Etwas kreativer für mehr Persönlichkeit
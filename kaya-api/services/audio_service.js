@@ -28,8 +28,8 @@ class AudioService extends EventEmitter {
         
         // Configuration
         this.config = {
-            elevenlabsApiUrl: 'https://api.elevenlabs.io/v1',
-            openaiApiUrl: 'https://api.openai.com/v1/audio/transcriptions',
+            elevenlabsApiUrl: process.env.ELEVENLABS_API_URL || 'https://api.elevenlabs.io/v1',
+            openaiApiUrl: process.env.OPENAI_STT_URL || 'https://api.openai.com/v1/audio/transcriptions',
             defaultVoice: 'Dana', // Persönliche Stimme für KAYA (wird von ENV überschrieben)
             fallbackVoice: 'Bella', // Warm, empathisch
             modelId: process.env.ELEVENLABS_MODEL_ID || 'eleven_multilingual_v2',
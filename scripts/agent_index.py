@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+BM25-Index über die Agent-Wissensbasis (kaya-api/data/agents/*.json)
+
+Build-Schritt statt JSON-Parsen in jedem Prozess: die Agent-Dateien werden
+einmal in eine kompakte Binärdatei übersetzt, die per mmap geöffnet wird
+(nur Header + Meta werden gelesen; Terme, Postings und Dokumente erst bei
+Bedarf, direkt aus den Seiten des OS-Caches).
+
+  python scripts/agent_index.py build
+  python scripts/agent_index.py query "Bauantrag Formulare" -k 5 --agent buergerdienste
+  python scripts/agent_index.py bench
+
+Dateiaufbau (little-endian, Abschnitte 8-Byte-ausgerichtet):
+  Header     MAGIC, Version, Anzahl Dokumente/Terme, avgdl, Abschnitts-Tabelle
+  meta       JSON: Agenten, Quelldateien, BM25-Parameter
+  terms      sortierte Einträge (str_off, str_len, df, post_off, post_len) -> Binärsuche
+  strings    Term-Bytes (UTF-8)
+  postings   pro Term: Skip-Tabelle (letzte DocID, max. tf, Blockende) je Block,
+             dann Blöcke à BLOCK_SIZE Postings als VByte (DocID-Deltas, dann tfs);
+             die Suche nutzt sie für MaxScore-Schranken und zum Überspringen von Blöcken
+  docs       pro Dokument (Länge, Agent, stored_off, stored_len)
+  stored     kompaktes JSON pro Dokument (title, url, plain_text, links, contacts, ...)
+
+Auswahl der Dateien wie kaya_agent_manager_v2.js: alle *.json außer
+all_agents_data_*, pro Agent die neueste Datei.
+"""
+
+import argparse
+import bisect
+import glob
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import time
+
+from german_text import split_compound, tokenize
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA_DIR = os.path.join(REPO_ROOT, "kaya-api", "data", "agents")
+DEFAULT_INDEX = os.path.join(REPO_ROOT, "kaya-api", "data", "agents.bm25")
+
+MAGIC = b"KAYABM25"
+VERSION = 1
+SECTIONS = ("meta", "terms", "strings", "postings", "docs", "stored")
+HEADER = struct.Struct("<8sIIIf" + "QQ" * len(SECTIONS))
+TERM = struct.Struct("<IIIII")
+SKIP = struct.Struct("<III")
+DOC = struct.Struct("<IHHII")
+
+BLOCK_SIZE = 128
+TITLE_BOOST = 2       # Titel-Terme zählen doppelt (einfaches BM25F)
+COMPOUND_MIN = 8      # Terme ab dieser Länge werden in bekannte Teile zerlegt
+K1, B = 1.2, 0.75
+
+# Typische Bürgeranfragen für den Benchmark
+BENCH_QUERIES = [
+    "Bauantrag Formulare",
+    "Kreistagssitzung Tagesordnung",
+    "Führerschein beantragen",
+    "KFZ Zulassung Termin",
+    "Jobcenter Öffnungszeiten",
+    "Kinderbetreuung Kita Platz",
+    "E-Rechnung Leitweg-ID",
+    "Gleichstellungsbeauftragte Beratung",
+    "Stellenangebote Verwaltung",
+    "Pflege Senioren Beratung",
+    "Landrat",
+    "Gewerbe anmelden",
+]
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="BM25-Index über kaya-api/data/agents")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Index aus den Agent-JSON-Dateien bauen")
+    build.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Verzeichnis mit den Agent-Dateien")
+    build.add_argument("--out", default=DEFAULT_INDEX, help=f"Index-Datei (Standard: {DEFAULT_INDEX})")
+
+    query = sub.add_parser("query", help="Suchanfrage gegen den Index")
+    query.add_argument("text", help="Suchtext")
+    query.add_argument("--index", default=DEFAULT_INDEX, help="Index-Datei")
+    query.add_argument("-k", type=int, default=5, help="Anzahl Treffer (Standard: 5)")
+    query.add_argument("--agent", default=None, help="Nur Dokumente dieses Agenten")
+    query.add_argument("--json", action="store_true", help="Treffer als JSON ausgeben")
+
+    bench = sub.add_parser("bench", help="Index vs. lineare Suche (QPS, Kaltstart)")
+    bench.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Verzeichnis mit den Agent-Dateien")
+    bench.add_argument("--index", default=DEFAULT_INDEX, help="Index-Datei")
+    bench.add_argument("--queries", default=None, help="Datei mit Anfragen (eine pro Zeile)")
+    bench.add_argument("--seconds", type=float, default=3.0, help="Messdauer je Verfahren (Standard: 3)")
+    bench.add_argument("--opens", type=int, default=20, help="Wiederholungen der Kaltstart-Messung (Standard: 20)")
+    return p.parse_args()
+
+
+# ---------------------------------------------------------------------------
+# Quelldaten
+# ---------------------------------------------------------------------------
+
+def agent_files(data_dir):
+    """{Agent: Pfad} - neueste Datei pro Agent, ohne all_agents_data_* (wie loadAgentData)"""
+    newest = {}
+    for path in glob.glob(os.path.join(data_dir, "*.json")):
+        name = os.path.basename(path)
+        if name.startswith("all_agents_data_"):
+            continue
+        agent = re.sub(r"_data_\d{4}-\d{2}-\d{2}$", "", name[:-5])
+        mtime = os.path.getmtime(path)
+        if agent not in newest or mtime > newest[agent][1]:
+            newest[agent] = (path, mtime)
+    return {agent: path for agent, (path, _) in sorted(newest.items())}
+
+
+def load_records(data_dir):
+    """[(Agent, Record)] aller Agent-Dateien"""
+    records = []
+    for agent, path in agent_files(data_dir).items():
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            records.extend((agent, r) for r in data if isinstance(r, dict))
+    return records
+
+
+def stored_record(agent, record):
+    """Gespeicherte Felder: alles Nötige für die Antwort, 'content' nur wenn abweichend"""
+    stored = {k: record[k] for k in ("title", "url", "plain_text", "links", "contacts", "forms") if record.get(k)}
+    if record.get("content") and record.get("content") != record.get("plain_text"):
+        stored["content"] = record["content"]
+    stored["agent"] = (record.get("metadata") or {}).get("agent", agent)
+    return stored
+
+
+def record_terms(record):
+    """{Term: gewichtete tf} eines Records (Titel geboostet)"""
+    tf = {}
+    for term in tokenize(record.get("title")):
+        tf[term] = tf.get(term, 0) + TITLE_BOOST
+    for term in tokenize(record.get("plain_text") or record.get("content")):
+        tf[term] = tf.get(term, 0) + 1
+    return tf
+
+
+# ---------------------------------------------------------------------------
+# Kodierung
+# ---------------------------------------------------------------------------
+
+def vbyte(values, out):
+    for v in values:
+        while v >= 0x80:
+            out.append((v & 0x7F) | 0x80)
+            v >>= 7
+        out.append(v)
+
+
+def unvbyte(buf, pos, count):
+    """count VByte-Zahlen ab pos -> (Liste, neue Position)"""
+    values = []
+    for _ in range(count):
+        v = shift = 0
+        while True:
+            byte = buf[pos]
+            pos += 1
+            v |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        values.append(v)
+    return values, pos
+
+
+def encode_postings(postings):
+    """[(DocID, tf)] (aufsteigend) -> Skip-Tabelle + VByte-Blöcke"""
+    blocks = []
+    skips = []
+    previous = -1
+    for start in range(0, len(postings), BLOCK_SIZE):
+        block = postings[start:start + BLOCK_SIZE]
+        data = bytearray()
+        deltas = []
+        for doc, _ in block:
+            deltas.append(doc - previous - 1)
+            previous = doc
+        vbyte(deltas, data)
+        vbyte([tf for _, tf in block], data)
+        blocks.append(bytes(data))
+        skips.append((previous, max(tf for _, tf in block)))
+    out = bytearray()
+    end = 0
+    for (last, max_tf), data in zip(skips, blocks):
+        end += len(data)
+        out += SKIP.pack(last, max_tf, end)
+    for data in blocks:
+        out += data
+    return bytes(out)
+
+
+def pad8(out):
+    out += b"\0" * (-len(out) % 8)
+
+
+def build_index(data_dir, out_path):
+    """Agent-Dateien -> Index-Datei; liefert Statistik"""
+    records = load_records(data_dir)
+    agents = sorted({agent for agent, _ in records})
+    agent_ids = {agent: i for i, agent in enumerate(agents)}
+
+    doc_terms = [record_terms(record) for _, record in records]
+    df = {}
+    for tf in doc_terms:
+        for term in tf:
+            df[term] = df.get(term, 0) + 1
+
+    # Komposita über das Korpus-Vokabular zerlegen (Teile mit df >= 2)
+    vocabulary = {term for term, count in df.items() if count >= 2}
+    for tf in doc_terms:
+        for term, count in list(tf.items()):
+            if len(term) >= COMPOUND_MIN:
+                for part in split_compound(term, vocabulary):
+                    if part not in tf:
+                        df[part] = df.get(part, 0) + 1
+                    tf[part] = tf.get(part, 0) + count
+
+    postings = {}
+    for doc, tf in enumerate(doc_terms):
+        for term, count in tf.items():
+            postings.setdefault(term, []).append((doc, count))
+    doc_lengths = [sum(tf.values()) for tf in doc_terms]
+    avgdl = sum(doc_lengths) / max(1, len(doc_lengths))
+
+    sections = {name: bytearray() for name in SECTIONS}
+    terms = sorted(postings, key=lambda t: t.encode("utf-8"))
+    for term in terms:
+        raw = term.encode("utf-8")
+        encoded = encode_postings(postings[term])
+        sections["terms"] += TERM.pack(len(sections["strings"]), len(raw), len(postings[term]),
+                                       len(sections["postings"]), len(encoded))
+        sections["strings"] += raw
+        sections["postings"] += encoded
+
+    for doc, (agent, record) in enumerate(records):
+        stored = json.dumps(stored_record(agent, record), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        sections["docs"] += DOC.pack(doc_lengths[doc], agent_ids[agent], 0, len(sections["stored"]), len(stored))
+        sections["stored"] += stored
+
+    meta = {
+        "agents": agents,
+        "sources": {agent: os.path.basename(path) for agent, path in agent_files(data_dir).items()},
+        "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "k1": K1, "b": B, "block_size": BLOCK_SIZE, "title_boost": TITLE_BOOST,
+        "tokenizer": "german_text/cistem",
+    }
+    sections["meta"] += json.dumps(meta, ensure_ascii=False).encode("utf-8")
+
+    body = bytearray()
+    table = []
+    for name in SECTIONS:
+        pad8(body)
+        table.append((HEADER.size + len(body), len(sections[name])))
+        body += sections[name]
+    header = HEADER.pack(MAGIC, VERSION, len(records), len(terms), avgdl, *[v for pair in table for v in pair])
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(body)
+    os.replace(tmp, out_path)
+    return {"docs": len(records), "terms": len(terms), "agents": len(agents),
+            "bytes": HEADER.size + len(body), "postings_bytes": len(sections["postings"])}
+
+
+# ---------------------------------------------------------------------------
+# Lesen / Suchen
+# ---------------------------------------------------------------------------
+
+class AgentIndex:
+    """Lesezugriff per mmap; Terme werden per Binärsuche direkt in der Datei gefunden"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.buf = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        fields = HEADER.unpack_from(self.buf, 0)
+        magic, version, self.n_docs, self.n_terms, self.avgdl = fields[:5]
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Kein KAYA-BM25-Index (Version {VERSION}): {path}")
+        offsets = fields[5:]
+        self.sections = {name: (offsets[2 * i], offsets[2 * i + 1]) for i, name in enumerate(SECTIONS)}
+        start, length = self.sections["meta"]
+        self.meta = json.loads(self.buf[start:start + length].decode("utf-8"))
+        self.agents = self.meta["agents"]
+
+    @classmethod
+    def open(cls, path=DEFAULT_INDEX):
+        return cls(path)
+
+    def close(self):
+        self.buf.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, term):
+        return self.lookup(term) is not None
+
+    def term_entry(self, i):
+        return TERM.unpack_from(self.buf, self.sections["terms"][0] + i * TERM.size)
+
+    def term_bytes(self, entry):
+        start = self.sections["strings"][0] + entry[0]
+        return self.buf[start:start + entry[1]]
+
+    def lookup(self, term):
+        """Binärsuche im Term-Verzeichnis -> (df, post_off, post_len) oder None"""
+        key = term.encode("utf-8")
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = self.term_entry(mid)
+            value = self.term_bytes(entry)
+            if value < key:
+                lo = mid + 1
+            elif value > key:
+                hi = mid
+            else:
+                return entry[2:]
+        return None
+
+    def skip_table(self, df, offset):
+        """[(letzte DocID, max. tf, Blockende)] je Block eines Terms"""
+        base = self.sections["postings"][0] + offset
+        return [SKIP.unpack_from(self.buf, base + i * SKIP.size) for i in range(-(-df // BLOCK_SIZE))]
+
+    def block(self, df, offset, skips, i):
+        """[(DocID, tf)] von Block i - dekodiert nur diesen Block"""
+        data_start = self.sections["postings"][0] + offset + len(skips) * SKIP.size
+        previous = skips[i - 1][0] if i else -1
+        count = min(BLOCK_SIZE, df - i * BLOCK_SIZE)
+        deltas, pos = unvbyte(self.buf, data_start + (skips[i - 1][2] if i else 0), count)
+        tfs, _ = unvbyte(self.buf, pos, count)
+        out = []
+        for delta, tf in zip(deltas, tfs):
+            previous += delta + 1
+            out.append((previous, tf))
+        return out
+
+    def postings(self, df, offset, length):
+        """Alle (DocID, tf) eines Terms - Block für Block dekodiert"""
+        skips = self.skip_table(df, offset)
+        for i in range(len(skips)):
+            yield from self.block(df, offset, skips, i)
+
+    def doc(self, doc_id):
+        length, agent, _, start, size = DOC.unpack_from(self.buf, self.sections["docs"][0] + doc_id * DOC.size)
+        return length, agent, start, size
+
+    def record(self, doc_id):
+        _, _, start, size = self.doc(doc_id)
+        start += self.sections["stored"][0]
+        return json.loads(self.buf[start:start + size].decode("utf-8"))
+
+    def query_terms(self, text):
+        """Anfrage-Terme; unbekannte Komposita werden über das Index-Vokabular zerlegt"""
+        terms = []
+        for term in tokenize(text):
+            terms.append(term)
+            if len(term) >= COMPOUND_MIN and term not in self:
+                terms.extend(split_compound(term, self))
+        return terms
+
+    def search(self, text, k=5, agent=None):
+        """Top-k nach BM25: [{"score", "doc", "agent", "record"}]
+
+        MaxScore über die Skip-Tabelle: Terme nach ihrer Obergrenze (idf mit
+        dem größten max. tf aller Blöcke, kürzeste Dokumentlänge) absteigend.
+        Kann die Summe der restlichen Obergrenzen die aktuelle k-te Punktzahl
+        nicht mehr erreichen, kommen keine neuen Dokumente mehr dazu; dann
+        werden nur noch Blöcke dekodiert, deren DocID-Bereich einen der
+        verbliebenen Kandidaten enthält.
+        """
+        agent_id = self.agents.index(agent) if agent in self.agents else None
+        if agent is not None and agent_id is None:
+            return []
+        plan = []
+        for term in set(self.query_terms(text)):
+            found = self.lookup(term)
+            if found is None:
+                continue
+            df, offset, _ = found
+            idf = math.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5))
+            skips = self.skip_table(df, offset)
+            max_tf = max(max_tf for _, max_tf, _ in skips)
+            plan.append((idf * max_tf * (K1 + 1) / (max_tf + K1 * (1 - B)), df, offset, idf, skips))
+        plan.sort(key=lambda entry: entry[0], reverse=True)
+
+        scores = {}
+        remaining = sum(entry[0] for entry in plan)
+        for bound, df, offset, idf, skips in plan:
+            threshold = heapq.nlargest(k, scores.values())[-1] if len(scores) >= k else 0.0
+            if remaining < threshold:
+                # Neue Dokumente können die Top-k nicht mehr erreichen
+                scores = {d: s for d, s in scores.items() if s + remaining >= threshold}
+                candidates = sorted(scores)
+                lasts = [last for last, _, _ in skips]
+                blocks = sorted({bisect.bisect_left(lasts, d) for d in candidates} - {len(skips)})
+            else:
+                candidates = None
+                blocks = range(len(skips))
+            for i in blocks:
+                for doc_id, tf in self.block(df, offset, skips, i):
+                    if candidates is not None and doc_id not in scores:
+                        continue
+                    length, doc_agent, _, _ = self.doc(doc_id)
+                    if agent_id is not None and doc_agent != agent_id:
+                        continue
+                    norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / self.avgdl))
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * norm
+            remaining -= bound
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [{"score": round(score, 4), "doc": doc_id, "agent": self.agents[self.doc(doc_id)[1]],
+                 "record": self.record(doc_id)} for doc_id, score in best]
+
+
+# ---------------------------------------------------------------------------
+# Benchmark gegen die lineare Suche (filterRelevantData in kaya_agent_manager_v2.js)
+# ---------------------------------------------------------------------------
+
+def linear_scan(records, query, k=5):
+    """Nachbau von filterRelevantData: Teilstring der ganzen Anfrage in Titel oder Inhalt"""
+    needle = query.lower()
+    hits = []
+    for agent, item in records:
+        if needle in (item.get("title") or "").lower() or needle in (item.get("content") or "").lower():
+            hits.append((agent, item))
+            if len(hits) == k:
+                break
+    return hits
+
+
+def measure_qps(fn, queries, seconds):
+    """(Anfragen/s, Treffer gesamt über eine Runde)"""
+    hits = sum(len(fn(q)) for q in queries)
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for q in queries:
+            fn(q)
+        count += len(queries)
+    return count / (time.perf_counter() - start), hits
+
+
+def run_bench(args):
+    queries = BENCH_QUERIES
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    print("=" * 60)
+    print("⏱️  BM25-Index vs. lineare Suche")
+    print("=" * 60)
+
+    # Kaltstart: Öffnen + erste Anfrage (Dateien liegen im OS-Cache - misst Parsen, nicht Platte)
+    open_times, scan_times = [], []
+    for _ in range(args.opens):
+        t0 = time.perf_counter()
+        with AgentIndex.open(args.index) as index:
+            index.search(queries[0])
+        open_times.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        records = load_records(args.data_dir)
+        linear_scan(records, queries[0])
+        scan_times.append(time.perf_counter() - t0)
+    open_ms = sorted(open_times)[len(open_times) // 2] * 1e3
+    scan_ms = sorted(scan_times)[len(scan_times) // 2] * 1e3
+    print(f"Kaltstart (Median aus {args.opens}):  Index {open_ms:.2f} ms   JSON laden + Scan {scan_ms:.2f} ms "
+          f"({scan_ms / open_ms:.0f}x)")
+
+    with AgentIndex.open(args.index) as index:
+        index_qps, index_hits = measure_qps(lambda q: index.search(q, 5), queries, args.seconds)
+    scan_qps, scan_hits = measure_qps(lambda q: linear_scan(records, q, 5), queries, args.seconds)
+    print(f"Durchsatz:  Index {index_qps:,.0f} Anfragen/s   linear {scan_qps:,.0f} Anfragen/s")
+    print(f"Treffer (Top 5, {len(queries)} Anfragen):  Index {index_hits}   linear {scan_hits}")
+    print(f"Index: {os.path.getsize(args.index) / 1024:.0f} KB   "
+          f"JSON: {sum(os.path.getsize(p) for p in agent_files(args.data_dir).values()) / 1024:.0f} KB")
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    if args.command == "build":
+        t0 = time.perf_counter()
+        stats = build_index(args.data_dir, args.out)
+        print(f"✅ Index gebaut: {args.out}")
+        print(f"   {stats['docs']} Dokumente, {stats['terms']} Terme, {stats['agents']} Agenten, "
+              f"{stats['bytes'] / 1024:.0f} KB (Postings {stats['postings_bytes'] / 1024:.0f} KB) "
+              f"in {time.perf_counter() - t0:.2f}s")
+    elif args.command == "query":
+        with AgentIndex.open(args.index) as index:
+            hits = index.search(args.text, args.k, args.agent)
+        if args.json:
+            print(json.dumps(hits, ensure_ascii=False, indent=2))
+            return
+        for hit in hits:
+            record = hit["record"]
+            print(f"{hit['score']:7.3f}  [{hit['agent']}] {record.get('title', '-')}")
+            print(f"         {(record.get('plain_text') or '')[:120]}")
+            print(f"         {record.get('url', '')}")
+    else:
+        run_bench(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Content-adressierter Build-Cache für die Avatar-Asset-Pipeline
+
+Der Cache-Key ist ein SHA-256 über alles, was das Ergebnis beeinflusst
+(Input-GLB, Micro-Normal-Map, Draco-Einstellung, Skript-Version, Material-
+Presets, Blender-Version - der glTF-Exporter ist Teil von Blender). Gleicher Key -> die fertige Datei wird nur kopiert, Blender muss
+nicht laufen. Einträge liegen als <key>.glb (+ <key>.json mit Metadaten) im
+Cache-Verzeichnis; die mtime dient als "zuletzt benutzt" für die LRU-Eviction.
+
+Ohne zentrale Index-Datei: mehrere Worker können gleichzeitig schreiben,
+jede Datei wird atomar per os.replace() eingestellt.
+
+Usage:
+  python scripts/asset_cache.py stats
+  python scripts/asset_cache.py prune [--max-mb 2048]
+  python scripts/asset_cache.py clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from material_presets import presets_fingerprint
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "KAYA_ASSET_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "kaya-assets"))
+DEFAULT_MAX_BYTES = int(float(os.environ.get("KAYA_ASSET_CACHE_MB", "2048")) * 1024 * 1024)
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CHUNK = 1024 * 1024
+SPARSE_SCRIPTS = ("glb_sparse_morphs.py", "glb_io.py")
+QUANTIZE_SCRIPTS = ("glb_quantize.py", "glb_io.py")
+BLENDER_VERSION = re.compile(r"Blender (\d+\.\d+\.\d+)")
+
+
+def hash_file(path):
+    """SHA-256 einer Datei (gestreamt, konstanter Speicher)"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def script_hashes(names):
+    """Hashes der Nachbearbeitungs-Skripte in scripts/ (ändert sich der Code, ändert sich der Key)"""
+    return [hash_file(os.path.join(SCRIPTS_DIR, name)) for name in names]
+
+
+def blender_version(binary):
+    """Version eines Blender-Binarys als "X.Y.Z" (wie ".".join(bpy.app.version)); None, wenn unbekannt"""
+    try:
+        out = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=60).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = BLENDER_VERSION.search(out or "")
+    return match.group(1) if match else None
+
+
+def build_key(parts):
+    """Key aus einem Dict von Bestandteilen (Werte: str/bool/Zahl/None)"""
+    blob = json.dumps(parts, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def enhance_glb_key(inp, micro, keep_draco, sparse_epsilon=None, textures=None, quantize=False, blender=None):
+    """Cache-Key für einen enhance_glb.py-Lauf
+
+    blender: Version "X.Y.Z" des exportierenden Blenders (in Blender aus
+    bpy.app.version, im Batch-Runner über blender_version())
+    """
+    parts = {
+        "tool": "enhance_glb",
+        "blender": blender,
+        "input": hash_file(inp),
+        "micro": hash_file(micro) if micro and os.path.exists(micro) else None,
+        "keep_draco": keep_draco if isinstance(keep_draco, dict) else bool(keep_draco),
+        "script": hash_file(os.path.join(SCRIPTS_DIR, "enhance_glb.py")),
+        "presets": presets_fingerprint(),
+    }
+    if sparse_epsilon is not None:
+        parts["sparse_epsilon"] = sparse_epsilon
+        parts["sparse_script"] = script_hashes(SPARSE_SCRIPTS)
+    if textures is not None:
+        # Thread-Anzahl ändert das Ergebnis nicht
+        parts["textures"] = {k: v for k, v in textures.items() if k != "workers"}
+        parts["texture_script"] = hash_file(os.path.join(SCRIPTS_DIR, "texture_tools.py"))
+    if quantize:
+        parts["quantize_script"] = script_hashes(QUANTIZE_SCRIPTS)
+    return build_key(parts)
+
+
+class AssetCache:
+    """Größenbegrenzter LRU-Cache fertiger Build-Outputs"""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def _paths(self, key):
+        base = os.path.join(self.root, key)
+        return base + ".glb", base + ".json"
+
+    def get(self, key, dest):
+        """Kopiert den Eintrag nach dest; liefert Metadaten oder None bei Miss"""
+        blob, meta_path = self._paths(key)
+        if not os.path.exists(blob):
+            return None
+        dest_dir = os.path.dirname(dest)
+        if dest_dir:
+            os.makedirs(dest_dir, exist_ok=True)
+        try:
+            shutil.copyfile(blob, dest)
+            os.utime(blob)  # LRU: zuletzt benutzt
+        except FileNotFoundError:
+            return None  # parallel evicted
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        return meta
+
+    def _atomic_write(self, target, data=None, src=None):
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            if src is not None:
+                with open(src, "rb") as fin:
+                    shutil.copyfileobj(fin, f, CHUNK)
+            else:
+                f.write(data)
+        os.replace(tmp, target)
+
+    def put(self, key, src, meta=None):
+        """Stellt src unter key ein (atomar) und räumt danach per LRU auf"""
+        blob, meta_path = self._paths(key)
+        self._atomic_write(meta_path, data=json.dumps(meta or {}).encode("utf-8"))
+        self._atomic_write(blob, src=src)
+        self.evict()
+
+    def entries(self):
+        """[(key, size, last_used)] aller Einträge"""
+        out = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".glb"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.root, name))
+            except FileNotFoundError:
+                continue
+            out.append((name[:-4], st.st_size, st.st_mtime))
+        return out
+
+    def evict(self, max_bytes=None):
+        """Löscht die am längsten unbenutzten Einträge, bis die Größe passt"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self.entries(), key=lambda e: e[2])
+        total = sum(e[1] for e in entries)
+        removed = 0
+        for key, size, _ in entries:
+            if total <= limit:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """Leert den Cache komplett"""
+        return self.evict(max_bytes=-1)
+
+
+def main():
+    """CLI: stats / prune / clear"""
+    p = argparse.ArgumentParser(description="KAYA asset build cache")
+    p.add_argument("command", choices=["stats", "prune", "clear"])
+    p.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    p.add_argument("--max-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024))
+    args = p.parse_args()
+
+    cache = AssetCache(args.cache_dir, int(args.max_mb * 1024 * 1024))
+    if args.command == "stats":
+        entries = cache.entries()
+        total = sum(e[1] for e in entries)
+        print(f"📦 Cache: {cache.root}")
+        print(f"   Einträge: {len(entries)}")
+        print(f"   Größe:    {total / (1024 * 1024):.2f} MB / {cache.max_bytes / (1024 * 1024):.0f} MB")
+        for key, size, used in sorted(entries, key=lambda e: -e[2])[:10]:
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(used))
+            print(f"   {key[:16]}  {size / (1024 * 1024):8.2f} MB  {stamp}")
+    elif args.command == "prune":
+        print(f"🧹 {cache.evict()} Einträge entfernt")
+    else:
+        print(f"🧹 {cache.clear()} Einträge entfernt")
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
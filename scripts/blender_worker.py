@@ -0,0 +1,266 @@
+"""
+Warmer Blender-Worker - ein langlebiger `blender --background`-Prozess mit Job-API
+
+Jeder Aufruf von enhance_glb.py, blender_add_mouth_shapekeys.py oder
+blender_export_simple.py zahlt Blender-Start, Factory-Reset und GLB-Import
+neu. Dieser Worker startet einmal und nimmt danach Jobs über einen lokalen
+TCP-Socket entgegen (eine JSON-Zeile pro Job, eine JSON-Zeile als Antwort):
+
+  blender --background --factory-startup --python scripts/blender_worker.py -- [--port 7501]
+
+Job:
+  {"id": "kaya-1", "reset": "purge",
+   "steps": [{"op": "import", "path": "avatar.glb"},
+             {"op": "tune_materials", "micro": null},
+             {"op": "mouth_shapekeys"},
+             {"op": "export", "path": "out/avatar.glb", "draco_profile": "default", "sparse_epsilon": 1e-6}]}
+
+export: draco_profile und quantize (KHR_mesh_quantization) schließen sich aus.
+
+reset: "purge" (Standard, Datenblöcke löschen - Millisekunden), "factory"
+(read_factory_settings wie clean_scene) oder "none" (Szene des vorigen Jobs
+weiterverwenden, z. B. für mehrere Exporte desselben Imports).
+
+Weitere Schritte: textures, script (Blender-Skript per Pfad ausführen).
+Steuer-Jobs: {"op": "ping"}, {"op": "stats"}, {"op": "shutdown"}.
+Die Antwort enthält Zeiten pro Schritt. Client: scripts/blender_worker_client.py
+"""
+
+import argparse
+import json
+import os
+import runpy
+import socket
+import sys
+import time
+import traceback
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from compression_profiles import load_profile  # noqa: E402
+from enhance_glb import clean_scene, export_glb, import_glb, process_textures, quantize_export, scene_triangles, \
+    sparsify_export, tune_materials  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = int(os.environ.get("BLENDER_WORKER_PORT", 7501))
+MAX_LINE = 1024 * 1024
+
+# Datenblöcke, die ein Import erzeugt - "purge" entfernt sie statt Blender neu zu initialisieren
+PURGE_COLLECTIONS = ("objects", "meshes", "materials", "images", "textures", "armatures", "actions", "cameras",
+                     "lights", "curves", "node_groups", "collections")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    argv = sys.argv
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    p = argparse.ArgumentParser(description="Persistent Blender worker (runs inside Blender)")
+    p.add_argument("--host", default=DEFAULT_HOST, help=f"Bind-Adresse (Standard: {DEFAULT_HOST})")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP-Port (Standard: {DEFAULT_PORT})")
+    p.add_argument("--max-jobs", type=int, default=0,
+                   help="Nach so vielen Jobs beenden (0 = unbegrenzt; gegen schleichenden Speicherzuwachs)")
+    return p.parse_args(argv)
+
+
+def purge_scene():
+    """Alle importierten Datenblöcke entfernen; Szene, Addons und Einstellungen bleiben geladen"""
+    ids = []
+    for name in PURGE_COLLECTIONS:
+        ids.extend(getattr(bpy.data, name))
+    if ids:
+        bpy.data.batch_remove(ids)
+    bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+
+
+def reset_scene(mode):
+    if mode == "none":
+        return
+    if mode == "factory":
+        clean_scene()
+    elif mode == "purge":
+        purge_scene()
+    else:
+        raise ValueError(f"Unbekannter Reset-Modus: {mode}")
+
+
+def step_import(step):
+    import_glb(step["path"])
+    return {"objects": len(bpy.data.objects), "triangles": scene_triangles()}
+
+
+def step_tune_materials(step):
+    return {"tuned_materials": tune_materials(step.get("micro"))}
+
+
+def step_textures(step):
+    entries, removed = process_textures(step.get("workers"))
+    return {"images": len(entries), "duplicates": removed}
+
+
+def step_mouth_shapekeys(step):
+    """Wie blender_add_mouth_shapekeys.py, aber ohne dessen Auto-Export
+
+    set: "mouth" (3 Mund-Keys) oder "full" (face_presets.json, Standard wie im Skript);
+    mapping: optionaler Pfad für die Viseme-/Emotions-Zuordnung
+    """
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    import blender_add_mouth_shapekeys as msk
+
+    obj = msk.pick_head_mesh()
+    if step.get("set", msk.FACE_KEY_SET) == "full":
+        created = msk.create_face_keys(obj, overwrite=step.get("overwrite", False))
+    else:
+        existing = {kb.name for kb in obj.data.shape_keys.key_blocks} if obj.data.shape_keys else set()
+        created = msk.create_mouth_keys(obj, existing)
+    if created is None:
+        raise RuntimeError("Keine Mund-Vertices gefunden")
+    for kb in obj.data.shape_keys.key_blocks:
+        kb.value = 0.0
+    if step.get("mapping"):
+        morph_names = [kb.name for kb in obj.data.shape_keys.key_blocks if kb.name != "Basis"]
+        msk.write_mapping(step["mapping"], msk.load_presets(), morph_names, obj.name)
+    return {"mesh": obj.name, "created": len(created)}
+
+
+def step_export(step):
+    profile = step.get("draco_profile")
+    keep_draco = load_profile(profile) if profile else False
+    if keep_draco and step.get("quantize"):
+        raise ValueError("draco_profile und quantize schließen sich aus")
+    if not export_glb(step["path"], keep_draco, step.get("texture_format", "AUTO"), step.get("texture_quality")):
+        raise RuntimeError(f"Export fehlgeschlagen: {step['path']}")
+    result = {"bytes": os.path.getsize(step["path"])}
+    if step.get("quantize"):
+        report = quantize_export(step["path"])
+        result.update(bytes=report["file_bytes_after"], quantize_error=report["error"])
+    if step.get("sparse_epsilon") is not None:
+        report = sparsify_export(step["path"], step["sparse_epsilon"])
+        result["bytes"] = report["file_bytes_after"]
+    return result
+
+
+def step_script(step):
+    """Bestehendes Blender-Skript (z. B. blender_export_simple.py) in der warmen Szene ausführen"""
+    path = step["path"] if os.path.isabs(step["path"]) else os.path.join(REPO_ROOT, step["path"])
+    argv = sys.argv
+    sys.argv = [path] + (["--"] + step["args"] if step.get("args") else [])
+    try:
+        runpy.run_path(path, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise RuntimeError(f"{os.path.basename(path)} beendet mit Code {e.code}") from e
+    finally:
+        sys.argv = argv
+    return {"script": os.path.relpath(path, REPO_ROOT)}
+
+
+STEPS = {
+    "import": step_import,
+    "tune_materials": step_tune_materials,
+    "textures": step_textures,
+    "mouth_shapekeys": step_mouth_shapekeys,
+    "export": step_export,
+    "script": step_script,
+}
+
+
+class Worker:
+    def __init__(self, args):
+        self.args = args
+        self.started = time.time()
+        self.jobs = 0
+        self.failed = 0
+        self.busy_s = 0.0
+
+    def stats(self):
+        return {"pid": os.getpid(), "blender": bpy.app.version_string, "uptime_s": round(time.time() - self.started, 1),
+                "jobs": self.jobs, "failed": self.failed, "busy_s": round(self.busy_s, 3),
+                "objects": len(bpy.data.objects), "meshes": len(bpy.data.meshes), "images": len(bpy.data.images)}
+
+    def run_job(self, job):
+        """Schritte nacheinander ausführen; beim ersten Fehler abbrechen"""
+        t_job = time.perf_counter()
+        response = {"id": job.get("id"), "ok": True, "error": None, "steps": []}
+        try:
+            t0 = time.perf_counter()
+            reset_scene(job.get("reset", "purge"))
+            response["reset_s"] = round(time.perf_counter() - t0, 4)
+            for step in job.get("steps", []):
+                handler = STEPS.get(step.get("op"))
+                if handler is None:
+                    raise ValueError(f"Unbekannter Schritt: {step.get('op')} (erlaubt: {', '.join(STEPS)})")
+                t0 = time.perf_counter()
+                entry = {"op": step["op"]}
+                response["steps"].append(entry)
+                entry["result"] = handler(step)
+                entry["s"] = round(time.perf_counter() - t0, 4)
+        except Exception as e:
+            traceback.print_exc()
+            response.update(ok=False, error=f"{type(e).__name__}: {e}")
+            self.failed += 1
+        elapsed = time.perf_counter() - t_job
+        self.jobs += 1
+        self.busy_s += elapsed
+        response.update(total_s=round(elapsed, 4), job=self.jobs)
+        sys.stdout.flush()
+        return response
+
+    def handle(self, request):
+        """(Antwort, weiterlaufen?)"""
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "pong": True}, True
+        if op == "stats":
+            return dict(self.stats(), ok=True), True
+        if op == "shutdown":
+            return {"ok": True, "shutdown": True}, False
+        response = self.run_job(request)
+        return response, not (self.args.max_jobs and self.jobs >= self.args.max_jobs)
+
+    def serve_connection(self, conn):
+        """Zeilen einer Verbindung abarbeiten; False = Worker beenden"""
+        with conn, conn.makefile("rwb") as stream:
+            for line in iter(lambda: stream.readline(MAX_LINE), b""):
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    response, keep_running = {"ok": False, "error": f"Ungültiges JSON: {e}"}, True
+                else:
+                    response, keep_running = self.handle(request)
+                stream.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                stream.flush()
+                if not keep_running:
+                    return False
+        return True
+
+    def serve(self):
+        # Blender (bpy) ist nicht threadsicher: Verbindungen werden nacheinander bedient
+        with socket.create_server((self.args.host, self.args.port)) as server:
+            print(f"🟢 Blender-Worker bereit auf {self.args.host}:{self.args.port} "
+                  f"(Blender {bpy.app.version_string}, PID {os.getpid()})")
+            sys.stdout.flush()
+            while True:
+                conn, _ = server.accept()
+                try:
+                    if not self.serve_connection(conn):
+                        break
+                except (ConnectionError, OSError) as e:
+                    print(f"⚠️  Verbindung abgebrochen: {e}")
+        print(f"🔴 Blender-Worker beendet nach {self.jobs} Jobs")
+        sys.stdout.flush()
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    clean_scene()
+    Worker(args).serve()
+
+
+if __name__ == "__main__":
+    main()
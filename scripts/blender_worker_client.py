@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Client für den warmen Blender-Worker (scripts/blender_worker.py)
+
+Läuft ohne Blender. Startet den Worker bei Bedarf einmal im Hintergrund und
+schickt danach Jobs über den lokalen Socket - aufeinanderfolgende
+Asset-Iterationen zahlen den Blender-Start nur beim ersten Mal.
+
+  python scripts/blender_worker_client.py start
+  python scripts/blender_worker_client.py enhance --in avatar.glb --out out/avatar.glb --mouth --draco-profile default
+  python scripts/blender_worker_client.py run jobs.json          # ein Job-Objekt oder eine Liste
+  python scripts/blender_worker_client.py stats
+  python scripts/blender_worker_client.py stop
+
+Job-Format: siehe Docstring von blender_worker.py.
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blender_worker.py")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = int(os.environ.get("BLENDER_WORKER_PORT", 7501))
+DEFAULT_LOG = os.path.join(tempfile.gettempdir(), "kaya_blender_worker.log")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Jobs an den warmen Blender-Worker schicken")
+    p.add_argument("--host", default=DEFAULT_HOST, help=f"Worker-Adresse (Standard: {DEFAULT_HOST})")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Worker-Port (Standard: {DEFAULT_PORT})")
+    p.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender-Binary")
+    p.add_argument("--log", default=DEFAULT_LOG, help=f"Log des gestarteten Workers (Standard: {DEFAULT_LOG})")
+    p.add_argument("--start-timeout", type=float, default=180.0, help="Max. Wartezeit auf den Worker-Start (s)")
+    p.add_argument("--job-timeout", type=float, default=1800.0, help="Max. Dauer eines Jobs (s)")
+    p.add_argument("--no-spawn", action="store_true", help="Worker nicht automatisch starten")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("start", help="Worker starten (falls nicht schon aktiv)")
+    sub.add_parser("stop", help="Worker beenden")
+    sub.add_parser("stats", help="Zustand des Workers anzeigen")
+
+    run = sub.add_parser("run", help="Job-Datei ausführen")
+    run.add_argument("jobs", help="JSON-Datei mit einem Job oder einer Liste von Jobs")
+
+    enhance = sub.add_parser("enhance", help="Import -> Materialien -> (Mund-Keys) -> Export als Job")
+    enhance.add_argument("--in", dest="inp", required=True, help="Input GLB path")
+    enhance.add_argument("--out", dest="outp", required=True, help="Output GLB path")
+    enhance.add_argument("--micro", default=None, help="Skin micro normal map path (optional)")
+    enhance.add_argument("--mouth", action="store_true", help="Mund-Shape-Keys ergänzen (blender_add_mouth_shapekeys)")
+    enhance.add_argument("--face-set", default="full", choices=["mouth", "full"],
+                         help="Mit --mouth: nur 3 Mund-Keys oder kompletter Viseme-/Emotions-Satz (Standard: full)")
+    enhance.add_argument("--textures", action="store_true", help="Textur-Stufe ausführen")
+    enhance.add_argument("--draco-profile", default=None, help="Draco mit Profil aus compression_profiles.json")
+    enhance.add_argument("--quantize", action="store_true", help="KHR_mesh_quantization statt Draco")
+    enhance.add_argument("--sparse-epsilon", type=float, default=None, help="Sparse Morph Targets mit diesem Epsilon")
+    enhance.add_argument("--reset", default="purge", choices=["purge", "factory", "none"], help="Szenen-Reset vor dem Job")
+    enhance.add_argument("--repeat", type=int, default=1, help="Job n-mal ausführen (Messung warm vs. kalt)")
+    return p.parse_args()
+
+
+class WorkerClient:
+    """Eine Socket-Verbindung zum Worker; eine JSON-Zeile hin, eine zurück"""
+
+    def __init__(self, host, port, timeout):
+        self.sock = socket.create_connection((host, port), timeout=5)
+        self.sock.settimeout(timeout)
+        self.stream = self.sock.makefile("rwb")
+
+    def request(self, payload):
+        self.stream.write(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("Worker hat die Verbindung geschlossen (abgestürzt? Log prüfen)")
+        return json.loads(line)
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+
+def ping(host, port):
+    try:
+        client = WorkerClient(host, port, 5)
+    except OSError:
+        return False
+    try:
+        return client.request({"op": "ping"}).get("pong", False)
+    except (OSError, ValueError):
+        return False
+    finally:
+        client.close()
+
+
+def spawn_worker(args):
+    """Worker im Hintergrund starten und warten, bis er auf ping antwortet"""
+    cmd = [args.blender, "--background", "--factory-startup", "--python", WORKER_SCRIPT, "--",
+           "--host", args.host, "--port", str(args.port)]
+    print(f"🚀 Starte Blender-Worker: {' '.join(cmd)}")
+    print(f"   Log: {args.log}")
+    t0 = time.perf_counter()
+    with open(args.log, "a", encoding="utf-8") as log:
+        try:
+            proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                    start_new_session=True)
+        except OSError as e:
+            raise SystemExit(f"❌ Blender nicht startbar ({e}) - --blender oder BLENDER setzen")
+    while time.perf_counter() - t0 < args.start_timeout:
+        if proc.poll() is not None:
+            raise SystemExit(f"❌ Worker beendet mit Code {proc.returncode} - siehe {args.log}")
+        if ping(args.host, args.port):
+            print(f"✅ Worker bereit nach {time.perf_counter() - t0:.1f}s (PID {proc.pid})")
+            return
+        time.sleep(0.25)
+    proc.terminate()
+    raise SystemExit(f"❌ Worker nicht bereit nach {args.start_timeout:g}s - siehe {args.log}")
+
+
+def ensure_worker(args):
+    if ping(args.host, args.port):
+        return
+    if args.no_spawn:
+        raise SystemExit(f"❌ Kein Worker auf {args.host}:{args.port} (ohne --no-spawn wird er gestartet)")
+    spawn_worker(args)
+
+
+def enhance_job(args, n):
+    steps = [{"op": "import", "path": os.path.abspath(args.inp)},
+             {"op": "tune_materials", "micro": os.path.abspath(args.micro) if args.micro else None}]
+    if args.textures:
+        steps.append({"op": "textures"})
+    if args.mouth:
+        mapping = os.path.splitext(os.path.abspath(args.outp))[0] + ".morphs.json" if args.face_set == "full" else None
+        steps.append({"op": "mouth_shapekeys", "set": args.face_set, "mapping": mapping})
+    steps.append({"op": "export", "path": os.path.abspath(args.outp), "draco_profile": args.draco_profile,
+                  "quantize": args.quantize, "sparse_epsilon": args.sparse_epsilon})
+    return {"id": f"{os.path.basename(args.inp)}#{n}", "reset": args.reset, "steps": steps}
+
+
+def load_jobs(path):
+    with open(path, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    return jobs if isinstance(jobs, list) else [jobs]
+
+
+def print_response(response):
+    icon = "✅" if response.get("ok") else "❌"
+    print(f"\n{icon} Job {response.get('id')}  (Worker-Job #{response.get('job')})  "
+          f"gesamt {response.get('total_s', 0):.2f}s")
+    if "reset_s" in response:
+        print(f"   {'reset':<16} {response['reset_s']:>8.3f}s")
+    for step in response.get("steps", []):
+        seconds = f"{step['s']:>8.3f}s" if "s" in step else f"{'-':>9}"
+        details = ", ".join(f"{k}={v}" for k, v in (step.get("result") or {}).items())
+        print(f"   {step['op']:<16} {seconds}  {details}")
+    if response.get("error"):
+        print(f"   Fehler: {response['error']}")
+
+
+def run_jobs(args, jobs):
+    client = WorkerClient(args.host, args.port, args.job_timeout)
+    failed = 0
+    wall = time.perf_counter()
+    try:
+        for job in jobs:
+            t0 = time.perf_counter()
+            response = client.request(job)
+            print_response(response)
+            print(f"   Roundtrip: {time.perf_counter() - t0:.2f}s")
+            failed += 0 if response.get("ok") else 1
+    finally:
+        client.close()
+    print(f"\n{len(jobs)} Job(s) in {time.perf_counter() - wall:.1f}s, {failed} fehlgeschlagen")
+    return failed
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+
+    if args.command == "start":
+        if ping(args.host, args.port):
+            print(f"✅ Worker läuft bereits auf {args.host}:{args.port}")
+        else:
+            spawn_worker(args)
+        return
+
+    if args.command in ("stop", "stats"):
+        if not ping(args.host, args.port):
+            print(f"ℹ️  Kein Worker auf {args.host}:{args.port}")
+            return
+        client = WorkerClient(args.host, args.port, 30)
+        try:
+            response = client.request({"op": "shutdown" if args.command == "stop" else "stats"})
+        finally:
+            client.close()
+        if args.command == "stop":
+            print("🔴 Worker beendet")
+        else:
+            for key, value in response.items():
+                if key != "ok":
+                    print(f"   {key:<10} {value}")
+        return
+
+    print("=" * 60)
+    print("🧵 KAYA Blender-Worker")
+    print("=" * 60)
+    ensure_worker(args)
+    if args.command == "run":
+        jobs = load_jobs(args.jobs)
+    else:
+        jobs = [enhance_job(args, n + 1) for n in range(args.repeat)]
+    sys.exit(1 if run_jobs(args, jobs) else 0)
+
+
+if __name__ == "__main__":
+    main()
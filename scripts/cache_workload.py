@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Zipf-Lastprofil und Trefferquoten-Analyse für den Antwort-Cache
+
+Baut aus aufgezeichnetem Verkehr eine Anfrage-Verteilung:
+  - intensive_test_results_2025-10-29.json (detailedResults[].query)
+  - test-results-*.csv (Spalte Query/Message, falls vorhanden)
+  - Nutzer-Turns aus memory/*.json und kaya-api/memory/*.json
+
+test-results-20251026-170647.csv ist unbrauchbar: test-kaya-comprehensive.ps1
+hat Hashtables per Export-Csv geschrieben, die Datei enthält nur deren
+Eigenschaften (IsReadOnly, Keys, Values, Count, ...) statt der Anfragen.
+Sie bleibt in den Standardquellen, trägt aber 0 Anfragen bei und wird im
+Report (und im JSON unter "skipped") mit Grund als übersprungen geführt.
+
+Gleichbedeutende Formulierungen werden über german_text.tokenize (ohne
+Grußformeln) zu einem Anliegen zusammengefasst. Die Anliegen werden nach
+Häufigkeit gerankt und mit Zipf-Gewichten (rank^-s) gezogen; ein Teil der
+Anfragen kommt als Umformulierung (Gruß, Satzzeichen, Groß-/Kleinschreibung).
+
+Offline (Standard) wird cache_service.js nachgebildet (shouldCache,
+5 min / 24 h TTL) und mit drei Schlüsseln verglichen:
+  exakt            query.toLowerCase().trim()          (/chat, sessionId "default")
+  exakt+Session    dazu die sessionId                  (/api/chat)
+  normalisiert     sortierte Stammformen ohne Füllwörter
+Jeder Fehlgriff wird eingeordnet: kalt, TTL abgelaufen, andere Session oder
+nur andere Formulierung (= Normalisierung hätte getroffen).
+
+Mit --base wird dieselbe Last live gegen /chat geschickt und das cached-Flag
+ausgewertet ("identisch" = gleicher Text kurz vorher beantwortet, trotzdem
+kein Treffer).
+
+  python scripts/cache_workload.py --requests 20000 --zipf 1.1
+  python scripts/cache_workload.py --base http://localhost:3001 --requests 2000 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import bisect
+import csv
+import glob
+import json
+import os
+import random
+import time
+from collections import Counter
+
+import aiohttp
+
+from german_text import FOLD, cistem, tokenize
+from latency_stats import LatencyHistogram, format_header, format_row
+from session_replay import message_role, repair_text
+from upstream_standin import parse_distribution
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SOURCES = [
+    os.path.join(REPO_ROOT, "intensive_test_results_2025-10-29.json"),
+    os.path.join(REPO_ROOT, "test-results-20251026-170647.csv"),
+    os.path.join(REPO_ROOT, "memory"),
+    os.path.join(REPO_ROOT, "kaya-api", "memory"),
+]
+
+# cache_service.js
+FREQUENT_QUESTIONS = [
+    "kfz zulassen", "wohnsitz anmelden", "ausweis beantragen", "führerschein", "kita anmeldung",
+    "bürgergeld", "termin buchen", "kreistag", "bauantrag", "gewerbe anmelden", "jobcenter", "soziales",
+    "gesundheit", "umwelt", "jugend", "bildung", "landwirtschaft", "handwerk", "tourismus", "lieferanten",
+]
+LONG_CACHE_KEYWORDS = [
+    "kfz", "zulassung", "führerschein", "ausweis", "reisepass", "wohnsitz", "anmeldung", "abmeldung",
+    "bauantrag", "gewerbe", "kita", "schule", "bürgergeld", "grundsicherung", "termin", "öffnungszeiten",
+    "telefon", "kontakt", "kreistag", "sitzung", "ratsinfo",
+]
+TTL_SHORT = 5 * 60
+TTL_LONG = 24 * 60 * 60
+
+FILLER = frozenset(cistem(w.translate(FOLD)) for w in (
+    "moin", "hallo", "hi", "servus", "guten", "tag", "morgen", "abend", "bitte", "danke", "kaya", "mal", "gerne",
+))
+GREETINGS = ["Moin, ", "Hallo, ", "Moin! ", "Guten Tag, ", "Hallo KAYA, ", ""]
+ENDINGS = ["?", "", "??", " bitte", ".", "? Danke"]
+POLICIES = ("exakt", "exakt+Session", "normalisiert")
+MISS_KINDS = ("nicht cachebar", "kalt", "TTL", "andere Session", "identisch", "Formulierung")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Zipf-Last und Cache-Trefferquote für den KAYA-Antwort-Cache")
+    p.add_argument("--source", action="append", default=None,
+                   help="Quelle (JSON, CSV oder memory-Verzeichnis; mehrfach; Standard: aufgezeichneter Verkehr)")
+    p.add_argument("--requests", type=int, default=20000, help="Anzahl Anfragen (Standard: 20000)")
+    p.add_argument("--zipf", type=float, default=1.0, help="Zipf-Exponent s der Popularität (Standard: 1.0)")
+    p.add_argument("--paraphrase-rate", type=float, default=0.3,
+                   help="Anteil umformulierter Anfragen (Standard: 0.3)")
+    p.add_argument("--sessions", type=int, default=2000, help="Anzahl Nutzer-Sessions (Standard: 2000)")
+    p.add_argument("--rate", type=float, default=2.0, help="Anfragen pro Sekunde, simulierte Zeit (Standard: 2)")
+    p.add_argument("--window", type=int, default=2000, help="Anfragen pro Zeitfenster im Verlauf (Standard: 2000)")
+    p.add_argument("--hit-latency", default="lognormal:5:0.5", help="Latenz Treffer in ms (Standard: lognormal:5:0.5)")
+    p.add_argument("--miss-latency", default="lognormal:1800:0.6",
+                   help="Latenz Fehlgriff/LLM in ms (Standard: lognormal:1800:0.6)")
+    p.add_argument("--cost-per-miss", type=float, default=0.002, help="Kosten pro LLM-Aufruf in EUR (Standard: 0.002)")
+    p.add_argument("--seed", type=int, default=1, help="Seed (Standard: 1)")
+    p.add_argument("--base", default=None, help="Live gegen diesen Server (z. B. http://localhost:3001)")
+    p.add_argument("--concurrency", type=int, default=10, help="Parallele Anfragen im Live-Modus (Standard: 10)")
+    p.add_argument("--json", dest="json_out", default=None, help="Ergebnis als JSON speichern")
+    return p.parse_args()
+
+
+# --- Verkehr laden ----------------------------------------------------------
+
+POWERSHELL_HASHTABLE = {"Keys", "Values", "SyncRoot", "Count"}
+
+
+def load_queries(sources):
+    """Counter roher Anfragetexte, Anzahl pro Quelle und übersprungene Quellen mit Grund"""
+    queries = Counter()
+    per_source = {}
+    skipped = {}
+    for source in sources:
+        before = sum(queries.values())
+        name = os.path.relpath(source, REPO_ROOT)
+        if os.path.isdir(source):
+            for path in sorted(glob.glob(os.path.join(source, "*.json"))):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                for message in (data.get("messages") or []) if isinstance(data, dict) else []:
+                    role, text = message_role(message)
+                    if role == "user" and text.strip():
+                        queries[repair_text(text.strip())] += 1
+        elif source.endswith(".csv"):
+            with open(source, "r", encoding="utf-8-sig", newline="") as f:
+                reader = csv.DictReader(f)
+                fields = reader.fieldnames or []
+                column = next((c for c in fields if c.lower() in ("query", "message", "frage")), None)
+                if column is None:
+                    if POWERSHELL_HASHTABLE <= set(fields):
+                        skipped[name] = "PowerShell-Hashtable-Export ohne Anfragetexte"
+                    else:
+                        skipped[name] = "keine Spalte Query/Message"
+                    continue
+                for row in reader:
+                    if (row.get(column) or "").strip():
+                        queries[row[column].strip()] += 1
+        elif os.path.exists(source):
+            with open(source, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for result in data.get("detailedResults") or data.get("results") or []:
+                if (result.get("query") or "").strip():
+                    queries[result["query"].strip()] += 1
+        else:
+            skipped[name] = "nicht gefunden"
+            continue
+        per_source[name] = sum(queries.values()) - before
+    return queries, per_source, skipped
+
+
+def canonical(text):
+    """Normalisierter Cache-Schlüssel: sortierte Stammformen ohne Grußformeln"""
+    terms = sorted(set(t for t in tokenize(text) if t not in FILLER))
+    return " ".join(terms) if terms else text.lower().strip()
+
+
+def exact_key(text):
+    return text.lower().strip()
+
+
+class Workload:
+    """Anliegen mit Zipf-Gewichten nach beobachtetem Rang; liefert (Text, sessionId)"""
+
+    def __init__(self, queries, zipf, paraphrase_rate, sessions, seed):
+        intents = {}
+        for text, count in queries.items():
+            intent = intents.setdefault(canonical(text), Counter())
+            intent[text] += count
+        ranked = sorted(intents.items(), key=lambda item: (-sum(item[1].values()), item[0]))
+        self.intents = [list(variants.items()) for _, variants in ranked]
+        self.cumulative = []
+        total = 0.0
+        for rank in range(1, len(self.intents) + 1):
+            total += rank ** -zipf
+            self.cumulative.append(total)
+        self.paraphrase_rate = paraphrase_rate
+        self.sessions = sessions
+        self.rng = random.Random(seed)
+
+    def paraphrase(self, text):
+        rng = self.rng
+        core = text.strip().rstrip("?!. ")
+        style = rng.random()
+        if style < 0.3:
+            core = core.lower()
+        elif style < 0.4:
+            core = core[:1].upper() + core[1:]
+        return rng.choice(GREETINGS) + core + rng.choice(ENDINGS)
+
+    def next(self):
+        rng = self.rng
+        index = bisect.bisect_left(self.cumulative, rng.random() * self.cumulative[-1])
+        variants = self.intents[min(index, len(self.intents) - 1)]
+        text = rng.choices([v for v, _ in variants], weights=[c for _, c in variants])[0]
+        if rng.random() < self.paraphrase_rate:
+            text = self.paraphrase(text)
+        return text, f"zipf-{rng.randrange(self.sessions)}"
+
+
+# --- Cache-Nachbildung ------------------------------------------------------
+
+def should_cache(query):
+    """cacheService.shouldCache"""
+    if not query or len(query.strip()) < 3:
+        return False
+    lower = query.lower().strip()
+    if any(f in lower or lower in f for f in FREQUENT_QUESTIONS):
+        return True
+    return len(query.split()) <= 6 and len(lower) < 100
+
+
+def cache_ttl(query):
+    """cacheService.shouldCacheLong -> 24 h, sonst 5 min"""
+    lower = query.lower().strip()
+    return TTL_LONG if any(k in lower for k in LONG_CACHE_KEYWORDS) else TTL_SHORT
+
+
+class TtlCache:
+    def __init__(self):
+        self.expires = {}
+
+    def lookup(self, key, now):
+        """'hit', 'expired' oder None"""
+        expires = self.expires.get(key)
+        if expires is None:
+            return None
+        if now > expires:
+            del self.expires[key]
+            return "expired"
+        return "hit"
+
+    def live(self, key, now):
+        expires = self.expires.get(key)
+        return expires is not None and now <= expires
+
+    def set(self, key, now, ttl):
+        self.expires[key] = now + ttl
+
+
+class PolicyStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = Counter()
+        self.windows = []
+        self.window_hits = 0
+        self.window_total = 0
+        self.hit_latency = LatencyHistogram()
+        self.miss_latency = LatencyHistogram()
+
+    def record(self, hit, kind, latency, window):
+        if hit:
+            self.hits += 1
+            self.window_hits += 1
+            self.hit_latency.record(latency)
+        else:
+            self.misses[kind] += 1
+            self.miss_latency.record(latency)
+        self.window_total += 1
+        if self.window_total == window:
+            self.close_window()
+
+    def close_window(self):
+        if self.window_total:
+            self.windows.append(self.window_hits / self.window_total)
+        self.window_hits = self.window_total = 0
+
+    @property
+    def total(self):
+        return self.hits + sum(self.misses.values())
+
+    def summary(self, cost_per_miss):
+        misses = sum(self.misses.values())
+        overall = LatencyHistogram()
+        overall.merge(self.hit_latency)
+        overall.merge(self.miss_latency)
+        return {
+            "requests": self.total,
+            "hit_ratio": self.hits / self.total if self.total else 0.0,
+            "misses": dict(self.misses),
+            "hit_ratio_windows": [round(w, 4) for w in self.windows],
+            "latency_hit": self.hit_latency.summary(),
+            "latency_miss": self.miss_latency.summary(),
+            "latency_all": overall.summary(),
+            "llm_cost_eur": round(misses * cost_per_miss, 4),
+        }
+
+
+class Classifier:
+    """Schatten-Caches, um Fehlgriffe einzuordnen (gleiche TTL-Regeln wie der echte Cache)"""
+
+    def __init__(self, same_text="andere Session"):
+        self.exact = TtlCache()
+        self.normalized = TtlCache()
+        self.same_text = same_text  # Live: gleicher Text kurz vorher beantwortet, trotzdem kein Treffer
+
+    def miss_kind(self, text, expired, now):
+        if expired:
+            return "TTL"
+        if self.exact.live(exact_key(text), now):
+            return self.same_text
+        if self.normalized.live(canonical(text), now):
+            return "Formulierung"
+        return "kalt"
+
+    def remember(self, text, now):
+        ttl = cache_ttl(text)
+        self.exact.set(exact_key(text), now, ttl)
+        self.normalized.set(canonical(text), now, ttl)
+
+
+def simulate(args, workload):
+    rng = random.Random(args.seed + 1)
+    hit_latency = parse_distribution(args.hit_latency)
+    miss_latency = parse_distribution(args.miss_latency)
+    keys = {
+        "exakt": lambda text, sid: exact_key(text),
+        "exakt+Session": lambda text, sid: exact_key(text) + "_" + json.dumps({"sessionId": sid})[:50],
+        "normalisiert": lambda text, sid: canonical(text),
+    }
+    caches = {name: TtlCache() for name in POLICIES}
+    stats = {name: PolicyStats() for name in POLICIES}
+    classifier = Classifier()
+    now = 0.0
+    for _ in range(args.requests):
+        now += rng.expovariate(args.rate)
+        text, sid = workload.next()
+        cacheable = should_cache(text)
+        for name in POLICIES:
+            if not cacheable:
+                stats[name].record(False, "nicht cachebar", miss_latency(rng), args.window)
+                continue
+            key = keys[name](text, sid)
+            state = caches[name].lookup(key, now)
+            if state == "hit":
+                stats[name].record(True, None, hit_latency(rng), args.window)
+                continue
+            stats[name].record(False, classifier.miss_kind(text, state == "expired", now), miss_latency(rng),
+                               args.window)
+            caches[name].set(key, now, cache_ttl(text))
+        if cacheable:
+            classifier.remember(text, now)
+    for s in stats.values():
+        s.close_window()
+    return stats
+
+
+async def replay_live(args, workload):
+    """Dieselbe Last gegen /chat; Treffer laut cached-Flag der Antwort"""
+    url = args.base.rstrip("/") + "/chat"
+    stats = PolicyStats()
+    classifier = Classifier(same_text="identisch")
+    items = [workload.next() for _ in range(args.requests)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    lock = asyncio.Lock()
+    t0 = time.perf_counter()
+    errors = Counter()
+
+    async def one(http, text):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async with http.post(url, json={"message": text}) as response:
+                    data = await response.json(content_type=None)
+                    if response.status != 200:
+                        errors[f"HTTP {response.status}"] += 1
+                        return
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                errors[type(e).__name__] += 1
+                return
+            latency = time.perf_counter() - start
+            now = time.perf_counter() - t0
+            async with lock:
+                cached = bool(data.get("cached"))
+                kind = None
+                if not cached:
+                    kind = classifier.miss_kind(text, False, now) if should_cache(text) else "nicht cachebar"
+                stats.record(cached, kind, latency, args.window)
+                if should_cache(text):
+                    classifier.remember(text, now)
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=args.concurrency)) as http:
+        await asyncio.gather(*(one(http, text) for text, _ in items))
+    stats.close_window()
+    return {"Server (/chat)": stats}, errors
+
+
+# --- Ausgabe ----------------------------------------------------------------
+
+def print_report(stats, args, workload):
+    print(f"\nAnliegen: {len(workload.intents)}  Anfragen: {args.requests}  Zipf s={args.zipf}  "
+          f"Umformulierungen: {args.paraphrase_rate:.0%}")
+    kinds = [k for k in MISS_KINDS if any(s.misses.get(k) for s in stats.values())]
+    print(f"\n{'Schlüssel':<16} {'Treffer':>8} " + " ".join(f"{k:>14}" for k in kinds) + f" {'LLM-Kosten':>11}")
+    for name, s in stats.items():
+        total = s.total or 1
+        cells = " ".join(f"{s.misses.get(k, 0) / total:>14.1%}" for k in kinds)
+        cost = sum(s.misses.values()) * args.cost_per_miss
+        print(f"{name:<16} {s.hits / total:>8.1%} {cells} {cost:>10.2f}€")
+
+    print(f"\nTrefferquote im Verlauf (je {args.window} Anfragen):")
+    for name, s in stats.items():
+        print(f"  {name:<16} " + " ".join(f"{w:>5.0%}" for w in s.windows))
+
+    print()
+    print(format_header(28))
+    for name, s in stats.items():
+        print(format_row(f"{name} Treffer", s.hit_latency, 28))
+        print(format_row(f"{name} Fehlgriff", s.miss_latency, 28))
+
+    if "exakt" in stats and "normalisiert" in stats:
+        exact, normalized = stats["exakt"], stats["normalisiert"]
+        phrasing = exact.misses.get("Formulierung", 0)
+        misses = sum(exact.misses.values())
+        print(f"\n💡 {phrasing / misses if misses else 0:.1%} der Fehlgriffe (exakt) sind nur andere Formulierungen; "
+              f"normalisierte Schlüssel: {exact.hits / exact.total:.1%} -> {normalized.hits / normalized.total:.1%} "
+              f"Treffer, {(sum(exact.misses.values()) - sum(normalized.misses.values())) * args.cost_per_miss:.2f}€ "
+              f"weniger LLM-Kosten")
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    print("=" * 60)
+    print("📈 KAYA Cache-Lastprofil (Zipf)")
+    print("=" * 60)
+
+    queries, per_source, skipped = load_queries(args.source or DEFAULT_SOURCES)
+    for source, count in per_source.items():
+        print(f"   {source}: {count} Anfragen")
+    for source, reason in skipped.items():
+        print(f"⚠️  {source}: übersprungen, 0 Anfragen ({reason})")
+    if not queries:
+        print("❌ Keine Anfragen gefunden")
+        raise SystemExit(1)
+    workload = Workload(queries, args.zipf, args.paraphrase_rate, args.sessions, args.seed)
+
+    errors = Counter()
+    if args.base:
+        print(f"\nLive: {args.base}/chat  Parallel: {args.concurrency}")
+        stats, errors = asyncio.run(replay_live(args, workload))
+        if errors:
+            print(f"❌ Fehler: {dict(errors)}")
+    else:
+        print(f"\nSimulation: {args.rate} Anfragen/s, {args.sessions} Sessions, "
+              f"Treffer {args.hit_latency} ms, Fehlgriff {args.miss_latency} ms")
+        stats = simulate(args, workload)
+
+    print_report(stats, args, workload)
+
+    if args.json_out:
+        result = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "config": {k: v for k, v in vars(args).items() if k != "json_out"},
+            "sources": per_source,
+            "skipped": skipped,
+            "intents": len(workload.intents),
+            "policies": {name: s.summary(args.cost_per_miss) for name, s in stats.items()},
+            "errors": dict(errors),
+        }
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 JSON gespeichert: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
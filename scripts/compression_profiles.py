@@ -0,0 +1,77 @@
+"""
+Benannte Draco-/Quantisierungs-Profile für export_glb() in enhance_glb.py
+
+Profile liegen in compression_profiles.json neben diesem Skript und werden von
+draco_sweep.py (Autotuner) geschrieben. "default" entspricht den bisherigen
+Export-Einstellungen (Level 5, Blender-Standard-Quantisierung).
+
+Usage:
+  python scripts/compression_profiles.py            # alle Profile anzeigen
+"""
+
+import json
+import os
+import tempfile
+
+PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "compression_profiles.json")
+
+DEFAULT_PROFILE = {
+    "draco_level": 5,      # Balance zwischen Qualität und Größe
+    "position_bits": 14,
+    "normal_bits": 10,
+    "texcoord_bits": 12,
+}
+
+PROFILE_KEYS = list(DEFAULT_PROFILE)
+
+
+def load_profiles(path=PROFILES_PATH):
+    """{Name: Profil} aus der JSON-Datei ("default" ist immer vorhanden)"""
+    profiles = {"default": dict(DEFAULT_PROFILE)}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            profiles.update(json.load(f))
+    return profiles
+
+
+def load_profile(name="default", path=PROFILES_PATH):
+    """Ein Profil (nur die Export-Einstellungen); KeyError bei unbekanntem Namen"""
+    profiles = load_profiles(path)
+    if name not in profiles:
+        raise KeyError(f"Kompressions-Profil '{name}' nicht gefunden (vorhanden: {', '.join(sorted(profiles))})")
+    profile = profiles[name]
+    return {key: int(profile.get(key, DEFAULT_PROFILE[key])) for key in PROFILE_KEYS}
+
+
+def save_profile(name, profile, info=None, path=PROFILES_PATH):
+    """Profil (plus Messwerte in info) unter name speichern (atomar)"""
+    profiles = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            profiles = json.load(f)
+    entry = {key: int(profile[key]) for key in PROFILE_KEYS}
+    if info:
+        entry["measured"] = info
+    profiles[name] = entry
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def describe(profile):
+    return (f"Level {profile['draco_level']}, Bits P{profile['position_bits']}/"
+            f"N{profile['normal_bits']}/UV{profile['texcoord_bits']}")
+
+
+def main():
+    """Alle Profile anzeigen"""
+    for name, profile in sorted(load_profiles().items()):
+        measured = profile.get("measured", {})
+        extra = f"  ({measured['bytes'] / (1024 * 1024):.2f} MB)" if "bytes" in measured else ""
+        print(f"🧩 {name:<16} {describe({k: profile.get(k, DEFAULT_PROFILE[k]) for k in PROFILE_KEYS})}{extra}")
+
+
+if __name__ == "__main__":
+    main()
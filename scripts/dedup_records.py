@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate-Zusammenführung der Crawler-Records (MinHash + LSH)
+
+Viele Records in kaya-crawler/data/processed sind fast gleich (Sitemap-
+Brotkrumen, "Datei nicht gefunden"-Seiten, Navigationsleisten). Ablauf:
+
+  1. plain_text normalisieren, Zeichen-5-Gramme als Shingles (crc32)
+  2. Boilerplate entfernen: Shingles, die in Records mit mindestens
+     BOILERPLATE_TITLES verschiedenen Titeln vorkommen (Navigationslisten,
+     Formular-Menüs), zählen nicht. Records ohne eigenen Text danach werden
+     nur mit wortgleichen Records desselben Titels zusammengeführt,
+     Platzhalter wie "Unbekannt" nie
+  3. MinHash-Signatur (NUM_PERM Permutationen, NumPy) pro Record
+  4. LSH-Banding: Records mit gleichem Band landen im selben Bucket -
+     Kandidaten in ungefähr linearer Zeit statt n² Vergleichen
+  5. Kandidaten mit exakter Jaccard-Ähnlichkeit >= --threshold bestätigen;
+     bei verschiedenen Titeln nur, wenn der Text fast gleich ist
+     (>= NEAR_EXACT). Union-Find bildet die Cluster
+  6. Pro Cluster bleibt der Record mit dem längsten Text; links, contacts
+     und forms aller Duplikate werden zusammengeführt, die Duplikate stehen
+     in metadata.merged (url + title)
+
+  python scripts/dedup_records.py
+  python scripts/dedup_records.py --in kaya-crawler/data/processed/all_agents_data_2025-10-29.json --threshold 0.85
+
+Standardmäßig nur innerhalb eines Agenten (--cross-agent für das ganze Korpus).
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PROCESSED = os.path.join(REPO_ROOT, "kaya-crawler", "data", "processed")
+
+SHINGLE = 5
+NUM_PERM = 128
+BANDS = 32            # 32 Bänder à 4 Zeilen: Kandidat ab ca. 0.42 Jaccard, bei J = 0.8 praktisch sicher
+# Größte Primzahl < 2^32: a, b, x < p -> a*x + b < p^2 < 2^64, kein uint64-Überlauf
+PRIME = (1 << 32) - 5
+NEAR_EXACT = 0.95      # Mindest-Jaccard, wenn sich die Titel unterscheiden
+BOILERPLATE_TITLES = 3  # Shingle in so vielen verschieden betitelten Records = Boilerplate
+PLACEHOLDER_TEXTS = {"", "unbekannt"}  # Crawler-Platzhalter ohne Inhalt: nie zusammenführen
+CHECK_JACCARD = (0.2, 0.33, 0.5, 0.8, 0.9)
+CHECK_PAIRS = 200
+CHECK_TOLERANCE = 0.03
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Near-Duplicates im Crawler-Korpus zusammenführen (MinHash/LSH)")
+    p.add_argument("--in", dest="inp", default=None,
+                   help="Korpus-Datei ({Agent: [Records]} oder Liste; Standard: neueste *_validated.json)")
+    p.add_argument("--out", default=None, help="Ausgabe (Standard: <in>_dedup.json)")
+    p.add_argument("--report", default=None, help="Report als JSON speichern")
+    p.add_argument("--threshold", type=float, default=0.8, help="Jaccard-Schwelle (Standard: 0.8)")
+    p.add_argument("--cross-agent", action="store_true", help="Auch über Agenten-Grenzen hinweg zusammenführen")
+    p.add_argument("--seed", type=int, default=1, help="Seed der MinHash-Permutationen (Standard: 1)")
+    p.add_argument("--check", action="store_true",
+                   help="Nur prüfen, ob die Signatur-Übereinstimmung die Jaccard-Ähnlichkeit trifft")
+    return p.parse_args()
+
+
+def default_input():
+    files = sorted(glob.glob(os.path.join(DEFAULT_PROCESSED, "all_agents_data_*_validated.json")))
+    if not files:
+        files = sorted(glob.glob(os.path.join(DEFAULT_PROCESSED, "all_agents_data_*.json")))
+    if not files:
+        raise FileNotFoundError(f"Kein all_agents_data_*.json in {DEFAULT_PROCESSED}")
+    return files[-1]
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", (text or "").lower()).strip()
+
+
+def shingles(text):
+    """Menge der crc32-Hashes aller Zeichen-5-Gramme (kurze Texte: der ganze Text)"""
+    text = normalize(text)
+    if len(text) <= SHINGLE:
+        return {zlib.crc32(text.encode("utf-8"))}
+    data = text.encode("utf-8")
+    return {zlib.crc32(data[i:i + SHINGLE]) for i in range(len(data) - SHINGLE + 1)}
+
+
+def strip_boilerplate(shingle_sets, titles, scopes, min_titles=BOILERPLATE_TITLES):
+    """Shingles entfernen, die innerhalb eines Bereichs (Agent bzw. Korpus) in
+    Records mit mindestens min_titles verschiedenen Titeln vorkommen
+
+    Gleicher Text unter verschiedenen Titeln ist Seitenrahmen, kein Inhalt;
+    echte Duplikate (dieselbe Seite unter mehreren URLs) teilen den Titel.
+    """
+    seen = {}
+    for shingle_set, title, scope in zip(shingle_sets, titles, scopes):
+        for shingle in shingle_set:
+            seen.setdefault((scope, shingle), set()).add(title)
+    common = {key for key, owners in seen.items() if len(owners) >= min_titles}
+    return [{x for x in shingle_set if (scope, x) not in common}
+            for shingle_set, scope in zip(shingle_sets, scopes)]
+
+
+class MinHasher:
+    """h_i(x) = (a_i * x + b_i) mod p - NUM_PERM universelle Hash-Funktionen
+
+    a gleichverteilt aus [1, p), b aus [0, p): erst dann sind die Funktionen
+    paarweise unabhängig und der Anteil gleicher Signatur-Stellen schätzt
+    die Jaccard-Ähnlichkeit (siehe check_estimator).
+    """
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set):
+        x = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set)) % np.uint64(PRIME)
+        hashed = (x[:, None] * self.a[None, :] + self.b[None, :]) % np.uint64(PRIME)
+        return hashed.min(axis=0)
+
+
+def check_estimator(hasher, size=200, pairs=CHECK_PAIRS, seed=7):
+    """Mittlere Signatur-Übereinstimmung gegen bekannte Jaccard-Werte
+
+    Pro Ziel-Jaccard J werden Mengenpaare mit genau |A ∩ B| / |A ∪ B| = J
+    erzeugt; liefert [(J, mittlere Übereinstimmung, Standardabweichung)].
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for target in CHECK_JACCARD:
+        common = int(round(2 * size * target / (1 + target)))
+        agreement = []
+        for _ in range(pairs):
+            values = rng.choice(1 << 32, size=2 * size - common, replace=False).tolist()
+            a = set(values[:size])
+            b = set(values[:common]) | set(values[size:])
+            agreement.append(float(np.mean(hasher.signature(a) == hasher.signature(b))))
+        exact = common / float(2 * size - common)
+        rows.append((exact, float(np.mean(agreement)), float(np.std(agreement))))
+    return rows
+
+
+def lsh_candidates(signatures, bands=BANDS):
+    """Buckets gleicher Bänder -> Listen von Record-Indizes (nur Buckets mit > 1 Eintrag)"""
+    rows = signatures.shape[1] // bands
+    buckets = {}
+    for i, sig in enumerate(signatures):
+        for band in range(bands):
+            key = (band, sig[band * rows:(band + 1) * rows].tobytes())
+            buckets.setdefault(key, []).append(i)
+    return [members for members in buckets.values() if len(members) > 1]
+
+
+def jaccard(a, b):
+    return len(a & b) / float(len(a | b)) if (a or b) else 1.0
+
+
+class UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def cluster(shingle_sets, signatures, threshold, bands=BANDS, titles=None):
+    """Union-Find über bestätigte Kandidaten-Paare
+
+    Pro Bucket wird jeder Eintrag mit jedem anderen Cluster des Buckets
+    verglichen, bis ein Mitglied die Schwelle erreicht (dann Merge). Große
+    Buckets identischer Texte bleiben linear: der erste Vergleich trifft.
+    Mit titles gilt für Paare mit verschiedenem Titel NEAR_EXACT.
+    """
+    strict = max(threshold, NEAR_EXACT)
+    uf = UnionFind(len(shingle_sets))
+    compared = 0
+    for members in lsh_candidates(signatures, bands):
+        groups = {}
+        for i in members:
+            for root in list(groups):
+                if uf.find(root) == uf.find(i):
+                    continue
+                for other in groups[root]:
+                    compared += 1
+                    needed = threshold if titles is None or titles[i] == titles[other] else strict
+                    if jaccard(shingle_sets[i], shingle_sets[other]) >= needed:
+                        uf.union(i, other)
+                        break
+            root = uf.find(i)
+            merged = {}
+            for r, items in groups.items():
+                merged.setdefault(uf.find(r), []).extend(items)
+            merged.setdefault(root, []).append(i)
+            groups = merged
+    return uf, compared
+
+
+def merge_unique(target, items, key):
+    seen = {key(item) for item in target}
+    for item in items:
+        k = key(item)
+        if k not in seen:
+            seen.add(k)
+            target.append(item)
+
+
+def merge_cluster(records):
+    """Längster Text bleibt; links/contacts/forms zusammenführen, Duplikate in metadata.merged"""
+    keep = max(records, key=lambda r: (len(r.get("plain_text") or ""), r.get("url") or ""))
+    merged = json.loads(json.dumps(keep))
+    for field in ("links", "contacts", "forms"):
+        merged.setdefault(field, [])
+    others = [r for r in records if r is not keep]
+    for other in others:
+        merge_unique(merged["links"], other.get("links") or [], lambda link: link.get("url"))
+        merge_unique(merged["contacts"], other.get("contacts") or [],
+                     lambda c: (c.get("type"), c.get("value")) if isinstance(c, dict) else json.dumps(c))
+        merge_unique(merged["forms"], other.get("forms") or [], lambda form: json.dumps(form, sort_keys=True))
+    metadata = merged.setdefault("metadata", {})
+    metadata["merged"] = [{"url": r.get("url"), "title": r.get("title")} for r in others]
+    return merged
+
+
+def record_bytes(records):
+    return sum(len(json.dumps(r, ensure_ascii=False).encode("utf-8")) for r in records)
+
+
+def dedup_corpus(corpus, threshold=0.8, cross_agent=False, seed=1):
+    """{Agent: [Records]} -> (dedupliziertes Korpus, Report pro Agent)"""
+    items = [(agent, record) for agent, records in corpus.items() for record in records]
+    texts = [record.get("plain_text") or record.get("content") for _, record in items]
+    titles = [normalize(record.get("title")) for _, record in items]
+    scopes = [None if cross_agent else agent for agent, _ in items]
+    shingle_sets = strip_boilerplate([shingles(text) for text in texts], titles, scopes)
+    # Nur Records mit eigenem Inhalt sind Kandidaten; der Rest bleibt einzeln stehen
+    eligible = [i for i, text in enumerate(texts) if normalize(text) not in PLACEHOLDER_TEXTS and shingle_sets[i]]
+    sets = [shingle_sets[i] for i in eligible]
+    hasher = MinHasher(seed=seed)
+    signatures = np.stack([hasher.signature(s) for s in sets]) if sets else np.zeros((0, NUM_PERM), dtype=np.uint64)
+    if not cross_agent and sets:
+        # Agent in die Signatur mischen: Bänder verschiedener Agenten kollidieren nie
+        agent_salt = np.array([zlib.crc32(items[i][0].encode("utf-8")) for i in eligible], dtype=np.uint64)
+        signatures = signatures ^ agent_salt[:, None]
+    uf, compared = cluster(sets, signatures, threshold, titles=[titles[i] for i in eligible])
+
+    clusters = {i: [i] for i in range(len(items))}
+    for pos, i in enumerate(eligible):
+        root = eligible[uf.find(pos)]
+        if root != i:
+            clusters[root].append(clusters.pop(i)[0])
+    # Nur Boilerplate: dieselbe Seite unter mehreren URLs (gleicher Titel, gleicher Text)
+    exact = {}
+    for i, text in enumerate(texts):
+        if not shingle_sets[i] and normalize(text) not in PLACEHOLDER_TEXTS:
+            root = exact.setdefault((scopes[i], titles[i], normalize(text)), i)
+            if root != i:
+                clusters[root].append(clusters.pop(i)[0])
+
+    result = {agent: [] for agent in corpus}
+    for root in sorted(clusters):
+        members = clusters[root]
+        agent = items[root][0]
+        records = [items[i][1] for i in members]
+        result[agent].append(records[0] if len(records) == 1 else merge_cluster(records))
+
+    report = {}
+    for agent, records in corpus.items():
+        before, after = record_bytes(records), record_bytes(result[agent])
+        report[agent] = {"records_before": len(records), "records_after": len(result[agent]),
+                         "bytes_before": before, "bytes_after": after}
+    placeholders = sum(1 for text in texts if normalize(text) in PLACEHOLDER_TEXTS)
+    report_meta = {"pairs_compared": compared, "records": len(items), "clusters": len(clusters),
+                   "placeholders": placeholders, "boilerplate_only": len(items) - len(eligible) - placeholders}
+    return result, report, report_meta
+
+
+def load_corpus(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        grouped = {}
+        for record in data:
+            grouped.setdefault((record.get("metadata") or {}).get("agent", "unbekannt"), []).append(record)
+        return grouped, False
+    return data, True
+
+
+def print_report(report, meta):
+    print(f"\n{'Agent':<26} {'Records':>15} {'KB':>17} {'Ersparnis':>10}")
+    totals = [0, 0, 0, 0]
+    for agent, r in sorted(report.items(), key=lambda item: item[1]["bytes_after"] - item[1]["bytes_before"]):
+        saved = 1.0 - r["bytes_after"] / r["bytes_before"] if r["bytes_before"] else 0.0
+        print(f"{agent:<26} {r['records_before']:>6} -> {r['records_after']:<6} "
+              f"{r['bytes_before'] / 1024:>7.0f} -> {r['bytes_after'] / 1024:<7.0f} {saved:>9.1%}")
+        for i, key in enumerate(("records_before", "records_after", "bytes_before", "bytes_after")):
+            totals[i] += r[key]
+    saved = 1.0 - totals[3] / totals[2] if totals[2] else 0.0
+    print(f"{'GESAMT':<26} {totals[0]:>6} -> {totals[1]:<6} {totals[2] / 1024:>7.0f} -> {totals[3] / 1024:<7.0f} "
+          f"{saved:>9.1%}")
+    print(f"\nJaccard-Vergleiche: {meta['pairs_compared']} (statt {meta['records'] * (meta['records'] - 1) // 2} paarweise)")
+    print(f"Platzhalter (nie zusammengeführt): {meta['placeholders']}   "
+          f"nur Boilerplate (nur wortgleich mit gleichem Titel): {meta['boilerplate_only']}")
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    if args.check:
+        print("🔎 MinHash-Schätzer: mittlere Signatur-Übereinstimmung vs. exakte Jaccard-Ähnlichkeit")
+        ok = True
+        for exact, mean, sd in check_estimator(MinHasher(seed=args.seed)):
+            good = abs(mean - exact) <= CHECK_TOLERANCE
+            ok &= good
+            print(f"   J={exact:.3f}  Schätzung {mean:.3f} ± {sd:.3f}  {'✅' if good else '❌'}")
+        raise SystemExit(0 if ok else 1)
+    inp = args.inp or default_input()
+    outp = args.out or os.path.splitext(inp)[0] + "_dedup.json"
+
+    print("=" * 60)
+    print("🧹 Near-Duplicate-Zusammenführung (MinHash/LSH)")
+    print("=" * 60)
+    print(f"Eingabe: {inp}")
+    print(f"Schwelle: Jaccard >= {args.threshold}  {'über alle Agenten' if args.cross_agent else 'pro Agent'}")
+
+    corpus, grouped = load_corpus(inp)
+    result, report, meta = dedup_corpus(corpus, args.threshold, args.cross_agent, args.seed)
+    output = result if grouped else [record for records in result.values() for record in records]
+    with open(outp, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+
+    print_report(report, meta)
+    print(f"\n✅ Gespeichert: {outp}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"input": inp, "output": outp, "threshold": args.threshold,
+                       "cross_agent": args.cross_agent, "agents": report, **meta}, f, indent=2, ensure_ascii=False)
+        print(f"📄 Report: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
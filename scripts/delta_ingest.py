@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Inkrementelle Delta-Übernahme zwischen den täglichen Crawl-Snapshots
+
+Snapshots sind Datumsordner mit <agent>_data.json (ki_backend/2025-10-07,
+kaya-crawler/ki_backend/2025-10-10, ...) oder all_agents_data_*.json-Dateien.
+Statt jedes Mal das komplette Agenten-JSON neu aufzubauen, wird jeder Record
+per URL + Inhalts-Hash identifiziert und nur die Änderung weitergegeben:
+
+  - Dateien werden gestreamt gelesen (Record für Record, nie die ganze Datei)
+  - der Zustand hält nur {Agent: {Schlüssel: Hash}}, keine Records
+  - pro Snapshot entsteht ein Changeset added / modified / removed pro Agent
+
+  python scripts/delta_ingest.py                      # alle neuen Snapshots
+  python scripts/delta_ingest.py --dry-run            # nur anzeigen
+  python scripts/delta_ingest.py --snapshot kaya-crawler/ki_backend/2025-10-10
+
+Agenten ohne Datei im Snapshot gelten als nicht gecrawlt (Stand bleibt).
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_ROOTS = [
+    os.path.join(REPO_ROOT, "ki_backend"),
+    os.path.join(REPO_ROOT, "kaya-crawler", "ki_backend"),
+]
+DEFAULT_STATE = os.path.join(REPO_ROOT, "kaya-crawler", "data", "delta_state.json")
+DEFAULT_OUT_DIR = os.path.join(REPO_ROOT, "kaya-crawler", "data", "changesets")
+
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+AGENT_FILE = re.compile(r"^(?P<agent>.+?)_data(?:_\d{4}-\d{2}-\d{2})?\.json$")
+VOLATILE_METADATA = ("timestamp",)  # ändert sich bei jedem Crawl, kein Inhalt
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Changesets zwischen Crawl-Snapshots erzeugen")
+    p.add_argument("--snapshot", action="append", default=None,
+                   help="Snapshot-Ordner oder all_agents_data-Datei (mehrfach; Standard: alle unter ki_backend/)")
+    p.add_argument("--state", default=DEFAULT_STATE, help="Zustandsdatei mit den Fingerprints")
+    p.add_argument("--out-dir", default=DEFAULT_OUT_DIR, help="Zielordner der Changesets")
+    p.add_argument("--reset", action="store_true", help="Zustand verwerfen und von vorn beginnen")
+    p.add_argument("--dry-run", action="store_true", help="Nichts schreiben, nur Änderungen anzeigen")
+    return p.parse_args()
+
+
+class StreamDecodeError(ValueError):
+    pass
+
+
+class JsonStream:
+    """Minimaler inkrementeller JSON-Leser: liest die Datei in Blöcken und
+    dekodiert Werte einzeln mit raw_decode, ohne die ganze Datei zu laden"""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Nächstes Nicht-Leerzeichen (ohne es zu verbrauchen), '' am Dateiende"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise StreamDecodeError(f"'{char}' erwartet, '{self.peek()}' gefunden")
+        self.pos += 1
+
+    def value(self):
+        """Einen vollständigen JSON-Wert lesen (ggf. weitere Blöcke nachladen)"""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # Zahl/Literal am Pufferende könnte abgeschnitten sein
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise StreamDecodeError(str(e)) from e
+            if not self._fill():
+                self.eof = True
+
+    def items(self):
+        """Elemente eines Arrays an der aktuellen Position"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+    def members(self):
+        """(Schlüssel, Stream) eines Objekts - der Wert muss vom Aufrufer gelesen werden"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key, self
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+
+def iter_records(path):
+    """(Agent, Record) einer Snapshot-Datei - gestreamt
+
+    <agent>_data.json ist eine Liste, all_agents_data_*.json ein Objekt
+    {Agent: [Records]}. Andere Inhalte (crawl_stats.json) liefern nichts.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        stream = JsonStream(f)
+        first = stream.peek()
+        if first == "[":
+            match = AGENT_FILE.match(os.path.basename(path))
+            agent = match.group("agent") if match else os.path.splitext(os.path.basename(path))[0]
+            for record in stream.items():
+                if isinstance(record, dict):
+                    yield (record.get("metadata") or {}).get("agent") or agent, record
+        elif first == "{" and os.path.basename(path).startswith("all_agents_data"):
+            for agent, sub in stream.members():
+                if sub.peek() != "[":
+                    sub.value()
+                    continue
+                for record in sub.items():
+                    if isinstance(record, dict):
+                        yield agent, record
+
+
+def snapshot_files(snapshot):
+    """Agenten-Dateien eines Snapshots (Ordner) bzw. die Datei selbst"""
+    if os.path.isfile(snapshot):
+        return [snapshot]
+    return sorted(os.path.join(snapshot, name) for name in os.listdir(snapshot)
+                  if AGENT_FILE.match(name) or name.startswith("all_agents_data"))
+
+
+def snapshot_label(snapshot):
+    match = DATE_PATTERN.search(os.path.basename(snapshot.rstrip(os.sep)))
+    return match.group(0) if match else os.path.basename(snapshot.rstrip(os.sep))
+
+
+def discover_snapshots():
+    """Alle Datumsordner unter SNAPSHOT_ROOTS, chronologisch"""
+    found = []
+    for root in SNAPSHOT_ROOTS:
+        for path in glob.glob(os.path.join(root, "*")):
+            if os.path.isdir(path) and DATE_PATTERN.fullmatch(os.path.basename(path)):
+                found.append(path)
+    return sorted(found, key=lambda p: (snapshot_label(p), p))
+
+
+def content_hash(record):
+    """SHA-1 über den kanonischen Record ohne flüchtige Metadaten"""
+    metadata = record.get("metadata")
+    if isinstance(metadata, dict) and any(k in metadata for k in VOLATILE_METADATA):
+        record = dict(record, metadata={k: v for k, v in metadata.items() if k not in VOLATILE_METADATA})
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def record_key(record, seen):
+    """URL als Schlüssel; mehrfach vorkommende URLs werden durchnummeriert"""
+    url = record.get("url") or ""
+    n = seen.get(url, 0)
+    seen[url] = n + 1
+    return url if n == 0 else f"{url}#{n}"
+
+
+def diff_snapshot(state, snapshot):
+    """Snapshot gegen den Zustand vergleichen -> (Changeset, neue Fingerprints pro Agent)
+
+    Es werden nur geänderte Records im Speicher gehalten; für alle anderen
+    bleibt nur der Hash.
+    """
+    agents = {}
+    # Über alle Dateien des Snapshots: Records eines Agenten können aus mehreren
+    # Dateien kommen (metadata.agent), gleiche URLs brauchen trotzdem eigene Schlüssel
+    seen_per_agent = {}
+    for path in snapshot_files(snapshot):
+        for agent, record in iter_records(path):
+            fingerprints = agents.setdefault(agent, {"prints": {}, "added": [], "modified": []})
+            key = record_key(record, seen_per_agent.setdefault(agent, {}))
+            digest = content_hash(record)
+            fingerprints["prints"][key] = digest
+            old = state.get(agent, {}).get(key)
+            if old is None:
+                fingerprints["added"].append({"key": key, "hash": digest, "record": record})
+            elif old != digest:
+                fingerprints["modified"].append({"key": key, "hash": digest, "old_hash": old, "record": record})
+
+    changeset = {}
+    new_prints = {}
+    for agent, data in agents.items():
+        removed = [{"key": key, "old_hash": digest} for key, digest in state.get(agent, {}).items()
+                   if key not in data["prints"]]
+        changeset[agent] = {"added": data["added"], "modified": data["modified"], "removed": removed,
+                            "unchanged": len(data["prints"]) - len(data["added"]) - len(data["modified"])}
+        new_prints[agent] = data["prints"]
+    return changeset, new_prints
+
+
+def load_state(path, reset):
+    if reset or not os.path.exists(path):
+        return {"snapshots": [], "agents": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def print_changeset(changeset):
+    if not changeset:
+        print("   (keine Agenten-Dateien - nichts gecrawlt)")
+        return
+    print(f"   {'Agent':<26} {'neu':>6} {'geändert':>9} {'entfernt':>9} {'gleich':>7}")
+    for agent, c in sorted(changeset.items()):
+        print(f"   {agent:<26} {len(c['added']):>6} {len(c['modified']):>9} {len(c['removed']):>9} "
+              f"{c['unchanged']:>7}")
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    snapshots = args.snapshot or discover_snapshots()
+    state = load_state(args.state, args.reset)
+
+    print("=" * 60)
+    print("🔄 Delta-Übernahme der Crawl-Snapshots")
+    print("=" * 60)
+    print(f"Zustand: {args.state} ({len(state['snapshots'])} Snapshots übernommen)")
+
+    done = {entry["path"] for entry in state["snapshots"]}
+    pending = [s for s in snapshots if os.path.abspath(s) not in done]
+    if not pending:
+        print("\n✅ Keine neuen Snapshots")
+        return
+
+    for snapshot in pending:
+        label = snapshot_label(snapshot)
+        t0 = time.perf_counter()
+        changeset, new_prints = diff_snapshot(state["agents"], snapshot)
+        elapsed = time.perf_counter() - t0
+        total = sum(len(c["added"]) + len(c["modified"]) + len(c["removed"]) for c in changeset.values())
+        print(f"\n📦 {label}  ({snapshot})  {total} Änderungen in {elapsed * 1e3:.1f} ms")
+        print_changeset(changeset)
+
+        if args.dry_run:
+            state["agents"].update(new_prints)
+            continue
+        base = state["snapshots"][-1]["label"] if state["snapshots"] else None
+        out_path = os.path.join(args.out_dir, f"changeset_{label}.json")
+        save_json(out_path, {"snapshot": label, "base": base, "source": os.path.abspath(snapshot),
+                             "agents": changeset})
+        state["agents"].update(new_prints)
+        state["snapshots"].append({"label": label, "path": os.path.abspath(snapshot), "changeset": out_path,
+                                   "changes": total})
+        save_json(args.state, state)
+        print(f"   💾 {out_path}")
+
+    if args.dry_run:
+        print("\nℹ️  --dry-run: Zustand und Changesets nicht geschrieben")
+
+
+if __name__ == "__main__":
+    main()
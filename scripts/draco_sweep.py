@@ -0,0 +1,254 @@
+"""
+Draco-/Quantisierungs-Sweep und Autotuner für export_glb()
+
+Exportiert dieselbe getunte Szene über ein Grid aus Draco-Level und
+Quantisierungs-Bits (Position/Normale/UV), misst Export-Zeit, Dateigröße
+und geometrischen Fehler gegen den unkomprimierten Export und wählt die
+kleinste Datei innerhalb des Fehlerbudgets. Das Ergebnis wird als benanntes
+Profil in compression_profiles.json gespeichert und ist danach per
+`enhance_glb.py --keep-draco --draco-profile <name>` nutzbar.
+
+Läuft ohne Blender (reines Python); die Grid-Punkte werden auf N parallele
+Blender-Prozesse verteilt (draco_sweep_worker.py). Export-Zeiten sind unter
+Last gemessen - untereinander vergleichbar, nicht absolut.
+
+Usage:
+  python scripts/draco_sweep.py --in frontend/public/avatar/Kayanew_mouth.glb --name avatar
+  python scripts/draco_sweep.py --in avatar.glb --levels 5,7,10 --position-bits 12,14 --workers 4
+  python scripts/draco_sweep.py --in avatar.glb --max-position-error 2e-4 --report sweep.json --dry-run
+"""
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from compression_profiles import PROFILES_PATH, describe, save_profile
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "draco_sweep_worker.py")
+
+# Fehlerbudget (Standard): Position relativ zur Bounding-Box-Diagonale, Normale in Grad, UV in Textur-Einheiten
+MAX_POSITION_ERROR = 5e-4
+MAX_NORMAL_ERROR_DEG = 8.0
+MAX_UV_ERROR = 1.0 / 2048
+
+
+def int_list(text):
+    return [int(v) for v in text.split(",") if v.strip()]
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Sweep Draco/quantization settings and store the best profile")
+    p.add_argument("--in", dest="inp", required=True, help="Input GLB path")
+    p.add_argument("--micro", default=None, help="Skin micro normal map path (optional)")
+    p.add_argument("--levels", type=int_list, default=[1, 5, 7, 10], help="Draco-Level (0-10)")
+    p.add_argument("--position-bits", type=int_list, default=[11, 12, 14, 16], help="Quantisierung Position")
+    p.add_argument("--normal-bits", type=int_list, default=[8, 10], help="Quantisierung Normale")
+    p.add_argument("--texcoord-bits", type=int_list, default=[10, 12], help="Quantisierung UV")
+    p.add_argument("--max-position-error", type=float, default=MAX_POSITION_ERROR,
+                   help=f"Max. Positionsfehler relativ zur Diagonale (Standard: {MAX_POSITION_ERROR:g})")
+    p.add_argument("--max-normal-error", type=float, default=MAX_NORMAL_ERROR_DEG,
+                   help=f"Max. Normalen-Abweichung in Grad (Standard: {MAX_NORMAL_ERROR_DEG:g})")
+    p.add_argument("--max-uv-error", type=float, default=MAX_UV_ERROR,
+                   help=f"Max. UV-Abweichung (Standard: {MAX_UV_ERROR:g} = 1 Texel bei 2048)")
+    p.add_argument("--name", default="avatar", help="Profilname für compression_profiles.json")
+    p.add_argument("--profiles", default=PROFILES_PATH, help="Profil-Datei")
+    p.add_argument("--dry-run", action="store_true", help="Nur messen, Profil nicht speichern")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Anzahl Blender-Prozesse")
+    p.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender-Binary")
+    p.add_argument("--textures", action="store_true", help="Textur-Stufe wie enhance_glb.py --textures ausführen")
+    p.add_argument("--report", default="draco_sweep_report.json", help="JSON-Report-Pfad")
+    p.add_argument("--keep-files", default=None, help="Exporte in dieses Verzeichnis kopieren")
+    p.add_argument("--timeout", type=float, default=None, help="Max. Sekunden pro Worker-Prozess")
+    return p.parse_args()
+
+
+def build_grid(args):
+    """Alle Kombinationen als Profil-Dicts mit laufender id"""
+    grid = itertools.product(args.levels, args.position_bits, args.normal_bits, args.texcoord_bits)
+    return [{"id": i, "draco_level": lv, "position_bits": pb, "normal_bits": nb, "texcoord_bits": tb}
+            for i, (lv, pb, nb, tb) in enumerate(grid)]
+
+
+def within_budget(result, args):
+    return (result["ok"]
+            and result["position_error"] <= args.max_position_error
+            and result["normal_error_deg"] <= args.max_normal_error
+            and result["uv_error"] <= args.max_uv_error)
+
+
+def pick_best(results, args):
+    """Kleinste Datei im Budget (bei Gleichstand: schnellerer Export)"""
+    feasible = [r for r in results if within_budget(r, args)]
+    if not feasible:
+        return None
+    return min(feasible, key=lambda r: (r["bytes"], r["export_s"]))
+
+
+def read_results(path):
+    """Ergebnisse + Absturz-Kandidat (gestartet, aber nicht exportiert) aus einer Worker-Datei"""
+    results, started, exported = {}, [], set()
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                r = json.loads(line)
+                if "started" in r:
+                    started.append(r["started"])
+                elif "exported" in r:
+                    exported.add(r["exported"])
+                else:
+                    results[r["point"]["id"]] = r
+    crashed = next((pid for pid in started if pid not in exported), None)
+    return results, crashed
+
+
+def launch_worker(wid, launch, points, args, work_dir):
+    """Ein Blender-Prozess für die übergebenen Punkte; liefert (Ergebnisdatei, Exit-Code, Log)"""
+    base = os.path.join(work_dir, f"w{wid}_{launch}")
+    points_path, results_path = base + "_points.json", base + "_results.jsonl"
+    with open(points_path, "w", encoding="utf-8") as f:
+        json.dump(points, f)
+    cmd = [args.blender, "--background", "--factory-startup", "--python", WORKER_SCRIPT, "--",
+           "--in", args.inp, "--points", points_path, "--results", results_path,
+           "--work-dir", os.path.join(work_dir, f"w{wid}")]
+    if args.micro:
+        cmd += ["--micro", args.micro]
+    if args.textures:
+        cmd.append("--textures")
+    with open(base + ".log", "w", encoding="utf-8") as log:
+        try:
+            code = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT, timeout=args.timeout).returncode
+        except subprocess.TimeoutExpired:
+            code = "timeout"
+        except OSError as e:
+            code = f"start fehlgeschlagen: {e}"
+    return results_path, code, base + ".log"
+
+
+def run_worker(wid, points, args, work_dir):
+    """Arbeitet einen Anteil des Grids ab; nach einem Absturz geht es ohne den schuldigen Punkt weiter"""
+    done, pending, launch = {}, list(points), 0
+    while pending:
+        launch += 1
+        print(f"[worker {wid}] starte Blender für {len(pending)} Grid-Punkt(e)")
+        sys.stdout.flush()
+        results_path, code, log_path = launch_worker(wid, launch, pending, args, work_dir)
+        results, crashed = read_results(results_path)
+        done.update(results)
+        rest = [pt for pt in pending if pt["id"] not in results]
+        if not rest:
+            break
+        culprit = next((pt for pt in rest if pt["id"] == crashed), rest[0])
+        print(f"[worker {wid}] ❌ Blender beendet ({code}) bei {describe(culprit)} - siehe {log_path}")
+        done[culprit["id"]] = {"point": culprit, "ok": False, "error": f"Blender-Prozess beendet ({code})"}
+        pending = [pt for pt in rest if pt is not culprit]
+        if isinstance(code, str) and code.startswith("start"):
+            for pt in pending:
+                done[pt["id"]] = {"point": pt, "ok": False, "error": code}
+            break
+    return list(done.values())
+
+
+def print_table(results, best, args):
+    """Ergebnisse nach Größe sortiert; ✅ = im Budget, ⭐ = gewählt"""
+    print(f"\n{'':3}{'Level':>5} {'P':>3} {'N':>3} {'UV':>3} {'MB':>8} {'Export':>8} "
+          f"{'Pos-Fehler':>11} {'Normale°':>9} {'UV':>9}")
+    ok = sorted((r for r in results if r["ok"]), key=lambda r: r["bytes"])
+    for r in ok:
+        pt = r["point"]
+        mark = "⭐" if r is best else ("✅" if within_budget(r, args) else "  ")
+        print(f"{mark:<3}{pt['draco_level']:>5} {pt['position_bits']:>3} {pt['normal_bits']:>3} "
+              f"{pt['texcoord_bits']:>3} {r['bytes'] / (1024 * 1024):>8.2f} {r['export_s']:>7.2f}s "
+              f"{r['position_error']:>11.2e} {r['normal_error_deg']:>9.2f} {r['uv_error']:>9.2e}")
+    for r in results:
+        if not r["ok"]:
+            print(f"❌ {describe(r['point'])}: {r['error']}")
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    if not os.path.exists(args.inp):
+        print(f"❌ FEHLER: Datei nicht gefunden: {args.inp}")
+        sys.exit(2)
+    points = build_grid(args)
+    workers = max(1, min(args.workers, len(points)))
+
+    print("\n" + "="*60)
+    print("🧪 KAYA Draco-Sweep")
+    print("="*60)
+    print(f"Input:   {args.inp}")
+    print(f"Grid:    {len(points)} Punkte, {workers} Blender-Prozesse")
+    print(f"Budget:  Position {args.max_position_error:g}, Normale {args.max_normal_error:g}°, "
+          f"UV {args.max_uv_error:g}")
+    print("="*60)
+    sys.stdout.flush()
+
+    t0 = time.perf_counter()
+    work_dir = tempfile.mkdtemp(prefix="kaya_draco_sweep_")
+    try:
+        shards = [points[i::workers] for i in range(workers)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            chunks = pool.map(lambda wp: run_worker(wp[0], wp[1], args, work_dir), enumerate(shards))
+            results = [r for chunk in chunks for r in chunk]
+        if args.keep_files:
+            os.makedirs(args.keep_files, exist_ok=True)
+            for wid in range(workers):
+                shard_dir = os.path.join(work_dir, f"w{wid}")
+                for name in os.listdir(shard_dir) if os.path.isdir(shard_dir) else []:
+                    shutil.copyfile(os.path.join(shard_dir, name), os.path.join(args.keep_files, name))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    wall = time.perf_counter() - t0
+
+    results.sort(key=lambda r: r["point"]["id"])
+    best = pick_best(results, args)
+    print_table(results, best, args)
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "input": args.inp,
+        "workers": workers,
+        "wall_time_s": round(wall, 3),
+        "budget": {"position_error": args.max_position_error, "normal_error_deg": args.max_normal_error,
+                   "uv_error": args.max_uv_error},
+        "best": best,
+        "results": results,
+    }
+    report_dir = os.path.dirname(args.report)
+    if report_dir:
+        os.makedirs(report_dir, exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("\n" + "="*60)
+    if best is None:
+        print("❌ Kein Grid-Punkt im Fehlerbudget - Budget lockern oder mehr Bits testen")
+        print(f"📄 Report: {args.report}")
+        print("="*60)
+        sys.exit(1)
+    saving = 1.0 - best["bytes"] / best["reference_bytes"] if best.get("reference_bytes") else 0.0
+    print(f"⭐ {describe(best['point'])}: {best['bytes'] / (1024 * 1024):.2f} MB "
+          f"({saving * 100:.0f}% kleiner als unkomprimiert), {len(points)} Punkte in {wall:.1f}s")
+    if not args.dry_run:
+        info = {k: best[k] for k in ("bytes", "reference_bytes", "export_s", "position_error",
+                                     "normal_error_deg", "uv_error")}
+        info.update(source=os.path.basename(args.inp), date=report["generated_at"][:10], budget=report["budget"])
+        save_profile(args.name, best["point"], info, args.profiles)
+        print(f"💾 Profil '{args.name}' gespeichert: {args.profiles}")
+        print(f"   Nutzung: enhance_glb.py ... --keep-draco --draco-profile {args.name}")
+    print(f"📄 Report: {args.report}")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Blender-Worker für draco_sweep.py - exportiert Grid-Punkte und misst den Fehler
+
+Wird von draco_sweep.py gestartet (ein Prozess pro Anteil des Grids):
+  blender --background --factory-startup --python scripts/draco_sweep_worker.py -- \\
+      --in avatar.glb --points points.json --results results.jsonl --work-dir tmp/
+
+Ablauf: Szene einmal importieren + tunen (wie enhance_glb.py), unkomprimierte
+Referenz exportieren, dann jeden Grid-Punkt exportieren (Zeit + Größe).
+Danach wird jede Datei wieder importiert (Blenders Draco-Decoder) und
+Ecke für Ecke mit der Referenz verglichen: Position (Hausdorff, relativ zur
+Bounding-Box-Diagonale), Normalen-Winkel und UV-Abstand.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import bpy
+import numpy as np
+from mathutils import Matrix
+from mathutils.kdtree import KDTree
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from enhance_glb import clean_scene, export_glb, import_glb, process_textures, tune_materials  # noqa: E402
+
+# Stichprobe je Richtung: genug für stabile Maxima, klein genug für Sekunden pro Punkt
+MAX_SAMPLES = 20000
+NEIGHBOURS = 16  # Kandidaten gleicher Position (Naht-Ecken haben mehrere UVs/Normalen)
+
+
+def parse_args():
+    """Parse command line arguments"""
+    argv = sys.argv
+    if "--" in argv:
+        argv = argv[argv.index("--") + 1:]
+    p = argparse.ArgumentParser(description="Draco sweep worker (runs inside Blender)")
+    p.add_argument("--in", dest="inp", required=True, help="Input GLB path")
+    p.add_argument("--micro", default=None, help="Skin micro normal map path (optional)")
+    p.add_argument("--points", required=True, help="JSON-Liste der Grid-Punkte (Profil-Dicts mit 'id')")
+    p.add_argument("--results", required=True, help="JSON-Lines-Datei für die Messwerte")
+    p.add_argument("--work-dir", required=True, help="Verzeichnis für Referenz und Exporte")
+    p.add_argument("--textures", action="store_true", help="Textur-Stufe ausführen")
+    return p.parse_args(argv)
+
+
+def scene_corners():
+    """Alle Ecken (Loops) der Szene in Weltkoordinaten: (Positionen, Normalen, UVs)"""
+    positions, normals, uvs = [], [], []
+    for obj in bpy.data.objects:
+        if obj.type != "MESH" or not obj.data.loops:
+            continue
+        mesh = obj.data
+        n_loops = len(mesh.loops)
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        vidx = np.empty(n_loops, dtype=np.int64)
+        mesh.loops.foreach_get("vertex_index", vidx)
+        if hasattr(mesh, "corner_normals"):  # Blender 4.1+
+            nor = np.empty(n_loops * 3, dtype=np.float32)
+            mesh.corner_normals.foreach_get("vector", nor)
+        else:
+            mesh.calc_normals_split()
+            nor = np.empty(n_loops * 3, dtype=np.float32)
+            mesh.loops.foreach_get("normal", nor)
+        uv = np.zeros(n_loops * 2, dtype=np.float32)
+        if mesh.uv_layers.active:
+            mesh.uv_layers.active.data.foreach_get("uv", uv)
+
+        world = np.array(obj.matrix_world, dtype=np.float64)
+        normal_matrix = np.array(Matrix(obj.matrix_world.to_3x3()).inverted_safe().transposed(), dtype=np.float64)
+        pos = co.reshape(-1, 3)[vidx] @ world[:3, :3].T + world[:3, 3]
+        nor = nor.reshape(-1, 3) @ normal_matrix.T
+        nor /= np.maximum(np.linalg.norm(nor, axis=1, keepdims=True), 1e-12)
+        positions.append(pos)
+        normals.append(nor)
+        uvs.append(uv.reshape(-1, 2))
+    if not positions:
+        return np.zeros((0, 3)), np.zeros((0, 3)), np.zeros((0, 2))
+    return np.concatenate(positions), np.concatenate(normals), np.concatenate(uvs)
+
+
+def build_tree(positions):
+    tree = KDTree(len(positions))
+    for i, co in enumerate(positions):
+        tree.insert(co, i)
+    tree.balance()
+    return tree
+
+
+def sample(n, rng):
+    return np.arange(n) if n <= MAX_SAMPLES else np.sort(rng.choice(n, MAX_SAMPLES, replace=False))
+
+
+def directed_error(src, dst, dst_tree, rng):
+    """Fehler von src-Ecken zur jeweils passendsten dst-Ecke gleicher Position
+
+    Liefert (max. Positionsabstand, RMS Positionsabstand, max. Normalen-Winkel°, max. UV-Abstand).
+    """
+    src_pos, src_nor, src_uv = src
+    _, dst_nor, dst_uv = dst
+    pos_err, nor_err, uv_err = [], [], []
+    for i in sample(len(src_pos), rng):
+        hits = dst_tree.find_n(src_pos[i], NEIGHBOURS)
+        best = hits[0][2]
+        cands = np.array([index for _, index, dist in hits if dist <= best * 1.5 + 1e-9])
+        pos_err.append(best)
+        cos = np.clip(dst_nor[cands] @ src_nor[i], -1.0, 1.0)
+        nor_err.append(np.degrees(np.arccos(cos.max())))
+        uv_err.append(np.linalg.norm(dst_uv[cands] - src_uv[i], axis=1).min())
+    pos_err = np.asarray(pos_err)
+    return pos_err.max(), float(np.sqrt(np.mean(pos_err ** 2))), max(nor_err), max(uv_err)
+
+
+def measure(ref, ref_tree, diag, path):
+    """Datei importieren und symmetrisch mit der Referenz vergleichen"""
+    rng = np.random.default_rng(0)
+    clean_scene()
+    import_glb(path)
+    test = scene_corners()
+    if not len(test[0]):
+        raise RuntimeError(f"Keine Geometrie nach Import: {path}")
+    test_tree = build_tree(test[0])
+    a = directed_error(test, ref, ref_tree, rng)
+    b = directed_error(ref, test, test_tree, rng)
+    return {
+        "position_error": float(max(a[0], b[0]) / diag),
+        "position_rms": float(max(a[1], b[1]) / diag),
+        "normal_error_deg": float(max(a[2], b[2])),
+        "uv_error": float(max(a[3], b[3])),
+    }
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    with open(args.points, "r", encoding="utf-8") as f:
+        points = json.load(f)
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    # 1) Szene wie enhance_glb.py vorbereiten, Referenz + alle Grid-Punkte exportieren
+    clean_scene()
+    import_glb(args.inp)
+    tune_materials(args.micro)
+    if args.textures:
+        process_textures()
+    reference = os.path.join(args.work_dir, "reference.glb")
+    if not export_glb(reference, False):
+        raise RuntimeError("Referenz-Export fehlgeschlagen")
+
+    exports = []
+    with open(args.results, "a", encoding="utf-8") as out:
+        for point in points:
+            # Marker: stürzt Blender beim Export ab, weiß draco_sweep.py welcher Punkt es war
+            out.write(json.dumps({"started": point["id"]}) + "\n")
+            out.flush()
+            path = os.path.join(args.work_dir, f"point_{point['id']}.glb")
+            t0 = time.perf_counter()
+            ok = export_glb(path, point)
+            exports.append((point, path, ok, time.perf_counter() - t0))
+            out.write(json.dumps({"exported": point["id"]}) + "\n")
+            out.flush()
+
+    # 2) Fehler gegen die Referenz messen (Import in leere Szene)
+    clean_scene()
+    import_glb(reference)
+    ref = scene_corners()
+    ref_tree = build_tree(ref[0])
+    diag = float(np.linalg.norm(ref[0].max(axis=0) - ref[0].min(axis=0))) or 1.0
+    ref_bytes = os.path.getsize(reference)
+
+    with open(args.results, "a", encoding="utf-8") as out:
+        for point, path, ok, export_s in exports:
+            result = {"point": point, "export_s": round(export_s, 3), "reference_bytes": ref_bytes,
+                      "ok": ok, "error": None}
+            try:
+                if not ok:
+                    raise RuntimeError("Export fehlgeschlagen")
+                result["bytes"] = os.path.getsize(path)
+                result.update(measure(ref, ref_tree, diag, path))
+            except Exception as e:
+                result.update(ok=False, error=str(e))
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
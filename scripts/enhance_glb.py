@@ -5,8 +5,15 @@ Optimiert Materialien, aktiviert Draco-Kompression, exportiert in einem Schritt
 import bpy
 import sys
 import argparse
-import re
+import hashlib
+import json
 import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from asset_cache import AssetCache, DEFAULT_CACHE_DIR, enhance_glb_key, hash_file  # noqa: E402
+from compression_profiles import DEFAULT_PROFILE, describe, load_profile  # noqa: E402
+from material_presets import match_preset  # noqa: E402
 
 def parse_args():
     """Parse command line arguments"""
@@ -15,11 +22,66 @@ def parse_args():
         argv = argv[argv.index("--") + 1:]
     
     p = argparse.ArgumentParser(description="Enhance GLB for HD production")
-    p.add_argument("--in", dest="inp", required=True, help="Input GLB path")
-    p.add_argument("--out", dest="outp", required=True, help="Output GLB path")
+    p.add_argument("--in", dest="inp", default=None, help="Input GLB path")
+    p.add_argument("--out", dest="outp", default=None, help="Output GLB path")
     p.add_argument("--micro", dest="micro", default=None, help="Skin micro normal map path (optional)")
     p.add_argument("--keep-draco", action="store_true", help="Enable Draco mesh compression")
-    return p.parse_args(argv)
+    p.add_argument("--draco-profile", default="default",
+                   help="Kompressions-Profil aus compression_profiles.json (siehe draco_sweep.py)")
+    p.add_argument("--quantize", action="store_true",
+                   help="Attribute + Morph-Deltas nach dem Export quantisieren (KHR_mesh_quantization, statt Draco)")
+    p.add_argument("--sparse-morphs", action="store_true",
+                   help="Morph Targets nach dem Export als Sparse-Accessoren speichern")
+    p.add_argument("--sparse-epsilon", type=float, default=None,
+                   help="Deltas unterhalb dieses Betrags verwerfen (Standard: glb_sparse_morphs.DEFAULT_EPSILON)")
+    p.add_argument("--textures", action="store_true",
+                   help="Textur-Stufe ausführen (Deduplizierung, Auflösungs-Limits, Transcoding; Standard: aus)")
+    p.add_argument("--texture-format", default="AUTO", choices=["AUTO", "JPEG", "WEBP"],
+                   help="Zielformat eingebetteter Texturen (AUTO = Quellformat beibehalten)")
+    p.add_argument("--texture-quality", type=int, default=90, help="JPEG/WebP-Qualität 0-100")
+    p.add_argument("--texture-workers", type=int, default=None,
+                   help="Threads für das Textur-Resampling (Standard: alle Kerne)")
+    p.add_argument("--lods", default=None,
+                   help="LOD-Kette als Dreiecks-Budgets in Prozent, z. B. 100,50,25 (schreibt <out>_lod<i>.glb + Manifest)")
+    p.add_argument("--force", action="store_true", help="Build-Cache ignorieren und neu bauen")
+    p.add_argument("--no-cache", action="store_true", help="Build-Cache weder lesen noch schreiben")
+    p.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Verzeichnis des Build-Caches")
+    p.add_argument("--cache-max-mb", type=float, default=None, help="Max. Cache-Größe in MB (LRU)")
+    p.add_argument("--jobs", default=None,
+                   help="Worker-Modus: JSON-Liste [{\"in\": ..., \"out\": ...}] in einem Blender-Prozess abarbeiten")
+    p.add_argument("--results", default=None,
+                   help="Worker-Modus: JSON-Lines-Datei, pro Asset eine Ergebniszeile")
+    args = p.parse_args(argv)
+    if args.jobs:
+        if not args.results:
+            p.error("--jobs benötigt --results")
+    elif not (args.inp and args.outp):
+        p.error("--in und --out sind erforderlich (oder --jobs für den Worker-Modus)")
+    if args.quantize and args.keep_draco:
+        p.error("--quantize und --keep-draco schließen sich aus")
+    if args.keep_draco:
+        # Ab hier: Profil-Dict statt True (Draco-Level + Quantisierungs-Bits)
+        try:
+            args.keep_draco = load_profile(args.draco_profile)
+        except KeyError as e:
+            p.error(str(e))
+    if args.sparse_morphs and args.sparse_epsilon is None:
+        from glb_sparse_morphs import DEFAULT_EPSILON
+        args.sparse_epsilon = DEFAULT_EPSILON
+    elif not args.sparse_morphs:
+        args.sparse_epsilon = None
+    args.textures = None if not args.textures else {
+        "format": args.texture_format,
+        "quality": args.texture_quality,
+        "workers": args.texture_workers,
+    }
+    if args.lods:
+        from lod_tools import parse_lods
+        try:
+            args.lods = parse_lods(args.lods)
+        except ValueError as e:
+            p.error(str(e))
+    return args
 
 def clean_scene():
     """Reset scene to factory settings"""
@@ -28,8 +90,7 @@ def clean_scene():
 def import_glb(path):
     """Import GLB file"""
     if not os.path.exists(path):
-        print(f"❌ FEHLER: Datei nicht gefunden: {path}")
-        sys.exit(1)
+        raise FileNotFoundError(f"Datei nicht gefunden: {path}")
     print(f"📦 Importiere GLB: {path}")
     bpy.ops.import_scene.gltf(filepath=path)
     print(f"✅ GLB importiert")
@@ -61,13 +122,7 @@ def link_normal_to_principled(mat, img_node):
         nt.links.new(bump.outputs["Normal"], principled.inputs["Normal"])
 
 def tune_materials(micro_path):
-    """Optimize materials for HD/photoreal rendering"""
-    skin_re = re.compile(r"(skin|face|head|neck)", re.I)
-    hair_re = re.compile(r"(hair)", re.I)
-    eye_re = re.compile(r"(eye|iris|cornea)", re.I)
-    tooth_re = re.compile(r"(tooth|teeth|gum|mouth)", re.I)
-    cloth_re = re.compile(r"(cloth|fabric|sweater|hoodie)", re.I)
-    
+    """Optimize materials for HD/photoreal rendering (Presets: material_presets.py)"""
     tuned_count = 0
     
     for mat in bpy.data.materials:
@@ -75,57 +130,142 @@ def tune_materials(micro_path):
         if not p:
             continue
         
-        name = (mat.name or "").lower()
-        
-        # --- SKIN ---
-        if skin_re.search(name):
-            p.inputs["Metallic"].default_value = 0.0
-            p.inputs["Roughness"].default_value = 0.42
-            p.inputs["Specular"].default_value = 0.6
-            p.inputs["Subsurface"].default_value = 0.2
-            p.inputs["Subsurface Radius"].default_value = (1.1, 0.7, 0.6)
-            
-            if micro_path and os.path.exists(micro_path):
-                img = ensure_image_node(mat, micro_path)
-                link_normal_to_principled(mat, img)
-                print(f"✅ Skin-Material '{mat.name}': Micro-Normal-Map hinzugefügt")
-            tuned_count += 1
-        
-        # --- HAIR ---
-        elif hair_re.search(name):
-            p.inputs["Anisotropic"].default_value = 0.8
-            p.inputs["Roughness"].default_value = 0.33
-            mat.blend_method = 'BLEND'
-            mat.shadow_method = 'HASHED'
-            tuned_count += 1
-        
-        # --- EYES ---
-        elif eye_re.search(name):
-            p.inputs["Clearcoat"].default_value = 1.0
-            p.inputs["Clearcoat Roughness"].default_value = 0.0
-            p.inputs["IOR"].default_value = 1.376
-            p.inputs["Specular"].default_value = 0.9
-            tuned_count += 1
+        preset = match_preset(mat.name)
+        if not preset:
+            continue
         
-        # --- TEETH / MOUTH ---
-        elif tooth_re.search(name):
-            p.inputs["Metallic"].default_value = 0.0
-            p.inputs["Roughness"].default_value = 0.22
-            p.inputs["Specular"].default_value = 0.95
-            tuned_count += 1
+        for input_name, value in preset["inputs"].items():
+            p.inputs[input_name].default_value = value
+        for attr, value in preset.get("material", {}).items():
+            setattr(mat, attr, value)
         
-        # --- CLOTH ---
-        elif cloth_re.search(name):
-            p.inputs["Sheen"].default_value = 0.35
-            p.inputs["Roughness"].default_value = 0.55
-            tuned_count += 1
+        if preset.get("micro_normal") and micro_path and os.path.exists(micro_path):
+            img = ensure_image_node(mat, micro_path)
+            link_normal_to_principled(mat, img)
+            print(f"✅ Skin-Material '{mat.name}': Micro-Normal-Map hinzugefügt")
+        tuned_count += 1
     
     print(f"✅ {tuned_count} Materialien optimiert")
+    return tuned_count
+
+def image_classes():
+    """Material-Klassen (Preset-Namen) je Bild, gesammelt aus den Image-Texture-Nodes"""
+    classes = {}
+    for mat in bpy.data.materials:
+        if not mat.node_tree:
+            continue
+        preset = match_preset(mat.name)
+        for node in mat.node_tree.nodes:
+            if node.type == "TEX_IMAGE" and node.image:
+                used_by = classes.setdefault(node.image.name, set())
+                if preset:
+                    used_by.add(preset["name"])
+    return classes
+
+def image_source_bytes(img):
+    """Größe der Bildquelle (gepackt oder Datei), None bei generierten Bildern"""
+    if img.packed_file:
+        return img.packed_file.size
+    path = bpy.path.abspath(img.filepath) if img.filepath else ""
+    return os.path.getsize(path) if path and os.path.exists(path) else None
+
+def image_content_hash(img):
+    """Inhalts-Hash eines Bildes (gepackte Daten, Datei oder Pixel) inkl. Farbraum"""
+    import numpy as np
+    
+    h = hashlib.sha256(f"{img.colorspace_settings.name}|{img.alpha_mode}".encode("utf-8"))
+    path = bpy.path.abspath(img.filepath) if img.filepath else ""
+    if img.packed_file:
+        h.update(img.packed_file.data)
+    elif path and os.path.exists(path):
+        h.update(hash_file(path).encode("utf-8"))
+    else:
+        buf = np.empty(len(img.pixels), dtype=np.float32)
+        img.pixels.foreach_get(buf)
+        h.update(f"{tuple(img.size)}|{img.channels}".encode("utf-8"))
+        h.update(buf.tobytes())
+    return h.hexdigest()
+
+def dedupe_images():
+    """Identische Bilder zusammenlegen (Nutzer umhängen, Duplikat löschen)"""
+    seen, removed = {}, []
+    for img in list(bpy.data.images):
+        if img.type != "IMAGE" or img.users == 0:
+            continue
+        digest = image_content_hash(img)
+        kept = seen.get(digest)
+        if kept is None:
+            seen[digest] = img
+            continue
+        removed.append((img.name, kept.name))
+        img.user_remap(kept)
+        bpy.data.images.remove(img)
+    return removed
 
-def export_glb(path, keep_draco):
-    """Export GLB with optimization settings"""
+def replace_image_pixels(img, width, height, pixels):
+    """Neues Bild in Zielgröße anlegen, alle Nutzer umhängen, Namen übernehmen"""
+    name = img.name
+    new = bpy.data.images.new(name + ".resized", width, height,
+                              alpha=img.channels == 4, float_buffer=img.is_float)
+    new.colorspace_settings.name = img.colorspace_settings.name
+    new.alpha_mode = img.alpha_mode
+    new.file_format = img.file_format  # AUTO-Export behält das Quellformat
+    new.pixels.foreach_set(pixels)
+    img.user_remap(new)
+    bpy.data.images.remove(img)
+    new.name = name
+    return new
+
+def process_textures(workers=None):
+    """Textur-Stufe zwischen Tuning und Export: Duplikate entfernen, Auflösung pro Klasse begrenzen
+
+    Das Resampling läuft parallel (NumPy-Threads, texture_tools.py); bpy wird
+    nur im Haupt-Thread angefasst. Liefert (Report-Einträge, entfernte Duplikate).
+    """
+    import numpy as np
+    from texture_tools import class_cap, resize_all, target_size
+    
+    workers = workers or os.cpu_count() or 1
+    removed = dedupe_images()
+    classes = image_classes()
+    
+    entries, pending = [], []
+    for img in bpy.data.images:
+        if img.type != "IMAGE" or img.name not in classes:
+            continue
+        width, height = img.size
+        used_by = sorted(classes[img.name])
+        new_width, new_height = target_size(width, height, class_cap(used_by))
+        entries.append({"name": img.name, "classes": ",".join(used_by), "width": width, "height": height,
+                        "new_width": new_width, "new_height": new_height,
+                        "before_bytes": image_source_bytes(img)})
+        if (new_width, new_height) != (width, height) and width and height:
+            pending.append(img.name)
+    
+    # In Paketen von `workers` Bildern: Float-Pixel großer Texturen belegen viel RAM
+    for start in range(0, len(pending), workers):
+        jobs = []
+        for name in pending[start:start + workers]:
+            img = bpy.data.images[name]
+            pixels = np.empty(len(img.pixels), dtype=np.float32)
+            img.pixels.foreach_get(pixels)
+            entry = next(e for e in entries if e["name"] == name)
+            jobs.append((name, pixels, entry["width"], entry["height"],
+                         entry["new_width"], entry["new_height"], img.channels))
+        for name, pixels in resize_all(jobs, workers).items():
+            entry = next(e for e in entries if e["name"] == name)
+            replace_image_pixels(bpy.data.images[name], entry["new_width"], entry["new_height"], pixels)
+    
+    print(f"✅ Texturen: {len(removed)} Duplikate entfernt, {len(pending)} verkleinert ({workers} Threads)")
+    return entries, removed
+
+def export_glb(path, keep_draco, image_format="AUTO", image_quality=None):
+    """Export GLB with optimization settings
+
+    keep_draco: False, True (Profil "default") oder Profil-Dict aus compression_profiles.py
+    """
     export_dir = os.path.dirname(path)
-    if not os.path.exists(export_dir):
+    if export_dir and not os.path.exists(export_dir):
         os.makedirs(export_dir, exist_ok=True)
         print(f"📁 Export-Verzeichnis erstellt: {export_dir}")
     
@@ -148,11 +288,26 @@ def export_glb(path, keep_draco):
     )
     
     if keep_draco:
+        profile = keep_draco if isinstance(keep_draco, dict) else DEFAULT_PROFILE
         kwargs.update(dict(
             export_draco_mesh_compression_enable=True,
-            export_draco_mesh_compression_level=5  # Balance zwischen Qualität und Größe
+            export_draco_mesh_compression_level=profile["draco_level"],
+            export_draco_position_quantization=profile["position_bits"],
+            export_draco_normal_quantization=profile["normal_bits"],
+            export_draco_texcoord_quantization=profile["texcoord_bits"],
         ))
-        print(f"🧩 Draco-Kompression aktiviert (Level 5)")
+        print(f"🧩 Draco-Kompression aktiviert ({describe(profile)})")
+    
+    # Transcoding übernimmt der glTF-Exporter (Optionsname je nach Blender-Version)
+    props = bpy.ops.export_scene.gltf.get_rna_type().properties.keys()
+    if image_format != "AUTO" and "export_image_format" in props:
+        kwargs["export_image_format"] = image_format
+        print(f"🖼️  Texturen als {image_format}")
+    if image_quality is not None:
+        for name in ("export_image_quality", "export_jpeg_quality"):
+            if name in props:
+                kwargs[name] = image_quality
+                break
     
     print(f"📦 Exportiere nach: {path}")
     bpy.ops.export_scene.gltf(**kwargs)
@@ -167,9 +322,340 @@ def export_glb(path, keep_draco):
         print(f"❌ Export fehlgeschlagen: Datei nicht erstellt")
         return False
 
+def sparsify_export(path, epsilon):
+    """Post-Export-Pass: Morph Targets als Sparse-Accessoren (glb_sparse_morphs.py)"""
+    from glb_sparse_morphs import sparsify_file
+    
+    report = sparsify_file(path, path, epsilon)
+    saved = report["before_bytes"] - report["after_bytes"]
+    sparse = sum(1 for t in report["targets"] if t["encoding"] in ("sparse", "leer"))
+    print(f"🧮 Sparse Morphs: {sparse}/{len(report['targets'])} Accessoren, -{saved / 1024:.1f} KB "
+          f"({report['file_bytes_after'] / (1024 * 1024):.2f} MB)")
+    return report
+
+def quantize_export(path):
+    """Post-Export-Pass: KHR_mesh_quantization (glb_quantize.py)"""
+    from glb_quantize import quantize_file
+    
+    report = quantize_file(path, path)
+    e = report["error"]
+    print(f"🔢 Quantisiert: {report['file_bytes_before'] / (1024 * 1024):.2f} MB -> "
+          f"{report['file_bytes_after'] / (1024 * 1024):.2f} MB (max. Fehler {e['position']:.1e} der Diagonale, "
+          f"Normalen {e['normal_deg']:.2f}°)")
+    return report
+
+LOD_PROTECT_GROUP = "_lod_protect"
+LOD_PROTECT_FACTOR = 10.0  # Gewicht der Schutz-Gruppe im Decimate-Modifier (0-1000)
+
+def read_coords(collection):
+    """Koordinaten einer Vertex-/Shape-Key-Collection als (N, 3)-Array"""
+    import numpy as np
+    
+    buf = np.empty(len(collection) * 3, dtype=np.float32)
+    collection.foreach_get("co", buf)
+    return buf.reshape(-1, 3)
+
+def write_coords(collection, coords):
+    import numpy as np
+    
+    collection.foreach_set("co", np.ascontiguousarray(coords, dtype=np.float32).ravel())
+
+def mesh_triangles(mesh):
+    """Dreiecke (Vertex-Indizes) eines Meshes als (T, 3)-Array"""
+    import numpy as np
+    
+    mesh.calc_loop_triangles()
+    tris = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int64)
+    mesh.loop_triangles.foreach_get("vertices", tris)
+    return tris.reshape(-1, 3)
+
+def scene_triangles():
+    """Summe der Dreiecke aller Mesh-Objekte (jedes Mesh einmal)"""
+    meshes = {obj.data for obj in bpy.data.objects if obj.type == "MESH"}
+    total = 0
+    for mesh in meshes:
+        mesh.calc_loop_triangles()
+        total += len(mesh.loop_triangles)
+    return total
+
+def decimate_mesh(obj, ratio):
+    """Dezimierte Kopie von obj.data (Basis-Form) mit übertragenen Shape Keys
+
+    Vertices, die ein Shape Key bewegt, kommen in eine Schutz-Gruppe und werden
+    vom Decimate-Modifier geschont. Die Shape Keys werden baryzentrisch von der
+    Original-Oberfläche übertragen (lod_tools.py).
+    """
+    import numpy as np
+    from mathutils import Vector
+    from mathutils.bvhtree import BVHTree
+    from lod_tools import barycentric, transfer_deltas
+    
+    src = obj.data
+    key = src.shape_keys
+    basis = read_coords(key.reference_key.data) if key else read_coords(src.vertices)
+    
+    protect = obj.vertex_groups.new(name=LOD_PROTECT_GROUP)
+    if key:
+        moved = np.zeros(len(basis), dtype=bool)
+        for kb in key.key_blocks:
+            if kb != key.reference_key:
+                moved |= np.abs(read_coords(kb.data) - basis).max(axis=1) > 1e-6
+        protect.add(np.flatnonzero(moved).tolist(), 1.0, "REPLACE")
+    
+    # Nur die Basis-Form dezimieren: andere Modifier (Armature ...) und Shape-Key-Mix aus
+    saved_modifiers = [(m, m.show_viewport) for m in obj.modifiers]
+    for m, _ in saved_modifiers:
+        m.show_viewport = False
+    saved_keys = (obj.show_only_shape_key, obj.active_shape_key_index)
+    obj.show_only_shape_key, obj.active_shape_key_index = True, 0
+    mod = obj.modifiers.new("_lod_decimate", "DECIMATE")
+    mod.decimate_type = "COLLAPSE"
+    mod.ratio = ratio
+    mod.use_collapse_triangulate = True
+    mod.vertex_group = LOD_PROTECT_GROUP
+    mod.invert_vertex_group = True
+    mod.vertex_group_factor = LOD_PROTECT_FACTOR
+    try:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        lod = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph),
+                                              preserve_all_data_layers=True, depsgraph=depsgraph)
+    finally:
+        obj.modifiers.remove(mod)
+        for m, shown in saved_modifiers:
+            m.show_viewport = shown
+        obj.show_only_shape_key, obj.active_shape_key_index = saved_keys
+        obj.vertex_groups.remove(protect)
+    lod.name = f"{src.name}_lod{int(round(ratio * 100))}"
+    if not key:
+        return lod
+    
+    # Jeden neuen Vertex auf die Original-Oberfläche projizieren
+    tris = mesh_triangles(src)
+    bvh = BVHTree.FromPolygons(basis.tolist(), tris.tolist(), all_triangles=True)
+    coords = read_coords(lod.vertices)
+    face_index = np.zeros(len(coords), dtype=np.int64)
+    nearest = coords.astype(np.float64)
+    for i, co in enumerate(coords):
+        location, _normal, index, _dist = bvh.find_nearest(Vector(co))
+        if index is not None:
+            face_index[i] = index
+            nearest[i] = location
+    corners = basis[tris[face_index]].astype(np.float64)
+    weights = barycentric(nearest, corners[:, 0], corners[:, 1], corners[:, 2])
+    
+    # Shape Keys auf dem neuen Mesh anlegen (shape_key_add arbeitet auf obj.data)
+    obj.data = lod
+    try:
+        for kb in key.key_blocks:
+            new = obj.shape_key_add(name=kb.name, from_mix=False)
+            delta = transfer_deltas(read_coords(kb.data) - basis, tris, face_index, weights)
+            write_coords(new.data, coords + delta)
+            for attr in ("value", "slider_min", "slider_max", "mute", "vertex_group", "interpolation"):
+                setattr(new, attr, getattr(kb, attr))
+        lod_keys = lod.shape_keys
+        lod_keys.use_relative = key.use_relative
+        for kb in key.key_blocks:
+            lod_keys.key_blocks[kb.name].relative_key = lod_keys.key_blocks[kb.relative_key.name]
+    finally:
+        obj.data = src
+    return lod
+
+def build_lod_scene(ratio):
+    """Tauscht alle großen Meshes gegen dezimierte Kopien; liefert Liste zum Zurücktauschen"""
+    from lod_tools import LOD_MIN_TRIANGLES
+    
+    swapped, done = [], {}
+    for obj in bpy.data.objects:
+        if obj.type != "MESH":
+            continue
+        src = obj.data
+        if src not in done:
+            src.calc_loop_triangles()
+            done[src] = decimate_mesh(obj, ratio) if len(src.loop_triangles) >= LOD_MIN_TRIANGLES else None
+        if done[src] is not None:
+            swapped.append((obj, src, done[src]))
+            obj.data = done[src]
+    return swapped
+
+def restore_lod_scene(swapped):
+    """Original-Meshes zurück, LOD-Meshes löschen"""
+    lods = set()
+    for obj, src, lod in swapped:
+        obj.data = src
+        lods.add(lod)
+    for lod in lods:
+        bpy.data.meshes.remove(lod)
+
+def export_lods(outp, ratios, keep_draco, textures=None, sparse_epsilon=None, quantize=False):
+    """Exportiert LOD-Stufen 1..n aus der getunten Szene; liefert Level-Dicts (ohne LOD 0)"""
+    from lod_tools import device_class, glb_target_names, lod_path
+    
+    expected = glb_target_names(outp)
+    levels = []
+    for index, ratio in enumerate(ratios[1:], start=1):
+        path = lod_path(outp, index)
+        print(f"\n🔻 LOD {index}: {ratio * 100:.0f}% Dreiecks-Budget")
+        swapped = build_lod_scene(ratio)
+        try:
+            triangles = scene_triangles()
+            if textures is not None:
+                ok = export_glb(path, keep_draco, textures["format"], textures["quality"])
+            else:
+                ok = export_glb(path, keep_draco)
+        finally:
+            restore_lod_scene(swapped)
+        if not ok:
+            raise RuntimeError(f"LOD-Export fehlgeschlagen: {path}")
+        if quantize:
+            quantize_export(path)
+        if sparse_epsilon is not None:
+            sparsify_export(path, sparse_epsilon)
+        names = glb_target_names(path)
+        if names != expected:
+            raise RuntimeError(f"LOD {index}: Morph Targets weichen von LOD 0 ab ({names} != {expected})")
+        levels.append({"lod": index, "ratio": ratio, "file": path, "triangles": triangles,
+                       "bytes": os.path.getsize(path), "device_class": device_class(index),
+                       "morph_targets": sorted({n for v in names.values() for n in v})})
+    return levels
+
+def open_cache(args):
+    """Build-Cache laut CLI-Argumenten (None = deaktiviert)"""
+    if args.no_cache:
+        return None
+    if args.cache_max_mb is None:
+        return AssetCache(args.cache_dir)
+    return AssetCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+
+def enhance_asset(inp, outp, micro, keep_draco, cache=None, force=False, sparse_epsilon=None, textures=None,
+                  lods=None, quantize=False):
+    """Kompletter Durchlauf für ein Asset; liefert Ergebnis-Dict für Reports
+
+    sparse_epsilon: None = Morph Targets dicht lassen, sonst Sparse-Pass mit diesem Epsilon
+    textures: None = Textur-Stufe aus, sonst {"format", "quality", "workers"}
+    lods: None oder Budget-Liste aus lod_tools.parse_lods() (1.0 = LOD 0 = outp)
+    quantize: True = KHR_mesh_quantization-Pass nach dem Export (vor dem Sparse-Pass)
+    """
+    t0 = time.perf_counter()
+    
+    key = None
+    if cache is not None:
+        if not os.path.exists(inp):
+            raise FileNotFoundError(f"Datei nicht gefunden: {inp}")
+        key = enhance_glb_key(inp, micro, keep_draco, sparse_epsilon, textures, quantize,
+                              ".".join(str(v) for v in bpy.app.version))
+        meta = None if force else cache.get(key, outp)
+        levels = None
+        if meta is not None and lods:
+            from lod_tools import restore_cached_chain
+            levels = restore_cached_chain(cache, key, meta, inp, outp, lods)
+            if levels is None:
+                meta = None  # LOD-Stufen fehlen im Cache -> Szene komplett neu bauen
+        if meta is not None:
+            print(f"♻️  Cache-Treffer ({key[:12]}): {outp}")
+            return {
+                "in": inp,
+                "out": outp,
+                "ok": True,
+                "cached": True,
+                "size_bytes": os.path.getsize(outp),
+                "duration_s": round(time.perf_counter() - t0, 3),
+                "tuned_materials": meta.get("tuned_materials"),
+                "textures": meta.get("textures"),
+                "lods": levels,
+                "error": None,
+            }
+    
+    clean_scene()
+    import_glb(inp)
+    tuned = tune_materials(micro)
+    triangles = scene_triangles()
+    texture_report = None
+    if textures is not None:
+        from texture_tools import finish_report, print_texture_report
+        entries, removed = process_textures(textures.get("workers"))
+        success = export_glb(outp, keep_draco, textures["format"], textures["quality"])
+        if success:
+            finish_report(entries, outp)
+            print_texture_report(entries, removed)
+        texture_report = {"images": entries, "duplicates": removed}
+    else:
+        success = export_glb(outp, keep_draco)
+    if success and quantize:
+        quantize_export(outp)
+    if success and sparse_epsilon is not None:
+        sparsify_export(outp, sparse_epsilon)
+    
+    levels = None
+    if success and lods:
+        from lod_tools import lod_cache_key, lod_zero, write_manifest
+        levels = export_lods(outp, lods, keep_draco, textures, sparse_epsilon, quantize)
+        levels = [lod_zero(outp, triangles, levels[0]["morph_targets"] if levels else None)] + levels
+        manifest = write_manifest(outp, inp, levels)
+        print(f"\n📐 LOD-Kette ({manifest}):")
+        for level in levels:
+            print(f"   LOD {level['lod']}: {level['triangles']:>8} Dreiecke  "
+                  f"{level['bytes'] / (1024 * 1024):6.2f} MB  [{level['device_class']}]")
+        if key is not None:
+            for level in levels[1:]:
+                meta_lod = {k: v for k, v in level.items() if k not in ("file", "bytes")}
+                cache.put(lod_cache_key(key, level["ratio"]), level["file"], {"lod": meta_lod, "source": inp})
+    
+    if success and key is not None:
+        cache.put(key, outp, {"tuned_materials": tuned, "textures": texture_report, "triangles": triangles,
+                              "source": inp})
+    return {
+        "in": inp,
+        "out": outp,
+        "ok": bool(success),
+        "cached": False,
+        "size_bytes": os.path.getsize(outp) if success else None,
+        "duration_s": round(time.perf_counter() - t0, 3),
+        "tuned_materials": tuned,
+        "textures": texture_report,
+        "lods": levels,
+        "error": None if success else "Export fehlgeschlagen: Datei nicht erstellt",
+    }
+
+def run_jobs(jobs_path, results_path, micro, keep_draco, cache=None, force=False, sparse_epsilon=None,
+             textures=None, lods=None, quantize=False):
+    """Worker-Modus: mehrere Assets in einem Blender-Prozess (Startkosten nur einmal)
+
+    Jede Ergebniszeile wird sofort geschrieben, damit der Batch-Runner nach
+    einem Absturz weiß, welche Assets schon fertig sind.
+    """
+    with open(jobs_path, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    
+    with open(results_path, "a", encoding="utf-8") as out:
+        for i, job in enumerate(jobs):
+            # Marker vor dem Start: stürzt Blender ab, ist das Asset als "laufend" erkennbar
+            # (Job-Id statt Pfad - dieselbe Input-GLB kann mehrfach vorkommen)
+            job_id = job.get("id", i)
+            out.write(json.dumps({"started": job_id}) + "\n")
+            out.flush()
+            try:
+                result = enhance_asset(job["in"], job["out"], micro, keep_draco, cache, force, sparse_epsilon,
+                                       textures, lods, quantize)
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                result = {"in": job["in"], "out": job["out"], "ok": False, "cached": False, "size_bytes": None,
+                          "duration_s": None, "tuned_materials": None, "error": str(e)}
+            out.write(json.dumps(dict(result, id=job_id)) + "\n")
+            out.flush()
+            sys.stdout.flush()
+
 def main():
     """Main function"""
     args = parse_args()
+    cache = open_cache(args)
+    
+    if args.jobs:
+        print(f"🧵 Worker-Modus: {args.jobs} -> {args.results}")
+        sys.stdout.flush()
+        run_jobs(args.jobs, args.results, args.micro, args.keep_draco, cache, args.force, args.sparse_epsilon,
+                 args.textures, args.lods, args.quantize)
+        return
     
     print("\n" + "="*60)
     print("🎨 KAYA HD Avatar Enhancement")
@@ -179,19 +665,25 @@ def main():
     if args.micro:
         print(f"Micro Normal: {args.micro}")
     if args.keep_draco:
-        print("Draco: Aktiviert")
+        print(f"Draco: Aktiviert ({args.draco_profile}: {describe(args.keep_draco)})")
+    if args.quantize:
+        print("Quantisierung: KHR_mesh_quantization")
+    if args.sparse_epsilon is not None:
+        print(f"Sparse Morphs: Aktiviert (epsilon {args.sparse_epsilon:g})")
+    if args.textures is not None:
+        print(f"Texturen: {args.texture_format}, Qualität {args.texture_quality}")
+    if args.lods:
+        print(f"LODs: {', '.join(f'{r * 100:.0f}%' for r in args.lods)}")
+    print(f"Cache: {'aus' if cache is None else cache.root}{' (--force)' if args.force else ''}")
     print("="*60 + "\n")
     
     sys.stdout.flush()
     
     try:
-        clean_scene()
-        import_glb(args.inp)
-        tune_materials(args.micro)
+        result = enhance_asset(args.inp, args.outp, args.micro, args.keep_draco, cache, args.force,
+                               args.sparse_epsilon, args.textures, args.lods, args.quantize)
         
-        success = export_glb(args.outp, args.keep_draco)
-        
-        if success:
+        if result["ok"]:
             print("\n" + "="*60)
             print("✅ ENHANCEMENT ABGESCHLOSSEN")
             print("="*60)
@@ -211,5 +703,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-
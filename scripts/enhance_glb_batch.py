@@ -0,0 +1,363 @@
+"""
+Batch-Modus für enhance_glb.py - mehrere Avatare parallel über N Blender-Worker
+
+Läuft ohne Blender (reines Python). Jeder Worker ist ein eigener
+`blender --background`-Prozess, der seinen Anteil der Assets im Worker-Modus
+von enhance_glb.py nacheinander abarbeitet (Blender-Start nur einmal pro Worker).
+Stürzt ein Worker ab, wird das laufende Asset als Fehler verbucht und der Rest
+seines Anteils in einem neuen Worker fortgesetzt - ein kaputtes Asset hält
+die anderen nicht auf.
+
+Usage:
+  python scripts/enhance_glb_batch.py --in-dir avatars/ --out-dir out/ [--workers 4]
+  python scripts/enhance_glb_batch.py --manifest jobs.json [--report report.json] [--keep-draco]
+
+Manifest: JSON-Liste [{"in": "a.glb", "out": "out/a.glb"}, ...]
+Ergebnisse werden über den Job-Index zugeordnet - dieselbe Input-GLB darf
+mehrfach (mit verschiedenen Outputs) im Manifest stehen.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asset_cache import AssetCache, DEFAULT_CACHE_DIR, blender_version, enhance_glb_key
+from compression_profiles import load_profile
+
+ENHANCE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "enhance_glb.py")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Enhance many GLBs in parallel headless Blender workers")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--in-dir", default=None, help="Verzeichnis mit Input-GLBs")
+    src.add_argument("--manifest", default=None, help="JSON-Manifest mit in/out-Paaren")
+    p.add_argument("--out-dir", default=None, help="Output-Verzeichnis (bei --in-dir erforderlich)")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Anzahl Blender-Prozesse")
+    p.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender-Binary")
+    p.add_argument("--micro", default=None, help="Skin micro normal map path (optional)")
+    p.add_argument("--keep-draco", action="store_true", help="Enable Draco mesh compression")
+    p.add_argument("--draco-profile", default="default",
+                   help="Kompressions-Profil aus compression_profiles.json (siehe draco_sweep.py)")
+    p.add_argument("--quantize", action="store_true",
+                   help="Attribute + Morph-Deltas nach dem Export quantisieren (KHR_mesh_quantization, statt Draco)")
+    p.add_argument("--sparse-morphs", action="store_true",
+                   help="Morph Targets nach dem Export als Sparse-Accessoren speichern")
+    p.add_argument("--sparse-epsilon", type=float, default=None,
+                   help="Deltas unterhalb dieses Betrags verwerfen (Standard: glb_sparse_morphs.DEFAULT_EPSILON)")
+    p.add_argument("--textures", action="store_true",
+                   help="Textur-Stufe ausführen (Deduplizierung, Auflösungs-Limits, Transcoding; Standard: aus)")
+    p.add_argument("--texture-format", default="AUTO", choices=["AUTO", "JPEG", "WEBP"],
+                   help="Zielformat eingebetteter Texturen (AUTO = Quellformat beibehalten)")
+    p.add_argument("--texture-quality", type=int, default=90, help="JPEG/WebP-Qualität 0-100")
+    p.add_argument("--lods", default=None, help="LOD-Kette als Dreiecks-Budgets in Prozent, z. B. 100,50,25")
+    p.add_argument("--force", action="store_true", help="Build-Cache ignorieren und alles neu bauen")
+    p.add_argument("--no-cache", action="store_true", help="Build-Cache weder lesen noch schreiben")
+    p.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Verzeichnis des Build-Caches")
+    p.add_argument("--cache-max-mb", type=float, default=None, help="Max. Cache-Größe in MB (LRU)")
+    p.add_argument("--report", default="enhance_report.json", help="JSON-Report-Pfad")
+    p.add_argument("--timeout", type=float, default=None, help="Max. Sekunden pro Worker-Prozess")
+    args = p.parse_args()
+    if args.in_dir and not args.out_dir:
+        p.error("--in-dir benötigt --out-dir")
+    if args.quantize and args.keep_draco:
+        p.error("--quantize und --keep-draco schließen sich aus")
+    if args.sparse_morphs and args.sparse_epsilon is None:
+        from glb_sparse_morphs import DEFAULT_EPSILON
+        args.sparse_epsilon = DEFAULT_EPSILON
+    elif not args.sparse_morphs:
+        args.sparse_epsilon = None
+    if args.keep_draco:
+        try:
+            args.draco = load_profile(args.draco_profile)
+        except KeyError as e:
+            p.error(str(e))
+    else:
+        args.draco = False
+    if args.lods:
+        from lod_tools import parse_lods
+        try:
+            args.lod_ratios = parse_lods(args.lods)
+        except ValueError as e:
+            p.error(str(e))
+    else:
+        args.lod_ratios = None
+    # Kerne auf die Worker aufteilen, sonst konkurrieren N Blender-Prozesse um alle Kerne
+    args.textures = None if not args.textures else {
+        "format": args.texture_format,
+        "quality": args.texture_quality,
+        "workers": max(1, (os.cpu_count() or 1) // max(1, args.workers)),
+    }
+    return args
+
+
+def collect_jobs(args):
+    """Baut die Job-Liste aus Verzeichnis oder Manifest ("id" = Index in der Liste)"""
+    if args.manifest:
+        with open(args.manifest, "r", encoding="utf-8") as f:
+            jobs = [{"in": j["in"], "out": j["out"]} for j in json.load(f)]
+    else:
+        jobs = [{"in": os.path.join(args.in_dir, name), "out": os.path.join(args.out_dir, name)}
+                for name in sorted(os.listdir(args.in_dir)) if name.lower().endswith(".glb")]
+    for i, job in enumerate(jobs):
+        job["id"] = i
+    return jobs
+
+
+def duplicate_outputs(jobs):
+    """Output-Pfade, die mehr als ein Job schreiben würde (parallel = gegenseitiges Überschreiben)"""
+    seen, dupes = set(), []
+    for job in jobs:
+        out = os.path.normcase(os.path.abspath(job["out"]))
+        if out in seen and job["out"] not in dupes:
+            dupes.append(job["out"])
+        seen.add(out)
+    return dupes
+
+
+def shard_jobs(jobs, workers):
+    """Verteilt Jobs nach Dateigröße (größte zuerst) auf den jeweils leichtesten Worker"""
+    def size(job):
+        try:
+            return os.path.getsize(job["in"])
+        except OSError:
+            return 0
+
+    shards = [[] for _ in range(max(1, min(workers, len(jobs))))]
+    loads = [0] * len(shards)
+    for job in sorted(jobs, key=size, reverse=True):
+        i = loads.index(min(loads))
+        shards[i].append(job)
+        loads[i] += size(job) or 1
+    return shards
+
+
+def read_results(path):
+    """Liest die JSON-Lines des Workers: (Ergebnisse nach Job-Id, zuletzt gestartete Job-Id)"""
+    results, started = {}, None
+    if not os.path.exists(path):
+        return results, started
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # halbe Zeile nach Absturz
+            if "started" in rec:
+                started = rec["started"]
+            else:
+                results[rec["id"]] = rec
+                started = None
+    return results, started
+
+
+class Worker:
+    """Arbeitet einen Anteil ab und startet Blender nach Abstürzen neu"""
+
+    def __init__(self, wid, jobs, args, tmp_dir, log_lock):
+        self.wid = wid
+        self.jobs = jobs
+        self.args = args
+        self.tmp_dir = tmp_dir
+        self.log_lock = log_lock
+        self.launches = 0
+
+    def log(self, msg):
+        with self.log_lock:
+            print(f"[worker {self.wid}] {msg}")
+            sys.stdout.flush()
+
+    def launch(self, jobs):
+        """Ein Blender-Prozess für die übergebenen Jobs; liefert Pfad der Ergebnisdatei"""
+        self.launches += 1
+        base = os.path.join(self.tmp_dir, f"w{self.wid}_{self.launches}")
+        jobs_path, results_path = base + "_jobs.json", base + "_results.jsonl"
+        with open(jobs_path, "w", encoding="utf-8") as f:
+            json.dump(jobs, f)
+
+        cmd = [self.args.blender, "--background", "--factory-startup", "--python", ENHANCE_SCRIPT,
+               "--", "--jobs", jobs_path, "--results", results_path]
+        if self.args.micro:
+            cmd += ["--micro", self.args.micro]
+        if self.args.keep_draco:
+            cmd += ["--keep-draco", "--draco-profile", self.args.draco_profile]
+        if self.args.textures is not None:
+            cmd += ["--textures", "--texture-format", self.args.textures["format"],
+                    "--texture-quality", str(self.args.textures["quality"]),
+                    "--texture-workers", str(self.args.textures["workers"])]
+        if self.args.lods:
+            cmd += ["--lods", self.args.lods]
+        if self.args.quantize:
+            cmd.append("--quantize")
+        if self.args.sparse_epsilon is not None:
+            cmd += ["--sparse-morphs", "--sparse-epsilon", repr(self.args.sparse_epsilon)]
+        if self.args.no_cache:
+            cmd.append("--no-cache")
+        else:
+            cmd += ["--cache-dir", self.args.cache_dir]
+            if self.args.cache_max_mb is not None:
+                cmd += ["--cache-max-mb", str(self.args.cache_max_mb)]
+        if self.args.force:
+            cmd.append("--force")
+
+        with open(base + ".log", "w", encoding="utf-8") as log:
+            try:
+                proc = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT, timeout=self.args.timeout)
+                code = proc.returncode
+            except subprocess.TimeoutExpired:
+                code = "timeout"
+            except OSError as e:
+                code = f"start fehlgeschlagen: {e}"
+        return results_path, code, base + ".log"
+
+    def run(self):
+        """Alle Jobs dieses Anteils abarbeiten; liefert Liste von Ergebnis-Dicts"""
+        done = []
+        pending = list(self.jobs)
+        while pending:
+            self.log(f"starte Blender für {len(pending)} Asset(s)")
+            results_path, code, log_path = self.launch(pending)
+            results, crashed_in = read_results(results_path)
+            done.extend(results[j["id"]] for j in pending if j["id"] in results)
+
+            rest = [j for j in pending if j["id"] not in results]
+            if not rest:
+                break
+
+            # Absturz/Timeout: das laufende Asset (oder das erste offene) gilt als fehlgeschlagen
+            failed_id = crashed_in if crashed_in is not None else rest[0]["id"]
+            failed = next(j for j in rest if j["id"] == failed_id)
+            self.log(f"❌ Worker beendet ({code}) bei {failed['in']} - siehe {log_path}")
+            done.append({"id": failed["id"], "in": failed["in"], "out": failed["out"], "ok": False, "cached": False,
+                         "size_bytes": None, "duration_s": None, "tuned_materials": None,
+                         "error": f"Blender-Prozess beendet ({code})"})
+            pending = [j for j in rest if j["id"] != failed_id]
+            if isinstance(code, str) and code.startswith("start"):
+                # Blender lässt sich gar nicht starten - restliche Jobs nicht endlos neu versuchen
+                for j in pending:
+                    done.append({"id": j["id"], "in": j["in"], "out": j["out"], "ok": False, "cached": False,
+                                 "size_bytes": None, "duration_s": None, "tuned_materials": None,
+                                 "error": code})
+                break
+        for r in done:
+            self.log(f"{'✅' if r['ok'] else '❌'} {os.path.basename(r['in'])}")
+        return done
+
+
+def resolve_cached(jobs, args):
+    """Cache-Treffer ohne Blender-Start bedienen; liefert (Ergebnisse, offene Jobs)"""
+    if args.no_cache or args.force:
+        return [], jobs
+    # Der Key enthält die Blender-Version; ohne sie entscheiden die Worker selbst
+    version = blender_version(args.blender)
+    if version is None:
+        print(f"⚠️  Blender-Version von '{args.blender}' unbekannt - Cache-Prüfung erst in den Workern")
+        return [], jobs
+    cache = AssetCache(args.cache_dir) if args.cache_max_mb is None else \
+        AssetCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+
+    hits, misses = [], []
+    for job in jobs:
+        t0 = time.perf_counter()
+        meta, levels = None, None
+        if os.path.exists(job["in"]):
+            key = enhance_glb_key(job["in"], args.micro, args.draco, args.sparse_epsilon, args.textures,
+                                  args.quantize, version)
+            meta = cache.get(key, job["out"])
+            if meta is not None and args.lod_ratios:
+                from lod_tools import restore_cached_chain
+                levels = restore_cached_chain(cache, key, meta, job["in"], job["out"], args.lod_ratios)
+                if levels is None:
+                    meta = None
+        if meta is None:
+            misses.append(job)
+            continue
+        hits.append({"id": job["id"], "in": job["in"], "out": job["out"], "ok": True, "cached": True,
+                     "size_bytes": os.path.getsize(job["out"]),
+                     "duration_s": round(time.perf_counter() - t0, 3),
+                     "tuned_materials": meta.get("tuned_materials"), "textures": meta.get("textures"),
+                     "lods": levels, "error": None})
+    return hits, misses
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    jobs = collect_jobs(args)
+    if not jobs:
+        print("❌ Keine GLB-Dateien gefunden")
+        sys.exit(1)
+    dupes = duplicate_outputs(jobs)
+    if dupes:
+        print(f"❌ Mehrere Jobs schreiben dieselbe Output-Datei: {', '.join(dupes)}")
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    cached, pending = resolve_cached(jobs, args)
+    shards = shard_jobs(pending, args.workers) if pending else []
+    print("\n" + "="*60)
+    print("🏭 KAYA HD Avatar Enhancement - Batch")
+    print("="*60)
+    print(f"Assets:  {len(jobs)} ({len(cached)} aus Cache)")
+    print(f"Worker:  {len(shards)}")
+    print(f"Blender: {args.blender}")
+    print("="*60 + "\n")
+    sys.stdout.flush()
+
+    tmp_dir = tempfile.mkdtemp(prefix="kaya_enhance_")
+    log_lock = threading.Lock()
+    workers = [Worker(i, shard, args, tmp_dir, log_lock) for i, shard in enumerate(shards)]
+    results = list(cached)
+    try:
+        if workers:
+            with ThreadPoolExecutor(max_workers=len(workers)) as pool:
+                results += [r for chunk in pool.map(Worker.run, workers) for r in chunk]
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    wall = time.perf_counter() - t0
+
+    results.sort(key=lambda r: r["id"])
+    ok = [r for r in results if r["ok"]]
+    failed_any = len(ok) != len(results)
+    busy = sum(r["duration_s"] or 0.0 for r in results)
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "workers": len(workers),
+        "assets": len(results),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "cached": len(cached),
+        "wall_time_s": round(wall, 3),
+        "asset_time_s": round(busy, 3),
+        "parallel_speedup": round(busy / wall, 2) if wall > 0 else None,
+        "total_output_bytes": sum(r["size_bytes"] or 0 for r in ok),
+        "results": results,
+    }
+    report_dir = os.path.dirname(args.report)
+    if report_dir:
+        os.makedirs(report_dir, exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("\n" + "="*60)
+    print(f"{'❌' if failed_any else '✅'} {len(ok)}/{len(results)} Assets erfolgreich in {wall:.1f}s "
+          f"(Asset-Zeit {busy:.1f}s, Speedup {report['parallel_speedup']}x)")
+    print(f"📄 Report: {args.report}")
+    print("="*60)
+    sys.exit(1 if failed_any else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Viseme- und Emotions-Shape-Keys aus der Preset-Tabelle face_presets.json (ohne bpy)
+
+Ein Durchlauf für den ganzen Satz: Basis-Koordinaten einmal lesen, räumlichen
+Index einmal bauen, jede Region (Mund, Brauen) einmal auswählen - danach ist
+jeder Key nur noch Array-Arithmetik auf den Vertices seiner Region. Die Kosten
+pro zusätzlichem Key hängen von der Regionsgröße ab, nicht vom Mesh.
+
+Genutzt von blender_add_mouth_shapekeys.py (in Blender) und
+glb_add_mouth_morphs.py --full (direkt auf der GLB). Die Mund-Keys
+mouthOpen / mouthO / lipsClosed verwenden die Konstanten aus mouth_shapes.py
+und sind identisch mit mouth_key_deltas().
+
+Beispiel:
+    presets = load_presets()
+    builder = FaceShapeBuilder(coords, presets)
+    for name, (ids, delta) in builder.deltas(preset_keys(presets)).items():
+        key_coords[ids] = coords[ids] + delta
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+import mouth_shapes
+from mouth_selection import VertexSelector
+from mouth_shapes import FALLOFF, mouth_region_from_bbox
+
+PRESETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "face_presets.json")
+
+# Übergangsbreite (in Region-Radien) für Lippen-Trennung und linke/rechte Hälfte
+LIP_RAMP = 0.10
+SIDE_RAMP = 0.05
+
+
+def load_presets(path=PRESETS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def preset_keys(presets, sets=None):
+    """Key-Namen in Tabellen-Reihenfolge, optional nur bestimmte Sätze (mouth, viseme, expression)"""
+    return [name for name, spec in presets["keys"].items() if sets is None or spec.get("set") in sets]
+
+
+def _constant(value):
+    """Zahl/Vektor aus der Tabelle; Strings verweisen auf Konstanten in mouth_shapes.py"""
+    if isinstance(value, str):
+        if not hasattr(mouth_shapes, value):
+            raise ValueError(f"Unbekannte Konstante in face_presets.json: {value}")
+        value = getattr(mouth_shapes, value)
+    return np.asarray(value, dtype=np.float32)
+
+
+def _ramp(x, lo, hi):
+    """0 unterhalb lo, 1 oberhalb hi, dazwischen smoothstep"""
+    t = np.clip((x - lo) / max(hi - lo, 1e-12), 0.0, 1.0)
+    return t * t * (3.0 - 2.0 * t)
+
+
+class Region:
+    """Ausgewählte Vertices einer Region plus Bezugssystem (Zentrum, Halbachsen)"""
+
+    def __init__(self, ids, weights, center, radii):
+        self.ids = ids
+        self.weights = weights
+        self.center = np.asarray(center, dtype=np.float32)
+        self.radii = np.maximum(np.asarray(radii, dtype=np.float32), 1e-9)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class FaceShapeBuilder:
+    """Berechnet Delta-Arrays für beliebig viele Preset-Keys auf einem Basis-Mesh
+
+    coords: (N, 3) Basis-Koordinaten
+    group_weights: optional {Gruppenname: (N,)-Gewichte} - ersetzt die Heuristik der Region
+    """
+
+    def __init__(self, coords, presets, group_weights=None, falloff=FALLOFF):
+        self.coords = np.ascontiguousarray(coords, dtype=np.float32).reshape(-1, 3)
+        self.presets = presets
+        self.group_weights = group_weights or {}
+        self.falloff = falloff
+        self.lo = self.coords.min(axis=0)
+        self.hi = self.coords.max(axis=0)
+        self.diag = float(np.linalg.norm(self.hi - self.lo))
+        self._selector = None
+        self._regions = {}
+        self.timings = {}
+
+    @property
+    def selector(self):
+        if self._selector is None:
+            t0 = time.perf_counter()
+            self._selector = VertexSelector(self.coords)
+            self.timings["index_s"] = time.perf_counter() - t0
+        return self._selector
+
+    def region(self, name):
+        """Region einmal auswählen und für alle Keys wiederverwenden"""
+        if name in self._regions:
+            return self._regions[name]
+        spec = self.presets["regions"].get(name)
+        if spec is None:
+            raise ValueError(f"Unbekannte Region in face_presets.json: {name}")
+        t0 = time.perf_counter()
+        group = self.group_weights.get(spec.get("group")) if spec.get("group") else None
+        if group is not None and np.any(group > 0.0):
+            ids = np.flatnonzero(group > 0.0)
+            co = self.coords[ids]
+            center = np.average(co, axis=0, weights=group[ids])
+            radii = np.maximum(co.max(axis=0) - center, center - co.min(axis=0))
+            region = Region(ids, group[ids].astype(np.float32), center, radii)
+        elif spec.get("type") == "mouth":
+            center, radius = mouth_region_from_bbox(self.lo, self.hi)
+            sel = self.selector.radius(center, radius, falloff=self.falloff)
+            region = Region(sel.ids, sel.weights, center, (radius, radius, radius))
+        else:
+            center = self.lo + np.asarray(spec["center"], dtype=np.float32) * (self.hi - self.lo)
+            radii = np.asarray(spec["radii"], dtype=np.float32) * self.diag
+            sel = self.selector.ellipsoid(center, radii, falloff=self.falloff)
+            region = Region(sel.ids, sel.weights, center, radii)
+        self.timings[f"region_{name}_s"] = time.perf_counter() - t0
+        self._regions[name] = region
+        return region
+
+    def region_sizes(self):
+        """{Name: Anzahl Vertices} der bisher ausgewählten Regionen (für Logs)"""
+        return {name: len(region) for name, region in self._regions.items()}
+
+    def key_delta(self, name):
+        """(Vertex-Indizes, Deltas (len, 3)) eines Keys - nur die Vertices seiner Region"""
+        spec = self.presets["keys"][name]
+        region = self.region(spec["region"])
+        co = self.coords[region.ids]
+        rel = co - region.center
+        unit = region.radii[0]
+        delta = np.zeros_like(co)
+
+        for op in spec.get("ops", []):
+            mode = op.get("weight", "uniform")
+            if mode == "uniform":
+                w = np.ones(len(co), dtype=np.float32)
+            elif mode == "corner":
+                w = np.clip(np.abs(rel[:, 0]) / region.radii[0], 0.0, 1.0)
+            elif mode == "center":
+                w = np.clip(1.0 - np.abs(rel[:, 0]) / region.radii[0], 0.0, 1.0)
+            elif mode == "below":
+                w = _ramp(-rel[:, 1] / region.radii[1], -LIP_RAMP, LIP_RAMP)
+            elif mode == "above":
+                w = _ramp(rel[:, 1] / region.radii[1], -LIP_RAMP, LIP_RAMP)
+            else:
+                raise ValueError(f"Unbekannte Gewichtung '{mode}' in Key {name}")
+
+            if "offset" in op or "offset_abs" in op:
+                d = np.broadcast_to(_constant(op["offset"]) * unit if "offset" in op
+                                    else _constant(op["offset_abs"]), co.shape).copy()
+                if mode == "corner":
+                    d[:, 0] *= np.sign(rel[:, 0])  # Mundwinkel bewegen sich spiegelbildlich nach außen
+            elif "pucker" in op:
+                d = -rel * (1.0 - _constant(op["pucker"]))
+            elif "stretch" in op:
+                d = np.zeros_like(co)
+                d[:, 0] = rel[:, 0] * _constant(op["stretch"])
+            else:
+                raise ValueError(f"Unbekannte Operation in Key {name}: {op}")
+            delta += d * w[:, None]
+
+        weights = region.weights
+        side = spec.get("side")
+        if side == "left":
+            weights = weights * _ramp(rel[:, 0] / region.radii[0], -SIDE_RAMP, SIDE_RAMP)
+        elif side == "right":
+            weights = weights * _ramp(-rel[:, 0] / region.radii[0], -SIDE_RAMP, SIDE_RAMP)
+        return region.ids, (delta * weights[:, None]).astype(np.float32)
+
+    def deltas(self, names):
+        """{Name: (ids, delta)} für alle Keys in einem Durchlauf"""
+        t0 = time.perf_counter()
+        result = {name: self.key_delta(name) for name in names}
+        self.timings["keys_s"] = time.perf_counter() - t0
+        return result
+
+
+def dense_delta(count, ids, delta):
+    """Sparse (ids, delta) als (count, 3)-Array"""
+    out = np.zeros((count, 3), dtype=np.float32)
+    out[ids] = delta
+    return out
+
+
+def build_mapping(presets, morph_names, mesh_name=None):
+    """Viseme-/Emotions-Zuordnung für das Frontend, beschränkt auf vorhandene Morph Targets"""
+    available = set(morph_names)
+
+    def filtered(table):
+        out = {}
+        for label, weights in table.items():
+            if label.startswith("_"):
+                continue
+            out[label] = {k: v for k, v in weights.items() if k in available}
+        return out
+
+    visemes = filtered(presets.get("viseme_map", {}))
+    # Viseme-Keys auch unter eigenem Namen (für Timelines mit viseme_aa, viseme_PP, ...)
+    for name in morph_names:
+        if presets["keys"].get(name, {}).get("set") == "viseme":
+            visemes.setdefault(name, {name: 1.0})
+    return {
+        "version": 1,
+        "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "mesh": mesh_name,
+        "morphTargets": list(morph_names),
+        "visemes": visemes,
+        "emotions": filtered(presets.get("emotion_map", {})),
+    }
+
+
+def write_mapping(path, presets, morph_names, mesh_name=None):
+    mapping = build_mapping(presets, morph_names, mesh_name)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(mapping, f, indent=2, ensure_ascii=False)
+    return mapping
+
+
+def mapping_path(glb_path):
+    """Zuordnungs-JSON neben der GLB: Kayanew_mouth.glb -> Kayanew_mouth.morphs.json"""
+    return os.path.splitext(glb_path)[0] + ".morphs.json"
@@ -0,0 +1,79 @@
+"""
+Deutsche Tokenisierung für Such-Index und Dubletten-Erkennung (ohne Abhängigkeiten)
+
+- Kleinschreibung, Umlaute/ß gefaltet (Anträge ~ Antraege ~ Antrage)
+- Bindestrich-Wörter als Ganzes und in Teilen (E-Rechnung -> e-rechnung, e, rechnung)
+- Stoppwörter raus, Stammformreduktion nach CISTEM (Weißgraeber & Zimmer 2017)
+- Komposita: zerlegt über ein bekanntes Vokabular (Bauantrag -> bau + antrag)
+"""
+
+import re
+
+WORD_PATTERN = re.compile(r"[0-9a-zäöüß]+(?:-[0-9a-zäöüß]+)*")
+
+FOLD = str.maketrans({"ä": "a", "ö": "o", "ü": "u", "ß": "ss"})
+
+STOPWORDS = frozenset("""
+aber alle allem allen aller alles als also am an ander andere anderem anderen anderer anderes auch auf aus
+bei bin bis bist da damit dann der den des dem die das dass daß dein deine dem demselben denn derer dessen
+dich dir du dies diese diesem diesen dieser dieses doch dort durch ein eine einem einen einer eines einig
+einige einigem einigen einiger einiges einmal er ihn ihm es etwas euer eure eurem euren eurer eures für
+gegen gewesen hab habe haben hat hatte hatten hier hin hinter ich mich mir ihr ihre ihrem ihren ihrer ihres
+euch im in indem ins ist jede jedem jeden jeder jedes jene jenem jenen jener jenes jetzt kann kein keine
+keinem keinen keiner keines können könnte machen man manche manchem manchen mancher manches mein meine
+meinem meinen meiner meines mit muss musste nach nicht nichts noch nun nur ob oder ohne sehr sein seine
+seinem seinen seiner seines selbst sich sie ihnen sind so solche solchem solchen solcher solches soll
+sollte sondern sonst über um und uns unsere unserem unseren unser unseres unter viel vom von vor während
+war waren warst was weg weil weiter welche welchem welchen welcher welches wenn werde werden wie wieder
+will wir wird wirst wo wollen wollte würde würden zu zum zur zwar zwischen
+""".split())
+
+
+def cistem(word):
+    """CISTEM-Stemmer (Groß-/Kleinschreibung ignoriert) für ein kleingeschriebenes, gefaltetes Wort"""
+    if len(word) > 5 and word.startswith("ge"):
+        word = word[2:]
+    word = word.replace("sch", "$").replace("ei", "%").replace("ie", "&")
+    word = re.sub(r"(.)\1", r"\1*", word)
+    while len(word) > 3:
+        if len(word) > 5 and word[-2:] in ("em", "er", "nd"):
+            word = word[:-2]
+        elif word[-1] in "tesn":
+            word = word[:-1]
+        else:
+            break
+    word = re.sub(r"(.)\*", r"\1\1", word)
+    return word.replace("$", "sch").replace("%", "ei").replace("&", "ie")
+
+
+def words(text):
+    """Rohe Wörter (kleingeschrieben) in Textreihenfolge"""
+    return WORD_PATTERN.findall((text or "").lower())
+
+
+def tokenize(text):
+    """Text -> Liste von Termen (gefaltet, ohne Stoppwörter, gestemmt); Reihenfolge bleibt"""
+    terms = []
+    for word in words(text):
+        parts = [word] + word.split("-") if "-" in word else [word]
+        for part in parts:
+            if part in STOPWORDS or (len(part) < 2 and not part.isdigit()):
+                continue
+            terms.append(cistem(part.translate(FOLD)))
+    return terms
+
+
+def split_compound(term, vocabulary, min_part=4, min_head=3):
+    """Kompositum in bekannte Teile zerlegen: längster bekannter Schluss-Teil, Rest als Kopf
+
+    'bauantrag' mit 'antrag' im Vokabular -> ['bau', 'antrag'] (Fugen-s wird entfernt).
+    Liefert [] wenn keine Zerlegung gefunden wird.
+    """
+    for cut in range(min_head, len(term) - min_part + 1):
+        tail = term[cut:]
+        if tail in vocabulary:
+            head = term[:cut]
+            if head.endswith("s") and head[:-1] in vocabulary:
+                head = head[:-1]
+            return [head, tail]
+    return []
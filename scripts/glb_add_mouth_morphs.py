@@ -0,0 +1,213 @@
+"""
+Mund-Morph-Targets direkt in eine GLB schreiben - ohne Blender-Round-Trip
+
+Liest die POSITION-Accessoren des Kopf-Meshes mit NumPy, bestimmt die
+Mund-Region mit derselben Heuristik wie blender_add_mouth_shapekeys.py
+(scripts/mouth_shapes.py) und hängt mouthOpen, mouthO und lipsClosed als
+neue Morph-Target-Accessoren an. Vorhandene bufferViews, Texturen und
+Attribute bleiben Byte für Byte unverändert; nur der JSON-Chunk wird ergänzt
+(targets, extras.targetNames, weights).
+
+Mit --full kommt der komplette Viseme-/Emotions-Satz aus face_presets.json
+dazu (face_shapes.py, ein Durchlauf für alle Keys) und daneben die
+Zuordnungs-JSON für das Frontend (<out>.morphs.json).
+
+Usage:
+  python scripts/glb_add_mouth_morphs.py --in Kayanew.glb --out Kayanew_mouth.glb
+  python scripts/glb_add_mouth_morphs.py --in Kayanew.glb --out out.glb --mesh Head_Mesh --overwrite
+  python scripts/glb_add_mouth_morphs.py --in Kayanew.glb --out Kayanew_face.glb --full
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from face_shapes import FaceShapeBuilder, dense_delta, load_presets, mapping_path, preset_keys, write_mapping
+from glb_io import FLOAT, GLB, GLBError, BinBuilder, write_glb
+from mouth_selection import VertexSelector
+from mouth_shapes import FALLOFF, MOUTH_KEYS, mouth_key_deltas, mouth_region_from_bbox
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Inject mouth morph targets into a GLB without Blender")
+    p.add_argument("--in", dest="inp", required=True, help="Input GLB path")
+    p.add_argument("--out", dest="outp", default=None, help="Output GLB path (Standard: <in>_mouth.glb)")
+    p.add_argument("--mesh", default=None, help="Mesh-Name erzwingen (sonst Head/Face bevorzugt, dann größtes)")
+    p.add_argument("--falloff", default=FALLOFF, help=f"Falloff der Mund-Region (Standard: {FALLOFF})")
+    p.add_argument("--overwrite", action="store_true", help="Vorhandene Mund-Morphs neu berechnen")
+    p.add_argument("--full", action="store_true",
+                   help="Kompletten Viseme-/Emotions-Satz aus face_presets.json erzeugen")
+    p.add_argument("--sets", default=None,
+                   help="Mit --full nur diese Sätze, z. B. mouth,viseme (Standard: alle)")
+    p.add_argument("--mapping", default=None,
+                   help="Pfad der Viseme-/Emotions-Zuordnung (Standard mit --full: <out>.morphs.json)")
+    return p.parse_args()
+
+
+def mesh_nodes(gltf, mesh_index):
+    """Alle Nodes, die dieses Mesh verwenden"""
+    return [n for n in gltf.get("nodes", []) if n.get("mesh") == mesh_index]
+
+
+def pick_head_mesh(gltf, forced_name=None):
+    """Findet das Kopf-Mesh: Name mit head/face/body bevorzugt, sonst meiste Vertices"""
+    accessors = gltf.get("accessors", [])
+    candidates = []
+    for mi, mesh in enumerate(gltf.get("meshes", [])):
+        prims = mesh.get("primitives", [])
+        if not prims or not all("POSITION" in p.get("attributes", {}) for p in prims):
+            continue
+        names = [mesh.get("name", "")] + [n.get("name", "") for n in mesh_nodes(gltf, mi)]
+        if forced_name is not None:
+            if forced_name in names:
+                return mi
+            continue
+        lowered = " ".join(names).lower()
+        bonus = 1 if ("head" in lowered or "face" in lowered or "body" in lowered) else 0
+        verts = sum(accessors[p["attributes"]["POSITION"]]["count"] for p in prims)
+        candidates.append(((bonus, verts), mi))
+    if forced_name is not None:
+        raise GLBError(f"Mesh '{forced_name}' nicht gefunden")
+    if not candidates:
+        raise GLBError("Kein Mesh mit POSITION-Attribut gefunden")
+    return max(candidates)[1]
+
+
+def check_weight_animations(gltf, mesh_index):
+    """Weights-Animationen hängen an der Target-Anzahl - neue Targets würden sie zerstören"""
+    nodes = gltf.get("nodes", [])
+    for anim in gltf.get("animations", []):
+        for channel in anim.get("channels", []):
+            target = channel.get("target", {})
+            node = target.get("node")
+            if target.get("path") == "weights" and node is not None and nodes[node].get("mesh") == mesh_index:
+                raise GLBError(f"Animation '{anim.get('name', '?')}' animiert Morph-Weights dieses Meshes - "
+                               "bitte in Blender hinzufügen")
+
+
+def add_mouth_morphs(glb, mesh_index, falloff=FALLOFF, overwrite=False, presets=None, sets=None):
+    """Hängt die Mund-Morphs an; liefert (BinBuilder oder None, Report-Dict)
+
+    presets: None = nur MOUTH_KEYS (mouth_shapes.py), sonst alle Keys der
+    Preset-Tabelle (optional auf sets beschränkt) über FaceShapeBuilder
+    """
+    gltf = glb.gltf
+    mesh = gltf["meshes"][mesh_index]
+    prims = mesh["primitives"]
+    names = glb.target_names(mesh_index)
+
+    wanted = MOUTH_KEYS if presets is None else preset_keys(presets, sets)
+    todo = [k for k in wanted if overwrite or k not in names]
+    report = {"mesh": mesh.get("name", f"mesh_{mesh_index}"), "created": [], "replaced": [],
+              "skipped": [k for k in wanted if k not in todo], "vertices": 0, "region_vertices": 0,
+              "target_names": names}
+    if not todo:
+        return None, report
+
+    check_weight_animations(gltf, mesh_index)
+    accessors = gltf["accessors"]
+    for p in prims:
+        acc = accessors[p["attributes"]["POSITION"]]
+        if acc["componentType"] != FLOAT or "KHR_draco_mesh_compression" in p.get("extensions", {}):
+            raise GLBError("POSITION ist komprimiert/quantisiert - bitte unkomprimierte GLB verwenden")
+
+    # Alle Primitive zusammen betrachten (eine Region für das ganze Mesh)
+    positions = [glb.read_accessor(p["attributes"]["POSITION"]).astype(np.float32) for p in prims]
+    coords = np.concatenate(positions)
+    center, radius = mouth_region_from_bbox(coords.min(axis=0), coords.max(axis=0))
+    if presets is None:
+        sel = VertexSelector(coords).radius(center, radius, falloff=falloff)
+        deltas = mouth_key_deltas(coords, sel.ids, sel.weights, center)
+    else:
+        builder = FaceShapeBuilder(coords, presets, falloff=falloff)
+        sel = builder.region("mouth")
+        sparse = builder.deltas(todo)
+        deltas = {key: dense_delta(len(coords), ids, delta) for key, (ids, delta) in sparse.items()}
+    report["vertices"] = len(coords)
+    report["region_vertices"] = len(sel)
+    report["center"] = center.tolist()
+    report["radius"] = radius
+    if len(sel) == 0:
+        raise GLBError("Keine Mund-Vertices gefunden - HEIGHT_RATIO/RADIUS_FACTOR in mouth_shapes.py prüfen")
+
+    builder = BinBuilder(glb)
+    offsets = np.cumsum([0] + [len(pos) for pos in positions])
+    for pi, p in enumerate(prims):
+        targets = p.setdefault("targets", [])
+        part = slice(offsets[pi], offsets[pi + 1])
+        for key in todo:
+            target = {"POSITION": builder.add_accessor(deltas[key][part], "VEC3")}
+            if key in names:
+                targets[names.index(key)] = target
+            else:
+                targets.append(target)
+
+    for key in todo:
+        if key in names:
+            report["replaced"].append(key)
+        else:
+            names.append(key)
+            report["created"].append(key)
+
+    mesh.setdefault("extras", {})["targetNames"] = names
+    for holder in [mesh] + mesh_nodes(gltf, mesh_index):
+        if "weights" in holder:
+            holder["weights"] = list(holder["weights"]) + [0.0] * (len(names) - len(holder["weights"]))
+    return builder, report
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    outp = args.outp or os.path.splitext(args.inp)[0] + "_mouth.glb"
+    presets = load_presets() if args.full else None
+    sets = [s.strip() for s in args.sets.split(",")] if args.sets else None
+
+    print("\n" + "="*60)
+    print("🎭 KAYA Avatar: Mund-Morphs direkt in GLB")
+    print("="*60)
+    print(f"Input:  {args.inp}")
+    print(f"Output: {outp}")
+    print("="*60)
+    sys.stdout.flush()
+
+    t0 = time.perf_counter()
+    try:
+        glb = GLB.open(args.inp)
+        try:
+            mesh_index = pick_head_mesh(glb.gltf, args.mesh)
+            builder, report = add_mouth_morphs(glb, mesh_index, args.falloff, args.overwrite, presets, sets)
+            bin_bytes = builder.bin_bytes() if builder else bytes(glb.bin)
+            gltf = glb.gltf
+        finally:
+            glb.close()
+        size = write_glb(outp, gltf, bin_bytes)
+        mapping = args.mapping or (mapping_path(outp) if args.full else None)
+        if mapping:
+            write_mapping(mapping, presets or load_presets(), report["target_names"], report["mesh"])
+    except (OSError, GLBError, ValueError) as e:
+        print(f"\n❌ FEHLER: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - t0
+
+    print(f"\n✅ Gewähltes Mesh: '{report['mesh']}' ({report['vertices']} Vertices)")
+    if report["region_vertices"]:
+        print(f"🎯 Mund-Region: {report['region_vertices']} Vertices, Radius {report['radius']:.4f}")
+    for key in report["created"]:
+        print(f"   ✅ {key} (neu)")
+    for key in report["replaced"]:
+        print(f"   ♻️  {key} (neu berechnet)")
+    for key in report["skipped"]:
+        print(f"   ⏭️  {key} (bereits vorhanden)")
+    print(f"\n💾 {outp}: {size / (1024 * 1024):.2f} MB in {elapsed * 1000:.0f} ms")
+    if mapping:
+        print(f"🗺️  Viseme-/Emotions-Zuordnung: {mapping}")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+GLB-Inspektor ohne Blender - prüft die exportierte Datei
+
+Ergänzt blender_check_debug.py / blender_test_simple.py: die prüfen die Szene
+in Blender (Objekte, Shape Keys, Export-Verzeichnis, Schreibrechte), dieser
+Inspektor die fertige GLB ohne Blender-Start.
+
+Liest nur den 12-Byte-Header und den JSON-Chunk; der BIN-Chunk wird gemappt,
+aber nicht gelesen. Dadurch läuft die Prüfung auch bei 50 MB in Millisekunden
+und kann in CI jeden Export absichern.
+
+Zeigt:
+- Meshes mit Vertex-Anzahl und Morph-Target-Namen
+- Accessor-Größen (Basis-Attribute vs. Morph Targets) pro Mesh
+- Texturen/Bilder mit Größe
+- Byte-Aufteilung nach Verwendung und pro bufferView
+- Prüfung der Pflicht-Shape-Keys (mouthOpen, mouthO, lipsClosed)
+
+Usage:
+  python scripts/glb_inspect.py frontend/public/avatar/Kayanew_mouth.glb
+  python scripts/glb_inspect.py avatar.glb --json            # maschinenlesbar für CI
+  python scripts/glb_inspect.py avatar.glb --views --accessors
+  python scripts/glb_inspect.py avatar.glb --require mouthOpen,jawOpen
+
+Exit-Codes: 0 = OK, 1 = Pflicht-Morph-Targets fehlen, 2 = Datei ungültig
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+from glb_io import GLB, GLBError, accessor_byte_length
+
+REQUIRED_MORPHS = ["mouthOpen", "mouthO", "lipsClosed"]
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Inspect a GLB without Blender")
+    p.add_argument("path", help="GLB-Datei")
+    p.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    p.add_argument("--views", action="store_true", help="Alle bufferViews einzeln auflisten")
+    p.add_argument("--accessors", action="store_true", help="Alle Accessoren einzeln auflisten")
+    p.add_argument("--require", default=",".join(REQUIRED_MORPHS),
+                   help="Komma-Liste Pflicht-Morph-Targets (leer = keine Prüfung)")
+    return p.parse_args()
+
+
+def view_usage(gltf):
+    """Ordnet jeder bufferView eine Verwendung zu (z. B. 'POSITION', 'morph:NORMAL', 'image/png')"""
+    usage = {}
+    accessors = gltf.get("accessors", [])
+
+    def mark_accessor(index, label):
+        acc = accessors[index]
+        if "bufferView" in acc:
+            usage.setdefault(acc["bufferView"], label)
+        sparse = acc.get("sparse")
+        if sparse:
+            usage.setdefault(sparse["indices"]["bufferView"], f"{label} (sparse)")
+            usage.setdefault(sparse["values"]["bufferView"], f"{label} (sparse)")
+
+    for mesh in gltf.get("meshes", []):
+        for prim in mesh.get("primitives", []):
+            draco = prim.get("extensions", {}).get("KHR_draco_mesh_compression")
+            if draco:
+                usage.setdefault(draco["bufferView"], "draco")
+            for attr, index in prim.get("attributes", {}).items():
+                mark_accessor(index, attr.split("_")[0] if attr[-1].isdigit() else attr)
+            if "indices" in prim:
+                mark_accessor(prim["indices"], "indices")
+            for target in prim.get("targets", []):
+                for attr, index in target.items():
+                    mark_accessor(index, f"morph:{attr}")
+    for skin in gltf.get("skins", []):
+        if "inverseBindMatrices" in skin:
+            mark_accessor(skin["inverseBindMatrices"], "skin")
+    for anim in gltf.get("animations", []):
+        for sampler in anim.get("samplers", []):
+            mark_accessor(sampler["input"], "animation")
+            mark_accessor(sampler["output"], "animation")
+    for image in gltf.get("images", []):
+        if "bufferView" in image:
+            usage.setdefault(image["bufferView"], image.get("mimeType", "image"))
+    return usage
+
+
+def inspect(glb, required):
+    """Sammelt alle Kennzahlen als Dict (Grundlage für Text- und JSON-Ausgabe)"""
+    gltf = glb.gltf
+    accessors = gltf.get("accessors", [])
+    views = gltf.get("bufferViews", [])
+    usage = view_usage(gltf)
+
+    meshes = []
+    all_targets = set()
+    for mi, mesh in enumerate(gltf.get("meshes", [])):
+        prims = mesh.get("primitives", [])
+        names = glb.target_names(mi)
+        all_targets.update(names)
+        vertices = sum(accessors[p["attributes"]["POSITION"]]["count"]
+                       for p in prims if "POSITION" in p.get("attributes", {}))
+        base_bytes = sum(accessor_byte_length(accessors[i])
+                         for p in prims for i in p.get("attributes", {}).values())
+        index_bytes = sum(accessor_byte_length(accessors[p["indices"]]) for p in prims if "indices" in p)
+        morph_bytes = defaultdict(int)
+        for p in prims:
+            for ti, target in enumerate(p.get("targets", [])):
+                name = names[ti] if ti < len(names) else f"target_{ti}"
+                for index in target.values():
+                    acc = accessors[index]
+                    if acc.get("sparse") and "bufferView" not in acc:
+                        morph_bytes[name] += sum(views[acc["sparse"][k]["bufferView"]]["byteLength"]
+                                                 for k in ("indices", "values"))
+                    else:
+                        morph_bytes[name] += accessor_byte_length(acc)
+        meshes.append({
+            "name": mesh.get("name", f"mesh_{mi}"),
+            "primitives": len(prims),
+            "vertices": vertices,
+            "attribute_bytes": base_bytes,
+            "index_bytes": index_bytes,
+            "morph_targets": names,
+            "morph_bytes": dict(morph_bytes),
+        })
+
+    images = []
+    for ii, image in enumerate(gltf.get("images", [])):
+        size = views[image["bufferView"]]["byteLength"] if "bufferView" in image else None
+        images.append({"name": image.get("name", f"image_{ii}"), "mimeType": image.get("mimeType"),
+                       "uri": image.get("uri"), "bytes": size})
+
+    by_usage = defaultdict(int)
+    view_list = []
+    for vi, view in enumerate(views):
+        label = usage.get(vi, "unbenutzt")
+        by_usage[label] += view["byteLength"]
+        view_list.append({"index": vi, "usage": label, "bytes": view["byteLength"],
+                          "byteStride": view.get("byteStride")})
+
+    accessor_list = [{"index": ai, "name": acc.get("name"), "type": acc["type"],
+                      "componentType": acc["componentType"], "count": acc["count"],
+                      "bytes": accessor_byte_length(acc), "sparse": bool(acc.get("sparse"))}
+                     for ai, acc in enumerate(accessors)]
+
+    missing = [name for name in required if name not in all_targets]
+    return {
+        "file": glb.path,
+        "file_bytes": glb.file_size,
+        "json_bytes": glb.json_length,
+        "bin_bytes": len(glb.bin),
+        "generator": gltf.get("asset", {}).get("generator"),
+        "extensions_used": gltf.get("extensionsUsed", []),
+        "meshes": meshes,
+        "textures": len(gltf.get("textures", [])),
+        "images": images,
+        "bytes_by_usage": dict(sorted(by_usage.items(), key=lambda kv: -kv[1])),
+        "buffer_views": view_list,
+        "accessors": accessor_list,
+        "required_morphs": required,
+        "missing_morphs": missing,
+    }
+
+
+def mb(n):
+    n = n or 0
+    if n < 1024 * 1024:
+        return f"{n / 1024:.1f} KB"
+    return f"{n / (1024 * 1024):.2f} MB"
+
+
+def print_report(info, show_views, show_accessors, elapsed_ms):
+    """Menschenlesbare Ausgabe"""
+    print("\n" + "="*60)
+    print(f"🔍 GLB-Inspektor: {os.path.basename(info['file'])}")
+    print("="*60)
+    print(f"   Datei:     {mb(info['file_bytes'])} (JSON {info['json_bytes']} B, BIN {mb(info['bin_bytes'])})")
+    print(f"   Generator: {info['generator'] or '-'}")
+    if info["extensions_used"]:
+        print(f"   Extensions: {', '.join(info['extensions_used'])}")
+    print(f"   Analyse:   {elapsed_ms:.1f} ms")
+
+    print(f"\n🧩 Meshes ({len(info['meshes'])}):")
+    for m in info["meshes"]:
+        morph_total = sum(m["morph_bytes"].values())
+        print(f"   - {m['name']}: {m['vertices']} Verts, {m['primitives']} Primitive(s), "
+              f"Attribute {mb(m['attribute_bytes'])}, Indizes {mb(m['index_bytes'])}, "
+              f"{len(m['morph_targets'])} Morph Targets ({mb(morph_total)})")
+        for name in m["morph_targets"]:
+            print(f"        • {name:<24} {mb(m['morph_bytes'].get(name, 0))}")
+
+    print(f"\n🖼️  Bilder ({len(info['images'])}), Texturen: {info['textures']}")
+    for img in info["images"]:
+        where = mb(img["bytes"]) if img["bytes"] is not None else (img["uri"] or "-")
+        print(f"   - {img['name']} [{img['mimeType'] or '?'}]: {where}")
+
+    print("\n📊 Bytes nach Verwendung:")
+    total = sum(info["bytes_by_usage"].values()) or 1
+    for label, size in info["bytes_by_usage"].items():
+        print(f"   {label:<24} {mb(size):>12}  {100.0 * size / total:5.1f}%")
+
+    if show_views:
+        print("\n📦 bufferViews:")
+        for v in info["buffer_views"]:
+            stride = f" stride {v['byteStride']}" if v["byteStride"] else ""
+            print(f"   #{v['index']:<4} {v['usage']:<24} {v['bytes']:>12} B{stride}")
+
+    if show_accessors:
+        print("\n🔢 Accessoren:")
+        for a in info["accessors"]:
+            sparse = " sparse" if a["sparse"] else ""
+            print(f"   #{a['index']:<4} {a['type']:<6} x {a['count']:<8} {a['bytes']:>12} B{sparse}"
+                  f"  {a['name'] or ''}")
+
+    if info["required_morphs"]:
+        print("\n🎭 Pflicht-Shape-Keys:")
+        for name in info["required_morphs"]:
+            print(f"   {'❌' if name in info['missing_morphs'] else '✅'} {name}")
+
+    print("\n" + "="*60)
+    if info["missing_morphs"]:
+        print(f"❌ FEHLEN: {', '.join(info['missing_morphs'])} - Export ohne Shape Keys?")
+    else:
+        print("✅ GLB OK")
+    print("="*60)
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    required = [name.strip() for name in args.require.split(",") if name.strip()]
+
+    t0 = time.perf_counter()
+    try:
+        with GLB.open(args.path) as glb:
+            info = inspect(glb, required)
+    except (OSError, GLBError, KeyError, IndexError) as e:
+        if args.json:
+            print(json.dumps({"file": args.path, "error": str(e)}))
+        else:
+            print(f"❌ FEHLER: {e}")
+        sys.exit(2)
+    elapsed_ms = (time.perf_counter() - t0) * 1000.0
+
+    if args.json:
+        info["elapsed_ms"] = round(elapsed_ms, 3)
+        print(json.dumps(info, indent=2, ensure_ascii=False))
+    else:
+        print_report(info, args.views, args.accessors, elapsed_ms)
+    sys.exit(1 if info["missing_morphs"] else 0)
+
+
+if __name__ == "__main__":
+    main()
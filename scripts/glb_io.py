@@ -0,0 +1,417 @@
+"""
+Minimaler GLB-Reader/-Writer ohne Blender
+
+- GLB.open(): prüft den 12-Byte-Header, parst den JSON-Chunk und mappt den
+  BIN-Chunk per mmap (kein Einlesen in den Speicher)
+- read_accessor(): Accessor als NumPy-Array (Stride, Sparse, normalisiert)
+- BinBuilder: hängt neue bufferViews/Accessoren an den bestehenden BIN-Chunk an,
+  ohne vorhandene Daten anzufassen
+- write_glb(): schreibt JSON + BIN wieder als GLB (4-Byte-Alignment)
+- staged_path(): Zwischendatei neben dem Ziel - erst prüfen, dann per os.replace() einstellen
+
+NumPy wird erst beim Lesen von Accessor-Daten importiert, damit reine
+JSON-Auswertungen (glb_inspect.py) ohne Import-Kosten laufen.
+"""
+
+import json
+import mmap
+import os
+import struct
+
+GLB_MAGIC = 0x46546C67      # "glTF"
+CHUNK_JSON = 0x4E4F534A     # "JSON"
+CHUNK_BIN = 0x004E4942      # "BIN\0"
+
+BYTE, UNSIGNED_BYTE, SHORT, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT = 5120, 5121, 5122, 5123, 5125, 5126
+COMPONENT_SIZES = {BYTE: 1, UNSIGNED_BYTE: 1, SHORT: 2, UNSIGNED_SHORT: 2, UNSIGNED_INT: 4, FLOAT: 4}
+COMPONENT_DTYPES = {BYTE: "<i1", UNSIGNED_BYTE: "<u1", SHORT: "<i2",
+                    UNSIGNED_SHORT: "<u2", UNSIGNED_INT: "<u4", FLOAT: "<f4"}
+TYPE_COUNTS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+
+class GLBError(ValueError):
+    """Datei ist kein gültiges GLB 2.0"""
+
+
+def _pad4(n):
+    return (4 - n % 4) % 4
+
+
+def element_size(accessor):
+    """Bytes pro Element (ohne Stride)"""
+    return COMPONENT_SIZES[accessor["componentType"]] * TYPE_COUNTS[accessor["type"]]
+
+
+def accessor_byte_length(accessor):
+    """Nutzbare Bytes eines Accessors (dicht gepackt)"""
+    return accessor["count"] * element_size(accessor)
+
+
+class GLB:
+    """Geöffnete GLB-Datei: .gltf (dict) + .bin (memoryview, ggf. mmap)"""
+
+    def __init__(self, gltf, bin_chunk=b"", path=None, file_size=None, json_length=0):
+        self.gltf = gltf
+        self.bin = memoryview(bin_chunk) if not isinstance(bin_chunk, memoryview) else bin_chunk
+        self.path = path
+        self.file_size = file_size
+        self.json_length = json_length
+        self._mm = None
+        self._mm_view = None
+        self._file = None
+
+    @classmethod
+    def open(cls, path, use_mmap=True):
+        """Öffnet eine GLB-Datei; BIN-Chunk wird gemappt statt gelesen"""
+        f = open(path, "rb")
+        try:
+            file_size = os.fstat(f.fileno()).st_size
+            header = f.read(12)
+            if len(header) < 12:
+                raise GLBError(f"{path}: Datei kürzer als der GLB-Header")
+            magic, version, length = struct.unpack("<III", header)
+            if magic != GLB_MAGIC:
+                raise GLBError(f"{path}: kein GLB (Magic {magic:#x})")
+            if version != 2:
+                raise GLBError(f"{path}: glTF-Version {version} nicht unterstützt")
+            if length > file_size:
+                raise GLBError(f"{path}: Header-Länge {length} > Dateigröße {file_size}")
+
+            chunk_len, chunk_type = struct.unpack("<II", f.read(8))
+            if chunk_type != CHUNK_JSON:
+                raise GLBError(f"{path}: erster Chunk ist nicht JSON")
+            gltf = json.loads(f.read(chunk_len).decode("utf-8"))
+
+            bin_chunk, mm, mm_view = b"", None, None
+            offset = 12 + 8 + chunk_len
+            if offset + 8 <= length:
+                f.seek(offset)
+                bin_len, bin_type = struct.unpack("<II", f.read(8))
+                if bin_type == CHUNK_BIN:
+                    start = offset + 8
+                    if start + bin_len > file_size:
+                        raise GLBError(f"{path}: BIN-Chunk abgeschnitten")
+                    if use_mmap and bin_len > 0:
+                        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                        mm_view = memoryview(mm)
+                        bin_chunk = mm_view[start:start + bin_len]
+                    else:
+                        bin_chunk = f.read(bin_len)
+        except (struct.error, UnicodeDecodeError, json.JSONDecodeError) as e:
+            f.close()
+            raise GLBError(f"{path}: defekter Chunk ({e})") from e
+        except Exception:
+            f.close()
+            raise
+
+        glb = cls(gltf, bin_chunk, path=path, file_size=file_size, json_length=chunk_len)
+        glb._mm, glb._mm_view, glb._file = mm, mm_view, f
+        return glb
+
+    def close(self):
+        """Gibt mmap und Dateihandle frei"""
+        self.bin.release()
+        if self._mm_view is not None:
+            self._mm_view.release()
+            self._mm_view = None
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # noch Views im Umlauf - mmap wird beim Garbage Collect freigegeben
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- Zugriff ----------
+
+    def buffer_view(self, index):
+        """Rohbytes einer bufferView (nur Buffer 0 = BIN-Chunk)"""
+        bv = self.gltf["bufferViews"][index]
+        if bv.get("buffer", 0) != 0:
+            raise GLBError("Externe Buffer werden nicht unterstützt")
+        start = bv.get("byteOffset", 0)
+        return self.bin[start:start + bv["byteLength"]]
+
+    def read_accessor(self, index, normalize=False):
+        """Accessor als (count, n)-Array; Sparse-Werte werden eingesetzt"""
+        import numpy as np
+
+        acc = self.gltf["accessors"][index]
+        dtype = np.dtype(COMPONENT_DTYPES[acc["componentType"]])
+        n = TYPE_COUNTS[acc["type"]]
+        count = acc["count"]
+
+        if "bufferView" in acc:
+            bv = self.gltf["bufferViews"][acc["bufferView"]]
+            raw = self.buffer_view(acc["bufferView"])
+            offset = acc.get("byteOffset", 0)
+            stride = bv.get("byteStride", 0) or dtype.itemsize * n
+            if count == 0:
+                out = np.zeros((0, n), dtype=dtype)
+            elif stride == dtype.itemsize * n:
+                out = np.frombuffer(raw, dtype=dtype, count=count * n, offset=offset).reshape(count, n).copy()
+            else:
+                rows = np.frombuffer(raw, dtype=np.uint8, count=(count - 1) * stride + dtype.itemsize * n,
+                                     offset=offset)
+                out = np.lib.stride_tricks.as_strided(
+                    rows, shape=(count, dtype.itemsize * n), strides=(stride, 1)).copy().view(dtype)
+        else:
+            out = np.zeros((count, n), dtype=dtype)
+
+        sparse = acc.get("sparse")
+        if sparse:
+            idx_info, val_info = sparse["indices"], sparse["values"]
+            idx = np.frombuffer(self.buffer_view(idx_info["bufferView"]),
+                                dtype=COMPONENT_DTYPES[idx_info["componentType"]],
+                                count=sparse["count"], offset=idx_info.get("byteOffset", 0))
+            vals = np.frombuffer(self.buffer_view(val_info["bufferView"]), dtype=dtype,
+                                 count=sparse["count"] * n, offset=val_info.get("byteOffset", 0))
+            out[idx.astype(np.int64)] = vals.reshape(-1, n)
+
+        if normalize and acc.get("normalized") and dtype.kind in "iu":
+            info = np.iinfo(dtype)
+            out = out.astype(np.float32) / info.max
+            if dtype.kind == "i":
+                out = np.maximum(out, -1.0)
+        return out
+
+    def target_names(self, mesh_index):
+        """Morph-Target-Namen eines Meshes (extras.targetNames, sonst target_<i>)"""
+        mesh = self.gltf["meshes"][mesh_index]
+        names = (mesh.get("extras") or {}).get("targetNames")
+        n_targets = max((len(p.get("targets", [])) for p in mesh.get("primitives", [])), default=0)
+        if names and len(names) == n_targets:
+            return list(names)
+        return [f"target_{i}" for i in range(n_targets)]
+
+
+class BinBuilder:
+    """Hängt neue Daten hinter den bestehenden BIN-Chunk an
+
+    Vorhandene bufferViews behalten Offset und Inhalt; neue Views landen am Ende.
+    """
+
+    def __init__(self, glb):
+        self.gltf = glb.gltf
+        self.base = glb.bin
+        self.base_length = len(glb.bin) + _pad4(len(glb.bin))
+        self.parts = []
+        self.length = self.base_length
+        self.gltf.setdefault("bufferViews", [])
+        self.gltf.setdefault("accessors", [])
+
+    def add_view(self, data, target=None, byte_stride=None):
+        """Neue bufferView mit data (bytes/ndarray); liefert deren Index"""
+        data = data.tobytes() if hasattr(data, "tobytes") else bytes(data)
+        pad = _pad4(self.length)
+        if pad:
+            self.parts.append(b"\0" * pad)
+            self.length += pad
+        view = {"buffer": 0, "byteOffset": self.length, "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        if byte_stride:
+            view["byteStride"] = byte_stride
+        self.parts.append(data)
+        self.length += len(data)
+        self.gltf["bufferViews"].append(view)
+        return len(self.gltf["bufferViews"]) - 1
+
+    def add_accessor(self, array, accessor_type, component_type=FLOAT, target=ARRAY_BUFFER,
+                     with_bounds=True, normalized=False):
+        """Neuer Accessor (+ bufferView) aus einem NumPy-Array; liefert Index"""
+        import numpy as np
+
+        arr = np.ascontiguousarray(array, dtype=COMPONENT_DTYPES[component_type])
+        n = TYPE_COUNTS[accessor_type]
+        arr = arr.reshape(-1, n)
+        acc = {
+            "bufferView": self.add_view(arr, target=target),
+            "componentType": component_type,
+            "count": int(arr.shape[0]),
+            "type": accessor_type,
+        }
+        if normalized:
+            acc["normalized"] = True
+        if with_bounds and len(arr):
+            acc["min"] = arr.min(axis=0).tolist()
+            acc["max"] = arr.max(axis=0).tolist()
+        self.gltf["accessors"].append(acc)
+        return len(self.gltf["accessors"]) - 1
+
+    def bin_bytes(self):
+        """Kompletter neuer BIN-Chunk (alt + Padding + neu)"""
+        return b"".join([bytes(self.base), b"\0" * (self.base_length - len(self.base))] + self.parts)
+
+
+def write_glb(path, gltf, bin_bytes=b""):
+    """Schreibt GLB 2.0 (JSON-Chunk mit Leerzeichen, BIN-Chunk mit Nullen aufgefüllt)"""
+    bin_bytes = bytes(bin_bytes)
+    if bin_bytes:
+        gltf.setdefault("buffers", [{}])
+        if not gltf["buffers"]:
+            gltf["buffers"].append({})
+        gltf["buffers"][0]["byteLength"] = len(bin_bytes)
+        gltf["buffers"][0].pop("uri", None)
+
+    json_bytes = json.dumps(gltf, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    json_bytes += b" " * _pad4(len(json_bytes))
+    bin_padded = bin_bytes + b"\0" * _pad4(len(bin_bytes))
+
+    total = 12 + 8 + len(json_bytes) + (8 + len(bin_padded) if bin_bytes else 0)
+    out_dir = os.path.dirname(path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(struct.pack("<III", GLB_MAGIC, 2, total))
+        f.write(struct.pack("<II", len(json_bytes), CHUNK_JSON))
+        f.write(json_bytes)
+        if bin_bytes:
+            f.write(struct.pack("<II", len(bin_padded), CHUNK_BIN))
+            f.write(bin_padded)
+    os.replace(tmp, path)
+    return total
+
+
+def staged_path(path):
+    """Zwischendatei für einen Pass, der path erst nach bestandener Prüfung ersetzt
+
+    Liegt im selben Verzeichnis (os.replace bleibt atomar) und endet auf .glb,
+    damit externe Validatoren sie als GLB erkennen.
+    """
+    return f"{os.path.splitext(path)[0]}.{os.getpid()}.staged.glb"
+
+
+def _walk_view_refs(node, visit, skip_key="bufferViews"):
+    """Ruft visit(dict) für jedes Dict mit int-Key 'bufferView' auf (auch in Extensions)"""
+    if isinstance(node, dict):
+        if isinstance(node.get("bufferView"), int):
+            visit(node)
+        for key, value in node.items():
+            if key != skip_key:
+                _walk_view_refs(value, visit, skip_key)
+    elif isinstance(node, list):
+        for item in node:
+            _walk_view_refs(item, visit, skip_key)
+
+
+def repack_bin(gltf, bin_bytes):
+    """Baut den BIN-Chunk neu: unreferenzierte bufferViews fallen weg, Rest wird dicht gepackt
+
+    Inhalte der verbleibenden Views bleiben unverändert, nur Offsets/Indizes
+    werden angepasst. Liefert die neuen BIN-Bytes.
+    """
+    views = gltf.get("bufferViews", [])
+    used = set()
+    _walk_view_refs(gltf, lambda d: used.add(d["bufferView"]))
+
+    src = memoryview(bin_bytes)
+    remap, new_views, parts, length = {}, [], [], 0
+    for old_index, view in enumerate(views):
+        if old_index not in used:
+            continue
+        pad = _pad4(length)
+        if pad:
+            parts.append(b"\0" * pad)
+            length += pad
+        start = view.get("byteOffset", 0)
+        parts.append(src[start:start + view["byteLength"]])
+        new_view = dict(view, byteOffset=length)
+        length += view["byteLength"]
+        remap[old_index] = len(new_views)
+        new_views.append(new_view)
+
+    def fix(d):
+        d["bufferView"] = remap[d["bufferView"]]
+
+    _walk_view_refs(gltf, fix)
+    gltf["bufferViews"] = new_views
+    return b"".join(bytes(p) for p in parts)
+
+
+def validate_gltf(gltf, bin_length):
+    """Strukturelle Prüfung der Binär-Referenzen (Teilmenge des Khronos-Validators)
+
+    Prüft bufferView-Grenzen, Accessor-Ausrichtung und -Größe, Sparse-Indizes
+    und POSITION-min/max. Liefert Liste von Fehlermeldungen (leer = OK).
+    """
+    errors = []
+    views = gltf.get("bufferViews", [])
+    for vi, view in enumerate(views):
+        end = view.get("byteOffset", 0) + view["byteLength"]
+        if end > bin_length:
+            errors.append(f"bufferViews[{vi}]: endet bei {end} > BIN-Länge {bin_length}")
+
+    def check_range(where, view_index, offset, nbytes, align):
+        if view_index >= len(views):
+            errors.append(f"{where}: bufferView {view_index} existiert nicht")
+            return
+        view = views[view_index]
+        if offset + nbytes > view["byteLength"]:
+            errors.append(f"{where}: {offset + nbytes} Bytes > bufferView-Länge {view['byteLength']}")
+        if (view.get("byteOffset", 0) + offset) % align:
+            errors.append(f"{where}: Offset nicht auf {align} Bytes ausgerichtet")
+
+    for ai, acc in enumerate(gltf.get("accessors", [])):
+        where = f"accessors[{ai}]"
+        csize = COMPONENT_SIZES[acc["componentType"]]
+        if "bufferView" in acc:
+            stride = views[acc["bufferView"]].get("byteStride", 0) if acc["bufferView"] < len(views) else 0
+            nbytes = (acc["count"] - 1) * stride + element_size(acc) if stride and acc["count"] else \
+                accessor_byte_length(acc)
+            check_range(where, acc["bufferView"], acc.get("byteOffset", 0), nbytes, csize)
+        sparse = acc.get("sparse")
+        if sparse:
+            n = sparse["count"]
+            if n < 1 or n > acc["count"]:
+                errors.append(f"{where}: sparse.count {n} ungültig")
+                continue
+            idx, val = sparse["indices"], sparse["values"]
+            if idx["componentType"] not in (UNSIGNED_BYTE, UNSIGNED_SHORT, UNSIGNED_INT):
+                errors.append(f"{where}: sparse.indices componentType ungültig")
+                continue
+            isize = COMPONENT_SIZES[idx["componentType"]]
+            check_range(where + ".sparse.indices", idx["bufferView"], idx.get("byteOffset", 0), n * isize, isize)
+            check_range(where + ".sparse.values", val["bufferView"], val.get("byteOffset", 0),
+                        n * element_size(acc), csize)
+    for mi, mesh in enumerate(gltf.get("meshes", [])):
+        counts = {len(p.get("targets", [])) for p in mesh.get("primitives", [])}
+        if len(counts) > 1:
+            errors.append(f"meshes[{mi}]: Primitive mit unterschiedlicher Target-Anzahl")
+        for pi, prim in enumerate(mesh.get("primitives", [])):
+            positions = [prim.get("attributes", {}).get("POSITION")]
+            positions += [t.get("POSITION") for t in prim.get("targets", [])]
+            for index in positions:
+                if index is not None and not ("min" in gltf["accessors"][index] and "max" in gltf["accessors"][index]):
+                    errors.append(f"meshes[{mi}].primitives[{pi}]: POSITION-Accessor {index} ohne min/max")
+    return errors
+
+
+def check_sparse_indices(glb):
+    """Sparse-Indizes müssen streng steigend und < count sein (liest BIN-Daten)"""
+    import numpy as np
+
+    errors = []
+    for ai, acc in enumerate(glb.gltf.get("accessors", [])):
+        sparse = acc.get("sparse")
+        if not sparse:
+            continue
+        idx_info = sparse["indices"]
+        idx = np.frombuffer(glb.buffer_view(idx_info["bufferView"]),
+                            dtype=COMPONENT_DTYPES[idx_info["componentType"]],
+                            count=sparse["count"], offset=idx_info.get("byteOffset", 0)).astype(np.int64)
+        if len(idx) and (np.any(np.diff(idx) <= 0) or idx[-1] >= acc["count"]):
+            errors.append(f"accessors[{ai}]: sparse.indices nicht streng steigend oder außerhalb von count")
+    return errors
@@ -0,0 +1,473 @@
+"""
+Vertex-Attribute und Morph-Deltas nach KHR_mesh_quantization quantisieren (Post-Export-Pass)
+
+export_glb() kennt nur float32 oder Draco. Draco lässt Morph Targets dicht
+und muss im Browser per WASM auf dem Main-Thread dekodiert werden. Dieser Pass
+speichert die Attribute stattdessen als normalisierte Ganzzahlen, die die GPU
+direkt liest - kein Decoder im Client:
+
+  POSITION            SHORT normalisiert   (Offset + Skalierung pro Mesh -> Node-Transform)
+  NORMAL / TANGENT    BYTE normalisiert
+  TEXCOORD_n          UNSIGNED_SHORT normalisiert (nur wenn alle UVs in 0..1 liegen)
+  Morph POSITION      SHORT normalisiert   (gleiche Skalierung wie POSITION)
+  Morph NORMAL/TANGENT SHORT normalisiert (nur wenn alle Deltas in -1..1 liegen)
+
+Die Dequantisierung (Translation + gleichförmige Skalierung) wandert in den
+Node: direkt in dessen TRS, sonst in einen neuen Kind-Node; bei Skinned Meshes
+in die inverseBindMatrices des Skins. Vertex-Attribute werden auf 4 Byte
+ausgerichtet (byteStride), extensionsUsed/-Required erhalten
+KHR_mesh_quantization. Danach wird die Datei geprüft und der Fehler gegen das
+Original gemessen (Position relativ zur Bounding-Box-Diagonale, Normalen-Winkel, UV,
+Morph-Normalen-Deltas).
+
+Usage:
+  python scripts/glb_quantize.py --in Kayanew_mouth.glb --out Kayanew_q.glb
+  python scripts/glb_quantize.py --in Kayanew_mouth.glb --compare Kayanew-draco.glb   # Größe, Parse-Zeit, Fehler
+  python scripts/glb_quantize.py --in avatar.glb --json --validator "npx gltf-validator"
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from glb_io import (BYTE, FLOAT, SHORT, UNSIGNED_SHORT, ARRAY_BUFFER, COMPONENT_SIZES, TYPE_COUNTS, GLB, GLBError,
+                    BinBuilder, repack_bin, staged_path, validate_gltf, write_glb)
+from glb_sparse_morphs import run_validator
+
+EXTENSION = "KHR_mesh_quantization"
+LIMITS = {BYTE: 127, SHORT: 32767, UNSIGNED_SHORT: 65535}
+DTYPES = {BYTE: np.int8, SHORT: np.int16, UNSIGNED_SHORT: np.uint16}
+# Ziel-Typ je Attribut (Basis, Morph-Target)
+BASE_TYPES = {"POSITION": SHORT, "NORMAL": BYTE, "TANGENT": BYTE}
+MORPH_TYPES = {"POSITION": SHORT, "NORMAL": SHORT, "TANGENT": SHORT}
+PARSE_REPEATS = 5
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Quantize GLB vertex attributes (KHR_mesh_quantization)")
+    p.add_argument("--in", dest="inp", required=True, help="Input GLB path (float, ohne Draco)")
+    p.add_argument("--out", dest="outp", default=None, help="Output GLB path (Standard: <in>_q.glb)")
+    p.add_argument("--compare", default=None, metavar="DRACO_GLB",
+                   help="Zusätzlich Größe/Parse-Zeit/Fehler gegen Float und diese Draco-Datei vergleichen")
+    p.add_argument("--no-texcoords", action="store_true", help="UVs als float lassen")
+    p.add_argument("--validator", default=None, help='Externer Validator, z. B. "npx gltf-validator"')
+    p.add_argument("--json", action="store_true", help="Report als JSON ausgeben")
+    return p.parse_args()
+
+
+# --- Quantisierung ------------------------------------------------------------
+
+def quantize(values, component_type):
+    """Float-Werte (bereits auf -1..1 bzw. 0..1 skaliert) -> normalisierte Ganzzahlen"""
+    limit = LIMITS[component_type]
+    low = 0 if component_type == UNSIGNED_SHORT else -limit
+    return np.clip(np.rint(values * limit), low, limit).astype(DTYPES[component_type])
+
+
+def add_attribute(builder, q, accessor_type, component_type, bounds=False):
+    """Quantisierten Vertex-Accessor anhängen; Elemente auf 4 Byte aufgefüllt (byteStride)"""
+    n = TYPE_COUNTS[accessor_type]
+    size = COMPONENT_SIZES[component_type] * n
+    stride = (size + 3) // 4 * 4
+    q = q.reshape(-1, n)
+    if stride != size:
+        padded = np.zeros((len(q), stride // COMPONENT_SIZES[component_type]), dtype=q.dtype)
+        padded[:, :n] = q
+        data = padded
+    else:
+        data = q
+    acc = {"bufferView": builder.add_view(np.ascontiguousarray(data), target=ARRAY_BUFFER,
+                                          byte_stride=stride if stride != size else None),
+           "componentType": component_type, "normalized": True, "count": int(len(q)), "type": accessor_type}
+    if bounds and len(q):
+        acc["min"] = q.min(axis=0).astype(int).tolist()
+        acc["max"] = q.max(axis=0).astype(int).tolist()
+    return acc
+
+
+def is_float(accessor):
+    return accessor["componentType"] == FLOAT and not accessor.get("normalized")
+
+
+def mesh_transform(glb, mesh):
+    """(Offset, Skalierung) pro Mesh: Basis-Positionen und Morph-Deltas müssen in -1..1 passen"""
+    positions, extent = [], 0.0
+    for prim in mesh["primitives"]:
+        positions.append(glb.read_accessor(prim["attributes"]["POSITION"]))
+        for target in prim.get("targets", []):
+            if "POSITION" in target:
+                delta = glb.read_accessor(target["POSITION"])
+                if len(delta):
+                    extent = max(extent, float(np.abs(delta).max()))
+    pos = np.concatenate(positions).astype(np.float64)
+    center = (pos.min(axis=0) + pos.max(axis=0)) / 2.0
+    scale = max(float(np.abs(pos - center).max()), extent)
+    return center, scale or 1.0
+
+
+def dequant_matrix(center, scale):
+    m = np.eye(4)
+    m[:3, :3] *= scale
+    m[:3, 3] = center
+    return m
+
+
+def quat_rotate(q, v):
+    x, y, z, w = q
+    u = np.array([x, y, z])
+    return v + 2.0 * np.cross(u, np.cross(u, v) + w * v)
+
+
+def animated_nodes(gltf, paths):
+    return {c["target"].get("node") for a in gltf.get("animations", []) for c in a.get("channels", [])
+            if c["target"].get("path") in paths}
+
+
+def place_transform(glb, builder, mesh_index, center, scale, state, report):
+    """Dequantisierung in alle Nodes dieses Meshes einbauen"""
+    gltf = glb.gltf
+    nodes = gltf.setdefault("nodes", [])
+    trs_animated = animated_nodes(gltf, ("translation", "rotation", "scale"))
+    m = dequant_matrix(center, scale)
+    for ni in [i for i, n in enumerate(nodes) if n.get("mesh") == mesh_index]:
+        node = nodes[ni]
+        if "skin" in node:
+            # Node-Transform wird bei Skinning ignoriert -> inverseBindMatrices anpassen (IBM' = IBM · M)
+            key = (node["skin"], mesh_index)
+            if key not in state["skins"]:
+                skin = gltf["skins"][node["skin"]]
+                source = state["skin_ibm"].setdefault(node["skin"], skin.get("inverseBindMatrices"))
+                target = node["skin"]
+                if any(k[0] == node["skin"] for k in state["skins"]):
+                    # Skin bereits für ein anderes Mesh angepasst -> eigene Kopie
+                    skin = dict(skin)
+                    gltf["skins"].append(skin)
+                    target = len(gltf["skins"]) - 1
+                    report["skins_cloned"] += 1
+                n_joints = len(skin["joints"])
+                ibm = (np.tile(np.eye(4), (n_joints, 1, 1)) if source is None
+                       else glb.read_accessor(source).reshape(n_joints, 4, 4).transpose(0, 2, 1))
+                fixed = (ibm @ m).transpose(0, 2, 1).reshape(n_joints, 16)
+                skin["inverseBindMatrices"] = builder.add_accessor(fixed, "MAT4", target=None, with_bounds=False)
+                state["skins"][key] = target
+            node["skin"] = state["skins"][key]
+            report["placement"].append({"node": node.get("name", ni), "where": "skin"})
+        elif "matrix" in node or node.get("children") or ni in trs_animated:
+            # Transform nicht als TRS faltbar -> Mesh in einen Kind-Node mit Dequantisierung verschieben
+            child = {"name": node.get("name", f"node_{ni}"), "mesh": mesh_index,
+                     "translation": center.tolist(), "scale": [scale] * 3}
+            if "weights" in node:
+                child["weights"] = node.pop("weights")
+            node["name"] = f"{child['name']}_dequant"
+            del node["mesh"]
+            nodes.append(child)
+            node.setdefault("children", []).append(len(nodes) - 1)
+            for anim in gltf.get("animations", []):
+                for channel in anim.get("channels", []):
+                    if channel["target"].get("node") == ni and channel["target"].get("path") == "weights":
+                        channel["target"]["node"] = len(nodes) - 1
+            report["placement"].append({"node": child["name"], "where": "child"})
+        else:
+            # T·R·S·T(c)·S(s) = T(t + R·S·c)·R·S(S·s) - bleibt ein TRS
+            t = np.array(node.get("translation", [0, 0, 0]), dtype=np.float64)
+            r = node.get("rotation", [0, 0, 0, 1])
+            s = np.array(node.get("scale", [1, 1, 1]), dtype=np.float64)
+            node["translation"] = (t + quat_rotate(r, s * center)).tolist()
+            node["scale"] = (s * scale).tolist()
+            report["placement"].append({"node": node.get("name", ni), "where": "trs"})
+
+
+def quantize_mesh(glb, builder, mesh_index, center, scale, state, texcoords, report):
+    accessors = glb.gltf["accessors"]
+    mesh = glb.gltf["meshes"][mesh_index]
+    done, source = state["accessors"], state["source"]
+
+    def convert(index, attr, morph):
+        acc = source[index]
+        if not is_float(acc):
+            return index
+        # Positionen hängen von Offset/Skalierung des Meshes ab, der Rest nur vom Attribut
+        key = (index, mesh_index if attr == "POSITION" else None, morph)
+        if key in done:
+            return done[key]
+        if attr == "POSITION":
+            ctype = SHORT
+        elif attr in ("NORMAL", "TANGENT"):
+            ctype = (MORPH_TYPES if morph else BASE_TYPES)[attr]
+        elif attr.startswith("TEXCOORD_") and texcoords and not morph:
+            ctype = UNSIGNED_SHORT
+        else:
+            return index
+        if index not in state["data"]:
+            state["data"][index] = glb.read_accessor(index).astype(np.float64)
+        data = state["data"][index]
+        if attr == "POSITION":
+            data = data / scale if morph else (data - center) / scale
+        elif ctype == UNSIGNED_SHORT and len(data) and (data.min() < 0.0 or data.max() > 1.0):
+            report["texcoords_float"] += 1
+            done[key] = index
+            return index
+        elif morph and len(data) and np.abs(data).max() > 1.0:
+            # Differenz zweier Einheitsvektoren liegt in -2..2 - normalisiert würde auf ±1 abgeschnitten
+            report["morph_normals_float"] += 1
+            done[key] = index
+            return index
+
+        new = add_attribute(builder, quantize(data, ctype), acc["type"], ctype, bounds=attr == "POSITION")
+        for keep in ("name", "extras"):
+            if keep in acc:
+                new[keep] = acc[keep]
+        # Erster Nutzer ersetzt in-place (Index bleibt), weitere Varianten werden angehängt
+        if accessors[index] is acc:
+            accessors[index] = new
+            done[key] = index
+        else:
+            accessors.append(new)
+            done[key] = len(accessors) - 1
+        report["attributes"][f"morph {attr}" if morph else attr] = ctype
+        return done[key]
+
+    for prim in mesh["primitives"]:
+        attrs = prim["attributes"]
+        for attr in list(attrs):
+            attrs[attr] = convert(attrs[attr], attr, False)
+        for target in prim.get("targets", []):
+            for attr in list(target):
+                target[attr] = convert(target[attr], attr, True)
+    place_transform(glb, builder, mesh_index, center, scale, state, report)
+
+
+def quantize_glb(glb, texcoords=True):
+    """Quantisiert alle Meshes in glb.gltf; liefert (BIN-Bytes, Report, {Mesh: (Offset, Skalierung)})"""
+    gltf = glb.gltf
+    if EXTENSION in gltf.get("extensionsUsed", []):
+        raise GLBError("Datei ist bereits quantisiert")
+    if "KHR_draco_mesh_compression" in gltf.get("extensionsUsed", []):
+        raise GLBError("Draco-komprimierte GLB - bitte ohne Draco exportieren und dann quantisieren")
+
+    # Transformationen vor dem ersten Umschreiben bestimmen (Accessoren können geteilt sein)
+    transforms = {}
+    for mi, mesh in enumerate(gltf.get("meshes", [])):
+        prims = mesh.get("primitives", [])
+        if prims and all("POSITION" in p.get("attributes", {}) and is_float(gltf["accessors"][p["attributes"]["POSITION"]])
+                         for p in prims):
+            transforms[mi] = mesh_transform(glb, mesh)
+
+    builder = BinBuilder(glb)
+    report = {"meshes": len(transforms), "skipped": [], "attributes": {}, "placement": [], "texcoords_float": 0,
+              "morph_normals_float": 0,
+              "skins_cloned": 0}
+    state = {"source": list(gltf["accessors"]), "data": {}, "accessors": {}, "skins": {}, "skin_ibm": {}}
+    for mi, mesh in enumerate(gltf.get("meshes", [])):
+        if mi not in transforms:
+            report["skipped"].append(mesh.get("name", mi))
+            continue
+        quantize_mesh(glb, builder, mi, *transforms[mi], state, texcoords, report)
+    for key in ("extensionsUsed", "extensionsRequired"):
+        gltf[key] = sorted(set(gltf.get(key, [])) | {EXTENSION})
+    bin_bytes = repack_bin(gltf, builder.bin_bytes())
+    if gltf.get("buffers"):
+        gltf["buffers"][0]["byteLength"] = len(bin_bytes)
+    names = {BYTE: "BYTE", SHORT: "SHORT", UNSIGNED_SHORT: "UNSIGNED_SHORT"}
+    report["attributes"] = {k: names[v] for k, v in sorted(report["attributes"].items())}
+    return bin_bytes, report, transforms
+
+
+# --- Prüfung und Vergleich ----------------------------------------------------
+
+def decoded_attributes(glb, transforms=None):
+    """{(Mesh, Primitive, Attribut): float-Array} wie ein Loader es an die GPU gibt (inkl. Dequantisierung)"""
+    out = {}
+    for mi, mesh in enumerate(glb.gltf.get("meshes", [])):
+        center, scale = (transforms or {}).get(mi, (0.0, 1.0))
+        for pi, prim in enumerate(mesh["primitives"]):
+            for attr, index in prim.get("attributes", {}).items():
+                data = glb.read_accessor(index, normalize=True).astype(np.float32)
+                out[(mi, pi, attr)] = data * scale + center if attr == "POSITION" else data
+            for ti, target in enumerate(prim.get("targets", [])):
+                for attr, index in target.items():
+                    data = glb.read_accessor(index, normalize=True).astype(np.float32)
+                    out[(mi, pi, f"target{ti}/{attr}")] = data * scale if attr == "POSITION" else data
+    return out
+
+
+def measure_error(original, quantized):
+    """Max. Abweichungen: Position/Morph relativ zur Diagonale, Normalen-Winkel in Grad, UV und
+    Morph-Normalen/-Tangenten-Deltas absolut"""
+    positions = [v for k, v in original.items() if k[2] == "POSITION"]
+    allpos = np.concatenate(positions) if positions else np.zeros((1, 3))
+    diag = float(np.linalg.norm(allpos.max(axis=0) - allpos.min(axis=0))) or 1.0
+    err = {"position": 0.0, "morph_position": 0.0, "normal_deg": 0.0, "uv": 0.0, "morph_normal": 0.0}
+    for key, ref in original.items():
+        got = quantized.get(key)
+        if got is None or not len(ref):
+            continue
+        attr = key[2]
+        if attr == "POSITION":
+            err["position"] = max(err["position"], float(np.abs(got - ref).max()) / diag)
+        elif attr.endswith("/POSITION"):
+            err["morph_position"] = max(err["morph_position"], float(np.abs(got - ref).max()) / diag)
+        elif attr.endswith("/NORMAL") or attr.endswith("/TANGENT"):
+            err["morph_normal"] = max(err["morph_normal"], float(np.abs(got - ref).max()))
+        elif attr == "NORMAL":
+            a = ref / np.maximum(np.linalg.norm(ref, axis=1, keepdims=True), 1e-12)
+            b = got / np.maximum(np.linalg.norm(got, axis=1, keepdims=True), 1e-12)
+            cos = np.clip((a * b).sum(axis=1), -1.0, 1.0)
+            err["normal_deg"] = max(err["normal_deg"], float(np.degrees(np.arccos(cos.min()))))
+        elif attr.startswith("TEXCOORD_"):
+            err["uv"] = max(err["uv"], float(np.abs(got - ref).max()))
+    return err
+
+
+def parse_time(path):
+    """Median-Zeit: GLB öffnen und alle Vertex-Accessoren in GPU-fertige Arrays lesen
+
+    Näherung für den Loader im Browser (Typed-Array-Views, keine Dekodierung).
+    Draco-Primitive brauchen dort zusätzlich den WASM-Decoder - hier nicht messbar.
+    """
+    times = []
+    for _ in range(PARSE_REPEATS):
+        t0 = time.perf_counter()
+        with GLB.open(path, use_mmap=False) as glb:
+            for mesh in glb.gltf.get("meshes", []):
+                for prim in mesh["primitives"]:
+                    indices = list(prim.get("attributes", {}).values())
+                    indices += [i for t in prim.get("targets", []) for i in t.values()]
+                    for index in indices:
+                        acc = glb.gltf["accessors"][index]
+                        if "bufferView" in acc or "sparse" in acc:
+                            glb.read_accessor(index)
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times))
+
+
+def gzip_size(path):
+    with open(path, "rb") as f:
+        return len(gzip.compress(f.read(), compresslevel=6))
+
+
+def file_row(label, path, error=None, parse=True):
+    row = {"label": label, "file": path, "bytes": os.path.getsize(path), "gzip_bytes": gzip_size(path)}
+    with GLB.open(path) as glb:
+        draco = "KHR_draco_mesh_compression" in glb.gltf.get("extensionsUsed", [])
+    row["parse_s"] = parse_time(path) if parse and not draco else None
+    row["error"] = error
+    if draco:
+        row["note"] = "Draco: Parse-Zeit ohne WASM-Decoder nicht messbar, Morph Targets bleiben unkomprimiert"
+    return row
+
+
+def quantize_file(inp, outp, texcoords=True, validator=None):
+    """Kompletter Pass Datei -> Datei inkl. Prüfung; wirft GLBError bei Fehlern
+
+    Geschrieben wird in eine Zwischendatei; outp wird erst nach bestandener
+    Prüfung ersetzt (inp == outp bleibt bei Fehlern unverändert).
+    """
+    t0 = time.perf_counter()
+    with GLB.open(inp) as glb:
+        original = decoded_attributes(glb)
+        bin_bytes, report, transforms = quantize_glb(glb, texcoords)
+        gltf = glb.gltf
+        size_before = glb.file_size
+
+    staged = staged_path(outp)
+    try:
+        size_after = write_glb(staged, gltf, bin_bytes)
+        with GLB.open(staged) as glb:
+            errors = validate_gltf(glb.gltf, len(glb.bin))
+            quantized = decoded_attributes(glb, transforms)
+        if validator:
+            ok, output = run_validator(validator, staged)
+            report["validator_output"] = output
+            if not ok:
+                errors.append(f"Externer Validator meldet Fehler ({validator})")
+        if errors:
+            raise GLBError("Validierung fehlgeschlagen:\n   " + "\n   ".join(errors))
+        os.replace(staged, outp)
+    finally:
+        if os.path.exists(staged):
+            os.remove(staged)
+
+    report.update(file=outp, file_bytes_before=size_before, file_bytes_after=size_after,
+                  error=measure_error(original, quantized), duration_s=round(time.perf_counter() - t0, 3))
+    return report
+
+
+def print_report(report):
+    print(f"\n🔢 Quantisiert: {report['meshes']} Meshes")
+    for attr, ctype in report["attributes"].items():
+        print(f"   {attr:<16} -> {ctype} normalisiert")
+    if report["texcoords_float"]:
+        print(f"   ⚠️  {report['texcoords_float']} UV-Accessor(en) außerhalb 0..1 - bleiben float")
+    if report["morph_normals_float"]:
+        print(f"   ⚠️  {report['morph_normals_float']} Morph-Normalen/-Tangenten mit Deltas außerhalb -1..1 - "
+              f"bleiben float")
+    if report["skipped"]:
+        print(f"   ⏭️  Nicht float (übersprungen): {', '.join(map(str, report['skipped']))}")
+    where = {}
+    for p in report["placement"]:
+        where[p["where"]] = where.get(p["where"], 0) + 1
+    print(f"   Dequantisierung: {', '.join(f'{n}x {w}' for w, n in where.items())}")
+    e = report["error"]
+    print(f"\n📏 Max. Fehler: Position {e['position']:.2e}, Morph {e['morph_position']:.2e} (rel. Diagonale), "
+          f"Normalen {e['normal_deg']:.2f}°, UV {e['uv']:.2e}, Morph-Normalen {e['morph_normal']:.2e}")
+    print(f"💾 {report['file_bytes_before'] / (1024 * 1024):.2f} MB -> {report['file_bytes_after'] / (1024 * 1024):.2f} MB "
+          f"in {report['duration_s'] * 1000:.0f} ms")
+
+
+def print_comparison(rows):
+    print(f"\n{'Variante':<12} {'Größe':>10} {'gzip':>10} {'Parse':>10}  Fehler (Position / Normalen)")
+    for row in rows:
+        parse = f"{row['parse_s'] * 1000:.1f} ms" if row["parse_s"] is not None else "n/a"
+        error = (f"{row['error']['position']:.1e} / {row['error']['normal_deg']:.2f}°" if row["error"]
+                 else ("0 (Referenz)" if row["label"] == "float" else "n/a"))
+        print(f"{row['label']:<12} {row['bytes'] / (1024 * 1024):>8.2f}MB {row['gzip_bytes'] / (1024 * 1024):>8.2f}MB "
+              f"{parse:>10}  {error}")
+        if row.get("note"):
+            print(f"{'':<12} ℹ️  {row['note']}")
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    outp = args.outp or os.path.splitext(args.inp)[0] + "_q.glb"
+
+    if not args.json:
+        print("\n" + "="*60)
+        print("🔢 KAYA Avatar: KHR_mesh_quantization")
+        print("="*60)
+        print(f"Input:  {args.inp}")
+        print(f"Output: {outp}")
+        print("="*60)
+        sys.stdout.flush()
+
+    try:
+        report = quantize_file(args.inp, outp, not args.no_texcoords, args.validator)
+        if args.compare:
+            report["comparison"] = [file_row("float", args.inp), file_row("quantisiert", outp, report["error"]),
+                                    file_row("draco", args.compare)]
+    except (OSError, GLBError) as e:
+        if args.json:
+            print(json.dumps({"file": args.inp, "error": str(e)}))
+        else:
+            print(f"\n❌ FEHLER: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    print_report(report)
+    if args.compare:
+        print_comparison(report["comparison"])
+    print("\n✅ Validierung OK")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
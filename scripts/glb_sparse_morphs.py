@@ -0,0 +1,274 @@
+"""
+Morph Targets als glTF-Sparse-Accessoren speichern (Post-Export-Pass)
+
+Die Mund-Keys bewegen nur wenige hundert Vertices, der Export schreibt aber
+für jedes Target ein dichtes Delta-Array über das ganze Mesh. Dieser Pass
+liest alle Morph-Target-Accessoren, verwirft Deltas unter --epsilon und
+schreibt das Target als Sparse-Accessor (ohne bufferView, nur Indizes +
+Werte), sofern das kleiner ist als dicht. Indizes nutzen den kleinsten
+passenden Typ (UNSIGNED_BYTE/SHORT/INT). Nicht mehr referenzierte
+bufferViews werden entfernt, alle anderen Daten bleiben unverändert.
+
+Danach wird die Datei geprüft: Struktur (bufferView-Grenzen, Ausrichtung,
+Sparse-Indizes, POSITION-min/max) und Round-Trip (dekodierte Sparse-Daten ==
+gefilterte dichte Daten). Optional zusätzlich ein externer Validator, z. B.
+--validator "npx gltf-validator".
+
+Usage:
+  python scripts/glb_sparse_morphs.py --in Kayanew_mouth.glb --out Kayanew_mouth_sparse.glb
+  python scripts/glb_sparse_morphs.py --in avatar.glb --epsilon 1e-5 --json
+  python scripts/glb_sparse_morphs.py --in avatar.glb --validator "npx gltf-validator"
+"""
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from glb_io import (FLOAT, UNSIGNED_BYTE, UNSIGNED_INT, UNSIGNED_SHORT, GLB, GLBError, BinBuilder,
+                    _pad4, accessor_byte_length, check_sparse_indices, element_size, repack_bin,
+                    staged_path, validate_gltf, write_glb)
+
+# Deltas mit |d| < EPSILON (in allen Komponenten) gelten als "bewegt sich nicht"
+DEFAULT_EPSILON = 1e-6
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Rewrite morph targets as sparse accessors")
+    p.add_argument("--in", dest="inp", required=True, help="Input GLB path")
+    p.add_argument("--out", dest="outp", default=None, help="Output GLB path (Standard: <in>_sparse.glb)")
+    p.add_argument("--epsilon", type=float, default=DEFAULT_EPSILON,
+                   help=f"Deltas unterhalb dieses Betrags verwerfen (Standard: {DEFAULT_EPSILON:g})")
+    p.add_argument("--validator", default=None,
+                   help="Zusätzlicher externer Validator, Datei wird angehängt (z. B. \"npx gltf-validator\")")
+    p.add_argument("--json", action="store_true", help="Report als JSON ausgeben")
+    return p.parse_args()
+
+
+def index_component_type(count):
+    """Kleinster Index-Typ, der alle Vertex-Indizes < count fassen kann"""
+    if count <= 0xFF:
+        return UNSIGNED_BYTE
+    if count <= 0xFFFF:
+        return UNSIGNED_SHORT
+    return UNSIGNED_INT
+
+
+def sparse_byte_length(accessor, n):
+    """Bytes einer Sparse-Kodierung mit n Einträgen (inkl. 4-Byte-Padding der Indizes)"""
+    ctype = index_component_type(accessor["count"])
+    index_bytes = n * {UNSIGNED_BYTE: 1, UNSIGNED_SHORT: 2, UNSIGNED_INT: 4}[ctype]
+    return index_bytes + _pad4(index_bytes) + n * element_size(accessor)
+
+
+def stored_byte_length(gltf, accessor):
+    """Tatsächlich belegte Bytes eines Accessors (dicht, sparse oder leer)"""
+    views = gltf.get("bufferViews", [])
+    total = accessor_byte_length(accessor) if "bufferView" in accessor else 0
+    sparse = accessor.get("sparse")
+    if sparse:
+        total += sum(views[sparse[k]["bufferView"]]["byteLength"] for k in ("indices", "values"))
+    return total
+
+
+def morph_accessors(gltf):
+    """{Accessor-Index: [(Mesh-Name, Target-Name, Attribut)]} aller Morph-Target-Accessoren"""
+    found = {}
+    for mi, mesh in enumerate(gltf.get("meshes", [])):
+        names = mesh.get("extras", {}).get("targetNames", [])
+        for prim in mesh.get("primitives", []):
+            for ti, target in enumerate(prim.get("targets", [])):
+                name = names[ti] if ti < len(names) else f"target_{ti}"
+                for attr, index in target.items():
+                    found.setdefault(index, []).append((mesh.get("name", f"mesh_{mi}"), name, attr))
+    return found
+
+
+def threshold_rows(data, accessor, epsilon):
+    """Maske der Zeilen, die gespeichert werden müssen (float: > epsilon, sonst != 0)"""
+    if accessor["componentType"] == FLOAT:
+        return np.abs(data).max(axis=1) >= epsilon
+    return np.any(data != 0, axis=1)
+
+
+def sparsify_morphs(glb, epsilon=DEFAULT_EPSILON):
+    """Schreibt Morph-Target-Accessoren in glb.gltf um; liefert (BIN-Bytes, Report, Sollwerte)
+
+    Accessoren werden in-place ersetzt (Index bleibt gleich), daher bleiben alle
+    Referenzen aus Meshes gültig. Die Rückgabe-BIN ist bereits neu gepackt;
+    Sollwerte = gefilterte dichte Daten je Accessor für den Round-Trip-Check.
+    """
+    gltf = glb.gltf
+    accessors = gltf.get("accessors", [])
+    builder = BinBuilder(glb)
+    targets, expected = [], {}
+
+    for index, uses in sorted(morph_accessors(gltf).items()):
+        acc = accessors[index]
+        mesh_name, target_name, attr = uses[0]
+        entry = {"mesh": mesh_name, "target": target_name, "attribute": attr, "accessor": index,
+                 "count": acc["count"], "before_bytes": stored_byte_length(gltf, acc)}
+        targets.append(entry)
+        if "bufferView" not in acc and "sparse" not in acc:
+            entry.update(encoding="leer", kept=0, after_bytes=0)
+            continue
+
+        data = glb.read_accessor(index).reshape(acc["count"], -1)
+        keep = threshold_rows(data, acc, epsilon)
+        ids = np.flatnonzero(keep)
+        entry["kept"] = int(len(ids))
+        if len(ids) and sparse_byte_length(acc, len(ids)) >= accessor_byte_length(acc):
+            # Dicht ist kleiner: Accessor bleibt unverändert (auch keine Epsilon-Filterung)
+            expected[index] = data
+            entry.update(encoding="dicht", after_bytes=entry["before_bytes"])
+            continue
+
+        filtered = np.where(keep[:, None], data, 0).astype(data.dtype)
+        expected[index] = filtered
+        new = {k: v for k, v in acc.items() if k not in ("bufferView", "byteOffset", "sparse", "min", "max")}
+        if len(ids) == 0:
+            entry["encoding"] = "leer"
+        else:
+            ctype = index_component_type(acc["count"])
+            new["sparse"] = {
+                "count": int(len(ids)),
+                "indices": {"bufferView": builder.add_view(ids.astype({UNSIGNED_BYTE: "<u1",
+                                                                       UNSIGNED_SHORT: "<u2",
+                                                                       UNSIGNED_INT: "<u4"}[ctype])),
+                            "componentType": ctype},
+                "values": {"bufferView": builder.add_view(np.ascontiguousarray(data[ids]))},
+            }
+            entry["encoding"] = "sparse"
+        # min/max über die vollständigen (gefilterten) Daten - Pflicht für POSITION
+        new["min"] = filtered.min(axis=0).tolist()
+        new["max"] = filtered.max(axis=0).tolist()
+        accessors[index] = new
+        entry["after_bytes"] = stored_byte_length(gltf, new)
+
+    bin_bytes = repack_bin(gltf, builder.bin_bytes())
+    if gltf.get("buffers"):
+        gltf["buffers"][0]["byteLength"] = len(bin_bytes)
+    report = {
+        "epsilon": epsilon,
+        "targets": targets,
+        "before_bytes": sum(t["before_bytes"] for t in targets),
+        "after_bytes": sum(t["after_bytes"] for t in targets),
+    }
+    return bin_bytes, report, expected
+
+
+def verify(path, expected):
+    """Struktur- und Round-Trip-Prüfung der geschriebenen Datei; liefert Fehlerliste"""
+    with GLB.open(path) as glb:
+        errors = validate_gltf(glb.gltf, len(glb.bin))
+        if errors:
+            return errors
+        errors += check_sparse_indices(glb)
+        for index, filtered in expected.items():
+            acc = glb.gltf["accessors"][index]
+            decoded = glb.read_accessor(index).reshape(acc["count"], -1)
+            if not np.array_equal(decoded, filtered):
+                errors.append(f"accessors[{index}]: Round-Trip weicht ab")
+    return errors
+
+
+def run_validator(command, path):
+    """Externen Validator ausführen; liefert (ok, Ausgabe)"""
+    try:
+        proc = subprocess.run(shlex.split(command) + [path], capture_output=True, text=True)
+    except OSError as e:
+        return False, str(e)
+    return proc.returncode == 0, (proc.stdout + proc.stderr).strip()
+
+
+def sparsify_file(inp, outp, epsilon=DEFAULT_EPSILON, validator=None):
+    """Kompletter Pass Datei -> Datei; wirft GLBError, wenn die Prüfung fehlschlägt
+
+    Geschrieben wird in eine Zwischendatei; outp wird erst nach bestandener
+    Prüfung ersetzt (inp == outp bleibt bei Fehlern unverändert).
+    """
+    t0 = time.perf_counter()
+    with GLB.open(inp) as glb:
+        bin_bytes, report, expected = sparsify_morphs(glb, epsilon)
+        gltf = glb.gltf
+        size_before = glb.file_size
+
+    staged = staged_path(outp)
+    try:
+        size_after = write_glb(staged, gltf, bin_bytes)
+        errors = verify(staged, expected)
+        if validator:
+            ok, output = run_validator(validator, staged)
+            report["validator_output"] = output
+            if not ok:
+                errors.append(f"Externer Validator meldet Fehler ({validator})")
+        if errors:
+            raise GLBError("Validierung fehlgeschlagen:\n   " + "\n   ".join(errors))
+        os.replace(staged, outp)
+    finally:
+        if os.path.exists(staged):
+            os.remove(staged)
+
+    report.update(file=outp, file_bytes_before=size_before, file_bytes_after=size_after,
+                  duration_s=round(time.perf_counter() - t0, 3))
+    return report
+
+
+def kb(n):
+    return f"{n / 1024:.1f} KB"
+
+
+def print_report(report):
+    """Menschenlesbare Ausgabe pro Target"""
+    print(f"\n🎭 Morph Targets (epsilon {report['epsilon']:g}):")
+    for t in report["targets"]:
+        saved = t["before_bytes"] - t["after_bytes"]
+        pct = 100.0 * saved / t["before_bytes"] if t["before_bytes"] else 0.0
+        print(f"   {t['mesh']}/{t['target']:<20} {t['attribute']:<9} {t['encoding']:<7} "
+              f"{t['kept']:>7}/{t['count']:<7} {kb(t['before_bytes']):>11} -> {kb(t['after_bytes']):>11}"
+              f"  (-{pct:.0f}%)")
+    saved = report["before_bytes"] - report["after_bytes"]
+    print(f"\n💾 Morph-Daten: {kb(report['before_bytes'])} -> {kb(report['after_bytes'])} (-{kb(saved)})")
+    print(f"   Datei: {report['file_bytes_before'] / (1024 * 1024):.2f} MB -> "
+          f"{report['file_bytes_after'] / (1024 * 1024):.2f} MB in {report['duration_s'] * 1000:.0f} ms")
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    outp = args.outp or os.path.splitext(args.inp)[0] + "_sparse.glb"
+
+    if not args.json:
+        print("\n" + "="*60)
+        print("🧮 KAYA Avatar: Sparse Morph Targets")
+        print("="*60)
+        print(f"Input:  {args.inp}")
+        print(f"Output: {outp}")
+        print("="*60)
+        sys.stdout.flush()
+
+    try:
+        report = sparsify_file(args.inp, outp, args.epsilon, args.validator)
+    except (OSError, GLBError) as e:
+        if args.json:
+            print(json.dumps({"file": args.inp, "error": str(e)}))
+        else:
+            print(f"\n❌ FEHLER: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    print_report(report)
+    print("\n✅ Validierung OK")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
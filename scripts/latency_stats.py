@@ -0,0 +1,149 @@
+"""
+Latenz-Histogramme im HDR-Stil für die Lasttests (test_clean.py u. a.)
+
+Werte werden als ganze Mikrosekunden in log-lineare Buckets einsortiert:
+konstanter relativer Fehler (Standard: 2 signifikante Stellen, < 1 %) über
+den ganzen Wertebereich, O(1) pro Messung und Speicher unabhängig von der
+Anzahl der Messungen. Histogramme lassen sich addieren (mehrere Phasen,
+Prozesse oder Läufe) und als JSON speichern/laden.
+"""
+
+import math
+
+PERCENTILES = [50.0, 90.0, 99.0, 99.9]
+
+
+class LatencyHistogram:
+    """Log-lineares Histogramm (HdrHistogram-Schema) für Latenzen in Mikrosekunden"""
+
+    def __init__(self, significant_digits=2):
+        self.significant_digits = significant_digits
+        self.sub_bucket_bits = int(math.ceil(math.log2(2 * 10 ** significant_digits)))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.half_count = self.sub_bucket_count // 2
+        self.counts = {}
+        self.total = 0
+        self.min_us = None
+        self.max_us = 0
+        self.sum_us = 0
+
+    def _index(self, value):
+        if value < self.sub_bucket_count:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return self.sub_bucket_count + (shift - 1) * self.half_count + ((value >> shift) - self.half_count)
+
+    def bucket_range(self, index):
+        """(kleinster, größter) Wert, der in diesem Bucket landet"""
+        if index < self.sub_bucket_count:
+            return index, index
+        offset = index - self.sub_bucket_count
+        shift = offset // self.half_count + 1
+        sub = offset % self.half_count + self.half_count
+        return sub << shift, ((sub + 1) << shift) - 1
+
+    def record(self, seconds, count=1):
+        """Eine Messung in Sekunden (float) eintragen"""
+        value = max(0, int(round(seconds * 1e6)))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.sum_us += value * count
+        self.max_us = max(self.max_us, value)
+        self.min_us = value if self.min_us is None else min(self.min_us, value)
+
+    def merge(self, other):
+        """Addiert ein anderes Histogramm (gleiche Genauigkeit)"""
+        if other.significant_digits != self.significant_digits:
+            raise ValueError("Histogramme mit unterschiedlicher Genauigkeit")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+        return self
+
+    def value_at(self, percentile):
+        """Wert (Sekunden) beim Perzentil - oberer Rand des Buckets wie bei HdrHistogram"""
+        if not self.total:
+            return None
+        target = max(1, int(math.ceil(percentile / 100.0 * self.total)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self.bucket_range(index)[1], self.max_us) / 1e6
+        return self.max_us / 1e6
+
+    def mean(self):
+        return self.sum_us / self.total / 1e6 if self.total else None
+
+    def summary(self, percentiles=PERCENTILES):
+        """Kennzahlen in Millisekunden (für Report und JSON)"""
+        out = {"count": self.total}
+        if not self.total:
+            return out
+        out["min_ms"] = round(self.min_us / 1e3, 3)
+        out["mean_ms"] = round(self.mean() * 1e3, 3)
+        for p in percentiles:
+            out[f"p{format(p, 'g').replace('.', '')}_ms"] = round(self.value_at(p) * 1e3, 3)
+        out["max_ms"] = round(self.max_us / 1e3, 3)
+        return out
+
+    def to_dict(self):
+        """Vollständig, verlustfrei serialisierbar (Buckets als {Index: Anzahl})"""
+        return {
+            "significant_digits": self.significant_digits,
+            "counts": {str(k): v for k, v in sorted(self.counts.items())},
+            "total": self.total,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "sum_us": self.sum_us,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls(data["significant_digits"])
+        hist.counts = {int(k): v for k, v in data["counts"].items()}
+        hist.total = data["total"]
+        hist.min_us = data["min_us"]
+        hist.max_us = data["max_us"]
+        hist.sum_us = data["sum_us"]
+        return hist
+
+
+class SplitHistograms:
+    """Ein Gesamt-Histogramm plus eines pro Schlüssel (z. B. Agent/Cache-Status)"""
+
+    def __init__(self, significant_digits=2):
+        self.significant_digits = significant_digits
+        self.overall = LatencyHistogram(significant_digits)
+        self.splits = {}
+
+    def record(self, key, seconds):
+        self.overall.record(seconds)
+        if key not in self.splits:
+            self.splits[key] = LatencyHistogram(self.significant_digits)
+        self.splits[key].record(seconds)
+
+    def to_dict(self):
+        return {
+            "overall": {"summary": self.overall.summary(), "histogram": self.overall.to_dict()},
+            "splits": {key: {"summary": h.summary(), "histogram": h.to_dict()}
+                       for key, h in sorted(self.splits.items())},
+        }
+
+
+def format_row(label, hist, width=28):
+    """Eine Tabellenzeile: Anzahl, p50/p90/p99/p99.9, max in ms"""
+    s = hist.summary()
+    if not s["count"]:
+        return f"{label:<{width}} {0:>7}"
+    cells = " ".join(f"{s[k]:>9.1f}" for k in ("p50_ms", "p90_ms", "p99_ms", "p999_ms", "max_ms"))
+    return f"{label:<{width}} {s['count']:>7} {cells}"
+
+
+def format_header(width=28):
+    return f"{'':<{width}} {'n':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'p99.9':>9} {'max':>9}  (ms)"
@@ -0,0 +1,146 @@
+"""
+LOD-Kette für enhance_glb.py: Shape-Key-Transfer und Manifest (ohne bpy)
+
+Der Decimate-Modifier lässt sich nicht auf Meshes mit Shape Keys anwenden.
+Deshalb wird nur die Basis dezimiert; jeder neue Vertex wird auf die nächste
+Stelle der Original-Oberfläche projiziert und erhält die Shape-Key-Deltas
+baryzentrisch aus dem getroffenen Original-Dreieck. Damit bewegen sich
+mouthOpen/mouthO/lipsClosed auf jeder Stufe genau wie die Original-Oberfläche.
+
+Manifest (<out>_lods.json) für das Frontend:
+  {"source": ..., "levels": [{"lod": 0, "ratio": 1.0, "file": "...", "triangles": ...,
+                               "bytes": ..., "device_class": "desktop", "morph_targets": [...]}]}
+"""
+
+import json
+import os
+
+import numpy as np
+
+from asset_cache import build_key, hash_file
+from glb_io import GLB
+
+# Empfohlene Geräteklasse je Stufe (Reihenfolge = LOD-Index, Rest: "low")
+LOD_DEVICE_CLASSES = ["desktop", "kiosk", "phone"]
+
+# Meshes mit weniger Dreiecken (Augen, Zähne) werden nicht dezimiert
+LOD_MIN_TRIANGLES = 512
+
+
+def parse_lods(spec):
+    """'100,50,25' -> [1.0, 0.5, 0.25] (absteigend, ohne Duplikate)"""
+    ratios = set()
+    for part in str(spec).split(","):
+        part = part.strip().rstrip("%")
+        if not part:
+            continue
+        value = float(part)
+        if not 0.0 < value <= 100.0:
+            raise ValueError(f"LOD-Budget muss zwischen 0 und 100 % liegen: {part}")
+        ratios.add(round(value / 100.0, 4))
+    ratios.add(1.0)  # LOD 0 = die normale Ausgabe
+    return sorted(ratios, reverse=True)
+
+
+def lod_path(outp, index):
+    """Dateiname der Stufe: LOD 0 = outp, sonst <out>_lod<i>.glb"""
+    if index == 0:
+        return outp
+    base, ext = os.path.splitext(outp)
+    return f"{base}_lod{index}{ext or '.glb'}"
+
+
+def manifest_path(outp):
+    return os.path.splitext(outp)[0] + "_lods.json"
+
+
+def device_class(index):
+    return LOD_DEVICE_CLASSES[index] if index < len(LOD_DEVICE_CLASSES) else "low"
+
+
+def barycentric(points, a, b, c):
+    """Baryzentrische Koordinaten (N, 3) der Punkte bezüglich der Dreiecke (a, b, c)
+
+    Punkte liegen auf bzw. nahe den Dreiecken (nächster Oberflächenpunkt);
+    Ergebnis wird auf das Dreieck geklemmt und normiert.
+    """
+    v0, v1, v2 = b - a, c - a, points - a
+    d00 = np.einsum("ij,ij->i", v0, v0)
+    d01 = np.einsum("ij,ij->i", v0, v1)
+    d11 = np.einsum("ij,ij->i", v1, v1)
+    d20 = np.einsum("ij,ij->i", v2, v0)
+    d21 = np.einsum("ij,ij->i", v2, v1)
+    denom = d00 * d11 - d01 * d01
+    safe = np.where(np.abs(denom) > 1e-20, denom, 1.0)
+    v = (d11 * d20 - d01 * d21) / safe
+    w = (d00 * d21 - d01 * d20) / safe
+    weights = np.stack([1.0 - v - w, v, w], axis=1)
+    weights[np.abs(denom) <= 1e-20] = (1.0, 0.0, 0.0)  # degeneriertes Dreieck: erster Eckpunkt
+    weights = np.clip(weights, 0.0, None)
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def transfer_deltas(deltas, tris, face_index, weights):
+    """Delta-Array (N_src, 3) auf die neuen Vertices übertragen -> (N_dst, 3)"""
+    corners = tris[face_index]  # (N_dst, 3) Original-Vertex-Indizes
+    return np.einsum("nk,nkj->nj", weights, deltas[corners]).astype(np.float32)
+
+
+def write_manifest(outp, source, levels):
+    """Schreibt das LOD-Manifest neben die Ausgabe; liefert den Pfad"""
+    path = manifest_path(outp)
+    out_dir = os.path.dirname(path)
+    entries = []
+    for level in levels:
+        entry = dict(level)
+        entry["file"] = os.path.relpath(level["file"], out_dir or ".").replace(os.sep, "/")
+        entries.append(entry)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"source": os.path.basename(source), "levels": entries}, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def lod_cache_key(base_key, ratio):
+    """Cache-Key einer LOD-Stufe (abgeleitet vom Key der vollen Ausgabe)"""
+    return build_key({"base": base_key, "lod_ratio": ratio, "lod_script": hash_file(os.path.abspath(__file__))})
+
+
+def lod_zero(outp, triangles, morph_targets=None):
+    """Manifest-Eintrag der vollen Ausgabe (LOD 0)"""
+    return {"lod": 0, "ratio": 1.0, "file": outp, "triangles": triangles, "bytes": os.path.getsize(outp),
+            "device_class": device_class(0), "morph_targets": morph_targets}
+
+
+def get_cached_lods(cache, base_key, outp, ratios):
+    """Alle LOD-Stufen > 0 aus dem Cache holen; None, sobald eine fehlt"""
+    levels = []
+    for index, ratio in enumerate(ratios[1:], start=1):
+        path = lod_path(outp, index)
+        meta = cache.get(lod_cache_key(base_key, ratio), path)
+        if meta is None or "lod" not in meta:
+            return None
+        levels.append(dict(meta["lod"], file=path, bytes=os.path.getsize(path)))
+    return levels
+
+
+def restore_cached_chain(cache, base_key, meta, inp, outp, ratios):
+    """Komplette LOD-Kette aus dem Cache holen und Manifest schreiben; None, wenn etwas fehlt
+
+    meta: Metadaten des Cache-Eintrags der vollen Ausgabe (enthält "triangles").
+    """
+    if "triangles" not in meta:
+        return None
+    levels = get_cached_lods(cache, base_key, outp, ratios)
+    if levels is None:
+        return None
+    morph_targets = levels[-1]["morph_targets"] if levels else None
+    levels = [lod_zero(outp, meta["triangles"], morph_targets)] + levels
+    write_manifest(outp, inp, levels)
+    return levels
+
+
+def glb_target_names(path):
+    """{Mesh-Name: [Morph-Target-Namen]} einer GLB (für den Vergleich zwischen Stufen)"""
+    with GLB.open(path) as glb:
+        return {mesh.get("name", f"mesh_{mi}"): glb.target_names(mi)
+                for mi, mesh in enumerate(glb.gltf.get("meshes", [])) if glb.target_names(mi)}
@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Streaming-Auswertung der Crawler- und API-Logs
+
+Liest die JSON-Zeilen-Logs Zeile für Zeile (optional wie tail -f) mit
+begrenztem Speicher und führt pro Schlüssel:
+
+  - Latenz-Sketch (latency_stats.LatencyHistogram, HDR-Schema: addierbar,
+    feste Genauigkeit) gesamt und rollierend über die letzten --windows
+    Zeitfenster (Fenster nach Log-Zeitstempel, nicht nach Uhrzeit)
+  - Anzahl ok / Fehler
+  - Top-k der langsamsten URLs bzw. Pfade
+  - häufigste Fehlerarten (normalisiert, begrenzte Tabelle)
+
+Erkannte Zeilen:
+  kaya-crawler/logs/crawler.log  "🌐 Crawle URL" bis "✅ Erfolgreich" / "❌ Crawl-Fehler"
+                                 -> Schlüssel crawl/<Agent>, Fehlerarten aus den level=error-Zeilen
+  kaya-api/logs/access.log       logPerformance -> api/<endpoint>, logRequest -> http/<METHODE pfad>
+  kaya-api/logs/error.log        Fehlerarten der API (logError)
+
+Jeder Fehler wird genau einmal gezählt: kaya-crawler/logs/error.log ist der
+Fehler-Transport von winston und wiederholt nur die level=error-Zeilen aus
+crawler.log - er wird standardmäßig nicht gelesen. Die API schreibt einen
+Fehler sowohl per logError (error.log) als auch per logPerformance
+(access.log); Fehlerarten kommen nur aus error.log (dort stehen auch
+Endpoints ohne logPerformance), access.log zählt nur ok/Fehler.
+
+Ausgabe als Text, Prometheus-Exposition oder JSON (mit Sketches); mehrere
+JSON-Dateien verschiedener Hosts lassen sich mit "merge" zusammenführen.
+
+  python scripts/log_analytics.py
+  python scripts/log_analytics.py --format prom --out /var/lib/node_exporter/kaya.prom --follow
+  python scripts/log_analytics.py --format json --out host-a.json
+  python scripts/log_analytics.py merge host-a.json host-b.json --format prom
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import socket
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+from latency_stats import LatencyHistogram, format_header, format_row
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_LOGS = [
+    os.path.join(REPO_ROOT, "kaya-crawler", "logs", "crawler.log"),
+    os.path.join(REPO_ROOT, "kaya-api", "logs", "access.log"),
+    os.path.join(REPO_ROOT, "kaya-api", "logs", "error.log"),
+]
+
+CRAWL_START = re.compile(r"Crawle URL: (?P<url>\S+)")
+CRAWL_OK = re.compile(r"Erfolgreich gecrawlt")
+CRAWL_ERROR = re.compile(r"Crawl-Fehler für (?P<url>\S+?):? (?P<error>.*)$")
+CRAWL_AGENT = re.compile(r"Crawle Agent: (?P<agent>\S+)")
+DURATION = re.compile(r"^(?P<value>[\d.]+)\s*ms$")
+URL_PATTERN = re.compile(r"https?://\S+")
+PATH_PATTERN = re.compile(r"[A-Za-z]:\\\S+|/(?:[\w.-]+/)+[\w.-]+")
+ID_SEGMENT = re.compile(r"/(?:\d+|[0-9a-f]{8,}|[0-9a-f-]{36})(?=/|$)")
+NUMBER = re.compile(r"\d+")
+WHITESPACE = re.compile(r"\s+")
+
+MAX_ERROR_KINDS = 500
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Streaming-Auswertung der Crawler- und API-Logs")
+    p.add_argument("logs", nargs="*", help="Log-Dateien (Standard: Crawler- und API-Logs) bzw. JSON bei 'merge'")
+    p.add_argument("--format", choices=("text", "prom", "json"), default="text", help="Ausgabeformat")
+    p.add_argument("--out", default=None, help="In Datei schreiben (atomar) statt auf stdout")
+    p.add_argument("--window", type=float, default=300.0, help="Länge eines Zeitfensters in Sekunden (Standard: 300)")
+    p.add_argument("--windows", type=int, default=12, help="Fenster im rollierenden Sketch (Standard: 12)")
+    p.add_argument("--top", type=int, default=10, help="Top-k langsamste URLs/Fehlerarten (Standard: 10)")
+    p.add_argument("--follow", action="store_true", help="Wie tail -f weiterlesen und regelmäßig ausgeben")
+    p.add_argument("--interval", type=float, default=15.0, help="Ausgabe-Intervall mit --follow (Standard: 15s)")
+    p.add_argument("--host", default=socket.gethostname(), help="Host-Label für Prometheus/JSON")
+    args = p.parse_args()
+    args.merge = bool(args.logs) and args.logs[0] == "merge"
+    if args.merge:
+        args.logs = args.logs[1:]
+    return args
+
+
+def parse_time(stamp):
+    try:
+        return datetime.fromisoformat(str(stamp).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def error_kind(message):
+    """Fehlermeldung ohne URLs, Pfade und Zahlen - gleiche Ursache, ein Eintrag
+
+    Mehrzeilige Meldungen (Stacktraces) werden auf eine Zeile zusammengezogen.
+    """
+    message = URL_PATTERN.sub("<url>", str(message or ""))
+    message = PATH_PATTERN.sub("<pfad>", message)
+    return WHITESPACE.sub(" ", NUMBER.sub("N", message)).strip()[:160]
+
+
+def api_key(endpoint):
+    """Schlüssel für API-Endpoints: /api/chat -> api/chat (kein doppeltes api/api)"""
+    path = "/" + str(endpoint or "").strip("/")
+    if path == "/api" or path.startswith("/api/"):
+        path = path[4:]
+    return "api" + path.rstrip("/")
+
+
+def normalize_path(path):
+    return ID_SEGMENT.sub("/:id", path or "/")
+
+
+class KeyStats:
+    """Sketches, Zähler und Top-k für einen Schlüssel (Endpoint oder Crawl-Quelle)"""
+
+    def __init__(self, window, windows, top):
+        self.window = window
+        self.total = LatencyHistogram()
+        self.recent = deque(maxlen=windows)  # [Fensterbeginn, Histogramm, Fehler]
+        self.ok = 0
+        self.errors = 0
+        self.top = top
+        self.slowest = {}  # URL -> langsamste Dauer, höchstens top Einträge
+
+    def record(self, at, seconds, ok, url=None):
+        self.total.record(seconds)
+        start = (at // self.window) * self.window
+        if not self.recent or self.recent[-1][0] < start:
+            self.recent.append([start, LatencyHistogram(), 0])
+        # verspätete Zeilen landen im jüngsten Fenster
+        self.recent[-1][1].record(seconds)
+        if ok:
+            self.ok += 1
+        else:
+            self.errors += 1
+            self.recent[-1][2] += 1
+        if url:
+            self.add_slow(url, seconds)
+
+    def add_slow(self, url, seconds):
+        if url in self.slowest:
+            self.slowest[url] = max(self.slowest[url], seconds)
+        elif len(self.slowest) < self.top:
+            self.slowest[url] = seconds
+        else:
+            fastest = min(self.slowest, key=self.slowest.get)
+            if seconds > self.slowest[fastest]:
+                del self.slowest[fastest]
+                self.slowest[url] = seconds
+
+    def rolling(self, cutoff):
+        """(Histogramm, Fehler) aller Fenster ab cutoff"""
+        merged = LatencyHistogram()
+        errors = 0
+        for start, hist, window_errors in self.recent:
+            if start >= cutoff:
+                merged.merge(hist)
+                errors += window_errors
+        return merged, errors
+
+    def to_dict(self, cutoff):
+        hist, errors = self.rolling(cutoff)
+        return {"total": self.total.to_dict(), "rolling": hist.to_dict(), "rolling_errors": errors,
+                "ok": self.ok, "errors": self.errors,
+                "slowest": sorted(self.slowest.items(), key=lambda item: -item[1])}
+
+    @classmethod
+    def from_dict(cls, data, top):
+        stats = cls(1.0, 1, top)
+        stats.total = LatencyHistogram.from_dict(data["total"])
+        # bereits auf die rollierenden Fenster des Hosts gefiltert
+        stats.recent.append([math.inf, LatencyHistogram.from_dict(data["rolling"]), data["rolling_errors"]])
+        stats.ok, stats.errors = data["ok"], data["errors"]
+        for url, seconds in data["slowest"]:
+            stats.add_slow(url, seconds)
+        return stats
+
+    def merge(self, other):
+        self.total.merge(other.total)
+        hist, errors = self.rolling(-math.inf)
+        other_hist, other_errors = other.rolling(-math.inf)
+        self.recent = deque([[math.inf, hist.merge(other_hist), errors + other_errors]], maxlen=1)
+        self.ok += other.ok
+        self.errors += other.errors
+        for url, seconds in other.slowest.items():
+            self.add_slow(url, seconds)
+        return self
+
+
+class ErrorKinds:
+    """Zähler pro Fehlerart; über MAX_ERROR_KINDS wird die seltenere Hälfte verworfen"""
+
+    def __init__(self):
+        self.counts = {}
+        self.dropped = 0
+
+    def add(self, source, message, count=1):
+        self.add_kind(source, error_kind(message), count)
+
+    def add_kind(self, source, kind, count=1):
+        """Bereits normalisierte Fehlerart zählen (merge, from_dict)"""
+        key = (source, kind)
+        self.counts[key] = self.counts.get(key, 0) + count
+        if len(self.counts) > MAX_ERROR_KINDS:
+            keep = sorted(self.counts.items(), key=lambda item: -item[1])[:MAX_ERROR_KINDS // 2]
+            self.dropped += sum(self.counts.values()) - sum(c for _, c in keep)
+            self.counts = dict(keep)
+
+    def most_common(self, n):
+        return sorted(self.counts.items(), key=lambda item: -item[1])[:n]
+
+
+class LogAnalyzer:
+    def __init__(self, window=300.0, windows=12, top=10):
+        self.window = window
+        self.windows = windows
+        self.top = top
+        self.keys = {}
+        self.error_kinds = ErrorKinds()
+        self.lines = 0
+        self.skipped = 0
+        self.crawl_agent = {}    # Datei -> aktueller Agent
+        self.crawl_pending = {}  # Datei -> (URL, Start)
+        self.unmatched = 0
+        self.latest = None       # jüngster Zeitstempel, Bezug der rollierenden Fenster
+
+    def cutoff(self):
+        """Beginn des ältesten rollierenden Fensters (relativ zur jüngsten Log-Zeile)"""
+        if self.latest is None:
+            return -math.inf
+        return (self.latest // self.window - self.windows + 1) * self.window
+
+    def stats(self, key):
+        if key not in self.keys:
+            self.keys[key] = KeyStats(self.window, self.windows, self.top)
+        return self.keys[key]
+
+    def feed(self, line, origin=""):
+        """Eine Log-Zeile verarbeiten (unbekannte Formate werden gezählt und übersprungen)"""
+        self.lines += 1
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            self.skipped += 1
+            return
+        if not isinstance(entry, dict):
+            self.skipped += 1
+            return
+        at = parse_time(entry.get("timestamp"))
+        if at is None:
+            self.skipped += 1
+            return
+        self.latest = at if self.latest is None else max(self.latest, at)
+        if "module" in entry and "level" in entry:
+            self._crawler(entry, at, origin)
+        elif "endpoint" in entry and "duration" in entry:
+            self._performance(entry, at)
+        elif "method" in entry and "path" in entry:
+            self._access(entry, at)
+        elif "error" in entry:
+            context = entry.get("context") or {}
+            self.error_kinds.add(api_key(context.get("endpoint")), entry.get("error"))
+        else:
+            self.skipped += 1
+
+    def _crawler(self, entry, at, origin):
+        message = entry.get("message") or ""
+        if entry.get("level") == "error":
+            self.error_kinds.add(f"crawl/{entry.get('module')}", message)
+        if entry.get("module") != "WebCrawler":
+            match = CRAWL_AGENT.search(message)
+            if match:
+                self.crawl_agent[origin] = match.group("agent")
+            return
+        start = CRAWL_START.search(message)
+        if start:
+            if origin in self.crawl_pending:
+                self.unmatched += 1
+            self.crawl_pending[origin] = (start.group("url"), at)
+            return
+        ok = CRAWL_OK.search(message)
+        failed = CRAWL_ERROR.search(message) if entry.get("level") == "error" else None
+        if not (ok or failed) or origin not in self.crawl_pending:
+            return
+        url, started = self.crawl_pending.pop(origin)
+        if failed and failed.group("url").rstrip(":") != url:
+            self.unmatched += 1
+            return
+        agent = self.crawl_agent.get(origin, "unbekannt")
+        self.stats(f"crawl/{agent}").record(at, max(0.0, at - started), bool(ok), url)
+
+    def _performance(self, entry, at):
+        match = DURATION.match(str(entry.get("duration")))
+        if not match:
+            self.skipped += 1
+            return
+        seconds = float(match.group("value")) / 1000.0
+        ok = bool(entry.get("success"))
+        # Fehlerart nicht hier: derselbe Fehler steht per logError auch in error.log
+        self.stats(api_key(entry.get("endpoint"))).record(at, seconds, ok)
+
+    def _access(self, entry, at):
+        match = DURATION.match(str(entry.get("responseTime")))
+        if not match:
+            self.skipped += 1
+            return
+        path = normalize_path(entry.get("path"))
+        status = int(entry.get("statusCode") or 0)
+        self.stats(f"http/{entry.get('method')} {path}").record(
+            at, float(match.group("value")) / 1000.0, status < 500, entry.get("path"))
+
+    def merge(self, other):
+        for key, stats in other.keys.items():
+            if key in self.keys:
+                self.keys[key].merge(stats)
+            else:
+                self.keys[key] = stats
+        for (source, kind), count in other.error_kinds.counts.items():
+            self.error_kinds.add_kind(source, kind, count)
+        self.error_kinds.dropped += other.error_kinds.dropped
+        self.lines += other.lines
+        self.skipped += other.skipped
+        return self
+
+    def to_dict(self, host):
+        return {"host": host, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "lines": self.lines,
+                "skipped": self.skipped, "keys": {key: s.to_dict(self.cutoff()) for key, s in sorted(self.keys.items())},
+                "error_kinds": [[source, kind, count] for (source, kind), count in self.error_kinds.most_common(
+                    MAX_ERROR_KINDS)],
+                "error_kinds_dropped": self.error_kinds.dropped}
+
+    @classmethod
+    def from_dict(cls, data, top):
+        analyzer = cls(top=top)
+        analyzer.keys = {key: KeyStats.from_dict(s, top) for key, s in data["keys"].items()}
+        for source, kind, count in data["error_kinds"]:
+            analyzer.error_kinds.add_kind(source, kind, count)
+        analyzer.error_kinds.dropped += data.get("error_kinds_dropped", 0)
+        analyzer.lines, analyzer.skipped = data["lines"], data["skipped"]
+        return analyzer
+
+
+class Tail:
+    """Liest neue vollständige Zeilen einer Datei; erkennt Rotation (neue Datei oder gekürzt)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.f = None
+        self.inode = None
+        self.partial = ""
+
+    def _open(self):
+        try:
+            self.f = open(self.path, "r", encoding="utf-8", errors="replace")
+        except FileNotFoundError:
+            self.f = None
+            return
+        self.inode = os.fstat(self.f.fileno()).st_ino
+        self.partial = ""
+
+    def lines(self):
+        if self.f is None:
+            self._open()
+            if self.f is None:
+                return
+        while True:
+            line = self.f.readline()
+            if not line:
+                break
+            if not line.endswith("\n"):
+                self.partial += line  # Zeile wird noch geschrieben
+                break
+            yield self.partial + line
+            self.partial = ""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if st.st_ino != self.inode or st.st_size < self.f.tell():
+            self.f.close()
+            self._open()
+
+
+def render_text(analyzer, top):
+    out = []
+    out.append("=" * 60)
+    out.append("📊 KAYA Log-Auswertung")
+    out.append("=" * 60)
+    out.append(f"Zeilen: {analyzer.lines}  übersprungen: {analyzer.skipped}")
+    cutoff = analyzer.cutoff()
+    tables = (
+        ("Gesamt", lambda s: (s.total, s.errors)),
+        (f"Rollierend (letzte {analyzer.windows} x {analyzer.window:g}s)", lambda s: s.rolling(cutoff)),
+    )
+    for title, pick in tables:
+        out.append(f"\n{title}")
+        out.append(format_header(34) + "  Fehler")
+        for key, s in sorted(analyzer.keys.items()):
+            hist, errors = pick(s)
+            if hist.total:
+                out.append(f"{format_row(key, hist, 34)}  {errors / hist.total:>6.1%}")
+    slow = sorted(((sec, url, key) for key, s in analyzer.keys.items() for url, sec in s.slowest.items()),
+                  reverse=True)
+    if slow:
+        out.append(f"\n🐢 Langsamste URLs (Top {top})")
+        for seconds, url, key in slow[:top]:
+            out.append(f"   {seconds * 1e3:>9.0f} ms  {key:<24} {url}")
+    kinds = analyzer.error_kinds.most_common(top)
+    if kinds:
+        out.append(f"\n❌ Häufigste Fehlerarten (Top {top})")
+        for (source, kind), count in kinds:
+            out.append(f"   {count:>6}  {source:<24} {kind[:90]}")
+    if analyzer.error_kinds.dropped:
+        out.append(f"   ⚠️  {analyzer.error_kinds.dropped} Fehler seltener Arten verworfen "
+                   f"(Tabelle auf {MAX_ERROR_KINDS} Arten begrenzt)")
+    return "\n".join(out) + "\n"
+
+
+def prom_value(value):
+    """Label-Wert laut Exposition-Format: Backslash, Anführungszeichen und Zeilenumbruch escapen"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prom_labels(**labels):
+    return "{" + ",".join(f'{k}="{prom_value(v)}"' for k, v in labels.items()) + "}"
+
+
+def render_prom(analyzer, host, top):
+    out = [
+        "# HELP kaya_latency_seconds Latenz pro Endpoint bzw. Crawl-Quelle (Quantile rollierend, sum/count gesamt)",
+        "# TYPE kaya_latency_seconds summary",
+    ]
+    cutoff = analyzer.cutoff()
+    for key, s in sorted(analyzer.keys.items()):
+        hist, _ = s.rolling(cutoff)
+        if not hist.total:
+            continue
+        for q in QUANTILES:
+            out.append(f"kaya_latency_seconds{prom_labels(host=host, key=key, quantile=q)} {hist.value_at(q * 100):.6f}")
+        # _sum/_count müssen monoton steigen (rate()), daher aus dem Gesamt-Histogramm
+        out.append(f"kaya_latency_seconds_sum{prom_labels(host=host, key=key)} {s.total.sum_us / 1e6:.6f}")
+        out.append(f"kaya_latency_seconds_count{prom_labels(host=host, key=key)} {s.total.total}")
+    out += ["# HELP kaya_requests_total Anfragen bzw. gecrawlte URLs nach Ergebnis",
+            "# TYPE kaya_requests_total counter"]
+    for key, s in sorted(analyzer.keys.items()):
+        out.append(f"kaya_requests_total{prom_labels(host=host, key=key, outcome='ok')} {s.ok}")
+        out.append(f"kaya_requests_total{prom_labels(host=host, key=key, outcome='error')} {s.errors}")
+    out += ["# HELP kaya_slowest_seconds Langsamste URLs pro Schlüssel (Top-k)",
+            "# TYPE kaya_slowest_seconds gauge"]
+    for key, s in sorted(analyzer.keys.items()):
+        for rank, (seconds, url) in enumerate(sorted(((sec, url) for url, sec in s.slowest.items()), reverse=True)[:top], start=1):
+            out.append(f"kaya_slowest_seconds{prom_labels(host=host, key=key, rank=rank, url=url)} {seconds:.6f}")
+    # Gauge statt Counter: ErrorKinds verwirft seltene Arten, der Wert kann also sinken
+    out += ["# HELP kaya_error_kinds Fehler nach Art (Top-k, seltene Arten werden verworfen)",
+            "# TYPE kaya_error_kinds gauge"]
+    for (source, kind), count in analyzer.error_kinds.most_common(top):
+        out.append(f"kaya_error_kinds{prom_labels(host=host, source=source, kind=kind[:80])} {count}")
+    return "\n".join(out) + "\n"
+
+
+def render(analyzer, args):
+    if args.format == "prom":
+        return render_prom(analyzer, args.host, args.top)
+    if args.format == "json":
+        return json.dumps(analyzer.to_dict(args.host), indent=2, ensure_ascii=False) + "\n"
+    return render_text(analyzer, args.top)
+
+
+def emit(text, out):
+    if not out:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+        return
+    tmp = out + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, out)
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+
+    if args.merge:
+        merged = LogAnalyzer(top=args.top)
+        hosts = []
+        for path in args.logs:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            hosts.append(data.get("host") or os.path.basename(path))
+            merged.merge(LogAnalyzer.from_dict(data, args.top))
+        args.host = "+".join(hosts) if args.format != "prom" else "alle"
+        emit(render(merged, args), args.out)
+        return
+
+    analyzer = LogAnalyzer(args.window, args.windows, args.top)
+    tails = [Tail(path) for path in (args.logs or DEFAULT_LOGS)]
+    missing = [t.path for t in tails if not os.path.exists(t.path)]
+    for path in missing:
+        print(f"⚠️  Nicht gefunden: {path}", file=sys.stderr)
+
+    while True:
+        for tail in tails:
+            for line in tail.lines():
+                analyzer.feed(line, tail.path)
+        emit(render(analyzer, args), args.out)
+        if not args.follow:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Material-Presets für tune_materials() in enhance_glb.py
+
+Ohne bpy importierbar, damit Build-Cache und Batch-Runner die Presets
+hashen können, ohne Blender zu starten. Reihenfolge = Priorität: das erste
+passende Preset gewinnt (wie die frühere if/elif-Kette).
+"""
+
+import hashlib
+import json
+import re
+
+# Längste Texturkante für Materialien ohne passendes Preset ("max_texture" pro Preset)
+DEFAULT_MAX_TEXTURE = 2048
+
+MATERIAL_PRESETS = [
+    {
+        "name": "skin",
+        "pattern": r"(skin|face|head|neck)",
+        "max_texture": 2048,
+        "inputs": {
+            "Metallic": 0.0,
+            "Roughness": 0.42,
+            "Specular": 0.6,
+            "Subsurface": 0.2,
+            "Subsurface Radius": (1.1, 0.7, 0.6),
+        },
+        "micro_normal": True,
+    },
+    {
+        "name": "hair",
+        "pattern": r"(hair)",
+        "max_texture": 2048,
+        "inputs": {
+            "Anisotropic": 0.8,
+            "Roughness": 0.33,
+        },
+        "material": {
+            "blend_method": "BLEND",
+            "shadow_method": "HASHED",
+        },
+    },
+    {
+        "name": "eyes",
+        "pattern": r"(eye|iris|cornea)",
+        "max_texture": 1024,
+        "inputs": {
+            "Clearcoat": 1.0,
+            "Clearcoat Roughness": 0.0,
+            "IOR": 1.376,
+            "Specular": 0.9,
+        },
+    },
+    {
+        "name": "teeth",
+        "pattern": r"(tooth|teeth|gum|mouth)",
+        "max_texture": 512,
+        "inputs": {
+            "Metallic": 0.0,
+            "Roughness": 0.22,
+            "Specular": 0.95,
+        },
+    },
+    {
+        "name": "cloth",
+        "pattern": r"(cloth|fabric|sweater|hoodie)",
+        "max_texture": 1024,
+        "inputs": {
+            "Sheen": 0.35,
+            "Roughness": 0.55,
+        },
+    },
+]
+
+
+def presets_fingerprint():
+    """Stabiler Hash über alle Presets (ändert sich bei jeder Tuning-Anpassung)"""
+    blob = json.dumps([DEFAULT_MAX_TEXTURE, MATERIAL_PRESETS], sort_keys=True).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+_COMPILED = [(preset, re.compile(preset["pattern"], re.I)) for preset in MATERIAL_PRESETS]
+
+
+def match_preset(material_name):
+    """Erstes passendes Preset für einen Materialnamen (oder None)"""
+    name = (material_name or "").lower()
+    for preset, rx in _COMPILED:
+        if rx.search(name):
+            return preset
+    return None
@@ -0,0 +1,186 @@
+"""
+Räumlicher Index + Soft-Falloff-Auswahl für Mesh-Regionen (Mund, Kiefer, ...)
+
+Reines NumPy (kein bpy), damit dieselbe Auswahl in Blender-Skripten und in
+Blender-freien GLB-Werkzeugen verwendet werden kann.
+
+Der Index ist ein gleichmäßiges Gitter: Vertices werden einmal pro Mesh nach
+Zell-ID sortiert. Eine Abfrage besucht nur die Zellen, die die Such-Region
+überlappen - die Kosten wachsen mit der Größe der Region, nicht des Meshes.
+
+Beispiel:
+    selector = VertexSelector(coords)            # einmal pro Mesh
+    sel = selector.radius(center, 0.03, falloff="smooth")
+    coords[sel.ids] += delta * sel.weights[:, None]
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# Ziel: so viele Vertices pro Zelle im Mittel (Kompromiss Zellenanzahl vs. Kandidaten)
+TARGET_VERTS_PER_CELL = 8
+
+
+def _falloff_constant(t):
+    return np.ones_like(t)
+
+
+def _falloff_linear(t):
+    return t
+
+
+def _falloff_smooth(t):
+    return t * t * (3.0 - 2.0 * t)
+
+
+def _falloff_sphere(t):
+    return np.sqrt(np.clip(t * (2.0 - t), 0.0, 1.0))
+
+
+def _falloff_sharp(t):
+    return t * t
+
+
+# Gleiche Namen wie Blenders Proportional-Editing-Falloffs
+FALLOFFS = {
+    "constant": _falloff_constant,
+    "linear": _falloff_linear,
+    "smooth": _falloff_smooth,
+    "sphere": _falloff_sphere,
+    "sharp": _falloff_sharp,
+}
+
+
+def falloff_weights(normalized_dist, falloff="smooth"):
+    """Wandelt normierte Distanzen (0 = Zentrum, 1 = Rand) in Gewichte 1..0 um"""
+    if falloff not in FALLOFFS:
+        raise ValueError(f"Unbekannter Falloff '{falloff}' (erlaubt: {', '.join(FALLOFFS)})")
+    t = 1.0 - np.clip(np.asarray(normalized_dist, dtype=np.float32), 0.0, 1.0)
+    return FALLOFFS[falloff](t).astype(np.float32)
+
+
+@dataclass
+class Selection:
+    """Ergebnis einer Abfrage: Vertex-Indizes (sortiert) + Gewichte 0..1"""
+    ids: np.ndarray
+    weights: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+    def apply(self, coords, deltas):
+        """Verschiebt coords[ids] um deltas * weights (deltas: (3,) oder (len, 3))"""
+        coords[self.ids] += np.asarray(deltas, dtype=coords.dtype) * self.weights[:, None]
+        return coords
+
+
+class VertexSelector:
+    """Gitter-Index über (N, 3)-Koordinaten, einmal pro Mesh aufbauen"""
+
+    def __init__(self, coords, cell_size=None):
+        self.coords = np.ascontiguousarray(coords, dtype=np.float32).reshape(-1, 3)
+        n = len(self.coords)
+        if n == 0:
+            raise ValueError("VertexSelector braucht mindestens einen Vertex")
+
+        self.lo = self.coords.min(axis=0)
+        extent = np.maximum(self.coords.max(axis=0) - self.lo, 1e-9)
+        if cell_size is None:
+            # Zellvolumen so wählen, dass im Mittel TARGET_VERTS_PER_CELL Vertices hineinfallen
+            cell_size = float(np.cbrt(np.prod(extent) * TARGET_VERTS_PER_CELL / n))
+            cell_size = max(cell_size, float(extent.max()) / 1024.0)
+        self.cell_size = float(cell_size)
+        self.dims = np.floor(extent / self.cell_size).astype(np.int64) + 1
+
+        keys = self._cell_keys(self._cell_of(self.coords))
+        self.order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[self.order]
+        self.cell_keys, self.cell_start, self.cell_count = np.unique(
+            sorted_keys, return_index=True, return_counts=True)
+
+    # ---------- intern ----------
+
+    def _cell_of(self, points):
+        cells = np.floor((points - self.lo) / self.cell_size).astype(np.int64)
+        return np.clip(cells, 0, self.dims - 1)
+
+    def _cell_keys(self, cells):
+        return (cells[..., 0] * self.dims[1] + cells[..., 1]) * self.dims[2] + cells[..., 2]
+
+    def _candidates(self, box_lo, box_hi):
+        """Alle Vertex-Indizes in Zellen, die die Box [box_lo, box_hi] überlappen"""
+        box_lo = np.asarray(box_lo, dtype=np.float32)
+        box_hi = np.asarray(box_hi, dtype=np.float32)
+        if np.any(box_hi < self.lo) or np.any(box_lo > self.lo + self.dims * self.cell_size):
+            return np.empty(0, dtype=np.int64)
+
+        c_lo, c_hi = self._cell_of(box_lo), self._cell_of(box_hi)
+        grid = np.stack(np.meshgrid(*[np.arange(a, b + 1) for a, b in zip(c_lo, c_hi)],
+                                    indexing="ij"), axis=-1).reshape(-1, 3)
+        keys = self._cell_keys(grid)
+        pos = np.searchsorted(self.cell_keys, keys)
+        valid = pos < len(self.cell_keys)
+        pos, keys = pos[valid], keys[valid]
+        hit = pos[self.cell_keys[pos] == keys]
+        if len(hit) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        starts = self.cell_start[hit]
+        counts = self.cell_count[hit]
+        # Zusammenhängende Bereiche in self.order ohne Python-Schleife einsammeln
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        slots = np.arange(counts.sum()) + offsets
+        return self.order[slots]
+
+    # ---------- Abfragen ----------
+
+    def radius(self, center, radius, falloff="smooth"):
+        """Alle Vertices mit Abstand <= radius, Gewicht nach Falloff"""
+        center = np.asarray(center, dtype=np.float32)
+        cand = self._candidates(center - radius, center + radius)
+        dist = np.linalg.norm(self.coords[cand] - center, axis=1)
+        inside = dist <= radius
+        ids, dist = cand[inside], dist[inside]
+        order = np.argsort(ids)
+        ids, dist = ids[order], dist[order]
+        return Selection(ids, falloff_weights(dist / max(radius, 1e-12), falloff))
+
+    def knn(self, center, k, falloff="smooth"):
+        """Die k nächsten Vertices; Gewicht relativ zur Distanz des k-ten Nachbarn"""
+        center = np.asarray(center, dtype=np.float32)
+        k = min(int(k), len(self.coords))
+        if k <= 0:
+            return Selection(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+
+        r = self.cell_size
+        while True:
+            cand = self._candidates(center - r, center + r)
+            dist = np.linalg.norm(self.coords[cand] - center, axis=1)
+            # Nur Kandidaten innerhalb der Kugel sind sicher vollständig erfasst
+            if np.count_nonzero(dist <= r) >= k or len(cand) == len(self.coords):
+                break
+            r *= 2.0
+
+        nearest = np.argpartition(dist, k - 1)[:k]
+        ids, dist = cand[nearest], dist[nearest]
+        order = np.argsort(ids)
+        ids, dist = ids[order], dist[order]
+        return Selection(ids, falloff_weights(dist / max(float(dist.max()), 1e-12), falloff))
+
+    def ellipsoid(self, center, radii, axes=None, falloff="smooth"):
+        """Vertices im Ellipsoid (Halbachsen radii, optional Rotationsmatrix axes mit Achsen als Zeilen)"""
+        center = np.asarray(center, dtype=np.float32)
+        radii = np.maximum(np.asarray(radii, dtype=np.float32), 1e-12)
+        axes = np.eye(3, dtype=np.float32) if axes is None else np.asarray(axes, dtype=np.float32)
+
+        # Achsenparallele Hülle des rotierten Ellipsoids
+        half = np.sqrt(((axes * radii[:, None]) ** 2).sum(axis=0))
+        cand = self._candidates(center - half, center + half)
+        local = (self.coords[cand] - center) @ axes.T / radii
+        dist = np.linalg.norm(local, axis=1)
+        inside = dist <= 1.0
+        ids, dist = cand[inside], dist[inside]
+        order = np.argsort(ids)
+        ids, dist = ids[order], dist[order]
+        return Selection(ids, falloff_weights(dist, falloff))
@@ -0,0 +1,97 @@
+"""
+Mund-Shape-Keys: gemeinsame Konfiguration + Heuristik (ohne bpy)
+
+Einzige Quelle für Deltas und Region-Parameter - genutzt von
+blender_add_mouth_shapekeys.py (in Blender) und glb_add_mouth_morphs.py
+(direkt auf der GLB). Achsen wie in den Kommentaren: Y = oben, +Z = vorne
+(entspricht dem glTF-Koordinatensystem). Blender (Z = oben, -Y = vorne)
+rechnet mit gltf_from_blender()/blender_from_gltf() um, damit beide Pfade
+dieselbe Mund-Region und dieselben Deltas bekommen.
+"""
+
+import numpy as np
+
+# ==================== KONFIGURATION (bei Bedarf anpassen) ====================
+# Öffnungs-Stärke für "mouthOpen" (in Mesh-Einheiten)
+OPEN_DELTA_LOCAL = (0.0, -0.02, -0.01)  # Y = nach unten, Z = nach hinten (ggf. anpassen)
+
+# Pucker-Stärke für "mouthO" (0.7 = stark pucker, 0.9 = sanft)
+PUCKER_SCALE = 0.85
+
+# Schließ-Stärke für "lipsClosed"
+CLOSE_DELTA_LOCAL = (0.0, 0.00, 0.01)  # Z = nach vorne
+
+# Mund-Region: Heuristik-Parameter (wenn keine Vertex-Gruppe "Mouth" gefunden wird)
+RADIUS_FACTOR = 0.12      # Mundradius relativ zur Mesh-Diagonale (0.08-0.16)
+DEPTH_OFFSET = 0.05       # Mund-Tiefe von vorderster Kante (0.03-0.08)
+HEIGHT_RATIO = 0.45       # Mund-Höhe relativ zur Kopfhöhe (0.40-0.55)
+
+# Weiche Abnahme zum Rand der Mund-Region: "smooth", "sphere", "linear", "sharp" oder "constant" (harte Kante)
+FALLOFF = "smooth"
+# ==============================================================================
+
+MOUTH_KEYS = ["mouthOpen", "mouthO", "lipsClosed"]
+
+
+def gltf_from_blender(co):
+    """Blender-Achsen (Z = oben) -> glTF-Achsen (Y = oben): (x, y, z) -> (x, z, -y)
+
+    Wie der glTF-Exporter mit +Y Up; funktioniert für Punkte, Deltas und (N, 3)-Arrays.
+    """
+    co = np.asarray(co, dtype=np.float32)
+    return np.stack([co[..., 0], co[..., 2], -co[..., 1]], axis=-1)
+
+
+def blender_from_gltf(co):
+    """Umkehrung von gltf_from_blender(): (x, y, z) -> (x, -z, y)"""
+    co = np.asarray(co, dtype=np.float32)
+    return np.stack([co[..., 0], -co[..., 2], co[..., 1]], axis=-1)
+
+
+def mouth_region_from_bbox(bbox_min, bbox_max):
+    """Schätzt Mund-Mitte und -Radius aus einer lokalen Bounding Box (glTF-Achsen)
+
+    Mund-Mitte: zentral in X, HEIGHT_RATIO der Höhe von unten, um DEPTH_OFFSET
+    von der vordersten Kante zurückgesetzt.
+    """
+    (xmin, ymin, zmin), (xmax, ymax, zmax) = bbox_min, bbox_max
+    cx = 0.5 * (xmin + xmax)
+    cy = ymin + HEIGHT_RATIO * (ymax - ymin)
+    cz = zmax - DEPTH_OFFSET * (zmax - zmin)
+    diag = float(np.linalg.norm([xmax - xmin, ymax - ymin, zmax - zmin]))
+    radius = max(1e-6, RADIUS_FACTOR * diag)
+    return np.array([cx, cy, cz], dtype=np.float32), radius
+
+
+def open_fn_bulk(co, center):
+    """Öffnet Mund: Bewegung nach unten/hinten"""
+    return co + np.asarray(OPEN_DELTA_LOCAL, dtype=np.float32)
+
+
+def close_fn_bulk(co, center):
+    """Schließt Lippen: Bewegung nach vorne"""
+    return co + np.asarray(CLOSE_DELTA_LOCAL, dtype=np.float32)
+
+
+def pucker_fn_bulk(co, center):
+    """Puckert Lippen: Bewegung Richtung Center"""
+    center = np.asarray(center, dtype=np.float32)
+    return co + (center - co) * (1.0 - PUCKER_SCALE)
+
+
+MOUTH_KEY_FNS = {
+    "mouthOpen": open_fn_bulk,
+    "mouthO": pucker_fn_bulk,
+    "lipsClosed": close_fn_bulk,
+}
+
+
+def mouth_key_deltas(coords, ids, weights, center):
+    """Delta-Arrays (N, 3) aller Mund-Keys für die gewichtete Region"""
+    co = coords[ids]
+    deltas = {}
+    for name, fn in MOUTH_KEY_FNS.items():
+        d = np.zeros_like(coords, dtype=np.float32)
+        d[ids] = (fn(co, center) - co) * weights[:, None]
+        deltas[name] = d
+    return deltas
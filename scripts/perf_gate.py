@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Performance-Gate mit gespeicherten Baselines
+
+Fährt eine feste Szenario-Liste gegen den lokalen Server, wiederholt jede
+Messung --runs mal und vergleicht mit der letzten gespeicherten Baseline:
+
+  chat     POST /chat             (einzelner Turn, Handler + LLM: jede Nachricht eindeutig)
+  cached   POST /chat             (feste Nachrichten - nach dem Warm-up nur Cache-Treffer)
+  stream   GET  /chat/stream?q=   (erstes Byte und Gesamtdauer)
+  route    POST /route
+  agent    GET  /agent/:agentName
+
+/chat ruft generateResponse(message, message) auf - der Cache-Schlüssel ist
+also nur die Nachricht, und alle CHAT_MESSAGES erfüllt cacheService.shouldCache().
+"chat" hängt deshalb an jede Nachricht eine Lauf-Kennung und einen fortlaufenden Zähler an
+und misst den ungecachten Weg; "cached" misst bewusst den Cache-Treffer.
+
+Pro Lauf: p50, p99 und Durchsatz. Eine Regression liegt erst vor, wenn das
+95-%-Konfidenzintervall der Differenz (Welch, t-Verteilung über die Läufe)
+vollständig jenseits von --threshold liegt - Rauschen allein lässt das Gate
+nicht fehlschlagen. Vor und nach jedem Lauf wird /metrics gelesen; die
+Differenzen der Server-Zähler stehen im Report.
+
+  python scripts/perf_gate.py --save-baseline             # Baseline v001, v002, ...
+  python scripts/perf_gate.py                             # gegen die neueste Baseline, Exit 1 bei Regression
+  python scripts/perf_gate.py --scenarios chat,route --runs 8 --threshold 0.15
+
+Baselines: data/perf_baselines/<Name>/vNNN.json (Name per --baseline).
+"""
+
+import argparse
+import asyncio
+import glob
+import itertools
+import json
+import math
+import os
+import statistics
+import subprocess
+import time
+
+import aiohttp
+
+from latency_stats import LatencyHistogram
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASE = "http://localhost:3001"
+BASELINE_DIR = os.path.join(REPO_ROOT, "data", "perf_baselines")
+
+CHAT_MESSAGES = [
+    "Moin KAYA!",
+    "Ich brauche ein Formular für Bauantrag",
+    "Wann ist die nächste Kreistagssitzung?",
+    "Wie melde ich mein Auto an?",
+    "Wo finde ich das Jobcenter?",
+]
+RUN_TOKEN = f"{os.getpid():x}{int(time.time()):x}"  # eindeutig pro Gate-Lauf, auch gegenüber früheren
+NONCES = itertools.count()  # über Warm-up und alle Läufe fortlaufend
+AGENTS = ["buergerdienste", "ratsinfo", "jugend", "soziales", "politik"]
+SCENARIOS = ("chat", "cached", "stream", "route", "agent")
+METRICS = (("p50_ms", "lower"), ("p99_ms", "lower"), ("throughput_rps", "higher"))
+
+# zweiseitig 95 %: t-Quantile nach Freiheitsgraden (dazwischen der kleinere Grad - konservativ)
+T_975 = [(1, 12.706), (2, 4.303), (3, 3.182), (4, 2.776), (5, 2.571), (6, 2.447), (7, 2.365), (8, 2.306),
+         (9, 2.262), (10, 2.228), (12, 2.179), (15, 2.131), (20, 2.086), (25, 2.060), (30, 2.042), (40, 2.021),
+         (60, 2.000), (120, 1.980)]
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Performance-Gate gegen gespeicherte Baselines")
+    p.add_argument("--base", default=DEFAULT_BASE, help=f"Server-URL (Standard: {DEFAULT_BASE})")
+    p.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Auswahl (Standard: {','.join(SCENARIOS)})")
+    p.add_argument("--runs", type=int, default=5, help="Wiederholungen pro Szenario (Standard: 5)")
+    p.add_argument("--duration", type=float, default=10.0, help="Messdauer pro Lauf in Sekunden (Standard: 10)")
+    p.add_argument("--warmup", type=float, default=2.0, help="Warm-up vor jedem Szenario in Sekunden (Standard: 2)")
+    p.add_argument("--concurrency", type=int, default=8, help="Parallele Nutzer, closed loop (Standard: 8)")
+    p.add_argument("--timeout", type=float, default=30.0, help="Timeout pro Request in Sekunden (Standard: 30)")
+    p.add_argument("--threshold", type=float, default=0.10,
+                   help="Zulässige Verschlechterung relativ zur Baseline (Standard: 0.10 = 10 %%)")
+    p.add_argument("--baseline", default="local", help="Name der Baseline-Reihe (Standard: local)")
+    p.add_argument("--baseline-dir", default=BASELINE_DIR, help="Ablage der Baselines")
+    p.add_argument("--against", default=None, help="Bestimmte Baseline-Datei statt der neuesten")
+    p.add_argument("--save-baseline", action="store_true", help="Ergebnis als neue Baseline-Version speichern")
+    p.add_argument("--json", dest="json_out", default=None, help="Report als JSON speichern")
+    args = p.parse_args()
+    if args.runs < 2:
+        p.error("--runs muss mindestens 2 sein (Konfidenzintervall über die Läufe)")
+    return args
+
+
+# --- Szenarien ----------------------------------------------------------------
+
+def scenario_request(name, i, base):
+    """(Methode, URL, JSON-Body) der i-ten Anfrage eines Szenarios"""
+    message = CHAT_MESSAGES[i % len(CHAT_MESSAGES)]
+    if name == "chat":
+        return "POST", f"{base}/chat", {"message": f"{message} (Gate {RUN_TOKEN}-{next(NONCES)})"}
+    if name == "cached":
+        return "POST", f"{base}/chat", {"message": message}
+    if name == "stream":
+        return "GET", f"{base}/chat/stream?q={aiohttp.helpers.quote(message)}", None
+    if name == "route":
+        return "POST", f"{base}/route", {"message": message}
+    if name == "agent":
+        return "GET", f"{base}/agent/{AGENTS[i % len(AGENTS)]}", None
+    raise ValueError(f"Unbekanntes Szenario: {name}")
+
+
+async def one_request(http, name, i, base):
+    """Latenz in Sekunden (bei stream: bis zum ersten Byte und bis zum Ende)"""
+    method, url, body = scenario_request(name, i, base)
+    t0 = time.perf_counter()
+    first = None
+    async with http.request(method, url, json=body) as response:
+        if name == "stream":
+            async for _ in response.content.iter_any():
+                first = first or time.perf_counter() - t0
+        else:
+            await response.read()
+        if response.status != 200:
+            raise aiohttp.ClientResponseError(response.request_info, (), status=response.status)
+    return time.perf_counter() - t0, first
+
+
+async def run_phase(http, name, args, seconds, record):
+    """Closed loop: --concurrency Nutzer, jeder schickt sofort die nächste Anfrage"""
+    deadline = time.perf_counter() + seconds
+    counter = [0]
+    errors = [0]
+
+    async def user():
+        while time.perf_counter() < deadline:
+            i = counter[0]
+            counter[0] += 1
+            try:
+                total, first = await one_request(http, name, i, args.base)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                errors[0] += 1
+                continue
+            if record:
+                record(total, first)
+
+    await asyncio.gather(*(user() for _ in range(args.concurrency)))
+    return errors[0]
+
+
+async def scrape_metrics(http, base):
+    """/metrics als {Name{Labels}: Wert}; leer, wenn der Server keine liefert"""
+    try:
+        async with http.get(f"{base}/metrics") as response:
+            text = await response.text()
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return {}
+    values = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        name, _, value = line.rpartition(" ")
+        try:
+            values[name] = float(value)
+        except ValueError:
+            continue
+    return values
+
+
+def metrics_delta(before, after):
+    return {name: round(after[name] - before.get(name, 0.0), 6) for name in sorted(after)}
+
+
+async def run_scenario(name, args):
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    runs = []
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as http:
+        await run_phase(http, name, args, args.warmup, None)
+        for run in range(1, args.runs + 1):
+            total_hist, first_hist = LatencyHistogram(), LatencyHistogram()
+
+            def record(total, first):
+                total_hist.record(total)
+                if first is not None:
+                    first_hist.record(first)
+
+            before = await scrape_metrics(http, args.base)
+            t0 = time.perf_counter()
+            errors = await run_phase(http, name, args, args.duration, record)
+            elapsed = time.perf_counter() - t0
+            after = await scrape_metrics(http, args.base)
+            summary = total_hist.summary()
+            result = {
+                "run": run,
+                "requests": total_hist.total,
+                "errors": errors,
+                "p50_ms": summary.get("p50_ms"),
+                "p99_ms": summary.get("p99_ms"),
+                "throughput_rps": round(total_hist.total / elapsed, 3) if elapsed else 0.0,
+                "histogram": total_hist.to_dict(),
+                "server_metrics": metrics_delta(before, after),
+            }
+            if first_hist.total:
+                result["first_byte_p50_ms"] = first_hist.summary()["p50_ms"]
+            runs.append(result)
+            print(f"   {name:<7} Lauf {run}/{args.runs}: p50 {fmt(result['p50_ms'])} ms  "
+                  f"p99 {fmt(result['p99_ms'])} ms  {result['throughput_rps']:.1f} req/s  Fehler: {errors}")
+    return runs
+
+
+def fmt(value):
+    return f"{value:.1f}" if value is not None else "-"
+
+
+# --- Statistik ----------------------------------------------------------------
+
+def t_quantile(df):
+    value = T_975[0][1]
+    for degrees, quantile in T_975:
+        if df >= degrees:
+            value = quantile
+    return value if df < 120 else 1.960
+
+
+def mean_ci(values):
+    """(Mittelwert, halbe Breite des 95-%-Intervalls)"""
+    if len(values) < 2:
+        return (values[0] if values else None), math.inf
+    return statistics.mean(values), t_quantile(len(values) - 1) * statistics.stdev(values) / math.sqrt(len(values))
+
+
+def welch_diff_ci(current, baseline):
+    """95-%-Intervall der Differenz der Mittelwerte (aktuell - Baseline) nach Welch"""
+    n1, n2 = len(current), len(baseline)
+    if n1 < 2 or n2 < 2:
+        return None
+    m1, m2 = statistics.mean(current), statistics.mean(baseline)
+    v1, v2 = statistics.variance(current) / n1, statistics.variance(baseline) / n2
+    se = math.sqrt(v1 + v2)
+    if se == 0:
+        return m1 - m2, m1 - m2
+    df = (v1 + v2) ** 2 / ((v1 ** 2 / (n1 - 1) if n1 > 1 else 0) + (v2 ** 2 / (n2 - 1) if n2 > 1 else 0))
+    half = t_quantile(int(df)) * se
+    return m1 - m2 - half, m1 - m2 + half
+
+
+def compare(current, baseline, threshold):
+    """Pro Szenario und Kennzahl: Urteil 'Regression', 'besser' oder 'ok'"""
+    verdicts = []
+    for name, runs in current.items():
+        if name not in baseline:
+            continue
+        for metric, direction in METRICS:
+            now = [r[metric] for r in runs if r.get(metric) is not None]
+            then = [r[metric] for r in baseline[name] if r.get(metric) is not None]
+            ci = welch_diff_ci(now, then)
+            if ci is None or not then:
+                continue
+            reference = statistics.mean(then)
+            limit = threshold * reference
+            low, high = ci
+            if direction == "lower":
+                worse, better = low > limit, high < -limit
+            else:
+                worse, better = high < -limit, low > limit
+            verdicts.append({
+                "scenario": name, "metric": metric, "baseline_mean": round(reference, 3),
+                "current_mean": round(statistics.mean(now), 3), "diff_ci": [round(low, 3), round(high, 3)],
+                "limit": round(limit, 3), "verdict": "Regression" if worse else ("besser" if better else "ok"),
+            })
+    return verdicts
+
+
+# --- Baselines ----------------------------------------------------------------
+
+def uncompared(current, verdicts):
+    """Szenarien ohne Urteil: fehlen in der Baseline oder haben dort/aktuell weniger als 2 Läufe"""
+    judged = {v["scenario"] for v in verdicts}
+    return [name for name in current if name not in judged]
+
+
+def baseline_files(directory, name):
+    return sorted(glob.glob(os.path.join(directory, name, "v[0-9][0-9][0-9].json")))
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def save_baseline(args, report):
+    files = baseline_files(args.baseline_dir, args.baseline)
+    version = int(os.path.basename(files[-1])[1:4]) + 1 if files else 1
+    path = os.path.join(args.baseline_dir, args.baseline, f"v{version:03d}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(report, version=version), f, indent=2, ensure_ascii=False)
+    return path
+
+
+def print_summary(results):
+    print(f"\n{'Szenario':<10} {'p50 ms':>16} {'p99 ms':>16} {'req/s':>16}   (Mittel ± 95 %-KI über Läufe)")
+    for name, runs in results.items():
+        cells = []
+        for metric, _ in METRICS:
+            mean, half = mean_ci([r[metric] for r in runs if r.get(metric) is not None])
+            cells.append(f"{fmt(mean):>8} ± {half:<5.1f}" if mean is not None and half != math.inf else f"{fmt(mean):>16}")
+        print(f"{name:<10} " + " ".join(cells))
+
+
+def print_verdicts(verdicts, baseline_path):
+    print(f"\nVergleich mit {os.path.relpath(baseline_path, REPO_ROOT)}")
+    print(f"{'Szenario':<10} {'Kennzahl':<15} {'Baseline':>10} {'Aktuell':>10} {'Diff 95 %-KI':>22} {'Grenze':>8}")
+    for v in verdicts:
+        icon = {"Regression": "❌", "besser": "✅", "ok": "  "}[v["verdict"]]
+        ci = f"[{v['diff_ci'][0]:+.1f}, {v['diff_ci'][1]:+.1f}]"
+        print(f"{v['scenario']:<10} {v['metric']:<15} {v['baseline_mean']:>10.1f} {v['current_mean']:>10.1f} "
+              f"{ci:>22} {v['limit']:>8.1f}  {icon} {v['verdict']}")
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"❌ Unbekannte Szenarien: {', '.join(unknown)} (erlaubt: {', '.join(SCENARIOS)})")
+
+    print("=" * 60)
+    print("🚦 KAYA Performance-Gate")
+    print("=" * 60)
+    print(f"Ziel: {args.base}  Läufe: {args.runs} x {args.duration:g}s  Parallel: {args.concurrency}")
+
+    results = {}
+    for name in scenarios:
+        results[name] = asyncio.run(run_scenario(name, args))
+    print_summary(results)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git_revision(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("json_out", "save_baseline", "against")},
+        "scenarios": results,
+    }
+
+    exit_code = 0
+    files = baseline_files(args.baseline_dir, args.baseline)
+    baseline_path = args.against or (files[-1] if files else None)
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        load_keys = ("base", "duration", "concurrency")
+        changed = [k for k in load_keys if baseline.get("config", {}).get(k) != report["config"][k]]
+        if changed:
+            print(f"\n⚠️  Lastprofil weicht von der Baseline ab ({', '.join(changed)}) - Vergleich nur bedingt aussagekräftig")
+        verdicts = compare(results, baseline["scenarios"], args.threshold)
+        report["baseline"] = {"path": baseline_path, "version": baseline.get("version"), "git": baseline.get("git")}
+        report["verdicts"] = verdicts
+        print_verdicts(verdicts, baseline_path)
+        regressions = [v for v in verdicts if v["verdict"] == "Regression"]
+        missing = uncompared(results, verdicts)
+        report["uncompared"] = missing
+        if missing:
+            print(f"\n⚠️  Nicht verglichen (fehlt in der Baseline oder < 2 Läufe): {', '.join(missing)}")
+        if not verdicts:
+            print("\n❌ Nichts verglichen - Baseline mit --save-baseline und --runs >= 2 neu anlegen")
+            exit_code = 1
+        elif regressions:
+            print(f"\n❌ {len(regressions)} signifikante Regression(en) über {args.threshold:.0%}")
+            exit_code = 1
+        else:
+            print("\n✅ Keine signifikante Regression")
+    else:
+        print(f"\nℹ️  Noch keine Baseline '{args.baseline}' - mit --save-baseline anlegen")
+
+    if args.save_baseline:
+        print(f"💾 Baseline gespeichert: {save_baseline(args, report)}")
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Report gespeichert: {args.json_out}")
+    raise SystemExit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,777 @@
+#!/usr/bin/env python3
+"""
+Segment-Speicher für das Gesprächs-Gedächtnis (Ersatz für memory/*.json)
+
+context_memory.js schreibt bei jeder Nachricht die komplette Session als
+eingerücktes JSON neu und löscht nur per Tages-Cleanup. Hier stattdessen:
+
+  - Append-only Log in Segmenten (seg-000001.log, ...), neue Segmente ab
+    --segment-size; jede Nachricht ist ein kleiner APPEND-Eintrag
+  - Index im Speicher: sessionId -> Kette (Segment, Offset, Länge) aus
+    PUT + APPENDs; wird beim Öffnen aus den Segmenten aufgebaut
+  - Kompaktierung (auch im Hintergrund-Thread): versiegelte Segmente werden
+    zu einem PUT pro lebender Session zusammengefasst, Tote fallen weg.
+    Vor dem Löschen der alten Segmente wird die Liste als COMPACT-Marker
+    gespeichert - ein Absturz mittendrin wird beim Öffnen zu Ende geführt,
+    statt gelöschte Sessions aus einem übrig gebliebenen Segment zurückzuholen
+  - ACTIVE nennt das Segment, in das gerade geschrieben wird: nur dort wird
+    ein abgerissener letzter Eintrag abgeschnitten; Schäden in versiegelten
+    Segmenten werden gemeldet (stats, CLI) und blockieren die Kompaktierung
+  - TTL-Verdrängung: Sessions ohne Aktivität seit --ttl-days bekommen einen
+    Löscheintrag (DSGVO: 30 Tage wie im Auto-Cleanup)
+
+Eintrag: HEADER (crc32, Länge, seq, lastActivity, op, Schlüssellänge),
+Schlüssel, kompaktes JSON. seq ist global monoton - beim Wiederaufbau gilt
+die Reihenfolge der seq, nicht die der Dateien.
+
+  python scripts/segment_store.py migrate
+  python scripts/segment_store.py get test-bauantrag-kosten
+  python scripts/segment_store.py stats
+  python scripts/segment_store.py compact --ttl-days 30
+  python scripts/segment_store.py bench --sessions 100000
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+from latency_stats import LatencyHistogram
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STORE = os.path.join(REPO_ROOT, "kaya-api", "memory_segments")
+DEFAULT_SOURCES = [os.path.join(REPO_ROOT, "kaya-api", "memory"), os.path.join(REPO_ROOT, "memory")]
+ACTIVE_FILE = "ACTIVE"
+COMPACT_MARKER = "COMPACT"
+
+HEADER = struct.Struct("<IIQdBH")   # crc32, Länge (ohne crc/Länge), seq, lastActivity, op, Schlüssellänge
+PREFIX = struct.Struct("<II")
+OP_PUT, OP_APPEND, OP_DELETE = 1, 2, 3
+SEGMENT_SIZE = 16 * 1024 * 1024
+DAY = 24 * 60 * 60
+
+
+def parse_time(stamp):
+    try:
+        return datetime.fromisoformat(str(stamp).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def iso_now():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def empty_session(session_id):
+    return {"id": session_id, "messages": [], "context": {"userData": {}}}
+
+
+class CorruptEntry(ValueError):
+    pass
+
+
+class Segment:
+    """Eine Log-Datei; gelesen wird mit pread (threadsicher, ohne Dateizeiger)"""
+
+    def __init__(self, seg_id, path):
+        self.id = seg_id
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        self.size = os.fstat(self.fd).st_size
+        self.live = 0  # Bytes, auf die der Index noch zeigt
+        self.readers = 0  # laufende get()-Aufrufe, die dieses Segment lesen
+        self.corrupt = None  # (Offset, Grund) des ersten unlesbaren Eintrags
+
+    def append(self, data):
+        offset = self.size
+        os.pwrite(self.fd, data, offset)
+        self.size += len(data)
+        return offset
+
+    def read(self, offset, length):
+        return os.pread(self.fd, length, offset)
+
+    def scan(self, truncate_tail=False):
+        """(offset, Länge, seq, lastActivity, op, Schlüssel) aller gültigen Einträge
+
+        Ein abgerissener letzter Eintrag (Absturz beim Schreiben) wird nur mit
+        truncate_tail - im aktiven Segment - abgeschnitten. Sonst, und bei
+        Schäden mitten im Segment, endet der Scan dort, self.corrupt nennt die
+        Stelle und die Datei bleibt unverändert.
+        """
+        self.corrupt = None
+        offset = 0
+        torn, reason = False, None
+        while offset < self.size:
+            if offset + HEADER.size > self.size:
+                torn, reason = True, "unvollständiger Header"
+                break
+            head = self.read(offset, HEADER.size)
+            crc, length, seq, last_activity, op, key_len = HEADER.unpack(head)
+            total = PREFIX.size + length
+            if offset + total > self.size:
+                torn, reason = True, "unvollständiger Eintrag"
+                break
+            body = self.read(offset + PREFIX.size, length)
+            if zlib.crc32(body) != crc:
+                torn, reason = offset + total == self.size, f"CRC-Fehler (seq {seq})"
+                break
+            key = body[HEADER.size - PREFIX.size:HEADER.size - PREFIX.size + key_len].decode("utf-8")
+            yield offset, total, seq, last_activity, op, key
+            offset += total
+        if offset >= self.size:
+            return
+        if truncate_tail and torn:
+            os.ftruncate(self.fd, offset)
+            self.size = offset
+        else:
+            self.corrupt = (offset, reason)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def encode_entry(seq, last_activity, op, key, payload):
+    key_bytes = key.encode("utf-8")
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8") if payload is not None else b""
+    body = HEADER.pack(0, 0, seq, last_activity, op, len(key_bytes))[PREFIX.size:] + key_bytes + data
+    return PREFIX.pack(zlib.crc32(body), len(body)) + body
+
+
+def decode_entry(raw):
+    crc, length, seq, last_activity, op, key_len = HEADER.unpack_from(raw)
+    body = raw[PREFIX.size:PREFIX.size + length]
+    if zlib.crc32(body) != crc:
+        raise CorruptEntry(f"CRC-Fehler (seq {seq})")
+    data = raw[HEADER.size + key_len:PREFIX.size + length]
+    return op, json.loads(data) if data else None
+
+
+class SessionEntry:
+    __slots__ = ("chain", "last_activity")
+
+    def __init__(self, chain, last_activity):
+        self.chain = chain  # [(seg_id, offset, Länge, seq)] - PUT (optional) + APPENDs
+        self.last_activity = last_activity
+
+
+class SegmentStore:
+    def __init__(self, directory, segment_size=SEGMENT_SIZE, fsync=False):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self.lock = threading.RLock()
+        self.readers_done = threading.Condition(self.lock)
+        self.compaction_lock = threading.Lock()
+        self.segments = {}
+        self.index = {}
+        self.corrupt = {}  # seg_id -> (Offset, Grund)
+        self.seq = 0
+        self.next_segment = 1
+        self.bytes_written = 0
+        self.compaction_bytes = 0
+        self._worker = None
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        active_id = self._recover()
+        last = self.segments.get(active_id)
+        if last and last.size < segment_size and active_id not in self.corrupt:
+            self.active = last
+            self._write_active(last.id)
+        else:
+            self.active = self._new_segment()
+
+    # --- Aufbau ---------------------------------------------------------
+
+    def _segment_path(self, seg_id):
+        return os.path.join(self.directory, f"seg-{seg_id:06d}.log")
+
+    def _new_segment(self):
+        """Neues Schreib-Segment anlegen und als ACTIVE vermerken"""
+        segment = Segment(self.next_segment, self._segment_path(self.next_segment))
+        self.segments[segment.id] = segment
+        self.next_segment += 1
+        self._write_active(segment.id)
+        return segment
+
+    def _write_json(self, name, data):
+        """Kleine Steuerdatei atomar und dauerhaft schreiben"""
+        path = os.path.join(self.directory, name)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        self._fsync_dir()
+
+    def _read_json(self, name):
+        try:
+            with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_active(self, seg_id):
+        self._write_json(ACTIVE_FILE, {"segment": seg_id})
+
+    def _fsync_dir(self):
+        """Umbenennungen/Löschungen dauerhaft machen (unter Windows nicht möglich und nicht nötig)"""
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _finish_compaction(self):
+        """COMPACT-Marker vorhanden: Kompaktate sind vollständig - alte Segmente fertig löschen"""
+        marker = self._read_json(COMPACT_MARKER)
+        if marker is None:
+            return
+        for seg_id in marker.get("delete", []):
+            path = self._segment_path(seg_id)
+            if os.path.exists(path):
+                os.remove(path)
+        self._fsync_dir()
+        os.remove(os.path.join(self.directory, COMPACT_MARKER))
+
+    def _recover(self):
+        """Index aus allen Segmenten in seq-Reihenfolge neu aufbauen; liefert die ACTIVE-Segment-ID"""
+        for path in glob.glob(os.path.join(self.directory, "seg-*.log.tmp")):
+            os.remove(path)  # abgebrochene Kompaktierung, die Originale sind noch da
+        self._finish_compaction()
+        paths = sorted(glob.glob(os.path.join(self.directory, "seg-*.log")))
+        active = self._read_json(ACTIVE_FILE)
+        # ältere Speicher ohne ACTIVE: das jüngste Segment gilt als aktiv
+        active_id = active["segment"] if active else (int(os.path.basename(paths[-1])[4:10]) if paths else None)
+        entries = []
+        for path in paths:
+            seg_id = int(os.path.basename(path)[4:10])
+            segment = Segment(seg_id, path)
+            self.segments[seg_id] = segment
+            self.next_segment = max(self.next_segment, seg_id + 1)
+            for offset, length, seq, last_activity, op, key in segment.scan(truncate_tail=seg_id == active_id):
+                # bei gleicher seq (Kompaktat + Original) zuerst APPEND/DELETE, dann das PUT
+                entries.append((seq, op == OP_PUT, key, op, (seg_id, offset, length, seq), last_activity))
+            if segment.corrupt:
+                self.corrupt[seg_id] = segment.corrupt
+        entries.sort(key=lambda e: (e[0], e[1]))
+        for seq, _, key, op, loc, last_activity in entries:
+            self.seq = max(self.seq, seq)
+            entry = self.index.get(key)
+            if op == OP_DELETE:
+                self.index.pop(key, None)
+            elif op == OP_PUT or entry is None:
+                self.index[key] = SessionEntry([loc], last_activity)
+            else:
+                entry.chain.append(loc)
+                entry.last_activity = max(entry.last_activity, last_activity)
+        for entry in self.index.values():
+            for seg_id, _, length, _ in entry.chain:
+                self.segments[seg_id].live += length
+        return active_id
+
+    # --- Schreiben ------------------------------------------------------
+
+    def _write(self, op, key, payload, last_activity):
+        with self.lock:
+            self.seq += 1
+            data = encode_entry(self.seq, last_activity, op, key, payload)
+            if self.active.size and self.active.size + len(data) > self.segment_size:
+                self.active = self._new_segment()
+            offset = self.active.append(data)
+            if self.fsync:
+                os.fsync(self.active.fd)
+            self.bytes_written += len(data)
+            return self.active.id, offset, len(data), self.seq
+
+    def _drop_chain(self, entry):
+        for seg_id, _, length, _ in entry.chain:
+            self.segments[seg_id].live -= length
+
+    def put(self, session_id, session):
+        """Komplette Session schreiben (ersetzt alles Vorherige)"""
+        last_activity = parse_time(session.get("lastActivity") or session.get("createdAt")) or time.time()
+        with self.lock:
+            loc = self._write(OP_PUT, session_id, session, last_activity)
+            old = self.index.get(session_id)
+            if old:
+                self._drop_chain(old)
+            self.index[session_id] = SessionEntry([loc], last_activity)
+            self.segments[loc[0]].live += loc[2]
+
+    def append_message(self, session_id, message):
+        """Eine Nachricht anhängen (entspricht addMessage + saveSession)"""
+        stamp = message.get("timestamp") or iso_now()
+        last_activity = parse_time(stamp) or time.time()
+        with self.lock:
+            loc = self._write(OP_APPEND, session_id, {"message": message, "lastActivity": stamp}, last_activity)
+            entry = self.index.get(session_id)
+            if entry is None:
+                self.index[session_id] = SessionEntry([loc], last_activity)
+            else:
+                entry.chain.append(loc)
+                entry.last_activity = max(entry.last_activity, last_activity)
+            self.segments[loc[0]].live += loc[2]
+
+    def delete(self, session_id):
+        with self.lock:
+            entry = self.index.pop(session_id, None)
+            if entry is None:
+                return False
+            self._drop_chain(entry)
+            self._write(OP_DELETE, session_id, None, time.time())
+            return True
+
+    # --- Lesen ----------------------------------------------------------
+
+    def _read_chain(self, session_id, chain, segments=None):
+        segments = segments or self.segments
+        session = None
+        for seg_id, offset, length, _ in chain:
+            op, payload = decode_entry(segments[seg_id].read(offset, length))
+            if op == OP_PUT:
+                session = payload
+            else:
+                session = session or empty_session(session_id)
+                session["messages"].append(payload["message"])
+                session["lastActivity"] = payload["lastActivity"]
+        return session
+
+    def get(self, session_id):
+        """Session lesen; die Segmente der Kette bleiben währenddessen offen
+
+        Gelesen wird ohne Sperre. Damit eine parallele Kompaktierung ein
+        Segment nicht mitten im Lesen schließt und löscht, werden die
+        Segmente der Kette unter der Sperre gezählt (readers) - _compact()
+        wartet, bis diese Zahl wieder 0 ist.
+        """
+        with self.lock:
+            entry = self.index.get(session_id)
+            if entry is None:
+                return None
+            chain = list(entry.chain)
+            pinned = {seg_id: self.segments[seg_id] for seg_id, _, _, _ in chain}
+            for segment in pinned.values():
+                segment.readers += 1
+        try:
+            return self._read_chain(session_id, chain, pinned)
+        finally:
+            with self.lock:
+                for segment in pinned.values():
+                    segment.readers -= 1
+                self.readers_done.notify_all()
+
+    def __contains__(self, session_id):
+        return session_id in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def session_ids(self):
+        with self.lock:
+            return list(self.index)
+
+    # --- Verdrängung und Kompaktierung ------------------------------------
+
+    def evict_idle(self, ttl_seconds, now=None):
+        """Sessions ohne Aktivität seit ttl_seconds löschen; liefert die Anzahl"""
+        cutoff = (now or time.time()) - ttl_seconds
+        with self.lock:
+            idle = [key for key, entry in self.index.items() if entry.last_activity < cutoff]
+        return sum(1 for key in idle if self.delete(key))
+
+    def garbage_ratio(self):
+        with self.lock:
+            sealed = [s for s in self.segments.values() if s is not self.active]
+            total = sum(s.size for s in sealed)
+            return 1.0 - sum(s.live for s in sealed) / total if total else 0.0
+
+    def compact(self):
+        """Alle versiegelten Segmente in frische Segmente umschreiben
+
+        Das aktive Segment wird vorher versiegelt. Gelesen und geschrieben
+        wird ohne Sperre; beim Umschalten wird eine Session nur übernommen,
+        wenn ihre Kette in der Zwischenzeit nicht ersetzt wurde. Beschädigte
+        Segmente blockieren die Kompaktierung (ihr unlesbarer Rest ginge verloren).
+        """
+        if self.corrupt:
+            raise CorruptEntry("Beschädigte Segmente - Kompaktierung abgebrochen: " + ", ".join(
+                f"seg-{seg_id:06d} ab Byte {offset} ({reason})" for seg_id, (offset, reason) in sorted(self.corrupt.items())))
+        with self.compaction_lock:
+            return self._compact()
+
+    def _compact(self):
+        t0 = time.perf_counter()
+        with self.lock:
+            if self.active.size:
+                self.active = self._new_segment()
+            old = {seg_id for seg_id in self.segments if seg_id != self.active.id}
+            if not old:
+                return {"segments_before": 0, "segments_after": 0, "bytes_before": 0, "bytes_after": 0,
+                        "sessions": 0, "seconds": 0.0}
+            bytes_before = sum(self.segments[seg_id].size for seg_id in old)
+            targets = []
+            for key, entry in self.index.items():
+                prefix = [loc for loc in entry.chain if loc[0] in old]
+                if prefix:
+                    targets.append((key, prefix, entry.last_activity))
+            out = Segment(self.next_segment, self._segment_path(self.next_segment) + ".tmp")
+            self.next_segment += 1
+
+        written = []
+        outputs = [out]
+        for key, prefix, last_activity in targets:
+            session = self._read_chain(key, prefix)
+            data = encode_entry(prefix[-1][3], last_activity, OP_PUT, key, session)
+            if out.size and out.size + len(data) > self.segment_size:
+                with self.lock:
+                    out = Segment(self.next_segment, self._segment_path(self.next_segment) + ".tmp")
+                    self.next_segment += 1
+                outputs.append(out)
+            offset = out.append(data)
+            written.append((key, prefix, (out.id, offset, len(data), prefix[-1][3])))
+        if not out.size:
+            outputs.pop()
+            out.close()
+            os.remove(out.path)
+        for segment in outputs:
+            os.fsync(segment.fd)
+            final = segment.path[:-len(".tmp")]
+            os.replace(segment.path, final)
+            segment.path = final
+
+        with self.lock:
+            for segment in outputs:
+                self.segments[segment.id] = segment
+            for key, prefix, loc in written:
+                entry = self.index.get(key)
+                if entry is None or entry.chain[:len(prefix)] != prefix:
+                    continue  # inzwischen gelöscht oder ersetzt: Kompaktat ist Müll
+                entry.chain = [loc] + entry.chain[len(prefix):]
+                self.segments[loc[0]].live += loc[2]
+            # Erst die Kompaktate dauerhaft machen und die Löschliste festschreiben: bricht das
+            # Löschen ab, führt _recover() es zu Ende (sonst könnte ein übrig gebliebenes
+            # Segment mit PUT eine Session zurückbringen, deren Löscheintrag schon weg ist)
+            self._fsync_dir()
+            self._write_json(COMPACT_MARKER, {"delete": sorted(old)})
+            # Der Index zeigt nicht mehr auf die alten Segmente; laufende Leser zu Ende lesen lassen
+            retired = [self.segments.pop(seg_id) for seg_id in sorted(old)]
+            self.readers_done.wait_for(lambda: not any(segment.readers for segment in retired))
+            for segment in retired:
+                segment.close()
+                os.remove(segment.path)
+            self._fsync_dir()
+            os.remove(os.path.join(self.directory, COMPACT_MARKER))
+            self.compaction_bytes += sum(s.size for s in outputs)
+        return {"segments_before": len(old), "segments_after": len(outputs), "bytes_before": bytes_before,
+                "bytes_after": sum(s.size for s in outputs), "sessions": len(written),
+                "seconds": time.perf_counter() - t0}
+
+    def start_background(self, interval=60.0, ttl_seconds=None, min_garbage=0.5):
+        """Hintergrund-Thread: TTL-Verdrängung und Kompaktierung ab min_garbage Anteil Müll"""
+        def loop():
+            while not self._stop.wait(interval):
+                if ttl_seconds:
+                    self.evict_idle(ttl_seconds)
+                if not self.corrupt and self.garbage_ratio() >= min_garbage:
+                    self.compact()
+
+        self._stop.clear()
+        self._worker = threading.Thread(target=loop, name="segment-compactor", daemon=True)
+        self._worker.start()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "sessions": len(self.index),
+                "segments": len(self.segments),
+                "bytes_on_disk": sum(s.size for s in self.segments.values()),
+                "live_bytes": sum(s.live for s in self.segments.values()),
+                "bytes_written": self.bytes_written,
+                "compaction_bytes": self.compaction_bytes,
+                "corrupt_segments": len(self.corrupt),
+            }
+
+    def close(self):
+        if self._worker:
+            self._stop.set()
+            self._worker.join()
+            self._worker = None
+        with self.lock:
+            for segment in self.segments.values():
+                if self.fsync:
+                    os.fsync(segment.fd)
+                segment.close()
+            self.segments = {}
+
+
+# --- Migration ------------------------------------------------------------
+
+def iter_session_files(sources):
+    for source in sources:
+        for path in sorted(glob.glob(os.path.join(source, "*.json"))):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Übersprungen: {path} ({e})")
+                continue
+            if isinstance(data, dict):
+                yield os.path.splitext(os.path.basename(path))[0], data
+
+
+def migrate(store, sources):
+    """memory/*.json übernehmen; bei doppelter sessionId gewinnt die jüngere lastActivity"""
+    migrated = replaced = 0
+    newest = {}
+    for session_id, session in iter_session_files(sources):
+        session.setdefault("id", session_id)
+        context = session.setdefault("context", {})
+        if isinstance(context, dict):
+            context.setdefault("userData", {})
+        last = parse_time(session.get("lastActivity") or session.get("createdAt")) or 0.0
+        if session_id in newest:
+            if last <= newest[session_id]:
+                continue
+            replaced += 1
+        newest[session_id] = last
+        store.put(session_id, session)
+        migrated += 1
+    return migrated - replaced, replaced
+
+
+# --- Benchmark ------------------------------------------------------------
+
+def sample_messages(sources, limit=2000):
+    """Echte Nachrichten aus den Transkripten als Größenvorlage"""
+    messages = []
+    for _, session in iter_session_files(sources):
+        for message in session.get("messages") or []:
+            if isinstance(message, dict):
+                messages.append(message)
+        if len(messages) >= limit:
+            break
+    return messages or [{"sender": "user", "content": "Wie beantrage ich einen Bauantrag?", "context": {}}]
+
+
+class FilePerSession:
+    """Vergleichsbasis: wie context_memory.js - jede Änderung schreibt die ganze Datei (spaces: 2)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.sessions = {}
+        self.bytes_written = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def append_message(self, session_id, message):
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = dict(empty_session(session_id), createdAt=message["timestamp"])
+        session["messages"].append(message)
+        session["lastActivity"] = message["timestamp"]
+        data = json.dumps(session, indent=2, ensure_ascii=False).encode("utf-8")
+        with open(os.path.join(self.directory, f"{session_id}.json"), "wb") as f:
+            f.write(data)
+        self.bytes_written += len(data)
+
+    def get(self, session_id):
+        try:
+            with open(os.path.join(self.directory, f"{session_id}.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+
+def make_workload(sessions, turns, templates, seed):
+    """Verschachtelte Schreibfolge: (sessionId, Nachricht); Turns pro Session 1..2*turns"""
+    rng = random.Random(seed)
+    pending = []
+    for i in range(sessions):
+        pending.extend([f"bench-{i:06d}"] * (2 * rng.randint(1, 2 * turns - 1)))
+    rng.shuffle(pending)
+    base = time.time() - 60 * DAY
+    for n, session_id in enumerate(pending):
+        template = rng.choice(templates)
+        stamp = datetime.fromtimestamp(base + n * 60 * DAY / len(pending), timezone.utc)
+        yield session_id, {"id": f"{n:x}", "sender": template.get("sender"), "content": template.get("content"),
+                           "timestamp": stamp.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+                           "context": template.get("context") or {}}
+
+
+def run_bench(args):
+    templates = sample_messages(DEFAULT_SOURCES)
+    root = tempfile.mkdtemp(prefix="segment_bench_", dir=args.bench_dir)
+    try:
+        results = {}
+        for name in ("Datei pro Session", "Segment-Log"):
+            directory = os.path.join(root, "files" if name.startswith("Datei") else "segments")
+            layout = FilePerSession(directory) if name.startswith("Datei") else SegmentStore(directory, args.segment_size)
+            logical = writes = 0
+            write_hist = LatencyHistogram()
+            t0 = time.perf_counter()
+            for session_id, message in make_workload(args.sessions, args.turns, templates, args.seed):
+                logical += len(json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+                t1 = time.perf_counter()
+                layout.append_message(session_id, message)
+                write_hist.record(time.perf_counter() - t1)
+                writes += 1
+            elapsed = time.perf_counter() - t0
+
+            compaction = None
+            if isinstance(layout, SegmentStore):
+                compaction = layout.compact()
+            disk = layout.bytes_written + (layout.compaction_bytes if compaction else 0)
+
+            rng = random.Random(args.seed + 1)
+            ids = [f"bench-{rng.randrange(args.sessions):06d}" for _ in range(args.lookups)]
+            read_hist = LatencyHistogram()
+            for session_id in ids:
+                t1 = time.perf_counter()
+                layout.get(session_id)
+                read_hist.record(time.perf_counter() - t1)
+
+            t1 = time.perf_counter()
+            if isinstance(layout, SegmentStore):
+                layout.close()
+                layout = SegmentStore(directory, args.segment_size)
+                startup_sessions = len(layout)
+                layout.close()
+            else:
+                startup_sessions = len(list(iter_session_files([directory])))
+            startup = time.perf_counter() - t1
+
+            results[name] = {"writes": writes, "logical_bytes": logical, "disk_bytes": disk,
+                             "write_amplification": disk / logical if logical else 0.0,
+                             "write_seconds": elapsed, "write": write_hist, "lookup": read_hist,
+                             "startup_seconds": startup, "startup_sessions": startup_sessions,
+                             "compaction": compaction}
+        return results
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def print_bench(results, sessions):
+    print(f"\n{'':<20} {'Schreib-Amplif.':>16} {'Disk MB':>9} {'Schreiben s':>12} {'Start s':>9}")
+    for name, r in results.items():
+        print(f"{name:<20} {r['write_amplification']:>15.1f}x {r['disk_bytes'] / 1e6:>9.1f} "
+              f"{r['write_seconds']:>12.2f} {r['startup_seconds']:>9.2f}")
+    print(f"\n(Start = alle {sessions} Sessions laden bzw. Index aus den Segmenten aufbauen)")
+    print(f"\n{'':<28} {'n':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'p99.9':>8} {'max':>8}  (µs)")
+    for name, r in results.items():
+        for label, hist in ((f"{name} schreiben", r["write"]), (f"{name} lesen", r["lookup"])):
+            cells = " ".join(f"{hist.value_at(p) * 1e6:>8.0f}" if p < 100 else f"{hist.max_us:>8.0f}"
+                             for p in (50.0, 90.0, 99.0, 99.9, 100))
+            print(f"{label:<28} {hist.total:>7} {cells}")
+    compaction = results["Segment-Log"]["compaction"]
+    if compaction:
+        print(f"\nKompaktierung: {compaction['bytes_before'] / 1e6:.1f} MB -> {compaction['bytes_after'] / 1e6:.1f} MB "
+              f"in {compaction['seconds']:.2f}s (in der Amplifikation enthalten)")
+
+
+# --- CLI ------------------------------------------------------------------
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Segment-Speicher für memory/*.json")
+    p.add_argument("--store", default=DEFAULT_STORE, help="Verzeichnis der Segmente")
+    p.add_argument("--segment-size", type=int, default=SEGMENT_SIZE, help="Segmentgröße in Bytes (Standard: 16 MiB)")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    m = sub.add_parser("migrate", help="memory/*.json in den Segment-Speicher übernehmen")
+    m.add_argument("--source", action="append", default=None,
+                   help="Quellverzeichnis (mehrfach; Standard: kaya-api/memory und memory)")
+
+    g = sub.add_parser("get", help="Eine Session ausgeben")
+    g.add_argument("session_id")
+
+    sub.add_parser("stats", help="Kennzahlen des Speichers")
+
+    c = sub.add_parser("compact", help="Kompaktieren (optional vorher TTL-Verdrängung)")
+    c.add_argument("--ttl-days", type=float, default=None, help="Sessions ohne Aktivität seit N Tagen löschen")
+
+    b = sub.add_parser("bench", help="Vergleich mit Datei-pro-Session")
+    b.add_argument("--sessions", type=int, default=100000, help="Anzahl Sessions (Standard: 100000)")
+    b.add_argument("--turns", type=int, default=3, help="Mittlere Turns pro Session (Standard: 3)")
+    b.add_argument("--lookups", type=int, default=10000, help="Zufällige Lesezugriffe (Standard: 10000)")
+    b.add_argument("--bench-dir", default=None, help="Arbeitsverzeichnis (Standard: System-Temp)")
+    b.add_argument("--seed", type=int, default=1, help="Seed der Schreibfolge (Standard: 1)")
+    b.add_argument("--json", dest="json_out", default=None, help="Ergebnis als JSON speichern")
+    return p.parse_args()
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+
+    if args.command == "get":
+        store = SegmentStore(args.store, args.segment_size)
+        session = store.get(args.session_id)
+        store.close()
+        if session is None:
+            print(f"❌ Session nicht gefunden: {args.session_id}")
+            raise SystemExit(1)
+        print(json.dumps(session, indent=2, ensure_ascii=False))
+        return
+
+    print("=" * 60)
+    print("🗄️  KAYA Segment-Speicher")
+    print("=" * 60)
+
+    if args.command == "bench":
+        print(f"Sessions: {args.sessions}  Turns: ~{args.turns}  Lesezugriffe: {args.lookups}")
+        results = run_bench(args)
+        print_bench(results, args.sessions)
+        if args.json_out:
+            export = {name: dict(r, write=r["write"].summary(), lookup=r["lookup"].summary())
+                      for name, r in results.items()}
+            with open(args.json_out, "w", encoding="utf-8") as f:
+                json.dump({"config": {k: v for k, v in vars(args).items() if k != "json_out"}, "results": export},
+                          f, indent=2, ensure_ascii=False)
+            print(f"\n💾 JSON gespeichert: {args.json_out}")
+        return
+
+    t0 = time.perf_counter()
+    store = SegmentStore(args.store, args.segment_size)
+    print(f"Speicher: {args.store}  ({len(store)} Sessions, Index in {(time.perf_counter() - t0) * 1e3:.1f} ms)")
+    for seg_id, (offset, reason) in sorted(store.corrupt.items()):
+        print(f"⚠️  seg-{seg_id:06d}.log beschädigt ab Byte {offset}: {reason} - Rest nicht geladen, Datei unverändert")
+
+    if args.command == "migrate":
+        sources = args.source or DEFAULT_SOURCES
+        migrated, replaced = migrate(store, sources)
+        print(f"✅ {migrated} Sessions übernommen ({replaced} Duplikate durch jüngere ersetzt)")
+        print("ℹ️  Die JSON-Dateien bleiben unverändert liegen")
+    elif args.command == "compact":
+        if args.ttl_days:
+            evicted = store.evict_idle(args.ttl_days * DAY)
+            print(f"🧹 {evicted} Sessions ohne Aktivität seit {args.ttl_days:g} Tagen gelöscht")
+        try:
+            result = store.compact()
+        except CorruptEntry as e:
+            print(f"❌ {e}")
+            store.close()
+            raise SystemExit(1)
+        print(f"✅ Kompaktiert: {result['segments_before']} -> {result['segments_after']} Segmente, "
+              f"{result['bytes_before'] / 1024:.0f} -> {result['bytes_after'] / 1024:.0f} KB "
+              f"in {result['seconds'] * 1e3:.0f} ms")
+
+    for key, value in store.stats().items():
+        print(f"   {key}: {value}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
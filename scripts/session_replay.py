@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Multi-Turn-Replay der Gesprächs-Transkripte aus memory/*.json
+
+Jede Datei ist eine Session ({"id", "messages": [{"sender", "content",
+"timestamp"}, ...]}). Die Nutzer-Nachrichten werden der Reihe nach an
+/api/chat geschickt; zwischen zwei Turns wird die echte Denkpause
+(Antwort -> nächste Nutzer-Nachricht) skaliert abgewartet. Viele Sessions
+laufen parallel, die Dateien werden nacheinander gelesen (nicht alle auf
+einmal geladen).
+
+Standard-Quelle ist memory/ im Repo-Root (test-turkish, test-plattdeutsch,
+test-bauantrag-kosten, ...). kaya-api/memory/ ist das Arbeitsverzeichnis
+des laufenden Servers (context_memory.js) - dorthin schreibt er jede Session,
+auch die des Replays; als Quelle nur bewusst per --memory-dir wählen.
+
+sessionId: standardmäßig die Original-ID mit Präfix "replay-<Zeitstempel>-",
+damit jeder Lauf mit leerer Historie startet und keine bestehenden
+Transkripte verlängert. --original-ids schickt die Original-IDs - der Server
+hängt die Antworten dann an die gleichnamigen Sessions an, und ein zweiter
+Lauf startet mit der Historie des ersten.
+
+  python scripts/session_replay.py --concurrency 50 --time-scale 0.1
+  python scripts/session_replay.py --session-prefix replay- --json replay.json
+
+Ausgabe: Latenz pro Turn-Index - wächst die Historie im Session-Manager,
+steigt die Latenz mit dem Turn.
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+from datetime import datetime
+
+import aiohttp
+
+from latency_stats import LatencyHistogram, format_header, format_row
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MEMORY_DIR = os.path.join(REPO_ROOT, "memory")
+DEFAULT_BASE = "http://localhost:3001"
+ROLES = ("user", "assistant")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Replay der memory/*.json-Transkripte gegen /api/chat")
+    p.add_argument("--memory-dir", default=DEFAULT_MEMORY_DIR, help="Verzeichnis mit den Transkripten")
+    p.add_argument("--pattern", default="*.json", help="Datei-Muster (Standard: *.json)")
+    p.add_argument("--limit", type=int, default=None, help="Höchstens so viele Dateien")
+    p.add_argument("--base", default=DEFAULT_BASE, help=f"Server-URL (Standard: {DEFAULT_BASE})")
+    p.add_argument("--concurrency", type=int, default=20, help="Parallele Sessions (Standard: 20)")
+    p.add_argument("--time-scale", type=float, default=0.1,
+                   help="Faktor für die Denkpausen (0 = keine Pausen, 1 = Echtzeit; Standard: 0.1)")
+    p.add_argument("--max-think", type=float, default=30.0, help="Obergrenze einer Pause in Sekunden (Standard: 30)")
+    p.add_argument("--max-turns", type=int, default=None, help="Höchstens so viele Nutzer-Turns pro Session")
+    p.add_argument("--turn-buckets", type=int, default=20,
+                   help="Turns ab diesem Index werden im Report zusammengefasst (Standard: 20)")
+    p.add_argument("--session-prefix", default=None,
+                   help="Präfix für die sessionId (Standard: replay-<Zeitstempel>-)")
+    p.add_argument("--original-ids", action="store_true",
+                   help="Original-sessionIds senden (der Server hängt die Antworten an diese Sessions an)")
+    p.add_argument("--timeout", type=float, default=60.0, help="Timeout pro Request in Sekunden (Standard: 60)")
+    p.add_argument("--json", dest="json_out", default=None, help="Ergebnis als JSON speichern")
+    p.add_argument("--label", default=None, help="Name des Laufs im JSON")
+    args = p.parse_args()
+    if args.original_ids and args.session_prefix:
+        p.error("--original-ids und --session-prefix schließen sich aus")
+    if args.original_ids:
+        args.session_prefix = ""
+    elif args.session_prefix is None:
+        args.session_prefix = time.strftime("replay-%Y%m%d-%H%M%S-")
+    return args
+
+
+def parse_time(stamp):
+    try:
+        return datetime.fromisoformat(str(stamp).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def repair_text(text):
+    """Doppelt kodiertes UTF-8 ("mÃ¶chte") reparieren, sonst unverändert"""
+    if "Ã" not in text:
+        return text
+    try:
+        return text.encode("latin-1").decode("utf-8")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return text
+
+
+def message_role(message):
+    """(Rolle, Text) einer Nachricht - ältere Dateien haben sender/content vertauscht"""
+    sender, content = message.get("sender"), message.get("content")
+    if sender in ROLES:
+        return sender, content or ""
+    if content in ROLES:
+        return content, sender or ""
+    return None, None
+
+
+def user_turns(messages, time_scale, max_think):
+    """[(Pause vor dem Turn in Sekunden, Text)] aller Nutzer-Nachrichten
+
+    Pause = Abstand der Nutzer-Nachricht zur vorherigen Nachricht (meist die
+    Antwort), skaliert und gedeckelt; der erste Turn startet sofort.
+    """
+    turns = []
+    previous = None
+    for message in messages:
+        role, text = message_role(message)
+        at = parse_time(message.get("timestamp"))
+        if role == "user" and text.strip():
+            gap = (at - previous) if (at is not None and previous is not None) else 0.0
+            think = 0.0 if not turns else min(max(gap, 0.0) * time_scale, max_think)
+            turns.append((think, repair_text(text)))
+        if at is not None:
+            previous = at
+    return turns
+
+
+def iter_transcripts(memory_dir, pattern, limit):
+    """Liest die Transkripte einzeln (Generator): (sessionId, Nachrichten)"""
+    paths = sorted(glob.glob(os.path.join(memory_dir, pattern)))
+    for path in paths[:limit]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Übersprungen: {os.path.basename(path)} ({e})")
+            continue
+        if isinstance(data, dict) and data.get("messages"):
+            yield data.get("id") or os.path.splitext(os.path.basename(path))[0], data["messages"]
+
+
+class Replay:
+    def __init__(self, args):
+        self.args = args
+        self.url = args.base.rstrip("/") + "/api/chat"
+        self.client = {}  # Turn-Index -> Histogramm (Client-Latenz)
+        self.server = {}  # Turn-Index -> Histogramm (metadata.latency vom Server)
+        self.errors = {}
+        self.sessions = 0
+        self.turns = 0
+
+    def bucket(self, turn):
+        return min(turn, self.args.turn_buckets)
+
+    def record(self, turn, client_s, server_ms):
+        key = self.bucket(turn)
+        self.client.setdefault(key, LatencyHistogram()).record(client_s)
+        if server_ms is not None:
+            self.server.setdefault(key, LatencyHistogram()).record(server_ms / 1000.0)
+        self.turns += 1
+
+    def count_error(self, turn, kind):
+        bucket = self.errors.setdefault(self.bucket(turn), {})
+        bucket[kind] = bucket.get(kind, 0) + 1
+
+    async def replay_session(self, http, session_id, messages):
+        turns = user_turns(messages, self.args.time_scale, self.args.max_think)
+        if self.args.max_turns:
+            turns = turns[:self.args.max_turns]
+        sid = self.args.session_prefix + session_id
+        for turn, (think, text) in enumerate(turns, start=1):
+            if think > 0:
+                await asyncio.sleep(think)
+            t0 = time.perf_counter()
+            try:
+                async with http.post(self.url, json={"message": text, "sessionId": sid}) as response:
+                    body = await response.read()
+                    latency = time.perf_counter() - t0
+                    if response.status != 200:
+                        self.count_error(turn, f"HTTP {response.status}")
+                        continue
+                    data = json.loads(body)
+            except asyncio.TimeoutError:
+                self.count_error(turn, "timeout")
+                continue
+            except (aiohttp.ClientError, ValueError) as e:
+                self.count_error(turn, type(e).__name__)
+                continue
+            self.record(turn, latency, (data.get("metadata") or {}).get("latency"))
+        self.sessions += 1
+
+    async def run(self):
+        queue = asyncio.Queue(maxsize=self.args.concurrency * 2)
+        timeout = aiohttp.ClientTimeout(total=self.args.timeout)
+        connector = aiohttp.TCPConnector(limit=self.args.concurrency)
+
+        async def worker(http):
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                await self.replay_session(http, *item)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as http:
+            workers = [asyncio.ensure_future(worker(http)) for _ in range(self.args.concurrency)]
+            for item in iter_transcripts(self.args.memory_dir, self.args.pattern, self.args.limit):
+                await queue.put(item)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+
+
+def turn_label(turn, last_bucket):
+    return f"Turn {turn}+" if turn == last_bucket else f"Turn {turn}"
+
+
+def print_report(replay, elapsed):
+    print()
+    print("=" * 60)
+    print("📊 LATENZ PRO TURN-INDEX")
+    print("=" * 60)
+    print(f"Sessions: {replay.sessions}  Turns: {replay.turns}  Dauer: {elapsed:.1f}s")
+    errors = sum(sum(b.values()) for b in replay.errors.values())
+    if errors:
+        print(f"❌ Fehler: {errors}")
+    print()
+    last = replay.args.turn_buckets
+    print(format_header(12) + "  Server p50  Fehler")
+    base = None
+    for turn in sorted(set(replay.client) | set(replay.errors)):
+        hist = replay.client.get(turn) or LatencyHistogram()
+        server = replay.server.get(turn)
+        p50 = hist.value_at(50)
+        base = base or p50
+        server_p50 = f"{server.value_at(50) * 1e3:>9.1f}" if server else f"{'-':>9}"
+        trend = f"  x{p50 / base:.2f}" if base and p50 else ""
+        print(f"{format_row(turn_label(turn, last), hist, 12)}  {server_p50}  "
+              f"{sum(replay.errors.get(turn, {}).values()):>6}{trend}")
+
+
+def export_json(args, replay, elapsed):
+    result = {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: v for k, v in vars(args).items() if k != "json_out"},
+        "elapsed_s": round(elapsed, 3),
+        "sessions": replay.sessions,
+        "turns": replay.turns,
+        "per_turn": [
+            {
+                "turn": turn,
+                "open_ended": turn == args.turn_buckets,
+                "client": {"summary": replay.client[turn].summary(), "histogram": replay.client[turn].to_dict()},
+                "server": replay.server[turn].summary() if turn in replay.server else None,
+                "errors": replay.errors.get(turn, {}),
+            }
+            for turn in sorted(replay.client)
+        ],
+    }
+    with open(args.json_out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    print("=" * 60)
+    print("🔁 KAYA Session-Replay")
+    print("=" * 60)
+    print(f"Transkripte: {args.memory_dir}/{args.pattern}")
+    print(f"Ziel: {args.base}/api/chat  Parallel: {args.concurrency}  Zeitfaktor: {args.time_scale}")
+    if args.original_ids:
+        print("⚠️  Original-sessionIds: der Server hängt die Antworten an die Transkripte an")
+    else:
+        print(f"sessionId-Präfix: {args.session_prefix}")
+
+    replay = Replay(args)
+    t0 = time.perf_counter()
+    asyncio.run(replay.run())
+    elapsed = time.perf_counter() - t0
+
+    print_report(replay, elapsed)
+    if args.json_out:
+        export_json(args, replay, elapsed)
+        print(f"\n💾 JSON gespeichert: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
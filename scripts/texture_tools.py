@@ -0,0 +1,127 @@
+"""
+Textur-Stufe für enhance_glb.py: Auflösungs-Limits, Resampling, Größen-Report (ohne bpy)
+
+Die Pixel-Arbeit läuft mit NumPy in einem Thread-Pool - NumPy gibt den GIL
+bei großen Array-Operationen frei, dadurch skaliert das über alle Kerne,
+auch innerhalb von Blender (bpy selbst ist nicht thread-sicher und wird nur
+im Haupt-Thread angefasst).
+
+Limits pro Material-Klasse stehen in material_presets.py ("max_texture").
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from glb_io import GLB
+from material_presets import DEFAULT_MAX_TEXTURE, MATERIAL_PRESETS
+
+
+def class_cap(class_names):
+    """Größtes Limit aller Klassen, die eine Textur verwenden (geteilte Texturen nicht verschlechtern)"""
+    caps = {p["name"]: p.get("max_texture", DEFAULT_MAX_TEXTURE) for p in MATERIAL_PRESETS}
+    if not class_names:
+        return DEFAULT_MAX_TEXTURE
+    return max(caps.get(name, DEFAULT_MAX_TEXTURE) for name in class_names)
+
+
+def target_size(width, height, cap):
+    """Zielgröße mit längster Kante <= cap (Seitenverhältnis bleibt, nie vergrößern)"""
+    longest = max(width, height)
+    if not cap or longest <= cap:
+        return width, height
+    scale = cap / float(longest)
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+def _box_taps(src, dst):
+    """Box-Filter als Taps: (Indizes, Gewichte) je (dst, k) für Flächen-Mittelung src -> dst"""
+    scale = src / float(dst)
+    k = int(np.ceil(scale)) + 1
+    lo = np.arange(dst, dtype=np.float64) * scale
+    idx = np.floor(lo).astype(np.int64)[:, None] + np.arange(k)[None, :]
+    pix = idx.astype(np.float64)
+    weights = np.clip(np.minimum(lo[:, None] + scale, pix + 1.0) - np.maximum(lo[:, None], pix), 0.0, None)
+    weights /= weights.sum(axis=1, keepdims=True)
+    return np.minimum(idx, src - 1), weights.astype(np.float32)
+
+
+def _resample_axis(img, axis, dst):
+    """Verkleinert img entlang axis auf dst Pixel (Summe über wenige Taps statt voller Matrix)"""
+    idx, weights = _box_taps(img.shape[axis], dst)
+    shape = [1] * img.ndim
+    shape[axis] = dst
+    out = None
+    for tap in range(idx.shape[1]):
+        part = np.take(img, idx[:, tap], axis=axis)
+        part *= weights[:, tap].reshape(shape)
+        out = part if out is None else np.add(out, part, out=out)
+    return out
+
+
+def resize_pixels(pixels, width, height, new_width, new_height, channels=4):
+    """Verkleinert ein flaches Pixel-Array (Blender-Layout: Zeilen von unten, RGBA float)
+
+    Flächen-Mittelung (Box-Filter) getrennt nach Achsen - kein Aliasing bei
+    starker Verkleinerung; die NumPy-Operationen laufen ohne GIL.
+    """
+    img = np.asarray(pixels, dtype=np.float32).reshape(height, width, channels)
+    if new_height != height:
+        img = _resample_axis(img, 0, new_height)
+    if new_width != width:
+        img = _resample_axis(img, 1, new_width)
+    return np.ascontiguousarray(img, dtype=np.float32).ravel()
+
+
+def resize_all(jobs, workers=None):
+    """Verkleinert mehrere Bilder parallel
+
+    jobs: [(key, pixels, w, h, new_w, new_h, channels)] -> {key: neue Pixel}
+    """
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {key: pool.submit(resize_pixels, pixels, w, h, nw, nh, ch)
+                   for key, pixels, w, h, nw, nh, ch in jobs}
+        return {key: f.result() for key, f in futures.items()}
+
+
+def glb_image_sizes(path):
+    """{Bildname: (Bytes, mimeType)} aller eingebetteten Bilder einer GLB"""
+    sizes = {}
+    with GLB.open(path) as glb:
+        views = glb.gltf.get("bufferViews", [])
+        for ii, image in enumerate(glb.gltf.get("images", [])):
+            if "bufferView" in image:
+                name = image.get("name", f"image_{ii}")
+                sizes[name] = (views[image["bufferView"]]["byteLength"], image.get("mimeType"))
+    return sizes
+
+
+def finish_report(entries, glb_path):
+    """Ergänzt Report-Einträge um die Größe in der exportierten GLB"""
+    sizes = glb_image_sizes(glb_path) if os.path.exists(glb_path) else {}
+    for entry in entries:
+        name = entry["name"]
+        found = sizes.get(name) or sizes.get(os.path.splitext(name)[0])
+        entry["after_bytes"], entry["after_mime"] = found if found else (None, None)
+    return entries
+
+
+def print_texture_report(entries, removed):
+    """Vorher/Nachher pro Textur"""
+    def kb(n):
+        return "-" if n is None else f"{n / 1024:.0f} KB"
+
+    print(f"\n🖼️  Texturen ({len(entries)}, {len(removed)} Duplikate entfernt):")
+    for e in entries:
+        size_before = f"{e['width']}x{e['height']}"
+        size_after = f"{e['new_width']}x{e['new_height']}"
+        print(f"   {e['name'][:28]:<28} {e['classes'] or '-':<12} {size_before:>9} -> {size_after:<9} "
+              f"{kb(e['before_bytes']):>9} -> {kb(e['after_bytes']):>9} {e['after_mime'] or ''}")
+    for dup, kept in removed:
+        print(f"   ♻️  {dup} = {kept}")
+    before = sum(e["before_bytes"] or 0 for e in entries)
+    after = sum(e["after_bytes"] or 0 for e in entries)
+    if after:
+        print(f"   Summe: {before / (1024 * 1024):.2f} MB -> {after / (1024 * 1024):.2f} MB")
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Offline-Ersatz für OpenAI (Chat + Whisper) und ElevenLabs TTS
+
+Lokaler asyncio-Server mit denselben Request-/Response-Formen, die
+llm_service.js und services/audio_service.js erwarten - für reproduzierbare
+Durchsatz-Messungen ohne Netz und ohne Schwankungen der externen Dienste:
+
+  python scripts/upstream_standin.py --port 3999 --llm-latency lognormal:400:0.4 --token-rate 40
+
+  OPENAI_API_URL=http://localhost:3999/v1/chat/completions \\
+  OPENAI_STT_URL=http://localhost:3999/v1/audio/transcriptions \\
+  ELEVENLABS_API_URL=http://localhost:3999/v1 \\
+  OPENAI_API_KEY=offline ELEVENLABS_API_KEY=offline USE_LLM=true node kaya-api/kaya_server.js
+
+Endpoints:
+  POST /v1/chat/completions               JSON oder SSE-Stream (stream: true)
+  POST /v1/audio/transcriptions           {"text", "language"}
+  POST /v1/text-to-speech/{voice_id}      stilles MP3 (audio/mpeg), Länge ~ Textlänge
+  GET  /stats                             Zähler pro Endpoint
+
+Antworten sind deterministisch (gleiche Anfrage -> gleicher Text). Latenzen
+werden aus Verteilungen gezogen ("const:200", "uniform:100:400",
+"normal:300:50", "lognormal:300:0.5" = Median 300 ms, "exp:300"); die Folge
+der Zufallswerte ist über --seed reproduzierbar. Fehler-Injektion:
+--error-rate (HTTP-Fehler im OpenAI/ElevenLabs-Format), --hang-rate (keine
+Antwort bis zum Client-Timeout), --abort-rate (Stream bricht mittendrin ab).
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+
+from aiohttp import web
+
+DEFAULT_PORT = 3999
+
+# Deterministische Antworten im KAYA-Stil (Auswahl über Hash der letzten Nutzer-Nachricht)
+CANNED_COMPLETIONS = [
+    "Moin! Für die KFZ-Zulassung brauchen Sie Ausweis, Zulassungsbescheinigung Teil I und II "
+    "sowie die eVB-Nummer. Termine buchen Sie online. Soll ich Ihnen den Link geben?",
+    "Gerne helfe ich beim Bauantrag. Die Formulare finden Sie beim Bauordnungsamt, "
+    "einreichen geht auch digital. Haben Sie schon einen Lageplan?",
+    "Moin! Die nächste Kreistagssitzung steht im Ratsinformationssystem. "
+    "Möchten Sie, dass ich Ihnen die Tagesordnung heraussuche?",
+    "Keine Sorge, das kriegen wir zusammen hin. Erzählen Sie mir kurz, worum es geht, "
+    "dann zeige ich Ihnen Schritt für Schritt den Weg.",
+    "Für den Führerschein melden Sie sich zuerst bei einer Fahrschule an. "
+    "Den Antrag stellen Sie dann bei der Führerscheinstelle. Brauchen Sie die Öffnungszeiten?",
+]
+
+CANNED_TRANSCRIPTS = [
+    "Moin, ich möchte mein Auto zulassen.",
+    "Ich brauche ein Formular für den Bauantrag.",
+    "Wann ist die nächste Kreistagssitzung?",
+    "Wo finde ich das Jobcenter?",
+]
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, mono, ohne Padding: 417 Bytes pro Frame,
+# Seiteninformation komplett 0 -> jeder Decoder liefert Stille
+MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0xC4]) + bytes(413)
+MP3_FRAME_SECONDS = 1152 / 44100.0
+
+TOKEN_PATTERN = re.compile(r"\s*\S+")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="Offline-Ersatz für OpenAI- und ElevenLabs-APIs")
+    p.add_argument("--host", default="127.0.0.1", help="Bind-Adresse (Standard: 127.0.0.1)")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (Standard: {DEFAULT_PORT})")
+    p.add_argument("--seed", type=int, default=0, help="Seed für Latenzen und Fehler (Standard: 0)")
+    p.add_argument("--llm-latency", default="lognormal:350:0.35",
+                   help="Zeit bis zum ersten Token in ms (Standard: lognormal:350:0.35)")
+    p.add_argument("--token-rate", type=float, default=50.0,
+                   help="Tokens pro Sekunde nach dem ersten Token (0 = alles sofort; Standard: 50)")
+    p.add_argument("--stt-latency", default="lognormal:600:0.3", help="Whisper-Latenz in ms")
+    p.add_argument("--tts-latency", default="lognormal:450:0.3", help="ElevenLabs-Latenz in ms")
+    p.add_argument("--speech-rate", type=float, default=14.0,
+                   help="Sprechtempo in Zeichen/s für die Länge des stillen Audios (Standard: 14)")
+    p.add_argument("--completions", default=None,
+                   help="JSON-Datei: Liste von Antworten oder {Stichwort: Antwort} (Standard: eingebaute Texte)")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Anteil HTTP-Fehler (0..1)")
+    p.add_argument("--error-status", default="500,429,503", help="Fehler-Statuscodes (Standard: 500,429,503)")
+    p.add_argument("--hang-rate", type=float, default=0.0, help="Anteil Requests ohne Antwort (0..1)")
+    p.add_argument("--hang-seconds", type=float, default=60.0, help="Wie lange ein hängender Request wartet")
+    p.add_argument("--abort-rate", type=float, default=0.0, help="Anteil Streams, die mittendrin abbrechen")
+    return p.parse_args()
+
+
+def parse_distribution(spec):
+    """'lognormal:300:0.5' -> Funktion rng -> Sekunden"""
+    kind, *params = spec.split(":")
+    values = [float(x) for x in params]
+    samplers = {
+        "const": lambda rng, ms: ms,
+        "uniform": lambda rng, lo, hi: rng.uniform(lo, hi),
+        "normal": lambda rng, mean, sd: max(0.0, rng.gauss(mean, sd)),
+        "lognormal": lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma),
+        "exp": lambda rng, mean: rng.expovariate(1.0 / mean),
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unbekannte Verteilung '{kind}' (erlaubt: {', '.join(samplers)})")
+    sampler = samplers[kind]
+    sampler(random.Random(0), *values)  # Parameterzahl prüfen
+    return lambda rng: sampler(rng, *values) / 1000.0
+
+
+def stable_index(text, count):
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16) % count
+
+
+def load_completions(path):
+    if not path:
+        return CANNED_COMPLETIONS
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def tokens(text):
+    """Grobe Token-Aufteilung (Wort inkl. führendem Leerzeichen, wie BPE-Tokens)"""
+    return TOKEN_PATTERN.findall(text)
+
+
+def silent_mp3(seconds):
+    return MP3_FRAME * max(1, int(math.ceil(seconds / MP3_FRAME_SECONDS)))
+
+
+class Upstream:
+    """Zustand des Ersatz-Servers: Zufallsquellen, Antworten, Zähler"""
+
+    def __init__(self, args):
+        self.args = args
+        self.completions = load_completions(args.completions)
+        self.llm_latency = parse_distribution(args.llm_latency)
+        self.stt_latency = parse_distribution(args.stt_latency)
+        self.tts_latency = parse_distribution(args.tts_latency)
+        self.error_status = [int(x) for x in args.error_status.split(",") if x.strip()]
+        # Eine Zufallsfolge pro Endpoint: reproduzierbar, unabhängig von den anderen Endpoints
+        self.rngs = {name: random.Random(f"{args.seed}:{name}") for name in ("chat", "stt", "tts")}
+        self.stats = {}
+
+    def count(self, endpoint, outcome):
+        bucket = self.stats.setdefault(endpoint, {})
+        bucket[outcome] = bucket.get(outcome, 0) + 1
+
+    def completion_for(self, messages):
+        """Deterministische Antwort zur letzten Nutzer-Nachricht"""
+        user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        if isinstance(self.completions, dict):
+            lowered = user.lower()
+            for keyword, answer in self.completions.items():
+                if keyword.lower() in lowered:
+                    return answer
+            answers = list(self.completions.values())
+            return answers[stable_index(user, len(answers))]
+        return self.completions[stable_index(user, len(self.completions))]
+
+    async def inject_fault(self, endpoint, rng, openai_format=True):
+        """Fehler-Injektion: None (normal weiter) oder eine Fehler-Antwort"""
+        roll = rng.random()
+        if roll < self.args.hang_rate:
+            self.count(endpoint, "hang")
+            await asyncio.sleep(self.args.hang_seconds)
+            raise web.HTTPGatewayTimeout()
+        if roll < self.args.hang_rate + self.args.error_rate and self.error_status:
+            status = rng.choice(self.error_status)
+            self.count(endpoint, f"HTTP {status}")
+            if openai_format:
+                body = {"error": {"message": "Injected upstream error", "type": "server_error", "code": status}}
+            else:
+                body = {"detail": {"status": "injected_error", "message": "Injected upstream error"}}
+            return web.json_response(body, status=status)
+        return None
+
+    async def chat(self, request):
+        body = await request.json()
+        rng = self.rngs["chat"]
+        fault = await self.inject_fault("chat", rng)
+        if fault is not None:
+            return fault
+        messages = body.get("messages") or []
+        text = self.completion_for(messages)
+        max_tokens = body.get("max_tokens")
+        parts = tokens(text)[:max_tokens] if max_tokens else tokens(text)
+        first_token = self.llm_latency(rng)
+        abort_at = len(parts) // 2 if rng.random() < self.args.abort_rate else None
+        usage = {
+            "prompt_tokens": sum(len(tokens(m.get("content") or "")) for m in messages),
+            "completion_tokens": len(parts),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = "chatcmpl-offline-" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+        model = body.get("model", "gpt-4o-mini")
+
+        if body.get("stream"):
+            return await self.chat_stream(request, completion_id, model, parts, first_token, abort_at)
+
+        await asyncio.sleep(first_token + self.token_time(len(parts)))
+        self.count("chat", "ok")
+        return web.json_response({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(parts)},
+                         "finish_reason": "stop" if len(parts) == len(tokens(text)) else "length"}],
+            "usage": usage,
+        })
+
+    def token_time(self, count):
+        return count / self.args.token_rate if self.args.token_rate > 0 else 0.0
+
+    async def chat_stream(self, request, completion_id, model, parts, first_token, abort_at):
+        """SSE wie OpenAI: ein chat.completion.chunk pro Token, dann finish_reason und [DONE]"""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        created = int(time.time())
+
+        def chunk(delta, finish_reason=None):
+            data = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            return f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        await asyncio.sleep(first_token)
+        await response.write(chunk({"role": "assistant", "content": ""}))
+        gap = self.token_time(1)
+        for index, part in enumerate(parts):
+            if index == abort_at:
+                self.count("chat", "abort")
+                request.transport.close()  # Verbindung mitten im Stream kappen
+                return response
+            if index and gap:
+                await asyncio.sleep(gap)
+            await response.write(chunk({"content": part}))
+        await response.write(chunk({}, "stop"))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        self.count("chat", "ok")
+        return response
+
+    async def transcription(self, request):
+        form = await request.post()
+        rng = self.rngs["stt"]
+        fault = await self.inject_fault("stt", rng)
+        if fault is not None:
+            return fault
+        upload = form.get("file")
+        audio = upload.file.read() if hasattr(upload, "file") else b""
+        await asyncio.sleep(self.stt_latency(rng))
+        self.count("stt", "ok")
+        text = CANNED_TRANSCRIPTS[stable_index(hashlib.sha1(audio).hexdigest(), len(CANNED_TRANSCRIPTS))]
+        return web.json_response({"text": text, "language": form.get("language", "de")})
+
+    async def text_to_speech(self, request):
+        body = await request.json()
+        rng = self.rngs["tts"]
+        fault = await self.inject_fault("tts", rng, openai_format=False)
+        if fault is not None:
+            return fault
+        text = body.get("text") or ""
+        await asyncio.sleep(self.tts_latency(rng))
+        self.count("tts", "ok")
+        return web.Response(body=silent_mp3(len(text) / self.args.speech_rate), content_type="audio/mpeg")
+
+    async def stats_handler(self, request):
+        return web.json_response(self.stats)
+
+
+def build_app(upstream):
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/v1/chat/completions", upstream.chat)
+    app.router.add_post("/v1/audio/transcriptions", upstream.transcription)
+    app.router.add_post("/v1/text-to-speech/{voice_id}", upstream.text_to_speech)
+    app.router.add_get("/stats", upstream.stats_handler)
+    return app
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    upstream = Upstream(args)
+    app = build_app(upstream)
+    print("=" * 60)
+    print("🧪 KAYA Offline-Upstream (OpenAI + ElevenLabs)")
+    print("=" * 60)
+    print(f"http://{args.host}:{args.port}/v1  Seed: {args.seed}")
+    print(f"LLM: {args.llm_latency} + {args.token_rate:g} Tokens/s  STT: {args.stt_latency}  TTS: {args.tts_latency}")
+    if args.error_rate or args.hang_rate or args.abort_rate:
+        print(f"Fehler: {args.error_rate:.1%} HTTP, {args.hang_rate:.1%} hängend, {args.abort_rate:.1%} Stream-Abbruch")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+    print(f"\n📊 {json.dumps(upstream.stats, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+WebSocket-Fan-out-Lasttest für /ws (emotion- und visemeTimeline-Events)
+
+Öffnet stufenweise tausende /ws-Verbindungen, jede mit eigener sessionId,
+löst für jede Session Chat-Requests aus und misst, wann die Events über
+websocketService.sendToSession() beim richtigen Client ankommen:
+
+  python scripts/ws_load_test.py --connections 100,500,1000,2000
+  python scripts/ws_load_test.py --endpoint audio-chat --audio probe.wav --connections 200,1000
+
+Pro Stufe:
+  - Zustellzeit HTTP-Antwort -> WebSocket-Event (der Server sendet das Event
+    vor res.json, negative Abstände zählen als "vor HTTP")
+  - Event-Latenz ab Request-Start
+  - verlorene Events (nicht innerhalb --grace nach der HTTP-Antwort) und
+    Events außer der Reihe (Server-Zeitstempel rückwärts, verspätet oder doppelt)
+  - Speicher pro Verbindung aus /metrics (Heap und RSS gegenüber dem Leerlauf)
+Ergebnis ist eine Kapazitätskurve: Verbindungen vs. p99 Event-Latenz.
+
+/api/chat sendet "emotion" nur, wenn eine Emotion erkannt wurde - die
+Standard-Nachrichten sind deshalb emotional. /api/audio-chat liefert die
+erwarteten Events in der Antwort mit, dort ist die Verlust-Zählung exakt.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime
+
+import aiohttp
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from latency_stats import LatencyHistogram, format_header, format_row
+
+DEFAULT_BASE = "http://localhost:3001"
+EVENT_TYPES = ("emotion", "visemeTimeline")
+
+# Nachrichten mit klarer Emotion (sonst sendet /api/chat kein Event)
+DEFAULT_MESSAGES = [
+    "Ich bin total verärgert, mein Bauantrag liegt seit Wochen unbearbeitet!",
+    "Vielen Dank, das hat mir super geholfen, ich freue mich riesig!",
+    "Ich mache mir große Sorgen, ob ich die Frist für den Wohngeldantrag verpasst habe.",
+    "Das ist ja wunderbar, endlich klappt das mit der Ummeldung!",
+]
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="WebSocket-Fan-out-Lasttest für KAYA /ws")
+    p.add_argument("--base", default=DEFAULT_BASE, help=f"Server-URL (Standard: {DEFAULT_BASE})")
+    p.add_argument("--connections", default="100,500,1000",
+                   help="Verbindungs-Stufen, aufsteigend (Standard: 100,500,1000)")
+    p.add_argument("--connect-concurrency", type=int, default=100,
+                   help="Gleichzeitige Verbindungsaufbauten (Standard: 100)")
+    p.add_argument("--rounds", type=int, default=1, help="Chat-Requests pro Session und Stufe (Standard: 1)")
+    p.add_argument("--concurrency", type=int, default=50, help="Parallele HTTP-Requests (Standard: 50)")
+    p.add_argument("--endpoint", choices=["chat", "audio-chat"], default="chat",
+                   help="Auslöser: /api/chat (emotion) oder /api/audio-chat (emotion + visemeTimeline)")
+    p.add_argument("--audio", default=None, help="WAV/WebM-Datei für --endpoint audio-chat")
+    p.add_argument("--messages", default=None, help="Datei mit Nachrichten (JSON-Liste oder eine pro Zeile)")
+    p.add_argument("--grace", type=float, default=5.0,
+                   help="Wartezeit nach der HTTP-Antwort, bevor ein Event als verloren gilt (Standard: 5 s)")
+    p.add_argument("--timeout", type=float, default=60.0, help="Timeout pro HTTP-Request (Standard: 60 s)")
+    p.add_argument("--settle", type=float, default=2.0,
+                   help="Wartezeit vor dem Lesen von /metrics nach dem Verbinden (Standard: 2 s)")
+    p.add_argument("--json", dest="json_out", default=None, help="Ergebnis als JSON speichern")
+    p.add_argument("--label", default=None, help="Name des Laufs im JSON")
+    args = p.parse_args()
+    if args.endpoint == "audio-chat" and not args.audio:
+        p.error("--endpoint audio-chat braucht --audio")
+    return args
+
+
+def raise_fd_limit():
+    """Soft-Limit offener Dateien auf das Hard-Limit heben (tausende Sockets)"""
+    if resource is None:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def load_messages(path):
+    if not path:
+        return DEFAULT_MESSAGES
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        return json.loads(text)
+    except ValueError:
+        return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def server_time(data):
+    """ISO-Zeitstempel des Servers -> Sekunden (None, wenn keiner mitkommt)"""
+    stamp = (data or {}).get("timestamp")
+    if not stamp:
+        return None
+    try:
+        return datetime.fromisoformat(stamp.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+async def read_metrics(http, base):
+    """/metrics (Prometheus-Text) -> {Name: Wert}"""
+    async with http.get(f"{base}/metrics") as response:
+        text = await response.text()
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, _, value = line.rpartition(" ")
+            try:
+                values[name] = float(value)
+            except ValueError:
+                pass
+    return values
+
+
+class Round:
+    """Ein Chat-Request einer Session und die Events, die er auslöst"""
+
+    def __init__(self):
+        self.started = None
+        self.http_at = None
+        self.expected = set()
+        self.received = {}
+        self.complete = asyncio.Event()
+
+    def check(self):
+        if self.http_at is not None and self.expected <= set(self.received):
+            self.complete.set()
+
+
+class Stats:
+    """Messwerte einer Stufe"""
+
+    def __init__(self):
+        self.after_http = LatencyHistogram()
+        self.end_to_end = LatencyHistogram()
+        self.http = LatencyHistogram()
+        self.before_http = 0
+        self.events = 0
+        self.lost = {}
+        self.out_of_order = 0
+        self.unexpected = 0
+        self.errors = {}
+
+    def count_error(self, kind):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+class WsSession:
+    """Eine /ws-Verbindung mit eigener sessionId"""
+
+    def __init__(self, sid):
+        self.sid = sid
+        self.ws = None
+        self.reader = None
+        self.round = None
+        self.last_server_time = None
+        self.pong = asyncio.Event()
+        self.stats = None
+
+    async def connect(self, http, ws_url):
+        self.ws = await http.ws_connect(ws_url, autoping=True, max_msg_size=0)
+        self.reader = asyncio.ensure_future(self.read())
+        # Session-Mapping anlegen; pong als Barriere, danach kennt der Server die sessionId
+        await self.ws.send_json({"type": "session", "data": {"action": "join", "sessionId": self.sid}})
+        await self.ws.send_json({"type": "ping"})
+        await asyncio.wait_for(self.pong.wait(), 30)
+
+    async def read(self):
+        async for msg in self.ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                continue
+            now = time.perf_counter()
+            try:
+                message = json.loads(msg.data)
+            except ValueError:
+                continue
+            if message.get("type") == "pong":
+                self.pong.set()
+            elif message.get("type") in EVENT_TYPES:
+                self.on_event(message["type"], message.get("data"), now)
+
+    def on_event(self, kind, data, now):
+        stats = self.stats
+        if stats is None:
+            return
+        stats.events += 1
+        stamp = server_time(data)
+        if stamp is not None:
+            if self.last_server_time is not None and stamp < self.last_server_time:
+                stats.out_of_order += 1
+            self.last_server_time = stamp
+        current = self.round
+        if current is None or kind in current.received:
+            stats.unexpected += 1  # nach Ablauf der Wartezeit oder doppelt
+            return
+        if kind == "visemeTimeline" and "emotion" in current.expected and "emotion" not in current.received:
+            stats.out_of_order += 1  # Server sendet emotion vor visemeTimeline
+        current.received[kind] = now
+        current.check()
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+        if self.reader is not None:
+            await self.reader
+
+
+class FanoutTest:
+    def __init__(self, args):
+        self.args = args
+        self.base = args.base.rstrip("/")
+        self.ws_url = self.base.replace("http", "ws", 1) + "/ws"
+        self.messages = load_messages(args.messages)
+        self.audio = None
+        if args.audio:
+            with open(args.audio, "rb") as f:
+                self.audio = f.read()
+        self.sessions = []
+        self.run_id = f"wsload-{int(time.time())}-{random.randrange(1 << 16):04x}"
+
+    def post(self, http, sid):
+        message = random.choice(self.messages)
+        if self.args.endpoint == "chat":
+            return http.post(f"{self.base}/api/chat", json={"message": message, "sessionId": sid})
+        form = aiohttp.FormData()
+        form.add_field("audio", self.audio, filename=os.path.basename(self.args.audio))
+        form.add_field("sessionId", sid)
+        return http.post(f"{self.base}/api/audio-chat", data=form)
+
+    def expected_events(self, body):
+        """Welche Events muss diese Antwort ausgelöst haben?"""
+        if self.args.endpoint == "chat":
+            return {"emotion"}
+        expected = set()
+        if body.get("emotion") and body.get("emotionConfidence"):
+            expected.add("emotion")
+        if body.get("visemeTimeline"):
+            expected.add("visemeTimeline")
+        return expected
+
+    async def trigger(self, http, session, slots, stats):
+        """Ein Request für eine Session; wartet auf die Events (ohne einen HTTP-Slot zu blockieren)"""
+        current = Round()
+        session.round = current
+        try:
+            async with slots:
+                current.started = time.perf_counter()
+                async with self.post(http, session.sid) as response:
+                    body = await response.read()
+                    current.http_at = time.perf_counter()
+                    if response.status != 200:
+                        stats.count_error(f"HTTP {response.status}")
+                        return
+                    current.expected = self.expected_events(json.loads(body))
+            stats.http.record(current.http_at - current.started)
+            current.check()
+            try:
+                await asyncio.wait_for(current.complete.wait(), self.args.grace)
+            except asyncio.TimeoutError:
+                pass
+            for kind in current.expected - set(current.received):
+                stats.lost[kind] = stats.lost.get(kind, 0) + 1
+            for kind, at in current.received.items():
+                delay = at - current.http_at
+                if delay < 0:
+                    stats.before_http += 1
+                stats.after_http.record(max(0.0, delay))
+                stats.end_to_end.record(at - current.started)
+        except asyncio.TimeoutError:
+            stats.count_error("timeout")
+        except (aiohttp.ClientError, ValueError) as e:
+            stats.count_error(type(e).__name__)
+        finally:
+            session.round = None
+
+    async def open_sessions(self, http, target):
+        """Verbindungen bis target aufstocken; liefert die Zahl der Fehlschläge"""
+        gate = asyncio.Semaphore(self.args.connect_concurrency)
+        failures = 0
+
+        async def open_one(index):
+            nonlocal failures
+            session = WsSession(f"{self.run_id}-{index}")
+            async with gate:
+                try:
+                    await session.connect(http, self.ws_url)
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                    failures += 1
+                    await session.close()
+                    return
+            self.sessions.append(session)
+
+        await asyncio.gather(*(open_one(i) for i in range(len(self.sessions), target)))
+        return failures
+
+    async def run_level(self, http, target, baseline):
+        print(f"🔌 Stufe {target}: verbinde ...")
+        t0 = time.perf_counter()
+        failures = await self.open_sessions(http, target)
+        connect_s = time.perf_counter() - t0
+        await asyncio.sleep(self.args.settle)
+        metrics = await read_metrics(http, self.base)
+
+        stats = Stats()
+        for session in self.sessions:
+            session.stats = stats
+        slots = asyncio.Semaphore(self.args.concurrency)
+
+        async def drive(session):
+            for _ in range(self.args.rounds):
+                await self.trigger(http, session, slots, stats)
+
+        print(f"💬 {len(self.sessions)} Sessions x {self.args.rounds} Requests ...")
+        t0 = time.perf_counter()
+        await asyncio.gather(*(drive(s) for s in self.sessions))
+        elapsed = time.perf_counter() - t0
+
+        connected = len(self.sessions)
+        per_conn = {}
+        for key in ("process_memory_heap_used_bytes", "process_memory_rss_bytes"):
+            if key in metrics and key in baseline and connected:
+                per_conn[key] = (metrics[key] - baseline[key]) / connected
+        return {
+            "target": target,
+            "connected": connected,
+            "connect_failures": failures,
+            "connect_s": round(connect_s, 3),
+            "server_connections": metrics.get("websocket_connections_active"),
+            "heap_per_connection_bytes": per_conn.get("process_memory_heap_used_bytes"),
+            "rss_per_connection_bytes": per_conn.get("process_memory_rss_bytes"),
+            "elapsed_s": round(elapsed, 3),
+            "requests": stats.http.total,
+            "events": stats.events,
+            "events_before_http": stats.before_http,
+            "lost": stats.lost,
+            "out_of_order": stats.out_of_order,
+            "unexpected": stats.unexpected,
+            "errors": stats.errors,
+            "after_http": {"summary": stats.after_http.summary(), "histogram": stats.after_http.to_dict()},
+            "end_to_end": {"summary": stats.end_to_end.summary(), "histogram": stats.end_to_end.to_dict()},
+            "http": {"summary": stats.http.summary(), "histogram": stats.http.to_dict()},
+        }, stats
+
+    async def run(self):
+        levels = sorted({int(x) for x in self.args.connections.split(",") if x.strip()})
+        connector = aiohttp.TCPConnector(limit=0)
+        timeout = aiohttp.ClientTimeout(total=self.args.timeout)
+        results = []
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as http:
+            baseline = await read_metrics(http, self.base)
+            try:
+                for target in levels:
+                    result, stats = await self.run_level(http, target, baseline)
+                    print_level(result, stats)
+                    results.append(result)
+            finally:
+                await asyncio.gather(*(s.close() for s in self.sessions), return_exceptions=True)
+        return results
+
+
+def kb(value):
+    return "-" if value is None else f"{value / 1024:.1f}"
+
+
+def ms(summary, key):
+    value = summary.get(key)
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_level(r, stats):
+    server = r["server_connections"]
+    print(f"   Verbunden: {r['connected']}/{r['target']} in {r['connect_s']:.1f}s "
+          f"(Fehlschläge: {r['connect_failures']}, Server meldet: {'-' if server is None else int(server)})")
+    print(f"   Speicher/Verbindung: Heap {kb(r['heap_per_connection_bytes'])} KB, "
+          f"RSS {kb(r['rss_per_connection_bytes'])} KB")
+    print(f"   Requests: {r['requests']}  Events: {r['events']} ({r['events_before_http']} vor HTTP)  "
+          f"Verloren: {sum(r['lost'].values())}  Außer Reihe: {r['out_of_order']}  "
+          f"Unerwartet: {r['unexpected']}")
+    if r["errors"]:
+        print(f"   ❌ Fehler: {', '.join(f'{k}: {v}' for k, v in sorted(r['errors'].items()))}")
+    print("   " + format_header(26))
+    print("   " + format_row("HTTP-Antwort", stats.http, 26))
+    print("   " + format_row("Event nach HTTP-Antwort", stats.after_http, 26))
+    print("   " + format_row("Event ab Request-Start", stats.end_to_end, 26))
+    print()
+
+
+def print_curve(results):
+    print("=" * 60)
+    print("📈 KAPAZITÄTSKURVE (Verbindungen vs. p99 Event-Latenz, ms)")
+    print("=" * 60)
+    print(f"{'Verb.':>7} {'nach HTTP':>10} {'ab Start':>10} {'verloren':>9} {'Reihe':>6} "
+          f"{'Heap KB':>8} {'RSS KB':>8}")
+    for r in results:
+        print(f"{r['connected']:>7} {ms(r['after_http']['summary'], 'p99_ms'):>10} "
+              f"{ms(r['end_to_end']['summary'], 'p99_ms'):>10} {sum(r['lost'].values()):>9} "
+              f"{r['out_of_order']:>6} {kb(r['heap_per_connection_bytes']):>8} "
+              f"{kb(r['rss_per_connection_bytes']):>8}")
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    limit = raise_fd_limit()
+    print("=" * 60)
+    print("🌐 KAYA WebSocket-Fan-out-Lasttest")
+    print("=" * 60)
+    print(f"Server: {args.base}  Auslöser: /api/{args.endpoint}  Stufen: {args.connections}")
+    if limit is not None:
+        print(f"Limit offener Dateien: {limit}")
+    print()
+
+    results = asyncio.run(FanoutTest(args).run())
+    print_curve(results)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"label": args.label, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "config": {k: v for k, v in vars(args).items() if k != "json_out"},
+                       "levels": results}, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 JSON gespeichert: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,52 @@
 #!/usr/bin/env python3
 """
 KAYA Test - Neue saubere Struktur D:\Landkreis
+
+Ohne Argumente: die drei Test-Nachrichten nacheinander (Funktionstest).
+Mit --load: Lastgenerator gegen /chat mit Latenz-Histogrammen
+
+  python test_clean.py --load --concurrency 32 --duration 60            # closed loop
+  python test_clean.py --load --rate 50 --duration 60 --json run.json   # open loop, 50 req/s
+  python test_clean.py --load --stream --sweep 50,100,200,400            # SSE /chat/stream
+
+Closed loop: N virtuelle Nutzer, jeder schickt die nächste Nachricht erst
+nach der Antwort. Open loop: feste Ankunftsrate unabhängig von der Antwortzeit;
+die Latenz zählt ab dem geplanten Sendezeitpunkt (keine "coordinated omission").
+Erst läuft eine Warm-up-Phase (wird verworfen), dann die Messphase.
+
+--stream misst /chat/stream (Server-Sent Events) statt /chat: die Frames
+werden beim Eintreffen geparst; pro Request zählen Zeit bis zum ersten Event,
+Abstände zwischen den Chunks und Gesamtdauer. --sweep wiederholt den Lauf für
+mehrere Parallelitäts-Stufen und zeigt, wie die Latenz mit der Last wächst.
 """
 
+import argparse
 import asyncio
-import aiohttp
 import json
+import os
+import random
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from latency_stats import LatencyHistogram, SplitHistograms, format_header, format_row  # noqa: E402
+
+DEFAULT_URL = "http://localhost:3002/chat"
+DEFAULT_STREAM_URL = "http://localhost:3002/chat/stream"
+
+# Kennzahlen im Stream-Modus (Schlüssel der Histogramme)
+STREAM_FIRST = "Erstes Event"
+STREAM_GAP = "Chunk-Abstand"
+STREAM_TOTAL = "Gesamtdauer"
+
+# Test-Nachrichten
+TEST_MESSAGES = [
+    "Moin KAYA!",
+    "Ich brauche ein Formular für Bauantrag",
+    "Wann ist die nächste Kreistagssitzung?"
+]
 
 async def test_kaya_clean():
     """Teste KAYA mit neuer sauberer Struktur"""
@@ -15,14 +56,7 @@ async def test_kaya_clean():
         print("Verzeichnis: D:\\Landkreis\\server")
         print()
         
-        # Test-Nachrichten
-        test_messages = [
-            "Moin KAYA!",
-            "Ich brauche ein Formular für Bauantrag",
-            "Wann ist die nächste Kreistagssitzung?"
-        ]
-        
-        for i, message in enumerate(test_messages, 1):
+        for i, message in enumerate(TEST_MESSAGES, 1):
             print(f"Test {i}: {message}")
             
             try:
@@ -50,5 +84,360 @@ async def test_kaya_clean():
         
         print("=== NEUE STRUKTUR ERFOLGREICH ===")
 
+
+class StreamError(Exception):
+    """Fehler-Event im SSE-Stream ({"error": ...})"""
+
+
+class SSEParser:
+    """Inkrementeller Parser für text/event-stream - Frames dürfen über Chunk-Grenzen gehen"""
+
+    def __init__(self):
+        self.buffer = b""
+        self.data = []
+
+    def feed(self, chunk):
+        """Liefert die Daten aller Events, die mit diesem Chunk vollständig sind"""
+        lines = (self.buffer + chunk).split(b"\n")
+        self.buffer = lines.pop()
+        events = []
+        for line in lines:
+            line = line.rstrip(b"\r")
+            if not line:
+                if self.data:
+                    events.append("\n".join(self.data))
+                    self.data = []
+                continue
+            field, _, value = line.partition(b":")
+            if field == b"data":
+                self.data.append(value[1:].decode("utf-8") if value.startswith(b" ") else value.decode("utf-8"))
+        return events
+
+
+def parse_args():
+    """Parse command line arguments"""
+    p = argparse.ArgumentParser(description="KAYA /chat Funktionstest und Lastgenerator")
+    p.add_argument("--load", action="store_true", help="Lastgenerator statt Funktionstest")
+    p.add_argument("--url", default=None,
+                   help=f"Endpoint (Standard: {DEFAULT_URL}, mit --stream {DEFAULT_STREAM_URL})")
+    p.add_argument("--stream", action="store_true", help="SSE-Endpoint /chat/stream statt /chat messen")
+    p.add_argument("--sweep", default=None,
+                   help="Parallelitäts-Stufen nacheinander, z. B. 50,100,200,400 (ersetzt --concurrency)")
+    p.add_argument("--concurrency", type=int, default=16,
+                   help="Closed loop: parallele Nutzer; open loop: max. offene Requests (Standard: 16)")
+    p.add_argument("--rate", type=float, default=None,
+                   help="Open loop: Ankünfte pro Sekunde (ohne: closed loop)")
+    p.add_argument("--poisson", action="store_true", help="Open loop: exponentielle statt feste Abstände")
+    p.add_argument("--warmup", type=float, default=10.0, help="Warm-up in Sekunden, wird verworfen (Standard: 10)")
+    p.add_argument("--duration", type=float, default=60.0, help="Messphase in Sekunden (Standard: 60)")
+    p.add_argument("--timeout", type=float, default=30.0, help="Timeout pro Request in Sekunden (Standard: 30)")
+    p.add_argument("--keepalive", type=float, default=30.0,
+                   help="Keep-Alive der gepoolten Verbindungen in Sekunden (0 = jede Verbindung schließen)")
+    p.add_argument("--messages", default=None,
+                   help="Datei mit Nachrichten (JSON-Liste oder eine pro Zeile; Standard: die drei Test-Nachrichten)")
+    p.add_argument("--json", dest="json_out", default=None, help="Ergebnis als JSON speichern (für Vergleiche)")
+    p.add_argument("--label", default=None, help="Name des Laufs im JSON (z. B. Commit oder Konfiguration)")
+    args = p.parse_args()
+    if args.url is None:
+        args.url = DEFAULT_STREAM_URL if args.stream else DEFAULT_URL
+    return args
+
+
+def load_messages(path):
+    if not path:
+        return TEST_MESSAGES
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        messages = json.loads(text)
+    except ValueError:
+        messages = [line.strip() for line in text.splitlines() if line.strip()]
+    if not messages:
+        raise ValueError(f"Keine Nachrichten in {path}")
+    return messages
+
+
+class LoadRun:
+    """Zustand eines Lastlaufs: Phase, Histogramme, Fehler"""
+
+    def __init__(self, args, messages):
+        self.args = args
+        self.messages = messages
+        self.sent = 0
+        self.measuring = False
+        self.stopping = False
+        self.hist = SplitHistograms()
+        self.stream_hist = {name: LatencyHistogram() for name in (STREAM_FIRST, STREAM_GAP, STREAM_TOTAL)}
+        self.errors = {}
+        self.dropped = 0
+        self.completed = 0
+
+    def next_message(self):
+        message = self.messages[self.sent % len(self.messages)]
+        self.sent += 1
+        return message
+
+    def count_error(self, kind):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    async def request(self, session, scheduled):
+        if self.args.stream:
+            await self.stream_request(session, scheduled)
+        else:
+            await self.chat_request(session, scheduled)
+
+    async def chat_request(self, session, scheduled):
+        """Ein POST /chat; Latenz ab scheduled (perf_counter), nur in der Messphase gezählt"""
+        measured = self.measuring
+        try:
+            async with session.post(self.args.url, json={"message": self.next_message()}) as response:
+                body = await response.read()
+                latency = time.perf_counter() - scheduled
+                if response.status != 200:
+                    if measured:
+                        self.count_error(f"HTTP {response.status}")
+                    return
+                data = json.loads(body)
+        except asyncio.TimeoutError:
+            if measured:
+                self.count_error("timeout")
+            return
+        except (aiohttp.ClientError, ValueError) as e:
+            if measured:
+                self.count_error(type(e).__name__)
+            return
+        if measured:
+            key = f"{data.get('agent', 'N/A')} / cached={str(bool(data.get('cached'))).lower()}"
+            self.hist.record(key, latency)
+            self.completed += 1
+
+    async def stream_request(self, session, scheduled):
+        """Ein GET /chat/stream; Events werden beim Eintreffen gezählt, nicht erst am Ende"""
+        measured = self.measuring
+        first = last = None
+        gaps = []
+        done = False
+        try:
+            async with session.get(self.args.url, params={"q": self.next_message()}) as response:
+                if response.status != 200:
+                    if measured:
+                        self.count_error(f"HTTP {response.status}")
+                    return
+                parser = SSEParser()
+                async for chunk in response.content.iter_any():
+                    now = time.perf_counter()
+                    for data in parser.feed(chunk):
+                        event = json.loads(data)
+                        if "error" in event:
+                            raise StreamError(event["error"])
+                        if first is None:
+                            first = now
+                        else:
+                            gaps.append(now - last)
+                        last = now
+                        done = done or bool(event.get("done"))
+            total = time.perf_counter() - scheduled
+        except asyncio.TimeoutError:
+            if measured:
+                self.count_error("timeout")
+            return
+        except StreamError:
+            if measured:
+                self.count_error("SSE-Fehler")
+            return
+        except (aiohttp.ClientError, ValueError) as e:
+            if measured:
+                self.count_error(type(e).__name__)
+            return
+        if not measured:
+            return
+        if not done:
+            self.count_error("ohne done-Event")
+            return
+        self.stream_hist[STREAM_FIRST].record(first - scheduled)
+        for gap in gaps:
+            self.stream_hist[STREAM_GAP].record(gap)
+        self.stream_hist[STREAM_TOTAL].record(total)
+        self.completed += 1
+
+    async def closed_loop(self, session):
+        async def user():
+            while not self.stopping:
+                await self.request(session, time.perf_counter())
+
+        await asyncio.gather(*(user() for _ in range(self.args.concurrency)))
+
+    async def open_loop(self, session):
+        """Feste (oder Poisson-)Ankunftsrate; ist das Limit offener Requests erreicht, zählt die Ankunft als verworfen"""
+        rng = random.Random(0)
+        slots = asyncio.Semaphore(self.args.concurrency)
+        pending = set()
+        interval = 1.0 / self.args.rate
+        next_at = time.perf_counter()
+
+        async def fire(scheduled):
+            try:
+                await self.request(session, scheduled)
+            finally:
+                slots.release()
+
+        while not self.stopping:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if slots.locked():
+                if self.measuring:
+                    self.dropped += 1
+            else:
+                await slots.acquire()
+                task = asyncio.ensure_future(fire(next_at))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            next_at += rng.expovariate(self.args.rate) if self.args.poisson else interval
+        if pending:
+            await asyncio.gather(*pending)
+
+    async def phases(self):
+        """Warm-up -> Messphase -> Stopp (offene Requests laufen noch zu Ende)"""
+        await asyncio.sleep(self.args.warmup)
+        print(f"Warm-up fertig ({self.args.warmup:.0f}s) - Messphase {self.args.duration:.0f}s")
+        self.measuring = True
+        started = time.perf_counter()
+        await asyncio.sleep(self.args.duration)
+        self.measuring = False
+        self.stopping = True
+        return time.perf_counter() - started
+
+
+async def run_level(args, messages, concurrency):
+    """Ein Lastlauf (Warm-up + Messphase) mit gepooltem Keep-Alive-Connector"""
+    level_args = argparse.Namespace(**vars(args))
+    level_args.concurrency = concurrency
+    run = LoadRun(level_args, messages)
+    if args.keepalive > 0:
+        connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=args.keepalive)
+    else:
+        connector = aiohttp.TCPConnector(limit=concurrency, force_close=True)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                     headers={"Content-Type": "application/json"}) as session:
+        load = run.open_loop(session) if args.rate else run.closed_loop(session)
+        elapsed, _ = await asyncio.gather(run.phases(), load)
+    return run, elapsed
+
+
+async def run_load(args):
+    """Lastlauf bzw. Sweep über mehrere Parallelitäts-Stufen"""
+    messages = load_messages(args.messages)
+    levels = [int(x) for x in args.sweep.split(",") if x.strip()] if args.sweep else [args.concurrency]
+    results = []
+    for concurrency in levels:
+        if args.rate:
+            mode = f"open loop {args.rate:g}/s, max. {concurrency} offen"
+        else:
+            mode = f"closed loop x{concurrency}"
+        print(f"=== KAYA LASTTEST - {'SSE ' if args.stream else ''}{mode} ===")
+        print(f"Ziel: {args.url}  Nachrichten: {len(messages)}")
+        run, elapsed = await run_level(args, messages, concurrency)
+        print_load_report(run, elapsed)
+        print()
+        results.append(level_result(run, elapsed, concurrency, mode))
+
+    if len(results) > 1:
+        print_sweep(results, args.stream)
+    if args.json_out:
+        export_json(args, results)
+        print(f"JSON gespeichert: {args.json_out}")
+    return results
+
+
+def print_load_report(run, elapsed):
+    print()
+    unit = "Streams/s" if run.args.stream else "req/s"
+    print(f"Erfolgreich: {run.completed}  Durchsatz: {run.completed / elapsed:.1f} {unit}")
+    errors = sum(run.errors.values())
+    if errors or run.dropped:
+        details = ", ".join(f"{k}: {v}" for k, v in sorted(run.errors.items()))
+        print(f"FEHLER: {errors} ({details or '-'})  Verworfen (Limit offener Requests): {run.dropped}")
+    print()
+    print(format_header(32))
+    if run.args.stream:
+        for name, hist in run.stream_hist.items():
+            print(format_row(name, hist, 32))
+        return
+    print(format_row("GESAMT", run.hist.overall, 32))
+    for key, hist in sorted(run.hist.splits.items()):
+        print(format_row(key[:32], hist, 32))
+
+
+def level_result(run, elapsed, concurrency, mode):
+    result = {
+        "concurrency": concurrency,
+        "mode": mode,
+        "elapsed_s": round(elapsed, 3),
+        "completed": run.completed,
+        "throughput_rps": round(run.completed / elapsed, 3),
+        "errors": run.errors,
+        "dropped": run.dropped,
+    }
+    if run.args.stream:
+        result["stream"] = {name: {"summary": h.summary(), "histogram": h.to_dict()}
+                            for name, h in run.stream_hist.items()}
+    else:
+        result["latency"] = run.hist.to_dict()
+    return result
+
+
+def print_sweep(results, stream):
+    """Wie wächst die Latenz mit der Parallelität? (Faktor = p99 relativ zur ersten Stufe)"""
+    def p99(result):
+        summary = result["stream"][STREAM_FIRST]["summary"] if stream else result["latency"]["overall"]["summary"]
+        return summary.get("p99_ms")
+
+    print("=== DEGRADATION NACH PARALLELITÄT ===")
+    if stream:
+        print(f"{'parallel':>8} {'Streams/s':>10} {'Fehler':>7} {'erstes p50':>11} {'erstes p99':>11} "
+              f"{'Abstand p99':>12} {'gesamt p99':>11} {'Faktor':>7}  (ms)")
+    else:
+        print(f"{'parallel':>8} {'req/s':>10} {'Fehler':>7} {'p50':>11} {'p99':>11} {'Faktor':>7}  (ms)")
+    base = p99(results[0])
+    for r in results:
+        errors = sum(r["errors"].values()) + r["dropped"]
+        factor = f"{p99(r) / base:.2f}x" if base and p99(r) else "-"
+        if stream:
+            first, gap, total = (r["stream"][k]["summary"] for k in (STREAM_FIRST, STREAM_GAP, STREAM_TOTAL))
+            print(f"{r['concurrency']:>8} {r['throughput_rps']:>10.1f} {errors:>7} "
+                  f"{first.get('p50_ms', 0):>11.1f} {first.get('p99_ms', 0):>11.1f} "
+                  f"{gap.get('p99_ms', 0):>12.1f} {total.get('p99_ms', 0):>11.1f} {factor:>7}")
+        else:
+            summary = r["latency"]["overall"]["summary"]
+            print(f"{r['concurrency']:>8} {r['throughput_rps']:>10.1f} {errors:>7} "
+                  f"{summary.get('p50_ms', 0):>11.1f} {summary.get('p99_ms', 0):>11.1f} {factor:>7}")
+
+
+def export_json(args, results):
+    result = {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "url": args.url, "stream": args.stream, "rate": args.rate, "poisson": args.poisson,
+            "warmup_s": args.warmup, "duration_s": args.duration, "keepalive_s": args.keepalive,
+            "messages": args.messages,
+        },
+        "levels": results,
+    }
+    with open(args.json_out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    if args.load:
+        asyncio.run(run_load(args))
+    else:
+        asyncio.run(test_kaya_clean())
+
+
 if __name__ == "__main__":
-    asyncio.run(test_kaya_clean())
+    main()
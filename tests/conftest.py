@@ -0,0 +1,6 @@
+"""Die Werkzeuge in scripts/ importieren ihre Nachbarn direkt - für die Tests ebenso"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
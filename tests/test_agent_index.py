@@ -0,0 +1,95 @@
+"""agent_index: MaxScore-Suche liefert dieselben Top-k wie erschöpfendes BM25"""
+
+import heapq
+import json
+import math
+import os
+import random
+
+import pytest
+
+from agent_index import B, BENCH_QUERIES, BLOCK_SIZE, DEFAULT_DATA_DIR, K1, AgentIndex, build_index
+
+WORDS = [
+    "antrag", "formular", "gebühr", "termin", "kreistag", "sitzung", "führerschein", "zulassung",
+    "jobcenter", "beratung", "kita", "schule", "pflege", "senioren", "gewerbe", "anmeldung",
+    "bauamt", "landrat", "verwaltung", "stelle", "rechnung", "umwelt", "abfall", "jugend",
+]
+QUERIES = ["Antrag Gebühr", "Kreistag Sitzung Termin", "Pflege Beratung Senioren", "Kita",
+           "Gewerbe Anmeldung Formular Gebühr", "Landrat Verwaltung Stelle"]
+
+
+def exhaustive(index, text, k, agent=None):
+    """Alle Postings aller Anfrage-Terme dekodieren und voll bewerten"""
+    agent_id = index.agents.index(agent) if agent is not None else None
+    scores = {}
+    for term in set(index.query_terms(text)):
+        found = index.lookup(term)
+        if found is None:
+            continue
+        df, offset, length = found
+        idf = math.log(1.0 + (index.n_docs - df + 0.5) / (df + 0.5))
+        for doc_id, tf in index.postings(df, offset, length):
+            doc_length, doc_agent, _, _ = index.doc(doc_id)
+            if agent_id is not None and doc_agent != agent_id:
+                continue
+            norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc_length / index.avgdl))
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * norm
+    return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def assert_same_topk(index, text, k, agent=None):
+    expected = [round(score, 4) for _, score in exhaustive(index, text, k, agent)]
+    got = [hit["score"] for hit in index.search(text, k, agent)]
+    assert got == expected, text
+
+
+@pytest.fixture
+def synthetic_index(tmp_path):
+    """Drei Agenten, ~900 Records: häufige Terme über viele Posting-Blöcke"""
+    rng = random.Random(3)
+    data_dir = tmp_path / "agents"
+    data_dir.mkdir()
+    for agent in ("buergerdienste", "jobcenter", "kreistag"):
+        records = []
+        for i in range(300):
+            words = rng.choices(WORDS, weights=range(len(WORDS), 0, -1), k=rng.randint(5, 80))
+            records.append({"title": f"{agent} {rng.choice(WORDS)} {i}", "url": f"https://example.org/{agent}/{i}",
+                            "plain_text": " ".join(words), "metadata": {"agent": agent}})
+        (data_dir / f"{agent}_data_2025-10-29.json").write_text(json.dumps(records), encoding="utf-8")
+    path = str(tmp_path / "agents.bm25")
+    build_index(str(data_dir), path)
+    with AgentIndex.open(path) as index:
+        yield index
+
+
+def test_synthetic_corpus_spans_several_blocks(synthetic_index):
+    df, _, _ = synthetic_index.lookup(next(iter(synthetic_index.query_terms("antrag"))))
+    assert df > 2 * BLOCK_SIZE
+
+
+@pytest.mark.parametrize("k", [1, 5, 20])
+def test_maxscore_matches_exhaustive(synthetic_index, k):
+    for text in QUERIES:
+        assert_same_topk(synthetic_index, text, k)
+
+
+def test_maxscore_matches_exhaustive_per_agent(synthetic_index):
+    for agent in synthetic_index.agents:
+        for text in QUERIES:
+            assert_same_topk(synthetic_index, text, 5, agent)
+
+
+def test_unknown_agent_and_terms(synthetic_index):
+    assert synthetic_index.search("Antrag", agent="gibtsnicht") == []
+    assert synthetic_index.search("Xylophonunterricht") == []
+
+
+@pytest.mark.skipif(not os.path.isdir(DEFAULT_DATA_DIR), reason="Agent-Daten fehlen")
+def test_real_corpus_matches_exhaustive(tmp_path):
+    path = str(tmp_path / "agents.bm25")
+    build_index(DEFAULT_DATA_DIR, path)
+    with AgentIndex.open(path) as index:
+        for text in BENCH_QUERIES:
+            for k in (5, 20):
+                assert_same_topk(index, text, k)
@@ -0,0 +1,87 @@
+"""dedup_records: keine Zusammenführung über Boilerplate, Platzhalter oder fremde Titel"""
+
+import pytest
+
+import dedup_records
+from dedup_records import dedup_corpus, load_corpus
+
+NAV = ("Landrat Fachstelle Integration Gleichstellungsbeauftragte Klimaschutz Rechnungsprüfungsamt "
+       "Dezernat I Bau Bauordnungsamt Amt für regionale Entwicklung und Naturschutz Kreisstraßen")
+BODY = ("Der Bauantrag ist schriftlich bei der unteren Bauaufsichtsbehörde einzureichen. Beizufügen sind "
+        "Lageplan, Bauzeichnungen, Baubeschreibung und die bautechnischen Nachweise. ")
+
+
+def record(title, url, text):
+    return {"title": title, "url": url, "plain_text": text, "links": [{"url": url}], "metadata": {}}
+
+
+def titles(result, agent):
+    return sorted(r["title"] for r in result[agent])
+
+
+def test_shared_navigation_with_different_titles_is_not_merged():
+    corpus = {"ratsinfo": [record(t, f"https://example.org/{i}", NAV)
+                           for i, t in enumerate(["Landrat", "Klimaschutz", "Rechnungsprüfungsamt", "Bauordnungsamt"])]}
+    result, _, meta = dedup_corpus(corpus)
+    assert titles(result, "ratsinfo") == ["Bauordnungsamt", "Klimaschutz", "Landrat", "Rechnungsprüfungsamt"]
+    assert meta["boilerplate_only"] == 4
+
+
+def test_own_text_survives_next_to_boilerplate():
+    texts = {"Bauantrag": BODY, "Abbruchanzeige": "Der Abbruch einer baulichen Anlage ist einen Monat vorher anzuzeigen.",
+             "Bauvoranfrage": "Mit der Bauvoranfrage lassen sich einzelne Fragen vorab verbindlich klären."}
+    corpus = {"buergerdienste": [record(t, f"https://example.org/{t}", NAV + " " + text) for t, text in texts.items()]}
+    result, _, _ = dedup_corpus(corpus)
+    assert titles(result, "buergerdienste") == sorted(texts)
+
+
+def test_placeholders_are_never_merged():
+    corpus = {"buergerdienste": [record("Unbekannt", "https://example.org/kfz-zulassungsstelle/", "Unbekannt"),
+                                 record("Unbekannt", "https://example.org/fuehrerscheinstelle/", "Unbekannt")]}
+    result, _, meta = dedup_corpus(corpus)
+    assert len(result["buergerdienste"]) == 2
+    assert meta["placeholders"] == 2
+
+
+def test_same_page_under_two_urls_is_merged():
+    corpus = {"buergerdienste": [record("Bauantrag", "https://example.org/bauantrag", BODY * 3),
+                                 record("Bauantrag", "https://example.org/bauantrag?print=1", BODY * 3 + "Drucken")]}
+    result, _, _ = dedup_corpus(corpus)
+    assert len(result["buergerdienste"]) == 1
+    assert result["buergerdienste"][0]["metadata"]["merged"][0]["title"] == "Bauantrag"
+
+
+def test_different_titles_need_near_exact_text():
+    edited = BODY + "Stand: Oktober 2025"
+    corpus = {"buergerdienste": [record("Bauantrag", "https://example.org/a", BODY),
+                                 record("Brandschutznachweis", "https://example.org/b", edited)]}
+    similarity = dedup_records.jaccard(dedup_records.shingles(BODY), dedup_records.shingles(edited))
+    assert 0.8 <= similarity < dedup_records.NEAR_EXACT
+    result, _, _ = dedup_corpus(corpus)
+    assert len(result["buergerdienste"]) == 2
+
+
+KNOWN_FALSE_MERGES = {
+    "buergerdienste": ["§ 73 Bauvoranfrage", "§ 62 NBauO Mitteilung", "§ 63 bzw. § 64 NBauO Bauantrag",
+                       "§ 60 Abbruchanzeige", "Brandschutznachweis", "www.hude.de", "www.gemeindeganderkesee.de",
+                       "www.grossenkneten.de", "www.wardenburg.de"],
+    "ratsinfo": ["Landrat", "Fachstelle Integration", "Gleichstellungsbeauftragte", "Klimaschutz",
+                 "Rechnungsprüfungsamt"],
+}
+
+
+def test_real_corpus_keeps_known_false_merges_apart():
+    try:
+        path = dedup_records.default_input()
+    except FileNotFoundError:
+        pytest.skip("kein Crawler-Korpus vorhanden")
+    corpus, _ = load_corpus(path)
+    result, _, _ = dedup_corpus(corpus)
+    for agent, expected in KNOWN_FALSE_MERGES.items():
+        kept = {r["title"] for r in result[agent]}
+        assert set(expected) <= kept
+        merged = {m["title"] for r in result[agent] for m in (r.get("metadata") or {}).get("merged", [])}
+        assert not set(expected) & merged
+    urls = {r["url"] for r in result["buergerdienste"]}
+    assert {"https://www.oldenburg-kreis.de/ordnung-und-verkehr/kfz-zulassungsstelle/",
+            "https://www.oldenburg-kreis.de/ordnung-und-verkehr/fuehrerscheinstelle/"} <= urls
@@ -0,0 +1,100 @@
+"""delta_ingest: JsonStream unabhängig von Blockgrenzen, Changesets pro Snapshot"""
+
+import io
+import json
+
+import pytest
+
+from delta_ingest import JsonStream, StreamDecodeError, diff_snapshot, iter_records
+
+CHUNK_SIZES = [1, 2, 7, 64 * 1024]
+
+RECORDS = [
+    {"url": "https://example.org/a", "title": "Führerschein – Umtausch", "n": 12345, "f": -0.5e-3,
+     "flags": [True, False, None], "nested": {"x": [], "y": {}}},
+    {"url": "https://example.org/b", "title": "Anführungszeichen \"innen\" und \\Backslash\\ ä€",
+     "n": 0, "big": 12345678901234567890},
+    [],
+    "freistehender Text",
+    987654321,
+    {"url": "", "title": "ohne URL"},
+]
+
+
+def stream_of(text, chunk_size):
+    return JsonStream(io.StringIO(text), chunk_size=chunk_size)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_items_match_json_loads(chunk_size, indent):
+    text = json.dumps(RECORDS, ensure_ascii=False, indent=indent)
+    assert list(stream_of(text, chunk_size).items()) == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_numbers_at_chunk_boundaries(chunk_size):
+    text = "[" + ",".join(str(10 ** i) for i in range(20)) + "]"
+    assert list(stream_of(text, chunk_size).items()) == [10 ** i for i in range(20)]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_members_and_empty_containers(chunk_size):
+    text = ' \n{ "a" : [1, 2] , "leer": [], "b": {"c": "d"} }  '
+    stream = stream_of(text, chunk_size)
+    out = {key: sub.value() for key, sub in stream.members()}
+    assert out == {"a": [1, 2], "leer": [], "b": {"c": "d"}}
+    assert stream.peek() == ""
+    assert list(stream_of("[]", chunk_size).items()) == []
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_truncated_input_raises(chunk_size):
+    text = json.dumps(RECORDS)[:-10]
+    with pytest.raises(StreamDecodeError):
+        list(stream_of(text, chunk_size).items())
+
+
+def write(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def test_iter_records_reads_agent_and_combined_files(tmp_path):
+    agent_file = write(tmp_path / "jugend_data.json", [{"url": "u1"}, "kein Record", {"url": "u2"}])
+    combined = write(tmp_path / "all_agents_data_2025-10-10.json",
+                     {"kita": [{"url": "k1"}], "meta": {"count": 1}, "jobcenter": [{"url": "j1"}]})
+    stats = write(tmp_path / "crawl_stats.json", {"pages": 3})
+    assert [(a, r["url"]) for a, r in iter_records(str(agent_file))] == [("jugend", "u1"), ("jugend", "u2")]
+    assert [(a, r["url"]) for a, r in iter_records(str(combined))] == [("kita", "k1"), ("jobcenter", "j1")]
+    assert list(iter_records(str(stats))) == []
+
+
+def record(url, text, agent="jugend", timestamp="2025-10-07T10:00:00"):
+    return {"url": url, "plain_text": text, "metadata": {"agent": agent, "timestamp": timestamp}}
+
+
+def test_duplicate_urls_across_files_get_distinct_keys(tmp_path):
+    snapshot = tmp_path / "2025-10-07"
+    snapshot.mkdir()
+    write(snapshot / "jugend_data.json", [record("u", "eins")])
+    write(snapshot / "jugend_extra_data.json", [record("u", "zwei")])
+    changeset, prints = diff_snapshot({}, str(snapshot))
+    assert sorted(prints["jugend"]) == ["u", "u#1"]
+    assert len(changeset["jugend"]["added"]) == 2
+
+
+def test_changes_between_snapshots(tmp_path):
+    first, second = tmp_path / "2025-10-07", tmp_path / "2025-10-10"
+    first.mkdir()
+    second.mkdir()
+    write(first / "jugend_data.json", [record("a", "gleich"), record("b", "alt"), record("c", "weg")])
+    write(second / "jugend_data.json", [record("a", "gleich", timestamp="2025-10-10T09:00:00"),
+                                        record("b", "neu"), record("d", "dazu")])
+    _, state = diff_snapshot({}, str(first))
+    changeset, _ = diff_snapshot(state, str(second))
+    c = changeset["jugend"]
+    assert [e["key"] for e in c["added"]] == ["d"]
+    assert [e["key"] for e in c["modified"]] == ["b"]
+    assert [e["key"] for e in c["removed"]] == ["c"]
+    assert c["unchanged"] == 1
@@ -0,0 +1,78 @@
+"""LatencyHistogram: Perzentile innerhalb der Genauigkeit, Merge = gemeinsames Aufzeichnen"""
+
+import random
+
+import pytest
+
+from latency_stats import LatencyHistogram
+
+
+def exact_percentile(values, percentile):
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percentile // 100))
+    return ordered[int(rank) - 1]
+
+
+@pytest.fixture
+def samples():
+    rng = random.Random(7)
+    return [rng.lognormvariate(-3.0, 1.2) for _ in range(20000)]
+
+
+def test_quantiles_within_relative_error(samples):
+    hist = LatencyHistogram()
+    for value in samples:
+        hist.record(value)
+    for p in (50.0, 90.0, 99.0, 99.9):
+        exact = exact_percentile(samples, p)
+        assert hist.value_at(p) == pytest.approx(exact, rel=0.01, abs=1e-6)
+    assert hist.value_at(100.0) == pytest.approx(max(samples), abs=1e-6)
+    assert hist.total == len(samples)
+
+
+def test_small_values_are_exact():
+    hist = LatencyHistogram()
+    for us in (1, 2, 3, 100, 200):
+        hist.record(us / 1e6)
+    assert hist.value_at(0.1) == 1e-6
+    assert hist.value_at(60.0) == 3e-6
+    assert hist.value_at(100.0) == 200e-6
+
+
+def test_merge_equals_recording_into_one(samples):
+    whole, left, right = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i, value in enumerate(samples):
+        whole.record(value)
+        (left if i % 3 else right).record(value)
+    merged = LatencyHistogram().merge(left).merge(right)
+    assert merged.to_dict() == whole.to_dict()
+    assert merged.summary() == whole.summary()
+
+
+def test_merge_of_empty_keeps_min():
+    hist = LatencyHistogram()
+    hist.record(0.005)
+    hist.merge(LatencyHistogram())
+    assert hist.min_us == 5000
+    assert LatencyHistogram().merge(hist).min_us == 5000
+
+
+def test_merge_rejects_different_precision():
+    with pytest.raises(ValueError):
+        LatencyHistogram(2).merge(LatencyHistogram(3))
+
+
+def test_json_roundtrip(samples):
+    hist = LatencyHistogram()
+    for value in samples[:500]:
+        hist.record(value)
+    restored = LatencyHistogram.from_dict(hist.to_dict())
+    assert restored.to_dict() == hist.to_dict()
+    assert restored.value_at(99.0) == hist.value_at(99.0)
+
+
+def test_empty_histogram():
+    hist = LatencyHistogram()
+    assert hist.value_at(50.0) is None
+    assert hist.mean() is None
+    assert hist.summary() == {"count": 0}
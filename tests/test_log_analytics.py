@@ -0,0 +1,60 @@
+"""log_analytics: jeder Fehler genau einmal, begrenzte Fehlerarten-Tabelle auch beim Zusammenführen"""
+
+import json
+import os
+
+import log_analytics
+from log_analytics import DEFAULT_LOGS, LogAnalyzer
+
+
+def line(**entry):
+    entry.setdefault("timestamp", "2025-10-29T10:00:00.000Z")
+    return json.dumps(entry)
+
+
+def test_crawler_error_transport_is_not_read_by_default():
+    assert not any(path.endswith(os.path.join("kaya-crawler", "logs", "error.log")) for path in DEFAULT_LOGS)
+    assert any(path.endswith(os.path.join("kaya-crawler", "logs", "crawler.log")) for path in DEFAULT_LOGS)
+
+
+def test_failed_api_request_counts_one_error_kind():
+    analyzer = LogAnalyzer()
+    # kaya_server.js: logError (error.log) und logPerformance(..., false, error) (access.log)
+    analyzer.feed(line(error="LLM timeout after 30000ms", context={"endpoint": "/api/chat"}), "error.log")
+    analyzer.feed(line(endpoint="/api/chat", duration="30012ms", success=False, error="LLM timeout after 30000ms"),
+                  "access.log")
+    assert analyzer.error_kinds.most_common(5) == [(("api/chat", "LLM timeout after Nms"), 1)]
+    assert analyzer.keys["api/chat"].errors == 1
+
+
+def test_crawler_error_line_counts_once():
+    analyzer = LogAnalyzer()
+    analyzer.feed(line(level="info", module="WebCrawler", message="🌐 Crawle URL: https://example.org/a"), "crawler.log")
+    analyzer.feed(line(level="error", module="WebCrawler",
+                       message="❌ Crawl-Fehler für https://example.org/a: $ is not defined"), "crawler.log")
+    [(key, count)] = analyzer.error_kinds.most_common(5)
+    assert key == ("crawl/WebCrawler", "❌ Crawl-Fehler für <url> $ is not defined")
+    assert count == 1
+
+
+def analyzer_with_kinds(prefix, n):
+    analyzer = LogAnalyzer()
+    for i in range(n):
+        analyzer.error_kinds.add_kind("api/chat", f"{prefix} Fehler {i}", 1 + i % 3)
+    return analyzer
+
+
+def test_merge_keeps_error_kinds_bounded_and_reports_dropped():
+    merged = LogAnalyzer()
+    total = 0
+    for host in range(4):
+        other = LogAnalyzer.from_dict(analyzer_with_kinds(f"host{host}", 300).to_dict(f"host{host}"), 10)
+        total += sum(other.error_kinds.counts.values()) + other.error_kinds.dropped
+        merged.merge(other)
+    kinds = merged.error_kinds
+    assert len(kinds.counts) <= log_analytics.MAX_ERROR_KINDS
+    assert kinds.dropped > 0
+    assert sum(kinds.counts.values()) + kinds.dropped == total
+    data = merged.to_dict("all")
+    assert data["error_kinds_dropped"] == kinds.dropped
+    assert "verworfen" in log_analytics.render_text(merged, 10)
@@ -0,0 +1,48 @@
+"""perf_gate: Welch-Vergleich und kein stilles Bestehen ohne Vergleich"""
+
+import sys
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+import perf_gate  # noqa: E402
+from perf_gate import compare, uncompared  # noqa: E402
+
+
+def runs(*p50):
+    return [{"p50_ms": v, "p99_ms": v * 3, "throughput_rps": 1000.0 / v} for v in p50]
+
+
+def verdict(verdicts, metric):
+    return next(v["verdict"] for v in verdicts if v["metric"] == metric)
+
+
+def test_clear_slowdown_is_a_regression():
+    verdicts = compare({"chat": runs(150, 152, 149, 151, 150)}, {"chat": runs(100, 101, 99, 100, 102)}, 0.10)
+    assert verdict(verdicts, "p50_ms") == "Regression"
+    assert verdict(verdicts, "throughput_rps") == "Regression"
+
+
+def test_noise_within_threshold_is_ok():
+    verdicts = compare({"chat": runs(101, 99, 103, 98, 100)}, {"chat": runs(100, 102, 97, 101, 99)}, 0.10)
+    assert {v["verdict"] for v in verdicts} == {"ok"}
+
+
+def test_clear_speedup_is_better():
+    verdicts = compare({"chat": runs(50, 51, 49, 50, 52)}, {"chat": runs(100, 101, 99, 100, 102)}, 0.10)
+    assert verdict(verdicts, "p50_ms") == "besser"
+
+
+def test_single_run_baseline_is_reported_as_uncompared():
+    current = {"chat": runs(150, 152, 149), "route": runs(10, 11, 10)}
+    verdicts = compare(current, {"chat": runs(100), "route": runs(10, 10, 11)}, 0.10)
+    assert {v["scenario"] for v in verdicts} == {"route"}
+    assert uncompared(current, verdicts) == ["chat"]
+
+
+def test_single_run_is_rejected(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["perf_gate.py", "--runs", "1"])
+    with pytest.raises(SystemExit) as exc:
+        perf_gate.parse_args()
+    assert exc.value.code == 2